@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Archive Transactions - Command Line Utility
+Maintain the monthly partitions of asset_transactions and move months older
+than the retention window to asset_transactions_archive (and optionally CSV.gz).
+Also prunes inventory_events older than EVENT_RETENTION_DAYS.
+Schedule it monthly, e.g. from cron:  0 3 1 * * python3 archive_transactions.py --export
+"""
+
+import os
+import sys
+
+# Set environment variables
+if 'SECRET_KEY' not in os.environ:
+    os.environ['SECRET_KEY'] = 'temp-key-for-archiving'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from config import DATABASE_SETTINGS
+from db.migrate import connect
+from db.transaction_archive import (archive_cutoff, archive_old_partitions,
+                                    ensure_future_partitions, list_partitions)
+from utils.events import prune_events
+
+
+def print_usage():
+    print("\nUsage: python3 archive_transactions.py [status] [--export] [--dry-run] [--retention=MONTHS]")
+    print("\nOptions:")
+    print("  status            - List partitions and what would be archived")
+    print("  --export          - Also write each archived month to CSV.gz")
+    print(f"                      ({DATABASE_SETTINGS['transaction_archive_dir']})")
+    print("  --dry-run         - Show what would be archived without changing anything")
+    print(f"  --retention=N     - Keep N months hot (default {DATABASE_SETTINGS['transaction_retention_months']})")
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    if '-h' in args or '--help' in args:
+        print_usage()
+        sys.exit(0)
+
+    retention = DATABASE_SETTINGS['transaction_retention_months']
+    for arg in args:
+        if arg.startswith('--retention='):
+            try:
+                retention = int(arg.split('=', 1)[1])
+            except ValueError:
+                print(f"❌ Invalid retention: {arg}")
+                sys.exit(1)
+    if retention < 1:
+        print("❌ Retention must be at least 1 month")
+        sys.exit(1)
+
+    try:
+        conn = connect()
+    except Exception as e:
+        print(f"❌ Could not connect to database: {e}")
+        sys.exit(1)
+
+    cursor = conn.cursor()
+    try:
+        partitions = list_partitions(cursor)
+        if not partitions:
+            print("❌ asset_transactions is not partitioned. Run: python3 migrate.py up")
+            sys.exit(1)
+
+        cutoff = archive_cutoff(retention)
+        if 'status' in args:
+            for name, month, rows in partitions:
+                state = 'archive' if month and month < cutoff else 'hot'
+                print(f"  {name:<10} ~{rows:>10,} rows  {state}")
+            return
+
+        if '--dry-run' not in args:
+            created = ensure_future_partitions(cursor, DATABASE_SETTINGS['transaction_partitions_ahead'])
+            if created:
+                print(f"✅ Added partitions: {', '.join(created)}")
+
+        export_dir = DATABASE_SETTINGS['transaction_archive_dir'] if '--export' in args else None
+        print(f"🔄 Archiving months before {cutoff.isoformat()} ...")
+        archived = archive_old_partitions(
+            conn, retention, export_dir=export_dir, dry_run='--dry-run' in args,
+            on_partition=lambda name, rows: print(f"   {name} (~{rows:,} rows)")
+        )
+        if not archived:
+            print("✅ Nothing to archive")
+        else:
+            total = sum(a['rows'] for a in archived)
+            verb = 'Would archive' if '--dry-run' in args else 'Archived'
+            print(f"✅ {verb} {len(archived)} partition(s), {total:,} rows")
+
+        if '--dry-run' not in args:
+            pruned = prune_events(conn, DATABASE_SETTINGS['event_retention_days'])
+            if pruned:
+                print(f"✅ Pruned {pruned:,} inventory event(s) older than "
+                      f"{DATABASE_SETTINGS['event_retention_days']} days")
+    except Exception as e:
+        print(f"❌ Archiving failed: {e}")
+        sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Attachments - Command Line Utility
+Maintain the deduplicated attachment blob store (uploads/blobs): report what
+deduplication saves, move timestamp-named legacy APO files onto blobs,
+backfill gallery thumbnails and avatars, and garbage-collect blobs no
+attachment row references.
+Schedule gc nightly, e.g. from cron:  30 2 * * * python3 attachments.py gc
+"""
+
+import os
+import sys
+
+# Set environment variables
+if 'SECRET_KEY' not in os.environ:
+    os.environ['SECRET_KEY'] = 'temp-key-for-attachments'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from config import FLASK_CONFIG
+from db.migrate import connect
+from utils.blob_store import (BlobStore, blob_usage, collect_garbage, existing_tables,
+                              import_legacy_files, LEGACY_DIRS)
+from utils import thumbnails
+
+# Same directory the application serves uploads from
+UPLOAD_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+
+
+def print_usage():
+    print("\nUsage: python3 attachments.py <status|import-legacy|thumbnails|gc> [--dry-run] [--grace=HOURS] [--retry]")
+    print("\nCommands:")
+    print("  status            - Blob count, references and bytes saved by deduplication")
+    print("  import-legacy     - Move timestamp-named APO files into the blob store")
+    print("  thumbnails        - Render missing gallery thumbnails and profile avatars")
+    print("  gc                - Delete blobs no attachment row references")
+    print("\nOptions:")
+    print("  --dry-run         - Show what gc would delete without changing anything")
+    print(f"  --grace=HOURS     - Keep unreferenced blobs this long (default {FLASK_CONFIG['BLOB_GC_GRACE_HOURS']:g})")
+    print("  --retry           - thumbnails: retry files that failed before (e.g. after installing poppler)")
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    commands = [a for a in args if not a.startswith('-')]
+    if '-h' in args or '--help' in args or len(commands) != 1 or \
+            commands[0] not in ('status', 'import-legacy', 'thumbnails', 'gc'):
+        print_usage()
+        sys.exit(0 if '-h' in args or '--help' in args else 1)
+    command = commands[0]
+
+    grace = FLASK_CONFIG['BLOB_GC_GRACE_HOURS']
+    for arg in args:
+        if arg.startswith('--grace='):
+            try:
+                grace = float(arg.split('=', 1)[1])
+            except ValueError:
+                print(f"❌ Invalid grace period: {arg}")
+                sys.exit(1)
+    if grace < 1:
+        print("❌ Grace period must be at least 1 hour")
+        sys.exit(1)
+
+    try:
+        conn = connect()
+    except Exception as e:
+        print(f"❌ Could not connect to database: {e}")
+        sys.exit(1)
+
+    cursor = conn.cursor()
+    store = BlobStore(UPLOAD_ROOT)
+    try:
+        tables = existing_tables(cursor)
+        if command == 'status':
+            usage = blob_usage(cursor, tables)
+            saved = usage['referenced_bytes'] - usage['stored_bytes']
+            print(f"  Blobs:        {usage['blobs']:,} ({format_size(usage['stored_bytes'])} stored)")
+            print(f"  References:   {usage['references']:,} ({format_size(usage['referenced_bytes'])} attached)")
+            print(f"  Unreferenced: {usage['unreferenced']:,}")
+            print(f"  Saved:        {format_size(max(saved, 0))}")
+            return
+
+        if command == 'import-legacy':
+            for table in tables:
+                if table not in LEGACY_DIRS:
+                    continue
+                print(f"🔄 Importing {table} ...")
+                result = import_legacy_files(cursor, store, table)
+                conn.commit()
+                for path in result['legacy_paths']:
+                    if os.path.exists(path):
+                        os.remove(path)
+                print(f"✅ {result['imported']} file(s) imported, {result['duplicates']} were duplicates")
+                if result['missing']:
+                    print(f"⚠️  {len(result['missing'])} row(s) have no file on disk: "
+                          f"{', '.join(map(str, result['missing'][:20]))}")
+            return
+
+        if command == 'thumbnails':
+            if not thumbnails.HAVE_PIL:
+                print("❌ Pillow is not installed")
+                sys.exit(1)
+            def report(counts):
+                if counts['sources'] % 100 == 0:
+                    print(f"   {counts['sources']:,} files ...")
+
+            print("🔄 Rendering thumbnails ...")
+            counts = thumbnails.backfill(cursor, UPLOAD_ROOT, tables=tables,
+                                         retry='--retry' in args, on_progress=report)
+            conn.commit()
+            print(f"✅ {counts['rendered']} thumbnail(s) rendered for {counts['sources']} file(s), "
+                  f"{counts['avatars']} avatar(s); {counts['skipped']} file(s) have no preview")
+            return
+
+        dry_run = '--dry-run' in args
+        removed = collect_garbage(cursor, store, grace, tables, dry_run=dry_run,
+                                  on_remove=lambda sha256: thumbnails.remove_variants(UPLOAD_ROOT, sha256))
+        if not dry_run:
+            conn.commit()
+        verb = 'Would remove' if dry_run else 'Removed'
+        print(f"✅ {verb} {removed['blobs']} unreferenced blob(s), {removed['strays']} stray file(s) "
+              f"and {removed['temp_files']} temporary file(s), {format_size(removed['bytes'])}")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ {command} failed: {e}")
+        sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Find Duplicates - Command Line Utility
+Scan the whole inventory for suspected duplicate assets with a pool of worker
+processes and queue the pairs for review at /data-quality/duplicates.
+Schedule it off-hours for large inventories, e.g.:  0 2 * * 0 python3 find_duplicates.py
+"""
+
+import os
+import sys
+
+# Set environment variables
+if 'SECRET_KEY' not in os.environ:
+    os.environ['SECRET_KEY'] = 'temp-key-for-duplicates'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from db.migrate import connect
+from utils.duplicates import DEFAULT_THRESHOLD, DuplicateIndex, enqueue_matches
+
+
+def print_usage():
+    print("\nUsage: python3 find_duplicates.py [--dry-run] [--workers=N] [--threshold=SCORE]")
+    print("\nOptions:")
+    print("  --dry-run         - Report matches without queueing them")
+    print("  --workers=N       - Worker processes (default: CPU count)")
+    print(f"  --threshold=S     - Minimum similarity 0-1 (default {DEFAULT_THRESHOLD})")
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    if '-h' in args or '--help' in args:
+        print_usage()
+        sys.exit(0)
+
+    workers, threshold = 0, DEFAULT_THRESHOLD
+    for arg in args:
+        try:
+            if arg.startswith('--workers='):
+                workers = int(arg.split('=', 1)[1])
+            elif arg.startswith('--threshold='):
+                threshold = float(arg.split('=', 1)[1])
+        except ValueError:
+            print(f"❌ Invalid option: {arg}")
+            sys.exit(1)
+    if workers < 0 or not 0 < threshold <= 1:
+        print_usage()
+        sys.exit(1)
+
+    try:
+        conn = connect()
+    except Exception as e:
+        print(f"❌ Could not connect to database: {e}")
+        sys.exit(1)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT name, brand, model, serial_number FROM inventory WHERE deleted_at IS NULL")
+        inventory = {name: {'brand': brand, 'model': model, 'serial_number': serial}
+                     for name, brand, model, serial in cursor.fetchall()}
+        print(f"🔄 Scanning {len(inventory):,} assets ...")
+        result = DuplicateIndex(inventory).scan(threshold=threshold, workers=workers)
+        print(f"   {result['pairs']:,} candidate pairs, {len(result['matches'])} suspected duplicate(s)")
+        if '--dry-run' in args:
+            for a, b, score, reason in result['matches']:
+                print(f"  {score:.2f}  {a}  ~  {b}  ({reason})")
+            return
+        enqueue_matches(cursor, result['matches'])
+        conn.commit()
+        print(f"✅ Queued {len(result['matches'])} pair(s) for review")
+    except Exception as e:
+        print(f"❌ Scan failed: {e}")
+        sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
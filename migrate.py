@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Database Migrations - Command Line Utility
+Apply and inspect the versioned schema migrations in src/db/migrations
+"""
+
+import os
+import sys
+
+# Set environment variables
+if 'SECRET_KEY' not in os.environ:
+    os.environ['SECRET_KEY'] = 'temp-key-for-migrations'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from db.migrate import MigrationRunner, connect
+
+
+def print_usage():
+    print("\nUsage: python3 migrate.py <command> [version]")
+    print("\nCommands:")
+    print("  up [version]   - Apply pending migrations (optionally up to a version)")
+    print("  status         - List migrations and whether they are applied")
+    print("\nExamples:")
+    print("  python3 migrate.py up")
+    print("  python3 migrate.py up 2")
+    print("  python3 migrate.py status")
+
+
+def cmd_status(runner):
+    rows = runner.status()
+    if not rows:
+        print("No migrations found.")
+        return True
+    for row in rows:
+        state = row['applied_at'].strftime('%Y-%m-%d %H:%M:%S') if row['applied_at'] else 'pending'
+        flag = '  ⚠️  modified since applied' if row['modified'] else ''
+        print(f"  {row['version']:04d}  {row['name']:<45} {state}{flag}")
+    return True
+
+
+def cmd_up(runner, target=None):
+    def announce(migration):
+        print(f"🔄 Applying {migration.version:04d}_{migration.name} ...")
+
+    try:
+        applied = runner.upgrade(target=target, on_apply=announce)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+    if applied:
+        print(f"✅ Applied {len(applied)} migration(s)")
+    else:
+        print("✅ Database schema is up to date")
+    return True
+
+
+def main():
+    """Main entry point"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('up', 'status'):
+        print_usage()
+        sys.exit(1)
+
+    target = None
+    if len(sys.argv) > 2:
+        try:
+            target = int(sys.argv[2])
+        except ValueError:
+            print(f"❌ Invalid version: {sys.argv[2]}")
+            sys.exit(1)
+
+    try:
+        conn = connect()
+    except Exception as e:
+        print(f"❌ Could not connect to database: {e}")
+        sys.exit(1)
+
+    try:
+        runner = MigrationRunner(conn)
+        ok = cmd_up(runner, target) if sys.argv[1] == 'up' else cmd_status(runner)
+    finally:
+        conn.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Retired Assets - Command Line Utility
+List, restore or purge assets retired (soft-deleted) from the asset list.
+Restores made here reach running app workers only after a restart; the
+Retired Assets page restores through the app and updates it at once.
+Schedule the purge, e.g. from cron:  0 4 * * 0 python3 retired_assets.py purge --older-than=365
+"""
+
+import os
+import sys
+
+# Set environment variables
+if 'SECRET_KEY' not in os.environ:
+    os.environ['SECRET_KEY'] = 'temp-key-for-retired-assets'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from db.migrate import connect
+from utils.bulk_delete import purge_tombstones, restore
+from utils.events import EventBus
+
+
+def print_usage():
+    print("\nUsage: python3 retired_assets.py [status | restore NAME... | purge --older-than=DAYS]")
+    print("\nCommands:")
+    print("  status               - List retired assets (default)")
+    print("  restore NAME...      - Put retired assets back on the asset list")
+    print("  purge --older-than=N - Delete assets retired more than N days ago, with their history")
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    if '-h' in args or '--help' in args:
+        print_usage()
+        sys.exit(0)
+    command = args[0] if args else 'status'
+    if command not in ('status', 'restore', 'purge'):
+        print_usage()
+        sys.exit(1)
+
+    older_than = None
+    for arg in args[1:]:
+        if arg.startswith('--older-than='):
+            try:
+                older_than = int(arg.split('=', 1)[1])
+            except ValueError:
+                print(f"❌ Invalid age: {arg}")
+                sys.exit(1)
+    if command == 'purge' and (older_than is None or older_than < 0):
+        print("❌ purge needs --older-than=DAYS")
+        sys.exit(1)
+    names = [arg for arg in args[1:] if not arg.startswith('--')]
+    if command == 'restore' and not names:
+        print("❌ restore needs at least one asset name")
+        sys.exit(1)
+
+    try:
+        conn = connect()
+    except Exception as e:
+        print(f"❌ Could not connect to database: {e}")
+        sys.exit(1)
+
+    try:
+        if command == 'status':
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT name, quantity, deleted_at FROM inventory
+                WHERE deleted_at IS NOT NULL ORDER BY deleted_at, name
+            """)
+            rows = cursor.fetchall()
+            cursor.close()
+            for name, quantity, deleted_at in rows:
+                print(f"  {name:<40} qty {quantity:>6}  retired {deleted_at}")
+            print(f"✅ {len(rows)} retired asset(s)")
+        elif command == 'restore':
+            # No subscribers in this process; the events still land in the outbox
+            restored = restore(conn, names, events=EventBus())
+            print(f"✅ Restored {restored} of {len(set(names))} asset(s)")
+            print("   Running app workers pick them up after a restart; the Retired Assets page applies restores at once")
+        else:
+            result = purge_tombstones(conn, older_than, events=EventBus())
+            print(f"✅ Purged {result['deleted']} of {result['candidates']} asset(s) retired over {older_than} days ago")
+    except Exception as e:
+        print(f"❌ {command.capitalize()} failed: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,8 @@ CREATE TABLE IF NOT EXISTS apo (
     description TEXT,
     notes TEXT,
     uploaded_by VARCHAR(255),
+    -- Number of apo_files rows, maintained by the app (migration 0008)
+    file_count INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (supplier) REFERENCES suppliers(name) ON DELETE RESTRICT
@@ -24,10 +26,13 @@ CREATE TABLE IF NOT EXISTS apo_files (
     apo_id INT NOT NULL,
     original_filename VARCHAR(255) NOT NULL,
     saved_filename VARCHAR(255) NOT NULL,
+    -- Content hash of the blob in UPLOAD_FOLDER/blobs (migration 0009)
+    sha256 CHAR(64) CHARACTER SET ascii NULL,
     file_size BIGINT,
     file_type VARCHAR(100),
     uploaded_by VARCHAR(255),
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_apo_files_sha256 (sha256),
     FOREIGN KEY (apo_id) REFERENCES apo(id) ON DELETE CASCADE
 );
 
@@ -48,3 +53,8 @@ CREATE INDEX idx_apo_number ON apo(apo_number);
 CREATE INDEX idx_apo_status ON apo(status);
 CREATE INDEX idx_apo_date ON apo(apo_date);
 CREATE INDEX idx_apo_supplier ON apo(supplier);
+
+-- Keyset-paginated APO list (migration 0008)
+CREATE INDEX idx_apo_date_id ON apo(apo_date, id);
+CREATE INDEX idx_apo_status_date_id ON apo(status, apo_date, id);
+CREATE INDEX idx_apo_supplier_date_id ON apo(supplier, apo_date, id);
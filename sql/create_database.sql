@@ -51,10 +51,11 @@ CREATE TABLE IF NOT EXISTS user_groups (
     FOREIGN KEY (group_id) REFERENCES `groups`(id) ON DELETE CASCADE
 );
 
+-- Partitioned by month (and the foreign key dropped) by migration 0004: python migrate.py up
 CREATE TABLE IF NOT EXISTS asset_transactions (
     id INT AUTO_INCREMENT PRIMARY KEY,
     asset_name VARCHAR(255) NOT NULL,
-    action VARCHAR(50) NOT NULL,
+    action ENUM('checkout','checkin','assign','dispose','maintenance','move','reserve','lease','contract') NOT NULL,
     quantity INT NOT NULL,
     person VARCHAR(255),
     department VARCHAR(255),
@@ -63,6 +64,11 @@ CREATE TABLE IF NOT EXISTS asset_transactions (
     username VARCHAR(255),
     user_id VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_txn_created (created_at, id),
+    INDEX idx_txn_action_created (action, created_at, id),
+    INDEX idx_txn_asset_created (asset_name, created_at, id),
+    INDEX idx_txn_person_created (person, created_at, id),
+    INDEX idx_txn_department_created (department, created_at, id),
     FOREIGN KEY (asset_name) REFERENCES inventory(name) ON DELETE CASCADE
 );
 
@@ -1,6 +1,10 @@
 -- Migration script to update asset_transactions table
 -- This updates existing tables to use asset_name instead of item_name
 -- and expands the action enum to include all transaction types
+--
+-- SUPERSEDED: schema changes are now versioned migrations in src/db/migrations,
+-- applied with `python migrate.py up`. Do not run this script on a database that
+-- has migration 0003 applied; it would turn `action` back into a VARCHAR.
 
 USE db_asset;
 
@@ -3,10 +3,23 @@
 import mysql.connector
 import csv
 from collections import defaultdict
-import smtplib
-from email.mime.text import MIMEText
 import getpass
 from config import DB_CONFIG, EMAIL_CONFIG
+from utils.asset_index import AssetIndex
+from utils.expiry_index import ExpiryIndex
+from utils.search_index import SearchIndex
+from utils.quality_index import QualityIndex
+from utils.duplicates import DuplicateIndex
+from utils.events import CACHE_ACTIONS, EventBus
+from models.asset import ASSET_FIELDS, AssetRecord
+
+class BulkTransactionError(ValueError):
+    """A bulk checkout/checkin was refused; ``problems`` holds one message per offending line"""
+
+    def __init__(self, problems):
+        super().__init__('; '.join(problems))
+        self.problems = list(problems)
+
 
 class InventorySystem:
     def __init__(self):
@@ -14,14 +27,28 @@ class InventorySystem:
         self.suppliers = {}
         self.groups = {}
         self.users = {}
+        self.asset_index = AssetIndex(self.inventory)
+        self.expiry_index = ExpiryIndex(self.inventory)
+        self.search_index = SearchIndex(self.inventory)
+        self.quality_index = QualityIndex(self.inventory)
+        self.duplicate_index = DuplicateIndex(self.inventory)
+        # Every inventory write is recorded on the bus; the cache is its first subscriber
+        self.events = EventBus()
+        self.events.subscribe(self._apply_events, actions=CACHE_ACTIONS)
         self.conn = self.create_connection()
         self.cursor = self.conn.cursor()
         self.email_config = EMAIL_CONFIG
-        self._create_tables()
+        self._check_schema()
         self._load_suppliers()
         self._load_groups()
         self._load_users()
         self._load_inventory()
+        self.refresh_expiry_schedules()
+        # Warranty/contract/lease/maintenance rows change outside this class;
+        # reload them on the alert refresh interval instead of only at start-up
+        from config import DATABASE_SETTINGS
+        self.expiry_index.refresh_schedules_every(DATABASE_SETTINGS.get('alert_refresh_minutes', 15) * 60,
+                                                  self._reload_expiry_schedules)
 
     def create_connection(self):
         try:
@@ -48,171 +75,17 @@ class InventorySystem:
             print("  sudo mysql -e \"GRANT ALL PRIVILEGES ON db_asset.* TO 'root'@'localhost';\"")
             exit(1)
 
-    def _create_tables(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS suppliers (
-                name VARCHAR(255) PRIMARY KEY,
-                contact VARCHAR(255),
-                email VARCHAR(255)
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                name VARCHAR(255) PRIMARY KEY,
-                quantity INTEGER NOT NULL,
-                price DECIMAL(10,2) DEFAULT 0.0,
-                description TEXT,
-                low_stock_threshold INTEGER DEFAULT 5,
-                category VARCHAR(255) DEFAULT 'Uncategorized',
-                supplier VARCHAR(255),
-                department VARCHAR(255) NULL,
-                location VARCHAR(255) NULL,
-                FOREIGN KEY (supplier) REFERENCES suppliers(name) ON DELETE SET NULL
-            )
-        ''')
-        # Ensure department/location columns exist for older deployments
-        try:
-            self.cursor.execute("""
-                SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'inventory'
-            """)
-            cols = {r[0] for r in self.cursor.fetchall()}
-            alter_parts = []
-            if 'department' not in cols:
-                alter_parts.append('ADD COLUMN department VARCHAR(255) NULL')
-            if 'location' not in cols:
-                alter_parts.append('ADD COLUMN location VARCHAR(255) NULL')
-            if 'model' not in cols:
-                alter_parts.append('ADD COLUMN model VARCHAR(255) NULL')
-            if 'brand' not in cols:
-                alter_parts.append('ADD COLUMN brand VARCHAR(255) NULL')
-            if 'serial_number' not in cols:
-                alter_parts.append('ADD COLUMN serial_number VARCHAR(255) NULL')
-            if 'purchase_date' not in cols:
-                alter_parts.append('ADD COLUMN purchase_date DATE NULL')
-            if 'depreciation_method' not in cols:
-                alter_parts.append('ADD COLUMN depreciation_method VARCHAR(50) DEFAULT "straight_line"')
-            if 'useful_life_years' not in cols:
-                alter_parts.append('ADD COLUMN useful_life_years INT DEFAULT 5')
-            if 'salvage_value' not in cols:
-                alter_parts.append('ADD COLUMN salvage_value DECIMAL(10,2) DEFAULT 0.0')
-            if alter_parts:
-                self.cursor.execute('ALTER TABLE inventory ' + ', '.join(alter_parts))
-        except Exception as _:
-            pass
-        # User / Group tables
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS `groups` (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) UNIQUE NOT NULL,
-                description TEXT
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                email VARCHAR(255),
-                password_hash VARCHAR(255),
-                name VARCHAR(255),
-                profile_picture VARCHAR(255)
-            )
-        ''')
-        # Ensure name and profile_picture columns exist for older deployments
+    def _check_schema(self):
+        """Warn when the database is behind the migrations shipped with the code.
+        Schema changes are applied with `python migrate.py up`, never at import."""
         try:
-            self.cursor.execute("""
-                SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'users'
-            """)
-            user_cols = {r[0] for r in self.cursor.fetchall()}
-            user_alter_parts = []
-            if 'name' not in user_cols:
-                user_alter_parts.append('ADD COLUMN name VARCHAR(255) NULL')
-            if 'profile_picture' not in user_cols:
-                user_alter_parts.append('ADD COLUMN profile_picture VARCHAR(255) NULL')
-            if user_alter_parts:
-                self.cursor.execute('ALTER TABLE users ' + ', '.join(user_alter_parts))
-        except Exception as _:
-            pass
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_groups (
-                user_id INT,
-                group_id INT,
-                PRIMARY KEY (user_id, group_id),
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (group_id) REFERENCES `groups`(id) ON DELETE CASCADE
-            )
-        ''')
-        # Transactions table for check-in and check-out
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS asset_transactions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                asset_name VARCHAR(255) NOT NULL,
-                action VARCHAR(50) NOT NULL,
-                quantity INT NOT NULL,
-                person VARCHAR(255),
-                department VARCHAR(255),
-                location VARCHAR(255),
-                notes TEXT,
-                username VARCHAR(255),
-                user_id VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (asset_name) REFERENCES inventory(name) ON DELETE CASCADE
-            )
-        ''')
-        # Migrate existing asset_transactions table if needed
-        try:
-            self.cursor.execute("""
-                SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'asset_transactions'
-            """)
-            existing_cols = {r[0] for r in self.cursor.fetchall()}
-            
-            # Rename item_name to asset_name if it exists
-            if 'item_name' in existing_cols and 'asset_name' not in existing_cols:
-                self.cursor.execute("ALTER TABLE asset_transactions CHANGE COLUMN item_name asset_name VARCHAR(255) NOT NULL")
-            
-            # Add user_id if it doesn't exist
-            if 'user_id' not in existing_cols:
-                self.cursor.execute("ALTER TABLE asset_transactions ADD COLUMN user_id VARCHAR(255) AFTER username")
-            
-            # Update action column to support all actions (remove enum constraint for flexibility)
-            # Check current action column type
-            self.cursor.execute("""
-                SELECT DATA_TYPE, COLUMN_TYPE FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = DATABASE() 
-                AND TABLE_NAME = 'asset_transactions' 
-                AND COLUMN_NAME = 'action'
-            """)
-            action_type = self.cursor.fetchone()
-            if action_type and 'ENUM' in action_type[1]:
-                # Change from ENUM to VARCHAR for flexibility
-                self.cursor.execute("ALTER TABLE asset_transactions MODIFY COLUMN action VARCHAR(50) NOT NULL")
+            from db.migrate import MigrationRunner
+            pending = MigrationRunner(self.conn).pending()
+            if pending:
+                print(f"Warning: {len(pending)} pending database migration(s) "
+                      f"(latest {pending[-1].version:04d}_{pending[-1].name}). Run: python migrate.py up")
         except Exception as e:
-            print(f"Migration note (non-critical): {e}")
-            pass
-        # Dashboard configuration tables
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dashboard_config (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id VARCHAR(255) NOT NULL,
-                widget_name VARCHAR(100) NOT NULL,
-                is_enabled BOOLEAN DEFAULT TRUE,
-                display_order INT DEFAULT 0,
-                UNIQUE KEY unique_user_widget (user_id, widget_name)
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dashboard_charts (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id VARCHAR(255) NOT NULL,
-                chart_name VARCHAR(100) NOT NULL,
-                is_enabled BOOLEAN DEFAULT TRUE,
-                display_order INT DEFAULT 0,
-                UNIQUE KEY unique_user_chart (user_id, chart_name)
-            )
-        ''')
-        self.conn.commit()
+            print(f"Warning checking schema version: {e}")
 
     def _load_suppliers(self):
         self.cursor.execute("SELECT name, contact, email FROM suppliers")
@@ -266,32 +139,125 @@ class InventorySystem:
         except Exception as e:
             print(f"Warning loading users: {e}")
 
+    def load_inventory(self):
+        """Reload the inventory cache from the database (after bulk SQL updates)."""
+        self.inventory.clear()
+        self._load_inventory()
+        self.inventory_changed()
+        self.refresh_expiry_schedules()
+
+    def inventory_changed(self, name=None):
+        """Refresh derived in-memory views after the inventory cache changed.
+        Call after writing to self.inventory outside this class."""
+        self.asset_index.invalidate()
+        self.expiry_index.asset_changed(name)
+        self.search_index.asset_changed(name)
+        self.quality_index.asset_changed(name)
+        self.duplicate_index.asset_changed(name)
+
+    # Above this many assets in one committed batch the indexes are rebuilt
+    # (lazily, once) instead of updated asset by asset
+    _INDEX_REBUILD_AFTER = 50
+
+    def _apply_events(self, events):
+        """Bus subscriber: bring the cache and its indexes in line with committed writes"""
+        changed = set()
+        for event in events:
+            name = event.asset_name
+            if name is None:
+                # Set-based write (e.g. data clean-up): reload everything once
+                self.load_inventory()
+                return
+            if event.action in ('deleted', 'retired'):
+                self.inventory.pop(name, None)
+            elif event.action == 'created':
+                self.inventory[name] = AssetRecord({f: event.changes.get(f) for f in ASSET_FIELDS})
+            elif name in self.inventory and 'version' in event.changes:
+                # The event carries the stored values, including the new version
+                self.inventory[name].update({f: v for f, v in event.changes.items() if f in ASSET_FIELDS})
+            else:
+                self._reload_asset(name)
+            changed.add(name)
+        if len(changed) > self._INDEX_REBUILD_AFTER:
+            self.inventory_changed()
+        else:
+            for name in changed:
+                self.inventory_changed(name)
+
+    def _commit(self):
+        """Commit the connection and deliver the events recorded in the transaction"""
+        self.conn.commit()
+        self.events.publish()
+
+    def _rollback(self):
+        self.conn.rollback()
+        self.events.discard()
+
+    def refresh_expiry_schedules(self):
+        """Reload warranty/contract/lease/maintenance dates from their tables into the expiry index"""
+        try:
+            self.expiry_index.load_schedules(self.cursor)
+        except mysql.connector.Error as err:
+            print(f"Warning loading expiry schedules: {err}")
+
+    def _reload_expiry_schedules(self):
+        """Periodic schedule reload on a connection of its own (runs in whichever request thread hits the TTL)"""
+        from db.migrate import connect
+        conn = connect()
+        cursor = conn.cursor()
+        try:
+            self.expiry_index.load_schedules(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+
+    _INVENTORY_COLUMNS = """
+        name, quantity, price, description, low_stock_threshold, category, supplier, department, funding_source, location,
+        model, brand, serial_number, purchase_date, depreciation_method, useful_life_years, salvage_value, version
+    """
+
+    @staticmethod
+    def _record_from_row(row):
+        name, qty, price, desc, threshold, cat, sup, dept, funding, loc, model, brand, serial_num, purchase_dt, dep_method, useful_life, salvage, version = row
+        return name, AssetRecord.from_values((
+            qty,
+            float(price) if price is not None else 0.0,
+            desc or "",
+            threshold or 5,
+            cat or "Uncategorized",
+            sup or "Unknown",
+            dept or None,
+            funding or None,
+            loc or None,
+            model or None,
+            brand or None,
+            serial_num or None,
+            purchase_dt or None,
+            dep_method or 'straight_line',
+            useful_life or 5,
+            float(salvage) if salvage is not None else 0.0,
+            version or 0
+        ))
+
     def _load_inventory(self):
-        self.cursor.execute("""
-            SELECT name, quantity, price, description, low_stock_threshold, category, supplier, department, funding_source, location,
-                   model, brand, serial_number, purchase_date, depreciation_method, useful_life_years, salvage_value
-            FROM inventory
-        """)
+        self.cursor.execute(f"SELECT {self._INVENTORY_COLUMNS} FROM inventory WHERE deleted_at IS NULL")
         for row in self.cursor.fetchall():
-            name, qty, price, desc, threshold, cat, sup, dept, funding, loc, model, brand, serial_num, purchase_dt, dep_method, useful_life, salvage = row
-            self.inventory[name] = {
-                'quantity': qty,
-                'price': float(price) if price is not None else 0.0,
-                'description': desc or "",
-                'low_stock_threshold': threshold or 5,
-                'category': cat or "Uncategorized",
-                'supplier': sup or "Unknown",
-                'department': dept or None,
-                'funding_source': funding or None,
-                'location': loc or None,
-                'model': model or None,
-                'brand': brand or None,
-                'serial_number': serial_num or None,
-                'purchase_date': purchase_dt or None,
-                'depreciation_method': dep_method or 'straight_line',
-                'useful_life_years': useful_life or 5,
-                'salvage_value': float(salvage) if salvage is not None else 0.0
-            }
+            name, record = self._record_from_row(row)
+            self.inventory[name] = record
+
+    def _reload_asset(self, name):
+        self.cursor.execute(f"SELECT {self._INVENTORY_COLUMNS} FROM inventory WHERE name = %s AND deleted_at IS NULL",
+                            (name,))
+        row = self.cursor.fetchone()
+        if row is None:
+            self.inventory.pop(name, None)
+        else:
+            self.inventory[name] = self._record_from_row(row)[1]
+
+    def refresh_asset(self, name):
+        """Reload one asset from the database into the cache (e.g. after a version conflict)."""
+        self._reload_asset(name)
+        self.inventory_changed(name)
 
     def add_supplier(self, name, contact="", email=""):
         if name in self.suppliers:
@@ -396,10 +362,17 @@ class InventorySystem:
             s = self.suppliers[name]
             print(f"- {name}: Contact={s['contact']}, Email={s['email']}")
 
-    def add_item(self, name, quantity, price=0.0, description="", low_stock_threshold=5, category="Uncategorized", supplier="Unknown", department=None, funding_source=None, location=None, model=None, brand=None, serial_number=None, purchase_date=None, depreciation_method='straight_line', useful_life_years=5, salvage_value=0.0):
+    def add_item(self, name, quantity, price=0.0, description="", low_stock_threshold=5, category="Uncategorized", supplier="Unknown", department=None, funding_source=None, location=None, model=None, brand=None, serial_number=None, purchase_date=None, depreciation_method='straight_line', useful_life_years=5, salvage_value=0.0, username=None):
         if name in self.inventory:
-            print(f"Item '{name}' already exists. Use update_quantity to adjust stock.")
-            return
+            raise ValueError(f"Item '{name}' already exists. Use update_quantity to adjust stock.")
+        # Retired assets keep their row (and name) but are not cached
+        self.cursor.execute("SELECT deleted_at FROM inventory WHERE name = %s", (name,))
+        row = self.cursor.fetchone()
+        if row is not None:
+            if row[0] is not None:
+                raise ValueError(f"Item '{name}' was retired on {row[0]}. Restore it from the "
+                                 f"Retired Assets page or choose another name.")
+            raise ValueError(f"Item '{name}' already exists. Use update_quantity to adjust stock.")
 
         if supplier != "Unknown" and supplier not in self.suppliers:
             print(f"Warning: Supplier '{supplier}' not in database. Adding as 'Unknown'.")
@@ -413,9 +386,7 @@ class InventorySystem:
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """, (name, quantity, price, description, low_stock_threshold, category, supplier, department, funding_source, location,
                   model, brand, serial_number, purchase_date, depreciation_method, useful_life_years, salvage_value))
-            self.conn.commit()
-
-            self.inventory[name] = {
+            self.events.record(self.cursor, 'created', name, {
                 'quantity': quantity,
                 'price': price,
                 'description': description,
@@ -431,47 +402,140 @@ class InventorySystem:
                 'purchase_date': purchase_date,
                 'depreciation_method': depreciation_method,
                 'useful_life_years': useful_life_years,
-                'salvage_value': salvage_value
-            }
+                'salvage_value': salvage_value,
+                'version': 0
+            }, username)
+            self._commit()
             print(f"Added '{name}' (Category: {category}, Supplier: {supplier}).")
-        except mysql.connector.Error as err:
-            print(f"Error adding item: {err}")
+        except mysql.connector.Error:
+            self._rollback()
+            raise
 
-    def remove_item(self, name):
+    def remove_item(self, name, username=None):
         if name not in self.inventory:
             print(f"Item '{name}' not found.")
             return
         try:
+            # asset_transactions is partitioned and cannot carry the old ON DELETE CASCADE
+            self.cursor.execute("DELETE FROM asset_transactions WHERE asset_name = %s", (name,))
+            self.cursor.execute("DELETE FROM asset_transactions_archive WHERE asset_name = %s", (name,))
             self.cursor.execute("DELETE FROM inventory WHERE name = %s", (name,))
-            self.conn.commit()
-            del self.inventory[name]
+            self.events.record(self.cursor, 'deleted', name, username=username)
+            self._commit()
             print(f"Removed '{name}' from inventory.")
         except mysql.connector.Error as err:
+            self._rollback()
             print(f"Error removing item: {err}")
 
-    def update_quantity(self, name, quantity_change):
+    def remove_items(self, names, soft=False, username=None):
+        """
+        Delete (or with ``soft`` retire) many assets with chunked set-based
+        statements. Each committed chunk publishes its events, which drop the
+        assets from the cache in one pass. Returns the number of inventory
+        rows deleted or retired.
+        """
+        from utils.bulk_delete import hard_delete, soft_delete
+        names = [name for name in dict.fromkeys(names) if name]
+        if not names:
+            return 0
+        delete = soft_delete if soft else hard_delete
+        return delete(self.conn, names, events=self.events, username=username)
+
+    def restore_items(self, names, username=None):
+        """
+        Put retired assets back on the asset list. The 'restored' events reload
+        the rows into the cache as each chunk commits. Returns the number of
+        assets restored.
+        """
+        from utils.bulk_delete import restore
+        names = [name for name in dict.fromkeys(names) if name]
+        if not names:
+            return 0
+        return restore(self.conn, names, events=self.events, username=username)
+
+    # --- Quantity changes ---
+    # Quantities are changed relative to the stored value in a single UPDATE
+    # (never by writing back a total computed from the cache), so concurrent
+    # workers cannot lose each other's changes. Every change bumps
+    # inventory.version, which edits use for optimistic concurrency, and the
+    # cache is reconciled from the row the statement left behind.
+
+    def _adjust_quantity(self, name, delta, minimum=None):
+        """
+        Add ``delta`` to the stored quantity inside the current transaction.
+        With ``minimum`` the row only changes while quantity >= minimum;
+        without it the result is clamped at 0. Returns (changed, row) where
+        row is the stored (quantity, version) afterwards, None if the asset is gone.
+        """
+        if minimum is None:
+            self.cursor.execute("""
+                UPDATE inventory SET quantity = GREATEST(quantity + %s, 0), version = version + 1
+                WHERE name = %s AND deleted_at IS NULL
+            """, (delta, name))
+        else:
+            self.cursor.execute("""
+                UPDATE inventory SET quantity = quantity + %s, version = version + 1
+                WHERE name = %s AND deleted_at IS NULL AND quantity >= %s
+            """, (delta, name, minimum))
+        changed = self.cursor.rowcount > 0
+        self.cursor.execute("SELECT quantity, version FROM inventory WHERE name = %s AND deleted_at IS NULL", (name,))
+        return changed, self.cursor.fetchone()
+
+    def _reconcile_quantity(self, name, row):
+        """Bring the cached quantity/version in line with the stored row"""
+        if row is None:
+            if self.inventory.pop(name, None) is not None:
+                self.inventory_changed(name)
+            return
+        record = self.inventory.get(name)
+        if record is None:
+            self.refresh_asset(name)
+            return
+        record['quantity'], record['version'] = row
+        self.inventory_changed(name)
+
+    def _change_quantity(self, name, delta, minimum=None, transaction=None, action='adjusted', username=None):
+        """
+        Apply a relative change, log ``transaction`` (sql, params) and record an
+        ``action`` event in one commit; returns (changed, row)
+        """
+        try:
+            changed, row = self._adjust_quantity(name, delta, minimum)
+            if changed:
+                if transaction:
+                    self.cursor.execute(*transaction)
+                self.events.record(self.cursor, action, name,
+                                   {'quantity': row[0], 'version': row[1], 'delta': delta}, username)
+            self._commit()
+        except mysql.connector.Error:
+            self._rollback()
+            raise
+        if not changed:
+            self._reconcile_quantity(name, row)
+        return changed, row
+
+    def update_quantity(self, name, quantity_change, username=None):
         if name not in self.inventory:
             print(f"Item '{name}' not found.")
             return
-        new_quantity = self.inventory[name]['quantity'] + quantity_change
-        if new_quantity < 0:
-            new_quantity = 0
-            print(f"Warning: Cannot go below 0. Set to 0.")
-
-        self.inventory[name]['quantity'] = new_quantity
         try:
-            self.cursor.execute("UPDATE inventory SET quantity = %s WHERE name = %s", (new_quantity, name))
-            self.conn.commit()
-            print(f"Updated '{name}' → {new_quantity} units.")
+            _, row = self._change_quantity(name, quantity_change, username=username)
         except mysql.connector.Error as err:
             print(f"Error updating quantity: {err}")
             return
+        if row is None:
+            print(f"Item '{name}' not found.")
+            return
+        new_quantity = row[0]
+        print(f"Updated '{name}' → {new_quantity} units.")
 
         if new_quantity < self.inventory[name]['low_stock_threshold']:
             msg = f"LOW STOCK: '{name}' has {new_quantity} left (threshold: {self.inventory[name]['low_stock_threshold']})."
             print(msg)
-            if self.email_config.get('sender') and self.email_config.get('recipient'):
-                self.send_email("Low Stock Alert", msg)
+            if self.email_config.get('sender_email') and self.email_config.get('recipient'):
+                # One digest per window instead of one email per quantity change
+                from utils.alert_digest import notify
+                notify('low_stock', self.email_config['recipient'], name, "Low Stock Alert", msg, conn=self.conn)
 
     # --- Check-out and Check-in helpers ---
     def checkout_item(self, name, quantity, username=None, person=None, department=None, location=None, notes=None):
@@ -479,48 +543,124 @@ class InventorySystem:
             raise ValueError("Item not found")
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
-        available = self.inventory[name]['quantity']
-        if quantity > available:
-            raise ValueError(f"Only {available} available to checkout")
-        # Update quantity
-        self.inventory[name]['quantity'] = available - quantity
-        try:
-            self.cursor.execute("UPDATE inventory SET quantity=%s WHERE name=%s", (available - quantity, name))
-            # Log transaction
-            self.cursor.execute(
-                """
-                INSERT INTO asset_transactions (asset_name, action, quantity, person, department, location, notes, username)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-                """,
-                (name, 'checkout', quantity, person, department, location, notes, username)
-            )
-            self.conn.commit()
-        except mysql.connector.Error as err:
-            # rollback memory cache
-            self.inventory[name]['quantity'] = available
-            raise err
+        changed, row = self._change_quantity(name, -quantity, minimum=quantity, transaction=(
+            """
+            INSERT INTO asset_transactions (asset_name, action, quantity, person, department, location, notes, username)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+            """,
+            (name, 'checkout', quantity, person, department, location, notes, username)
+        ), action='checkout', username=username)
+        if row is None:
+            raise ValueError("Item not found")
+        if not changed:
+            raise ValueError(f"Only {row[0]} available to checkout")
 
     def checkin_item(self, name, quantity, username=None, person=None, notes=None):
         if name not in self.inventory:
             raise ValueError("Item not found")
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
-        new_q = self.inventory[name]['quantity'] + quantity
-        self.inventory[name]['quantity'] = new_q
+        changed, row = self._change_quantity(name, quantity, transaction=(
+            """
+            INSERT INTO asset_transactions (asset_name, action, quantity, person, notes, username)
+            VALUES (%s,%s,%s,%s,%s,%s)
+            """,
+            (name, 'checkin', quantity, person, notes, username)
+        ), action='checkin', username=username)
+        if not changed:
+            raise ValueError("Item not found")
+
+    def dispose_item(self, name, quantity, username=None, reason='', disposal_method='', notes=''):
+        if name not in self.inventory:
+            raise ValueError("Item not found")
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        changed, row = self._change_quantity(name, -quantity, minimum=quantity, transaction=(
+            """
+            INSERT INTO asset_transactions (asset_name, action, quantity, notes, user_id, person, department)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            (name, 'dispose', quantity, f"Reason: {reason} | Method: {disposal_method} | {notes}",
+             username, f"Disposal - {disposal_method}", reason)
+        ), action='dispose', username=username)
+        if row is None:
+            raise ValueError("Item not found")
+        if not changed:
+            raise ValueError(f"Insufficient quantity. Only {row[0]} available.")
+
+    def _stored_quantities(self, names):
+        """name -> stored (quantity, version)"""
+        self.cursor.execute(f"SELECT name, quantity, version FROM inventory "
+                            f"WHERE name IN ({', '.join(['%s'] * len(names))}) AND deleted_at IS NULL", list(names))
+        return {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+
+    def bulk_transaction(self, action, lines, username=None, person=None, department=None, location=None, notes=None):
+        """
+        Check out or check in many assets at once: every quantity change and
+        asset_transactions row is written in one transaction (all or nothing).
+        ``lines`` are (name, quantity); repeated names are added together.
+        Raises BulkTransactionError with one message per problem line, checked
+        against the cache first and against the stored quantities on write.
+        Returns {name: (quantity, remaining)} in line order.
+        """
+        if action not in ('checkout', 'checkin'):
+            raise ValueError(f"Unsupported bulk action: {action}")
+        totals = {}
+        problems = []
+        for name, quantity in lines:
+            if name not in self.inventory:
+                problems.append(f"{name}: item not found")
+            elif not isinstance(quantity, int) or quantity <= 0:
+                problems.append(f"{name}: quantity must be a positive whole number")
+            else:
+                totals[name] = totals.get(name, 0) + quantity
+        if action == 'checkout':
+            problems.extend(f"{name}: only {self.inventory[name]['quantity']} available to checkout"
+                            for name, quantity in totals.items() if quantity > self.inventory[name]['quantity'])
+        if problems:
+            raise BulkTransactionError(problems)
+        if not totals:
+            raise BulkTransactionError(["No items to process"])
+
+        sign = -1 if action == 'checkout' else 1
+        names = list(totals)
+        ordered = sorted(totals.items())  # rows are locked in name order, so concurrent batches cannot deadlock
         try:
-            self.cursor.execute("UPDATE inventory SET quantity=%s WHERE name=%s", (new_q, name))
-            self.cursor.execute(
-                """
-                INSERT INTO asset_transactions (asset_name, action, quantity, person, notes, username)
-                VALUES (%s,%s,%s,%s,%s,%s)
-                """,
-                (name, 'checkin', quantity, person, notes, username)
-            )
-            self.conn.commit()
-        except mysql.connector.Error as err:
-            # rollback memory cache
-            self.inventory[name]['quantity'] = new_q - quantity
-            raise err
+            if action == 'checkout':
+                self.cursor.executemany("""
+                    UPDATE inventory SET quantity = quantity - %s, version = version + 1
+                    WHERE name = %s AND deleted_at IS NULL AND quantity >= %s
+                """, [(q, name, q) for name, q in ordered])
+            else:
+                self.cursor.executemany("""
+                    UPDATE inventory SET quantity = quantity + %s, version = version + 1
+                    WHERE name = %s AND deleted_at IS NULL
+                """, [(q, name) for name, q in ordered])
+            changed = self.cursor.rowcount
+            if changed < len(totals):
+                # Another worker got there first: apply nothing, report the stored stock
+                self._rollback()
+                stored = self._stored_quantities(names)
+                for name in names:
+                    self._reconcile_quantity(name, stored.get(name))
+                problems = [f"{name}: item not found" if name not in stored else
+                            f"{name}: only {stored[name][0]} available to checkout"
+                            for name in names if name not in stored or stored[name][0] + sign * totals[name] < 0]
+                raise BulkTransactionError(problems or ["Stock changed while processing; please try again"])
+            stored = self._stored_quantities(names)
+            self.cursor.executemany("""
+                INSERT INTO asset_transactions (asset_name, action, quantity, person, department, location, notes, username)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+            """, [(name, action, q, person, department, location, notes, username) for name, q in totals.items()])
+            self.events.record_many(self.cursor, action, [
+                (name, {'quantity': stored[name][0], 'version': stored[name][1], 'delta': sign * q})
+                for name, q in totals.items()
+            ], username)
+            self._commit()
+        except mysql.connector.Error:
+            self._rollback()
+            raise
+        return {name: (q, stored[name][0]) for name, q in totals.items()}
 
     def search_item(self, name):
         item = self.inventory.get(name)
@@ -605,23 +745,13 @@ class InventorySystem:
             print(f"Export failed: {e}")
 
     def send_email(self, subject, body):
-        if not all(self.email_config.get(k) for k in ['sender', 'password', 'recipient']):
+        """Queue an alert for EMAIL_CONFIG['recipient']; delivery happens on the mail queue workers"""
+        if not all(self.email_config.get(k) for k in ['sender_email', 'recipient']):
             print("Email not fully configured.")
             return
-
-        msg = MIMEText(body)
-        msg['Subject'] = subject
-        msg['From'] = self.email_config['sender']
-        msg['To'] = self.email_config['recipient']
-
-        try:
-            with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['port']) as server:
-                server.starttls()
-                server.login(self.email_config['sender'], self.email_config['password'])
-                server.send_message(msg)
-            print("Email sent!")
-        except Exception as e:
-            print(f"Email failed: {e}")
+        from utils.mail_queue import queue_email
+        if queue_email(self.email_config['recipient'], subject, body):
+            print("Email queued!")
 
     def run(self):
         print("Inventory Management System Started")
@@ -649,7 +779,10 @@ class InventorySystem:
                         contact = input("Contact: ")
                         email = input("Email: ")
                         self.add_supplier(sup, contact, email)
-                self.add_item(name, qty, price, desc, thresh, cat, sup)
+                try:
+                    self.add_item(name, qty, price, desc, thresh, cat, sup)
+                except (ValueError, mysql.connector.Error) as err:
+                    print(f"Error adding item: {err}")
 
             elif choice == '2':
                 self.remove_item(input("Item to remove: "))
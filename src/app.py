@@ -5,11 +5,16 @@
 
  
 
-from flask import Flask, request, redirect, url_for, flash, session, render_template, send_from_directory, jsonify
-from AssetManagement import InventorySystem
+from flask import Flask, request, redirect, url_for, flash, session, render_template, jsonify, abort
+from AssetManagement import BulkTransactionError, InventorySystem
 from config import FLASK_CONFIG, DB_CONFIG, BACKUP_CONFIG
-from utils.data_quality import DataQualityCleaner
+from utils.apo import add_file_count
+from utils.chunked_upload import UploadError
+from utils.page_stats import invalidate_stats
+from utils.people_search import reindex as reindex_person
 import html
+import heapq
+import math
 import os
 from datetime import datetime, date
 import mysql.connector
@@ -35,6 +40,9 @@ def validate_csrf_token():
     # For JSON requests, check JSON body
     if not form_token and request.is_json:
         form_token = request.json.get('csrf_token')
+    # Raw-body requests (upload chunks) send it as a header
+    if not form_token:
+        form_token = request.headers.get('X-CSRFToken')
     
     session_token = session.get('csrf_token')
     
@@ -72,6 +80,22 @@ app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max upload size
 app.secret_key = FLASK_CONFIG.get('secret_key', 'change_this_to_a_random_secret')
 system = InventorySystem()
 
+# Keep the precomputed /alerts tables fresh in the background
+try:
+    from utils.alerts import start_alert_evaluator
+    start_alert_evaluator()
+except Exception as e:
+    print(f"Alert evaluator not started: {e}")
+
+# Deliver any mail spooled before a restart; new mail starts the workers on demand
+try:
+    from utils.mail_queue import get_mail_queue
+    from utils.alert_digest import start_digest_scheduler
+    if get_mail_queue():
+        start_digest_scheduler()
+except Exception as e:
+    print(f"Mail queue not started: {e}")
+
 # Inject CSRF token into all templates (simple session-based protection)
 @app.context_processor
 def inject_csrf_token():
@@ -81,39 +105,22 @@ def inject_csrf_token():
         session['csrf_token'] = token
     return dict(csrf_token=token)
 
+@app.context_processor
+def inject_alert_counts():
+    """Sidebar alert badge; counts come from a per-process cache over the alerts table"""
+    if not session.get('username'):
+        return dict(alert_counts={}, alert_total=0)
+    try:
+        from utils.alerts import cached_alert_counts
+        counts = cached_alert_counts(get_db_connection)
+    except Exception:
+        counts = {}
+    return dict(alert_counts=counts, alert_total=sum(counts.values()))
+
 def calculate_depreciation(purchase_price, purchase_date_str, salvage_value, useful_life_years, method='straight_line'):
     """Calculate current asset value based on depreciation"""
-    if not purchase_date_str or not purchase_price:
-        return purchase_price
-    
-    try:
-        if isinstance(purchase_date_str, date):
-            purchase_date = purchase_date_str
-        else:
-            purchase_date = datetime.strptime(str(purchase_date_str), '%Y-%m-%d').date()
-        
-        today = date.today()
-        years_owned = (today - purchase_date).days / 365.25
-        
-        if years_owned >= useful_life_years:
-            return salvage_value
-        
-        depreciable_amount = purchase_price - salvage_value
-        
-        if method == 'straight_line':
-            annual_depreciation = depreciable_amount / useful_life_years
-            accumulated_depreciation = annual_depreciation * years_owned
-            current_value = purchase_price - accumulated_depreciation
-        elif method == 'declining_balance':
-            rate = 2.0 / useful_life_years  # Double declining balance
-            current_value = purchase_price * ((1 - rate) ** years_owned)
-            current_value = max(current_value, salvage_value)
-        else:
-            current_value = purchase_price
-        
-        return max(current_value, salvage_value)
-    except:
-        return purchase_price
+    from utils.enrichment import depreciated_value
+    return depreciated_value(purchase_price, purchase_date_str, salvage_value, useful_life_years, method)
 
 def header(title="Asset Management System"):
     # Deprecated: header content moved to Jinja templates. Kept for compatibility if referenced.
@@ -168,11 +175,11 @@ def index():
     
     # If logged in, show dashboard
     # Get search query
-    search_query = request.args.get('q', '').lower()
+    search_query = request.args.get('q', '').strip()
     # Calculate dashboard metrics
     items = system.inventory
     if search_query:
-        items = {k: v for k, v in items.items() if search_query in k.lower() or search_query in (v.get('category','').lower()) or search_query in (v.get('supplier','').lower())}
+        items = {n: items[n] for n in system.search_index.search(search_query) if n in items}
     
     # Get dashboard configuration from database or session
     user_id = session.get('username', 'default')
@@ -221,8 +228,7 @@ def index():
     # Get recent activity (last 10 items) - only if needed
     recent_activity = []
     if 'recent_activity' in dashboard_widgets:
-        inventory_items = sorted([(name, type('Obj', (), d)) for name, d in items.items()], key=lambda x: x[0])
-        recent_activity = inventory_items[:10]
+        recent_activity = heapq.nsmallest(10, items.items(), key=lambda x: x[0])
     
     return render_template('index.html', 
                          title='Dashboard', 
@@ -512,11 +518,18 @@ def add():
             
             system.add_item(name, quantity, price, description, low_stock_threshold, category, supplier, 
                           department, funding_source, location, model, brand, serial_number, purchase_date,
-                          depreciation_method, useful_life_years, salvage_value)
+                          depreciation_method, useful_life_years, salvage_value, username=session.get('username'))
             
             flash(f"✅ Successfully added asset '{name}'! Quantity: {quantity}, Price: ${price:.2f}", 'success')
+            suspected = _queue_duplicates([name])
+            if suspected:
+                flash(f"⚠️ '{name}' looks like {suspected} existing asset(s); see the duplicate review queue.", 'warning')
             return redirect(url_for('index'))
             
+        except ValueError as e:
+            # Refused by add_item: the name is taken by a current or retired asset
+            flash(f"❌ {e}", 'error')
+            return redirect(url_for('add'))
         except Exception as e:
             error_msg = str(e).lower()
             if "duplicate" in error_msg or "unique constraint" in error_msg:
@@ -538,7 +551,7 @@ def update():
             return redirect(url_for('update'))
         name = request.form.get("name","")
         change = int(request.form.get("change") or 0)
-        system.update_quantity(name, change)
+        system.update_quantity(name, change, username=session.get('username'))
         return redirect(url_for("index"))
     return render_template('update.html', title='Update Quantity')
 
@@ -554,10 +567,9 @@ def suppliers():
         email = request.form.get("email","")
         system.add_supplier(name, contact, email)
         return redirect(url_for("suppliers"))
-    suppliers_list = sorted([(n, {'contact': s.get('contact',''), 'email': s.get('email','')}) for n, s in system.suppliers.items()], key=lambda x: x[0])
-    # convert dicts into simple namespace-like for Jinja
-    suppliers_ns = [(n, type('Obj', (), d)) for n, d in suppliers_list]
-    return render_template('suppliers.html', title='Suppliers', suppliers=suppliers_ns)
+    # Jinja resolves s.contact / s.email on the dicts directly
+    suppliers_list = sorted(system.suppliers.items(), key=lambda x: x[0])
+    return render_template('suppliers.html', title='Suppliers', suppliers=suppliers_list)
 
 
 @app.route("/groups", methods=["GET", "POST"])
@@ -577,9 +589,8 @@ def groups():
                 return redirect(url_for('groups'))
             system.add_group(name, description)
         return redirect(url_for("groups"))
-    groups_list = sorted([(n, {'description': g.get('description','')}) for n, g in system.groups.items()], key=lambda x: x[0])
-    groups_ns = [(n, type('Obj', (), d)) for n, d in groups_list]
-    return render_template('groups.html', title='Groups', groups=groups_ns)
+    groups_list = sorted(system.groups.items(), key=lambda x: x[0])
+    return render_template('groups.html', title='Groups', groups=groups_list)
 
 
 @app.route('/users', methods=['GET', 'POST'])
@@ -601,10 +612,9 @@ def users():
             system.add_user(username, email, pw_hash)
             flash(f'User "{username}" added successfully', 'success')
         return redirect(url_for('users'))
-    users_list = sorted([(uname, {'email': u.get('email',''), 'groups': u.get('groups', set())}) for uname, u in system.users.items()], key=lambda x: x[0])
     # For Jinja, groups can be set; Jinja can iterate sets but order may vary; acceptable for now
-    users_ns = [(uname, type('Obj', (), d)) for uname, d in users_list]
-    return render_template('users.html', title='Users', users=users_ns)
+    users_list = sorted([(uname, {'email': u.get('email',''), 'groups': u.get('groups', set())}) for uname, u in system.users.items()], key=lambda x: x[0])
+    return render_template('users.html', title='Users', users=users_list)
 
 @app.route('/users/delete/<username>', methods=['POST'])
 @require_group('Admin')
@@ -724,10 +734,47 @@ def login():
     return render_template('landing.html', groups=groups_list)
 
 @app.route('/uploads/<path:filename>')
+@login_required
 def uploaded_file(filename):
-    """Serve uploaded files"""
-    upload_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
-    return send_from_directory(upload_folder, filename)
+    """Serve uploaded files (ETag/Range aware, or handed to nginx via X-Accel-Redirect)"""
+    from utils.file_delivery import send_upload
+    return send_upload(app.config['UPLOAD_FOLDER'], filename,
+                       as_attachment=request.args.get('download') == '1')
+
+def _send_attachment(table, file_id, legacy_dir=None):
+    """Serve an attachment row's file under its original filename"""
+    from utils.file_delivery import send_upload
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""
+            SELECT original_filename, saved_filename, sha256
+            FROM {table} WHERE id = %s
+        """, (file_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    if not row:
+        abort(404)
+    saved = row['saved_filename']
+    # Files stored before the blob store live under uploads/<legacy_dir> by their timestamped name
+    relative_path = saved if row['sha256'] or not legacy_dir else f"{legacy_dir}/{saved}"
+    return send_upload(app.config['UPLOAD_FOLDER'], relative_path,
+                       download_name=row['original_filename'],
+                       as_attachment=request.args.get('download') == '1', etag=row['sha256'])
+
+@app.route('/apo/files/<int:file_id>')
+@login_required
+def apo_file(file_id):
+    """Serve an APO attachment under its original filename"""
+    return _send_attachment('apo_files', file_id, legacy_dir='apo')
+
+@app.route('/contracts/files/<int:file_id>')
+@login_required
+def contract_file(file_id):
+    """Serve a contract attachment under its original filename"""
+    return _send_attachment('contract_files', file_id)
 
 @app.route('/logout', methods=['GET', 'POST'])
 def logout():
@@ -810,6 +857,11 @@ def change_profile():
                     save_path = os.path.join(app.static_folder, filename)
                     pic.save(save_path)
                     url_path = f"/static/{filename}"
+                    # Pages show a small content-keyed avatar; the original stays in static/
+                    from utils.thumbnails import store_avatar
+                    avatar = store_avatar(app.config['UPLOAD_FOLDER'], save_path)
+                    if avatar:
+                        url_path = url_for('thumbnail', variant='avatar', sha256=avatar)
                     system.users[user['username']]['profile_picture'] = url_path
                     system.cursor.execute("UPDATE users SET profile_picture=%s WHERE username=%s", (url_path, user['username']))
         system.conn.commit()
@@ -877,7 +929,7 @@ def checkout():
                             'checked_out_by': session.get('username', 'System')
                         }
                         
-                        send_checkout_notification_email(
+                        queued = send_checkout_notification_email(
                             recipient_email=user_data['email'],
                             recipient_name=user_data.get('name', person),
                             item_name=name,
@@ -885,7 +937,10 @@ def checkout():
                             checkout_details=checkout_details,
                             notes=notes
                         )
-                        flash(f"✅ Successfully checked out {quantity} unit(s) of '{name}' to {person}. Email notification sent!", 'success')
+                        if queued:
+                            flash(f"✅ Successfully checked out {quantity} unit(s) of '{name}' to {person}. Email notification queued.", 'success')
+                        else:
+                            flash(f"✅ Successfully checked out {quantity} unit(s) of '{name}' to {person}. (Email notification could not be sent)", 'success')
                     else:
                         flash(f"✅ Successfully checked out {quantity} unit(s) of '{name}' to {person}.", 'success')
                 else:
@@ -910,7 +965,7 @@ def checkout():
                 flash(f"❌ Failed to checkout asset. Please try again. Error: {str(e)}", 'error')
             return redirect(url_for('checkout'))
     # GET
-    return render_template('checkout.html', title='Check Out', items=sorted(system.inventory.keys()))
+    return render_template('checkout.html', title='Check Out')
 
 @app.route('/checkin', methods=['GET','POST'])
 @require_group('Admin', 'manager')
@@ -936,7 +991,85 @@ def checkin():
         except Exception as e:
             flash(str(e), 'error')
             return redirect(url_for('checkin'))
-    return render_template('checkin.html', title='Check In', items=sorted(system.inventory.keys()))
+    return render_template('checkin.html', title='Check In')
+
+@app.route('/api/transactions/bulk', methods=['POST'])
+@require_group('Admin', 'manager')
+def api_bulk_transaction():
+    """
+    Check out or check in many assets in one transaction:
+    {action: checkout|checkin, lines: [{asset, quantity}] or [[asset, quantity]],
+     person?, department?, location?, notes?}
+    """
+    if not validate_csrf_token():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in ('checkout', 'checkin'):
+        return jsonify({'error': "action must be 'checkout' or 'checkin'"}), 400
+    raw_lines = data.get('lines')
+    if not isinstance(raw_lines, list) or not raw_lines:
+        return jsonify({'error': 'lines must be a non-empty list'}), 400
+    if len(raw_lines) > 500:
+        return jsonify({'error': 'At most 500 lines per request'}), 400
+    lines = []
+    for line in raw_lines:
+        if isinstance(line, dict):
+            name, quantity = line.get('asset'), line.get('quantity')
+        elif isinstance(line, (list, tuple)) and len(line) == 2:
+            name, quantity = line
+        else:
+            return jsonify({'error': f'Invalid line: {line!r}'}), 400
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Invalid quantity for {name!r}'}), 400
+        lines.append((str(name or '').strip(), quantity))
+
+    def text(field):
+        return (str(data.get(field) or '')).strip() or None
+    person, department, location, notes = text('person'), text('department'), text('location'), text('notes')
+    try:
+        results = system.bulk_transaction(action, lines, username=session.get('username'), person=person,
+                                          department=department, location=location, notes=notes)
+    except BulkTransactionError as e:
+        return jsonify({'error': 'Nothing was processed', 'problems': e.problems}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Bulk {action} failed: {str(e)}'}), 500
+
+    # One email for the whole batch
+    email_queued = False
+    if person:
+        try:
+            from utils.email_util import send_bulk_transaction_email
+            cursor = system.conn.cursor(dictionary=True)
+            cursor.execute('SELECT email, name FROM users WHERE username = %s OR name = %s', (person, person))
+            user_data = cursor.fetchone()
+            cursor.close()
+            if user_data and user_data.get('email'):
+                email_queued = send_bulk_transaction_email(
+                    recipient_email=user_data['email'],
+                    recipient_name=user_data.get('name') or person,
+                    action=action,
+                    items=[(name, quantity) for name, (quantity, _) in results.items()],
+                    details={
+                        'department': department or 'N/A',
+                        'location': location or 'N/A',
+                        'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                        'processed_by': session.get('username', 'System'),
+                    },
+                    notes=notes)
+        except Exception as e:
+            print(f"Email notification error: {e}")
+
+    return jsonify({
+        'action': action,
+        'items': [{'asset': name, 'quantity': quantity, 'remaining': remaining}
+                  for name, (quantity, remaining) in results.items()],
+        'email_queued': bool(email_queued),
+    })
 
 @app.route('/lease')
 @login_required
@@ -962,31 +1095,13 @@ def dispose():
         notes = request.form.get('notes', '')
         
         if asset_name and asset_name in system.inventory:
-            asset = system.inventory[asset_name]
-            
-            if asset['quantity'] >= quantity:
-                # Update quantity
-                new_quantity = asset['quantity'] - quantity
-                system.update_quantity(asset_name, new_quantity)
-                
-                # Record transaction
-                cursor = system.conn.cursor()
-                cursor.execute('''
-                    INSERT INTO asset_transactions 
-                    (asset_name, action, quantity, notes, user_id, person, department)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ''', (asset_name, 'dispose', quantity, 
-                      f"Reason: {reason} | Method: {disposal_method} | {notes}",
-                      session.get('username'), 
-                      f"Disposal - {disposal_method}",
-                      reason))
-                system.conn.commit()
-                cursor.close()
-                
+            try:
+                system.dispose_item(asset_name, quantity, username=session.get('username'), reason=reason,
+                                    disposal_method=disposal_method, notes=notes)
                 flash(f'Successfully disposed {quantity} unit(s) of {asset_name}', 'success')
                 return redirect(url_for('dispose'))
-            else:
-                flash(f'Insufficient quantity. Only {asset["quantity"]} available.', 'error')
+            except ValueError as e:
+                flash(str(e), 'error')
         else:
             flash('Asset not found', 'error')
     
@@ -1019,8 +1134,12 @@ def maintenance():
                   session.get('username'), 
                   maintenance_type,
                   f"Cost: VT{cost}"))
+            system.events.record(cursor, 'maintenance', asset_name,
+                                 {'maintenance_type': maintenance_type, 'scheduled_date': scheduled_date, 'cost': cost},
+                                 session.get('username'))
             system.conn.commit()
             cursor.close()
+            system.events.publish()
             
             flash(f'Maintenance scheduled for {asset_name}', 'success')
             return redirect(url_for('maintenance'))
@@ -1051,7 +1170,7 @@ def move():
             cursor = system.conn.cursor()
             cursor.execute('''
                 UPDATE inventory 
-                SET location = %s, department = %s
+                SET location = %s, department = %s, version = version + 1
                 WHERE name = %s
             ''', (to_location, to_department, asset_name))
             
@@ -1066,12 +1185,12 @@ def move():
                   f"Moved to {to_location}",
                   to_location,
                   to_department))
+            system.events.record(cursor, 'moved', asset_name,
+                                 {'location': to_location, 'department': to_department}, session.get('username'))
             system.conn.commit()
             cursor.close()
-            
-            # Update in-memory
-            system.inventory[asset_name]['location'] = to_location
-            system.inventory[asset_name]['department'] = to_department
+            # Subscribers (the in-memory cache among them) see the move once committed
+            system.events.publish()
             
             flash(f'Successfully moved {asset_name} to {to_location}', 'success')
             return redirect(url_for('move'))
@@ -1111,8 +1230,13 @@ def reserve():
                       session.get('username'), 
                       reserved_by,
                       reserved_for))
+                system.events.record(cursor, 'reserve', asset_name,
+                                     {'quantity': quantity, 'reserved_by': reserved_by, 'reserved_for': reserved_for,
+                                      'start_date': start_date, 'end_date': end_date},
+                                     session.get('username'))
                 system.conn.commit()
                 cursor.close()
+                system.events.publish()
                 
                 flash(f'Successfully reserved {quantity} unit(s) of {asset_name}', 'success')
                 return redirect(url_for('reserve'))
@@ -1239,7 +1363,7 @@ def locations():
         active_count = sum(1 for loc in locations_list if loc.get('is_active'))
         
         # Count total assets with locations
-        cursor.execute("SELECT COUNT(DISTINCT name) as count FROM inventory WHERE location IS NOT NULL AND location != ''")
+        cursor.execute("SELECT COUNT(DISTINCT name) as count FROM inventory WHERE location IS NOT NULL AND location != '' AND deleted_at IS NULL")
         result = cursor.fetchone()
         total_assets = result['count'] if result else 0
         
@@ -1898,43 +2022,29 @@ def manage_dashboard():
 @login_required
 def data_quality_dashboard():
     """Data Quality Dashboard - Clean, standardize, and enrich asset data"""
-    items = system.inventory
-    
-    # Convert to list of dicts for processing
-    assets_list = []
-    for name, data in items.items():
-        asset = data.copy()
-        asset['name'] = name
-        assets_list.append(asset)
-    
-    # Generate data quality report
-    quality_report = DataQualityCleaner.generate_data_quality_report(assets_list)
-    
-    # Get sample of assets with issues
-    problematic_assets = []
-    for asset in assets_list[:20]:  # Show first 20
-        issues = []
-        if not asset.get('category') or asset.get('category') == '':
-            issues.append('Missing category')
-        if not asset.get('supplier') or asset.get('supplier') == '':
-            issues.append('Missing supplier')
-        if not asset.get('location') or asset.get('location') == '':
-            issues.append('Missing location')
-        if not asset.get('purchase_date'):
-            issues.append('Missing purchase date')
-        if DataQualityCleaner.clean_numeric(asset.get('price', 0)) == 0:
-            issues.append('Zero or invalid price')
-        
-        if issues:
-            problematic_assets.append({
-                'name': asset['name'],
-                'issues': issues
-            })
+    from utils.pagination import clamp_limit
+    from utils.quality_index import ISSUE_LABELS
+    issue = request.args.get('issue') or None
+    if issue not in ISSUE_LABELS:
+        issue = None
+    try:
+        page_number = int(request.args.get('page', 1))
+    except ValueError:
+        page_number = 1
+
+    # Counters are kept up to date as assets change; no pass over the inventory here
+    quality_report = system.quality_index.report()
+    problems = system.quality_index.problems(page=page_number,
+                                             per_page=clamp_limit(request.args.get('per_page')),
+                                             issue=issue)
     
     return render_template('data_quality.html',
                          title='Data Quality Dashboard',
                          quality_report=quality_report,
-                         problematic_assets=problematic_assets)
+                         problematic_assets=problems['items'],
+                         problems=problems,
+                         issue=issue,
+                         issue_labels=ISSUE_LABELS)
 
 
 @app.route('/data-quality/clean', methods=['POST'])
@@ -1946,41 +2056,16 @@ def clean_data():
         return redirect(url_for('data_quality_dashboard'))
     
     try:
+        from utils.bulk_clean import clean_inventory
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all assets
-        cursor.execute("SELECT name, category, supplier, location, price, quantity FROM inventory")
-        assets = cursor.fetchall()
-        
-        cleaned_count = 0
-        for asset in assets:
-            name, category, supplier, location, price, quantity = asset
-            
-            # Standardize
-            clean_category = DataQualityCleaner.standardize_category(category)
-            clean_supplier = DataQualityCleaner.standardize_supplier(supplier)
-            clean_location = DataQualityCleaner.standardize_location(location)
-            clean_price = DataQualityCleaner.clean_numeric(price)
-            
-            # Update if changed
-            if (clean_category != category or clean_supplier != supplier or 
-                clean_location != location or clean_price != price):
-                
-                cursor.execute("""
-                    UPDATE inventory 
-                    SET category = %s, supplier = %s, location = %s, price = %s
-                    WHERE name = %s
-                """, (clean_category, clean_supplier, clean_location, clean_price, name))
-                
-                cleaned_count += 1
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        try:
+            result = clean_inventory(conn, events=system.events, username=session.get('username'))
+        finally:
+            conn.close()
+        cleaned_count = result['assets']
         
-        # Reload system inventory
-        system.load_inventory()
+        # The 'cleaned' event reloads the in-memory inventory
+        system.events.publish()
         
         flash(f'✅ Successfully cleaned and standardized {cleaned_count} assets!', 'success')
         
@@ -1993,86 +2078,23 @@ def clean_data():
 @app.route('/data-quality/enrich', methods=['POST'])
 @login_required
 def enrich_data():
-    """Enrich asset data with calculated fields"""
+    """Enrich asset data with calculated fields (only assets changed since the last run unless full=1)"""
     if not validate_csrf_token():
         flash('Invalid CSRF token. Please try again.', 'error')
         return redirect(url_for('data_quality_dashboard'))
     
+    from utils.enrichment import enrich_inventory
+    incremental = request.form.get('full') != '1'
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if calculated columns exist, if not add them
-        cursor.execute("SHOW COLUMNS FROM inventory LIKE 'age_years'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE inventory ADD COLUMN age_years DECIMAL(10,2) DEFAULT 0")
-        
-        cursor.execute("SHOW COLUMNS FROM inventory LIKE 'depreciation_value'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE inventory ADD COLUMN depreciation_value DECIMAL(15,2) DEFAULT 0")
-        
-        cursor.execute("SHOW COLUMNS FROM inventory LIKE 'book_value'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE inventory ADD COLUMN book_value DECIMAL(15,2) DEFAULT 0")
-        
-        cursor.execute("SHOW COLUMNS FROM inventory LIKE 'lifecycle_status'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE inventory ADD COLUMN lifecycle_status VARCHAR(50) DEFAULT 'Unknown'")
-        
-        cursor.execute("SHOW COLUMNS FROM inventory LIKE 'risk_level'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE inventory ADD COLUMN risk_level VARCHAR(20) DEFAULT 'Low'")
-        
-        # Get all assets
-        cursor.execute("SELECT name, category, supplier, location, price, quantity, purchase_date FROM inventory")
-        assets = cursor.fetchall()
-        
-        enriched_count = 0
-        for asset in assets:
-            name, category, supplier, location, price, quantity, purchase_date = asset
-            
-            # Create asset dict
-            asset_dict = {
-                'name': name,
-                'category': category,
-                'supplier': supplier,
-                'location': location,
-                'price': price,
-                'quantity': quantity,
-                'purchase_date': purchase_date
-            }
-            
-            # Enrich
-            enriched = DataQualityCleaner.enrich_asset_data(asset_dict)
-            
-            # Update with calculated fields
-            cursor.execute("""
-                UPDATE inventory 
-                SET age_years = %s, 
-                    depreciation_value = %s,
-                    book_value = %s,
-                    lifecycle_status = %s,
-                    risk_level = %s
-                WHERE name = %s
-            """, (
-                enriched.get('age_years', 0),
-                enriched.get('accumulated_depreciation', 0),
-                enriched.get('book_value', price),
-                enriched.get('lifecycle_status', 'Unknown'),
-                enriched.get('risk_level', 'Low'),
-                name
-            ))
-            
-            enriched_count += 1
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        # Reload system inventory
-        system.load_inventory()
-        
-        flash(f'✅ Successfully enriched {enriched_count} assets with calculated fields!', 'success')
+        try:
+            result = enrich_inventory(conn, incremental=incremental, events=system.events)
+        finally:
+            conn.close()
+        # The calculated columns are not part of the in-memory inventory cache, so no reload
+        system.events.publish()
+        scope = 'changed' if incremental else 'all'
+        flash(f"✅ Enriched {scope} assets: {result['updated']} of {result['examined']} updated with new calculated values.", 'success')
         
     except Exception as e:
         flash(f'Error enriching data: {str(e)}', 'error')
@@ -2080,6 +2102,239 @@ def enrich_data():
     return redirect(url_for('data_quality_dashboard'))
 
 
+def _queue_duplicates(names):
+    """Check newly added assets against their blocks and queue suspected duplicates; returns pairs queued"""
+    from utils.duplicates import enqueue_matches
+    matches = {}
+    for name in names:
+        for match in system.duplicate_index.matches(name):
+            matches[match[:2]] = match
+    if not matches:
+        return 0
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            enqueue_matches(cursor, list(matches.values()))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        print(f"Warning queueing duplicate candidates: {e}")
+        return 0
+    return len(matches)
+
+
+@app.route('/data-quality/duplicates', methods=['GET', 'POST'])
+@login_required
+def duplicate_review():
+    """Review queue of suspected duplicate assets; POST runs a full scan"""
+    from utils.duplicates import enqueue_matches, pending_reviews
+    from utils.pagination import clamp_limit
+    if request.method == 'POST':
+        if not validate_csrf_token():
+            flash('Invalid CSRF token. Please try again.', 'error')
+            return redirect(url_for('duplicate_review'))
+        try:
+            # Single-process scorer: never fork from a request thread (the mail,
+            # digest and alert threads may hold locks); use find_duplicates.py for
+            # parallel scans of large inventories
+            result = system.duplicate_index.scan(workers=1)
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                enqueue_matches(cursor, result['matches'])
+                conn.commit()
+            finally:
+                cursor.close()
+                conn.close()
+            flash(f"✅ Compared {result['pairs']:,} candidate pairs across {result['assets']:,} assets: "
+                  f"{len(result['matches'])} suspected duplicate(s).", 'success')
+        except Exception as e:
+            flash(f'Error scanning for duplicates: {str(e)}', 'error')
+        return redirect(url_for('duplicate_review'))
+
+    page_number = request.args.get('page', 1, type=int) or 1
+    reviews = {'items': [], 'page': page_number, 'per_page': 0, 'has_prev': False, 'has_next': False}
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            reviews = pending_reviews(cursor, page_number, clamp_limit(request.args.get('per_page')))
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        flash(f'Error loading the duplicate review queue: {str(e)}', 'error')
+    return render_template('data_quality_duplicates.html', title='Duplicate Assets', reviews=reviews)
+
+
+@app.route('/data-quality/duplicates/<int:review_id>', methods=['POST'])
+@login_required
+def resolve_duplicate(review_id):
+    from utils.duplicates import resolve_review
+    if not validate_csrf_token():
+        flash('Invalid CSRF token. Please try again.', 'error')
+        return redirect(url_for('duplicate_review'))
+    status = request.form.get('status')
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            found = resolve_review(cursor, review_id, status, session.get('username'))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        if found:
+            flash('Marked as duplicate.' if status == 'duplicate' else 'Marked as not a duplicate.', 'success')
+        else:
+            flash('Review item not found.', 'error')
+    except ValueError:
+        flash('Invalid review decision.', 'error')
+    except Exception as e:
+        flash(f'Error saving review: {str(e)}', 'error')
+    return redirect(url_for('duplicate_review', page=request.form.get('page', 1, type=int)))
+
+
+# ---- Chunked attachment uploads ----
+def _upload_sessions():
+    from utils.chunked_upload import get_upload_sessions
+    return get_upload_sessions(app.config['UPLOAD_FOLDER'])
+
+
+def _collect_attachments(purpose, *fields):
+    """
+    Attachments submitted with a form: completed chunked uploads named in
+    ``upload_ids`` plus any plain multipart files in ``fields``, all stored in
+    the content-addressed blob store. Returns filename, mimetype, size,
+    sha256 and saved_filename (blob path relative to UPLOAD_FOLDER) per file.
+    """
+    sessions = _upload_sessions()
+    attachments = []
+    for upload_id in request.form.getlist('upload_ids'):
+        if upload_id:
+            attachments.append(sessions.claim(upload_id, session.get('username'), purpose))
+    files = [file for field in fields for file in request.files.getlist(field)]
+    for file in files:
+        if file and file.filename:
+            sha256, size = sessions.store.put_stream(file.stream)
+            attachments.append({
+                'filename': os.path.basename(file.filename.replace('\\', '/')),
+                'mimetype': file.mimetype,
+                'size': size,
+                'sha256': sha256,
+                'saved_filename': sessions.store.relative_path(sha256),
+            })
+    _make_thumbnails(attachments)
+    return attachments
+
+
+def _insert_apo_files(cursor, apo_id, attachments):
+    """apo_files rows for stored attachments plus the matching file_count and blob reference bumps"""
+    from utils.blob_store import retain_blob
+    for attachment in attachments:
+        cursor.execute("""
+            INSERT INTO apo_files (apo_id, original_filename, saved_filename, sha256,
+                                  file_size, file_type, uploaded_by)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (apo_id, attachment['filename'], attachment['saved_filename'], attachment['sha256'],
+              attachment['size'], attachment['mimetype'], session.get('username')))
+        retain_blob(cursor, attachment['sha256'], attachment['size'])
+    add_file_count(cursor, apo_id, len(attachments))
+
+
+def _make_thumbnails(attachments):
+    """Gallery thumbnails for new attachments; a failure only defers them to first view"""
+    from utils.thumbnails import generate_upload_variants
+    try:
+        generate_upload_variants(app.config['UPLOAD_FOLDER'], attachments)
+    except Exception as e:
+        print(f"Thumbnail generation failed: {e}")
+
+
+def _insert_contract_files(attachments, contract_number=None):
+    """contract_files rows (and blob references) for stored contract attachments"""
+    from utils.blob_store import retain_blob
+    if not attachments:
+        return
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for attachment in attachments:
+            cursor.execute("""
+                INSERT INTO contract_files (contract_number, original_filename, saved_filename, sha256,
+                                            file_size, file_type, uploaded_by)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (contract_number or None, attachment['filename'], attachment['saved_filename'],
+                  attachment['sha256'], attachment['size'], attachment['mimetype'],
+                  session.get('username')))
+            retain_blob(cursor, attachment['sha256'], attachment['size'])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@app.route('/api/uploads', methods=['POST'])
+@login_required
+def api_upload_create():
+    """Start a chunked upload: {filename, size, purpose, mimetype?, chunk_size?}"""
+    if not validate_csrf_token():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = _upload_sessions().create(data.get('filename'), data.get('size'), session.get('username'),
+                                           data.get('purpose'), data.get('mimetype'), data.get('chunk_size'))
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify(upload), 201
+
+
+@app.route('/api/uploads/<upload_id>')
+@login_required
+def api_upload_status(upload_id):
+    """Chunks received so far, for resuming after a dropped connection"""
+    try:
+        return jsonify(_upload_sessions().status(upload_id, session.get('username')))
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
+@app.route('/api/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+@login_required
+def api_upload_chunk(upload_id, index):
+    """Raw chunk body with X-Chunk-SHA256 (or X-Chunk-CRC32) checksum header"""
+    if not validate_csrf_token():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    if request.headers.get('X-Chunk-SHA256'):
+        algorithm, checksum = 'sha256', request.headers.get('X-Chunk-SHA256')
+    else:
+        algorithm, checksum = 'crc32', request.headers.get('X-Chunk-CRC32')
+    try:
+        result = _upload_sessions().write_chunk(upload_id, index, request.stream, session.get('username'),
+                                                checksum, algorithm)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify(result)
+
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+def api_upload_complete(upload_id):
+    """Assemble the chunks; the returned upload_id is then submitted with the form"""
+    if not validate_csrf_token():
+        return jsonify({'error': 'Invalid CSRF token'}), 403
+    try:
+        return jsonify(_upload_sessions().complete(upload_id, session.get('username')))
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
 # ---- Advances submenu routes ----
 @app.route('/contracts')
 @login_required
@@ -2106,23 +2361,16 @@ def contracts_add():
         contact_person = request.form.get('contact_person')
         description = request.form.get('description')
         
-        # Handle file uploads
-        uploaded_files = []
-        if 'contract_files' in request.files:
-            files = request.files.getlist('contract_files')
-            upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], 'contracts')
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            for file in files:
-                if file and file.filename:
-                    # Secure the filename
-                    from werkzeug.utils import secure_filename
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    unique_filename = f"{timestamp}_{filename}"
-                    filepath = os.path.join(upload_folder, unique_filename)
-                    file.save(filepath)
-                    uploaded_files.append(unique_filename)
+        # Handle file uploads (chunked upload ids and/or plain multipart files)
+        try:
+            uploaded_files = _collect_attachments('contracts', 'contract_files')
+            _insert_contract_files(uploaded_files, contract_number)
+        except UploadError as e:
+            flash(f'Error attaching files: {e}', 'error')
+            return redirect(url_for('contracts_add'))
+        except Exception as e:
+            flash(f'Error saving contract files: {e}', 'error')
+            return redirect(url_for('contracts_add'))
         
         # TODO: Save contract data to database
         
@@ -2137,30 +2385,19 @@ def contracts_upload():
     if not validate_csrf_token():
         return jsonify({'error': 'Invalid CSRF token'}), 403
     try:
-        if 'contract_files' not in request.files:
+        attachments = _collect_attachments('contracts', 'contract_files')
+        if not attachments:
             return jsonify({'error': 'No files provided'}), 400
+        _insert_contract_files(attachments)
         
-        files = request.files.getlist('contract_files')
-        upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], 'contracts')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        uploaded_files = []
-        for file in files:
-            if file and file.filename:
-                from werkzeug.utils import secure_filename
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_filename = f"{timestamp}_{filename}"
-                filepath = os.path.join(upload_folder, unique_filename)
-                file.save(filepath)
-                uploaded_files.append({
-                    'original_name': file.filename,
-                    'saved_name': unique_filename,
-                    'path': filepath
-                })
+        uploaded_files = [{
+            'original_name': a['filename'],
+            'saved_name': a['saved_filename'],
+            'sha256': a['sha256'],
+            'size': a['size'],
+        } for a in attachments]
         
         # TODO: Parse contract files and extract information
-        # TODO: Save to database
         
         return jsonify({
             'success': True,
@@ -2168,6 +2405,8 @@ def contracts_upload():
             'files': uploaded_files
         }), 200
     
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2237,31 +2476,9 @@ def apo_add():
             
             apo_id = cursor.lastrowid
             
-            # Handle file uploads
-            uploaded_files = []
-            if 'apo_files' in request.files:
-                files = request.files.getlist('apo_files')
-                upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], 'apo')
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                for file in files:
-                    if file and file.filename:
-                        from werkzeug.utils import secure_filename
-                        filename = secure_filename(file.filename)
-                        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        unique_filename = f"{timestamp}_{filename}"
-                        filepath = os.path.join(upload_folder, unique_filename)
-                        file.save(filepath)
-                        
-                        # Save file info to database
-                        cursor.execute("""
-                            INSERT INTO apo_files (apo_id, original_filename, saved_filename, 
-                                                  file_size, uploaded_by)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """, (apo_id, file.filename, unique_filename, 
-                              file.content_length or 0, session.get('username')))
-                        
-                        uploaded_files.append(unique_filename)
+            # Handle file uploads (chunked upload ids and/or plain multipart files)
+            uploaded_files = _collect_attachments('apo', 'apo_files')
+            _insert_apo_files(cursor, apo_id, uploaded_files)
             
             conn.commit()
             cursor.close()
@@ -2281,28 +2498,57 @@ def apo_add():
 @app.route('/apo/list')
 @login_required
 def apo_list():
-    """View all Asset Purchase Orders"""
+    """Keyset-paginated Asset Purchase Orders (newest first) with status/supplier/date filters"""
+    from utils.apo import APO_STATUSES, parse_apo_filters, filter_query_args, fetch_apo_page
+    filters = parse_apo_filters(request.args)
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT a.*, 
-                   COUNT(af.id) as file_count
-            FROM apo a
-            LEFT JOIN apo_files af ON a.id = af.apo_id
-            GROUP BY a.id
-            ORDER BY a.apo_date DESC, a.created_at DESC
-        """)
-        apos = cursor.fetchall()
-        
+        page = fetch_apo_page(cursor, filters,
+                              after=request.args.get('after'),
+                              before=request.args.get('before'),
+                              limit=request.args.get('limit'))
         cursor.close()
         conn.close()
-        
-        return render_template('apo_list.html', title='Asset Purchase Orders', apos=apos)
     except Exception as e:
         flash(f'Error loading APOs: {str(e)}', 'error')
-        return render_template('apo_list.html', title='Asset Purchase Orders', apos=[])
+        page = {'apos': [], 'next_cursor': None, 'prev_cursor': None, 'limit': 0}
+
+    return render_template('apo_list.html', title='Asset Purchase Orders',
+                           lpos=page['apos'],
+                           next_cursor=page['next_cursor'],
+                           prev_cursor=page['prev_cursor'],
+                           limit=page['limit'],
+                           filters=filter_query_args(filters),
+                           statuses=APO_STATUSES,
+                           suppliers=sorted(system.suppliers.keys()))
+
+
+@app.route('/api/apo')
+@login_required
+def api_apo_list():
+    """JSON feed of purchase orders; follow next_cursor for older orders"""
+    from utils.apo import parse_apo_filters, fetch_apo_page
+    filters = parse_apo_filters(request.args)
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        page = fetch_apo_page(cursor, filters,
+                              after=request.args.get('after'),
+                              before=request.args.get('before'),
+                              limit=request.args.get('limit'))
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    for apo in page['apos']:
+        for key in ('apo_date', 'delivery_date'):
+            if isinstance(apo.get(key), date):
+                apo[key] = apo[key].isoformat()
+        if apo.get('amount') is not None:
+            apo['amount'] = float(apo['amount'])
+    return jsonify(page)
 
 @app.route('/apo/upload', methods=['POST'])
 @login_required
@@ -2316,33 +2562,22 @@ def apo_upload():
         if not apo_id:
             return jsonify({'error': 'APO ID is required'}), 400
         
-        if 'files[]' not in request.files:
-            return jsonify({'error': 'No files provided'}), 400
-        
-        files = request.files.getlist('files[]')
-        upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], 'apo')
-        os.makedirs(upload_folder, exist_ok=True)
-        
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        uploaded_files = []
-        for file in files:
-            if file and file.filename:
-                from werkzeug.utils import secure_filename
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_filename = f"{timestamp}_{filename}"
-                filepath = os.path.join(upload_folder, unique_filename)
-                file.save(filepath)
-                
-                # Save to database
-                cursor.execute("""
-                    INSERT INTO apo_files (apo_id, filename, file_path, uploaded_by)
-                    VALUES (%s, %s, %s, %s)
-                """, (apo_id, filename, filepath, session.get('username')))
-                
-                uploaded_files.append(filename)
+        cursor.execute("SELECT id FROM apo WHERE id = %s", (apo_id,))
+        if cursor.fetchone() is None:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'APO not found'}), 404
+        
+        # The list page's modal sends apo_files (or chunked upload ids), older clients files[]
+        uploaded_files = _collect_attachments('apo', 'apo_files', 'files[]')
+        if not uploaded_files:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'No files provided'}), 400
+        _insert_apo_files(cursor, apo_id, uploaded_files)
         
         conn.commit()
         cursor.close()
@@ -2351,8 +2586,10 @@ def apo_upload():
         return jsonify({
             'success': True,
             'message': f'{len(uploaded_files)} file(s) uploaded successfully',
-            'files': uploaded_files
+            'files': [f['filename'] for f in uploaded_files]
         })
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2360,14 +2597,24 @@ def apo_upload():
 @login_required
 def customers():
     """Display all customers"""
+    from utils.people_search import search_clause
+    search_query = request.args.get('search', '').strip()
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT * FROM customers 
-            ORDER BY status ASC, company_name ASC
-        """)
+        clause = search_clause(conn, 'customers', search_query)
+        if clause is not None:
+            cursor.execute(f"""
+                SELECT *, {clause.rank} AS relevance FROM customers
+                WHERE {clause.where}
+                ORDER BY relevance DESC, status ASC, company_name ASC
+            """, clause.rank_params + clause.params)
+        else:
+            cursor.execute("""
+                SELECT * FROM customers 
+                ORDER BY status ASC, company_name ASC
+            """)
         customers_list = cursor.fetchall()
         
         # Count active customers
@@ -2385,11 +2632,13 @@ def customers():
                              customers=customers_list,
                              active_count=active_count,
                              total_assigned_assets=total_assigned_assets,
-                             total_value=total_value)
+                             total_value=total_value,
+                             search_query=search_query)
     except Exception as e:
         flash(f'Error loading customers: {str(e)}', 'error')
         return render_template('customers.html', title='Customers Management', 
-                             customers=[], active_count=0, total_assigned_assets=0, total_value=0)
+                             customers=[], active_count=0, total_assigned_assets=0, total_value=0,
+                             search_query=search_query)
 
 @app.route('/customers/add', methods=['POST'])
 @login_required
@@ -2435,6 +2684,7 @@ def customers_add():
         """, (customer_code, company_name, contact_name, email, phone, mobile,
               address, city, state, country, postal_code, website, tax_id,
               customer_type, status, credit_limit, payment_terms, notes, created_by))
+        reindex_person(conn, 'customers', cursor.lastrowid)
         
         conn.commit()
         cursor.close()
@@ -2492,6 +2742,7 @@ def customers_edit(customer_id):
             """, (customer_code, company_name, contact_name, email, phone, mobile,
                   address, city, state, country, postal_code, website, tax_id,
                   customer_type, status, credit_limit, payment_terms, notes, customer_id))
+            reindex_person(conn, 'customers', customer_id)
             
             conn.commit()
             cursor.close()
@@ -2541,6 +2792,7 @@ def customers_delete(customer_id):
         
         if customer:
             cursor.execute("DELETE FROM customers WHERE id = %s", (customer_id,))
+            reindex_person(conn, 'customers', customer_id)
             conn.commit()
             flash(f'Customer "{customer["company_name"]}" deleted successfully', 'success')
         else:
@@ -2561,6 +2813,7 @@ def customers_delete(customer_id):
 @login_required
 def departments():
     """Display all departments with statistics"""
+    from utils.page_stats import cached_stats
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
@@ -2588,29 +2841,18 @@ def departments():
         cursor.execute(query, params)
         departments_list = cursor.fetchall()
         
-        # Calculate statistics
-        cursor.execute("SELECT COUNT(*) as total FROM departments WHERE is_active = TRUE")
-        active_count = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM departments")
-        total_count = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT SUM(budget) as total FROM departments WHERE is_active = TRUE")
-        result = cursor.fetchone()
-        total_budget = result['total'] if result['total'] else 0
-        
-        cursor.execute("SELECT COUNT(DISTINCT manager) as total FROM departments WHERE is_active = TRUE AND manager IS NOT NULL")
-        manager_count = cursor.fetchone()['total']
+        # Statistics in one cached aggregate query
+        stats = cached_stats(cursor, 'departments')
         
         cursor.close()
         conn.close()
         
         return render_template('departments.html',
                              departments=departments_list,
-                             active_count=active_count,
-                             total_count=total_count,
-                             total_budget=total_budget,
-                             manager_count=manager_count,
+                             active_count=stats['active_count'],
+                             total_count=stats['total_count'],
+                             total_budget=stats['total_budget'],
+                             manager_count=stats['manager_count'],
                              status_filter=status_filter,
                              search_query=search_query)
     except Exception as e:
@@ -2648,6 +2890,7 @@ def add_department():
         """, (name, code, description, manager, location, budget, phone, email, session.get('username')))
         
         conn.commit()
+        invalidate_stats()
         cursor.close()
         conn.close()
         
@@ -2714,6 +2957,7 @@ def update_department(dept_id):
         """, (name, code, description, manager, location, budget, phone, email, is_active, dept_id))
         
         conn.commit()
+        invalidate_stats()
         cursor.close()
         conn.close()
         
@@ -2742,6 +2986,7 @@ def delete_department(dept_id):
         if department:
             cursor.execute("DELETE FROM departments WHERE id = %s", (dept_id,))
             conn.commit()
+            invalidate_stats()
             flash(f'Department "{department["name"]}" deleted successfully', 'success')
         else:
             flash('Department not found', 'error')
@@ -2761,6 +3006,9 @@ def delete_department(dept_id):
 @login_required
 def employees():
     """Display all employees with statistics"""
+    from utils.page_stats import cached_stats
+    from utils.pagination import clamp_limit
+    from utils.people_search import search_clause
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
@@ -2771,70 +3019,79 @@ def employees():
         employment_type = request.args.get('employment_type', 'all')
         search_query = request.args.get('search', '').strip()
         
+        try:
+            page_number = int(request.args.get('page', 1))
+        except ValueError:
+            page_number = 1
+        per_page = clamp_limit(request.args.get('per_page'))
+        
         # Build query
-        query = """
-            SELECT e.*, d.name as department_name 
-            FROM employees e
-            LEFT JOIN departments d ON e.department_id = d.id
-            WHERE 1=1
-        """
+        conditions = []
         params = []
         
         if status_filter == 'active':
-            query += " AND e.is_active = TRUE"
+            conditions.append("e.is_active = TRUE")
         elif status_filter == 'inactive':
-            query += " AND e.is_active = FALSE"
+            conditions.append("e.is_active = FALSE")
             
         if department_filter != 'all':
-            query += " AND e.department_id = %s"
+            conditions.append("e.department_id = %s")
             params.append(department_filter)
             
         if employment_type != 'all':
-            query += " AND e.employment_type = %s"
+            conditions.append("e.employment_type = %s")
             params.append(employment_type)
-            
-        if search_query:
-            query += " AND (e.first_name LIKE %s OR e.last_name LIKE %s OR e.employee_id LIKE %s OR e.email LIKE %s OR e.position LIKE %s)"
-            search_param = f"%{search_query}%"
-            params.extend([search_param] * 5)
-        
-        query += " ORDER BY e.last_name ASC, e.first_name ASC"
         
-        cursor.execute(query, params)
+        # Page statistics and the filtered count in one (cached) aggregate query
+        filter_sql = ' AND '.join(conditions)
+        stats = cached_stats(cursor, 'employees', filter_sql or None, params, alias='e')
+        matched_count = stats['matched'] if filter_sql else stats['total_count']
+            
+        # FULLTEXT (or trigram) match, ranked, instead of leading-wildcard LIKEs
+        rank, rank_params = '0', []
+        clause = search_clause(conn, 'employees', search_query, alias='e')
+        if clause is not None:
+            conditions.append(clause.where)
+            params.extend(clause.params)
+            rank, rank_params = clause.rank, clause.rank_params
+        where = "WHERE " + (' AND '.join(conditions) or '1=1')
+        
+        if clause is not None:
+            cursor.execute(f"SELECT COUNT(*) as total FROM employees e {where}", params)
+            matched_count = cursor.fetchone()['total']
+        pages = max(1, math.ceil(matched_count / per_page))
+        page_number = min(max(1, page_number), pages)
+        
+        cursor.execute(f"""
+            SELECT e.*, d.name as department_name, {rank} as relevance
+            FROM employees e
+            LEFT JOIN departments d ON e.department_id = d.id
+            {where}
+            ORDER BY relevance DESC, e.last_name ASC, e.first_name ASC, e.id
+            LIMIT %s OFFSET %s
+        """, rank_params + params + [per_page, (page_number - 1) * per_page])
         employees_list = cursor.fetchall()
+        page = {'page': page_number, 'pages': pages, 'per_page': per_page, 'total': matched_count}
         
         # Get departments for filter dropdown
         cursor.execute("SELECT id, name FROM departments WHERE is_active = TRUE ORDER BY name")
         departments_list = cursor.fetchall()
         
-        # Calculate statistics
-        cursor.execute("SELECT COUNT(*) as total FROM employees WHERE is_active = TRUE")
-        active_count = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM employees")
-        total_count = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(DISTINCT department_id) as total FROM employees WHERE is_active = TRUE AND department_id IS NOT NULL")
-        dept_with_employees = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT SUM(salary) as total FROM employees WHERE is_active = TRUE")
-        result = cursor.fetchone()
-        total_salary = result['total'] if result['total'] else 0
-        
         cursor.close()
         conn.close()
         
         return render_template('employees.html',
                              employees=employees_list,
                              departments=departments_list,
-                             active_count=active_count,
-                             total_count=total_count,
-                             dept_with_employees=dept_with_employees,
-                             total_salary=total_salary,
+                             active_count=stats['active_count'],
+                             total_count=stats['total_count'],
+                             dept_with_employees=stats['dept_with_employees'],
+                             total_salary=stats['total_salary'],
                              status_filter=status_filter,
                              department_filter=department_filter,
                              employment_type=employment_type,
-                             search_query=search_query)
+                             search_query=search_query,
+                             page=page)
     except Exception as e:
         flash(f'Error loading employees: {str(e)}', 'error')
         return render_template('employees.html', employees=[], departments=[], active_count=0, total_count=0, dept_with_employees=0, total_salary=0)
@@ -2907,8 +3164,10 @@ def add_employee():
             ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """, (employee_id, first_name, last_name, email or None, phone, mobile, date_of_birth or None, gender or None,
               department_id or None, position, qualification, employment_type, hire_date or None, salary or None, address, city, notes, photo_path, session.get('username')))
+        reindex_person(conn, 'employees', cursor.lastrowid)
         
         conn.commit()
+        invalidate_stats()
         cursor.close()
         conn.close()
         
@@ -3065,8 +3324,10 @@ def update_employee(emp_id):
               gender or None, department_id or None, position, qualification, employment_type, hire_date or None, 
               termination_date or None, salary or None, address, city, emergency_contact_name, 
               emergency_contact_phone, notes, is_active, photo_path, emp_id))
+        reindex_person(conn, 'employees', emp_id)
         
         conn.commit()
+        invalidate_stats()
         cursor.close()
         conn.close()
         
@@ -3094,7 +3355,9 @@ def delete_employee(emp_id):
         
         if employee:
             cursor.execute("DELETE FROM employees WHERE id = %s", (emp_id,))
+            reindex_person(conn, 'employees', emp_id)
             conn.commit()
+            invalidate_stats()
             flash(f'Employee "{employee["first_name"]} {employee["last_name"]}" deleted successfully', 'success')
         else:
             flash('Employee not found', 'error')
@@ -3172,6 +3435,7 @@ def import_data():
                     df = pd.read_excel(filepath)
                     iterator = df.iterrows()
 
+                imported, skipped = [], []
                 for _, row in iterator:
                     # row can be a pandas Series or a dict
                     name = str(row.get('name', '')).strip()
@@ -3183,9 +3447,20 @@ def import_data():
                     thresh = int(row.get('low_stock_threshold', 5) or 5)
                     cat = str(row.get('category', 'Uncategorized') or 'Uncategorized')
                     sup = str(row.get('supplier', 'Unknown') or 'Unknown')
-                    system.add_item(name, qty, price, desc, thresh, cat, sup)
+                    try:
+                        system.add_item(name, qty, price, desc, thresh, cat, sup, username=session.get('username'))
+                    except Exception as e:
+                        skipped.append(f'{name}: {e}')
+                        continue
+                    imported.append(name)
                 os.remove(filepath)
-                flash('Import successful', 'success')
+                flash(f'Import successful: {len(imported)} asset(s) added', 'success')
+                if skipped:
+                    more = f' (and {len(skipped) - 5} more)' if len(skipped) > 5 else ''
+                    flash(f'{len(skipped)} row(s) skipped: {"; ".join(skipped[:5])}{more}', 'warning')
+                suspected = _queue_duplicates(imported)
+                if suspected:
+                    flash(f'{suspected} suspected duplicate pair(s) queued for review.', 'warning')
                 return redirect(url_for('index'))
             except Exception as e:
                 try:
@@ -3199,29 +3474,167 @@ def import_data():
 
 
 # --- Asset listing route ---
-@app.route('/assets')
-def assets():
-    # Only allow logged-in users to view asset list
-    if not session.get('username'):
-        flash('Please log in to view assets', 'warning')
-        return redirect(url_for('login'))
-    
-    # Add depreciation calculation to each asset
-    assets_with_depreciation = []
-    for name, d in system.inventory.items():
+def _asset_listing_page():
+    """Resolve /assets query args (sort, order, filters, q, page, per_page) to one page of rows"""
+    from utils.asset_index import FILTER_FIELDS
+    from utils.pagination import clamp_limit
+    sort = request.args.get('sort', 'name')
+    descending = request.args.get('order', 'asc') == 'desc'
+    filters = {f: request.args.get(f, '').strip() for f in FILTER_FIELDS if request.args.get(f, '').strip()}
+    q = request.args.get('q', '').strip()
+    try:
+        page_number = int(request.args.get('page', 1))
+    except ValueError:
+        page_number = 1
+    per_page = clamp_limit(request.args.get('per_page'))
+
+    matches = system.search_index.search(q) if q else None
+    page = system.asset_index.page(sort=sort, descending=descending, filters=filters, matches=matches,
+                                   page=page_number, per_page=per_page)
+    # Depreciation only for the visible rows
+    rows = []
+    for name in page['names']:
+        d = system.inventory.get(name)
+        if d is None:
+            continue
         asset_copy = dict(d)
-        current_value = calculate_depreciation(
+        asset_copy['current_value'] = calculate_depreciation(
             d.get('price', 0),
             d.get('purchase_date'),
             d.get('salvage_value', 0),
             d.get('useful_life_years', 5),
             d.get('depreciation_method', 'straight_line')
         )
-        asset_copy['current_value'] = current_value
-        assets_with_depreciation.append((name, type('Obj', (), asset_copy)))
-    
-    assets_with_depreciation.sort(key=lambda x: x[0])
-    return render_template('assets.html', title='Asset List', assets=assets_with_depreciation, calculate_depreciation=calculate_depreciation)
+        rows.append((name, asset_copy))
+    query = {'sort': sort, 'order': 'desc' if descending else 'asc', 'per_page': per_page, 'q': q}
+    query.update(filters)
+    return rows, page, {k: v for k, v in query.items() if v}
+
+
+@app.route('/assets')
+def assets():
+    # Only allow logged-in users to view asset list
+    if not session.get('username'):
+        flash('Please log in to view assets', 'warning')
+        return redirect(url_for('login'))
+
+    from utils.asset_index import FILTER_FIELDS
+    rows, page, query = _asset_listing_page()
+    filter_options = {f: system.asset_index.filter_values(f) for f in FILTER_FIELDS}
+    return render_template('assets.html', title='Asset List', assets=rows, page=page, query=query,
+                           filter_options=filter_options)
+
+
+@app.route('/api/assets')
+@login_required
+def api_assets():
+    """JSON asset listing with the same sort/filter/page arguments as /assets"""
+    rows, page, query = _asset_listing_page()
+    items = []
+    for name, d in rows:
+        item = {'name': name}
+        item.update(d)
+        if isinstance(item.get('purchase_date'), date):
+            item['purchase_date'] = item['purchase_date'].isoformat()
+        items.append(item)
+    return jsonify({
+        'assets': items,
+        'total': page['total'],
+        'page': page['page'],
+        'pages': page['pages'],
+        'per_page': page['per_page'],
+        'query': query,
+    })
+
+
+@app.route('/api/assets/autocomplete')
+@login_required
+def api_assets_autocomplete():
+    """Ranked asset suggestions for a partial query (?q=lap del&limit=10); needs 2+ characters"""
+    from utils.pagination import clamp_limit
+    q = request.args.get('q', '').strip()
+    limit = clamp_limit(request.args.get('limit'), default=10, maximum=50)
+    results = system.search_index.autocomplete(q, limit=limit) if len(q) >= 2 else []
+    return jsonify({'q': q, 'results': results})
+
+
+@app.route('/api/events')
+@require_group('Admin', 'manager')
+def api_inventory_events():
+    """
+    Inventory change events after an id, oldest first (?after=0&limit=500&asset=...);
+    poll with the returned last_id. Events are served once a few seconds old, so
+    a transaction committing late cannot slip in behind last_id.
+    """
+    from utils.events import events_since
+    from utils.pagination import clamp_limit
+    after = request.args.get('after', 0, type=int) or 0
+    limit = clamp_limit(request.args.get('limit'), default=500, maximum=1000)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        events = events_since(cursor, after, limit, asset_name=request.args.get('asset') or None)
+    finally:
+        cursor.close()
+        conn.close()
+    return jsonify({
+        'events': [{
+            'id': e.id,
+            'action': e.action,
+            'asset': e.asset_name,
+            'changes': e.changes,
+            'username': e.username,
+            'created_at': e.created_at.isoformat() if e.created_at else None,
+        } for e in events],
+        'last_id': events[-1].id if events else after,
+    })
+
+
+def _people_search_api(entity, fields, filters):
+    """Shared body of the employee/customer search endpoints"""
+    from utils.pagination import clamp_limit
+    from utils.people_search import search
+    q = request.args.get('q', '').strip()
+    try:
+        page_number = int(request.args.get('page', 1))
+    except ValueError:
+        page_number = 1
+    per_page = clamp_limit(request.args.get('limit'), default=25, maximum=100)
+    conn = get_db_connection()
+    try:
+        result = search(conn, entity, q, page=page_number, per_page=per_page, filters=filters, fields=fields)
+    finally:
+        conn.close()
+    result['q'] = q
+    return jsonify(result)
+
+
+@app.route('/api/employees/search')
+@login_required
+def api_employees_search():
+    """Ranked employee search (?q=jane smith&page=1&limit=25&active=1&department=3)"""
+    filters = {}
+    if request.args.get('active') in ('0', '1'):
+        filters['is_active'] = request.args.get('active') == '1'
+    if request.args.get('department'):
+        filters['department_id'] = request.args.get('department')
+    if request.args.get('employment_type'):
+        filters['employment_type'] = request.args.get('employment_type')
+    return _people_search_api('employees', ('id', 'employee_id', 'first_name', 'last_name', 'email',
+                                            'position', 'department_id', 'is_active'), filters)
+
+
+@app.route('/api/customers/search')
+@login_required
+def api_customers_search():
+    """Ranked customer search (?q=acme&page=1&limit=25&status=Active&customer_type=Corporate)"""
+    filters = {}
+    if request.args.get('status'):
+        filters['status'] = request.args.get('status')
+    if request.args.get('customer_type'):
+        filters['customer_type'] = request.args.get('customer_type')
+    return _people_search_api('customers', ('id', 'customer_code', 'company_name', 'contact_name', 'email',
+                                            'city', 'country', 'status'), filters)
 
 
 @app.route('/view-asset/<asset_name>')
@@ -3282,7 +3695,7 @@ def assign_asset(asset_name):
         cursor = system.conn.cursor()
         cursor.execute('''
             UPDATE inventory 
-            SET department = %s, location = %s
+            SET department = %s, location = %s, version = version + 1
             WHERE name = %s
         ''', (department, location, asset_name))
         
@@ -3292,13 +3705,13 @@ def assign_asset(asset_name):
             (asset_name, action, quantity, person, department, location, notes, user_id)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         ''', (asset_name, 'assign', 1, person, department, location, notes, session.get('username')))
+        system.events.record(cursor, 'assigned', asset_name,
+                             {'person': person, 'department': department, 'location': location},
+                             session.get('username'))
         
         system.conn.commit()
         cursor.close()
-        
-        # Update in-memory inventory
-        system.inventory[asset_name]['department'] = department
-        system.inventory[asset_name]['location'] = location
+        system.events.publish()
         
         # Send email notification to the person receiving the asset
         try:
@@ -3322,7 +3735,7 @@ def assign_asset(asset_name):
                     'assignment_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 }
                 
-                send_asset_assignment_email(
+                queued = send_asset_assignment_email(
                     recipient_email=user_data['email'],
                     recipient_name=user_data.get('name', person),
                     asset_name=asset_name,
@@ -3330,7 +3743,10 @@ def assign_asset(asset_name):
                     assigned_by=session.get('username', 'System'),
                     notes=notes
                 )
-                flash(f'Asset "{asset_name}" successfully assigned to {person}. Email notification sent.', 'success')
+                if queued:
+                    flash(f'Asset "{asset_name}" successfully assigned to {person}. Email notification queued.', 'success')
+                else:
+                    flash(f'Asset "{asset_name}" successfully assigned to {person}. (Email notification failed)', 'success')
             else:
                 flash(f'Asset "{asset_name}" successfully assigned to {person}. (No email address found for notification)', 'success')
         except Exception as e:
@@ -3371,40 +3787,43 @@ def edit_asset(asset_name):
             useful_life_years = int(request.form.get('useful_life_years') or 5)
             salvage_value = float(request.form.get('salvage_value') or 0.0)
             
-            # Update in memory
-            system.inventory[asset_name].update({
-                'quantity': quantity,
-                'price': price,
-                'description': description,
-                'low_stock_threshold': low_stock_threshold,
-                'category': category,
-                'supplier': supplier,
-                'department': department if department else None,
-                'location': location if location else None,
-                'model': model if model else None,
-                'brand': brand if brand else None,
-                'serial_number': serial_number if serial_number else None,
-                'purchase_date': purchase_date if purchase_date else None,
-                'depreciation_method': depreciation_method,
-                'useful_life_years': useful_life_years,
-                'salvage_value': salvage_value
-            })
+            version = request.form.get('version', type=int)
             
-            # Update in database
+            # Update in database, only if nobody changed the asset since the form was loaded
             system.cursor.execute("""
                 UPDATE inventory 
                 SET quantity=%s, price=%s, description=%s, low_stock_threshold=%s, 
                     category=%s, supplier=%s, department=%s, location=%s,
                     model=%s, brand=%s, serial_number=%s, purchase_date=%s,
-                    depreciation_method=%s, useful_life_years=%s, salvage_value=%s
-                WHERE name=%s
+                    depreciation_method=%s, useful_life_years=%s, salvage_value=%s,
+                    version = version + 1
+                WHERE name=%s AND deleted_at IS NULL AND (%s IS NULL OR version = %s)
             """, (quantity, price, description, low_stock_threshold, category, supplier, 
                   department if department else None, location if location else None,
                   model if model else None, brand if brand else None, 
                   serial_number if serial_number else None, purchase_date if purchase_date else None,
                   depreciation_method, useful_life_years, salvage_value,
-                  asset_name))
+                  asset_name, version, version))
+            updated = system.cursor.rowcount > 0
+            if updated:
+                system.events.record(system.cursor, 'updated', asset_name, {
+                    'quantity': quantity, 'price': price, 'description': description,
+                    'low_stock_threshold': low_stock_threshold, 'category': category, 'supplier': supplier,
+                    'department': department or None, 'location': location or None, 'model': model or None,
+                    'brand': brand or None, 'serial_number': serial_number or None,
+                    'purchase_date': purchase_date or None, 'depreciation_method': depreciation_method,
+                    'useful_life_years': useful_life_years, 'salvage_value': salvage_value,
+                }, session.get('username'))
             system.conn.commit()
+            if updated:
+                # The cache subscriber reloads the row (with its new version)
+                system.events.publish()
+            else:
+                system.refresh_asset(asset_name)
+            if not updated:
+                flash(f'Asset "{asset_name}" was changed by someone else (e.g. a checkout) while you were editing. '
+                      'The form now shows the current values; please apply your changes again.', 'warning')
+                return redirect(url_for('edit_asset', asset_name=asset_name))
             
             flash(f'Asset "{asset_name}" updated successfully', 'success')
             return redirect(url_for('assets'))
@@ -3422,7 +3841,7 @@ def edit_asset(asset_name):
 @require_group('Admin', 'manager')
 def delete_asset(asset_name):
     try:
-        system.remove_item(asset_name)
+        system.remove_item(asset_name, username=session.get('username'))
         flash(f'Asset "{asset_name}" has been deleted successfully', 'success')
     except Exception as e:
         flash(f'Error deleting asset: {str(e)}', 'error')
@@ -3437,44 +3856,126 @@ def delete_selected_assets():
         flash('No assets selected', 'warning')
         return redirect(url_for('assets'))
     
-    deleted_count = 0
-    errors = []
-    
-    for asset_name in selected_assets:
-        try:
-            system.remove_item(asset_name)
-            deleted_count += 1
-        except Exception as e:
-            errors.append(f'{asset_name}: {str(e)}')
-    
-    if deleted_count > 0:
-        flash(f'Successfully deleted {deleted_count} asset(s)', 'success')
+    # 'retire' keeps the rows and their history as tombstones; 'delete' removes them
+    retire = request.form.get('mode') == 'retire'
+    try:
+        count = system.remove_items(selected_assets, soft=retire, username=session.get('username'))
+    except Exception as e:
+        flash(f'Error deleting assets: {str(e)}', 'error')
+        return redirect(url_for('assets'))
     
-    if errors:
-        flash(f'Errors: {"; ".join(errors)}', 'error')
+    if count > 0:
+        flash(f'Successfully {"retired" if retire else "deleted"} {count} asset(s)', 'success')
+    if count < len(set(selected_assets)):
+        flash(f'{len(set(selected_assets)) - count} selected asset(s) were not found', 'warning')
     
     return redirect(url_for('assets'))
 
 
+RETIRED_PER_PAGE = 100
+
+@app.route('/retired-assets')
+@require_group('Admin', 'manager')
+def retired_assets():
+    """Assets retired from the asset list, most recent first"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    rows = []
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT name, quantity, category, location, deleted_at FROM inventory
+                WHERE deleted_at IS NOT NULL ORDER BY deleted_at DESC, name
+                LIMIT %s OFFSET %s
+            """, (RETIRED_PER_PAGE + 1, (page - 1) * RETIRED_PER_PAGE))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        flash(f'Error loading retired assets: {str(e)}', 'error')
+    retired = {'items': rows[:RETIRED_PER_PAGE], 'page': page,
+               'has_prev': page > 1, 'has_next': len(rows) > RETIRED_PER_PAGE}
+    return render_template('retired_assets.html', title='Retired Assets', retired=retired)
+
+
+@app.route('/retired-assets/restore', methods=['POST'])
+@require_group('Admin', 'manager')
+def restore_retired_assets():
+    if not validate_csrf_token():
+        flash('Invalid CSRF token. Please try again.', 'error')
+        return redirect(url_for('retired_assets'))
+    selected_assets = request.form.getlist('selected_assets')
+    if not selected_assets:
+        flash('No assets selected', 'warning')
+        return redirect(url_for('retired_assets'))
+    try:
+        count = system.restore_items(selected_assets, username=session.get('username'))
+    except Exception as e:
+        flash(f'Error restoring assets: {str(e)}', 'error')
+        return redirect(url_for('retired_assets'))
+    if count > 0:
+        flash(f'Successfully restored {count} asset(s)', 'success')
+    if count < len(set(selected_assets)):
+        flash(f'{len(set(selected_assets)) - count} selected asset(s) were not retired', 'warning')
+    return redirect(url_for('retired_assets'))
+
+
 # --- Document Gallery ---
+def _gallery_page(kind):
+    from utils.gallery import fetch_gallery
+    page_number = request.args.get('page', 1, type=int) or 1
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return fetch_gallery(cursor, kind, page_number)
+    except Exception as e:
+        print(f"Gallery query failed: {e}")
+        return {'items': [], 'page': page_number, 'per_page': 0, 'has_prev': False, 'has_next': False}
+    finally:
+        cursor.close()
+        conn.close()
+
+
 @app.route('/document-gallery')
 @login_required
 def document_gallery():
-    return render_template('document_gallery.html', title='Document Gallery')
+    return render_template('document_gallery.html', title='Document Gallery', gallery=_gallery_page('documents'))
 
 
 # --- Image Gallery ---
 @app.route('/image-gallery')
 @login_required
 def image_gallery():
-    return render_template('image_gallery.html', title='Image Gallery')
+    return render_template('image_gallery.html', title='Image Gallery', gallery=_gallery_page('images'))
+
+
+@app.route('/thumbnails/<variant>/<sha256>')
+@login_required
+def thumbnail(variant, sha256):
+    """Cached WebP/JPEG variant of an attachment or avatar, rendered on first request"""
+    from utils.file_delivery import send_upload
+    from utils.thumbnails import VARIANTS, ensure_variant, output_formats, preferred_format
+    from utils.blob_store import is_sha256
+    if variant not in VARIANTS or not is_sha256(sha256):
+        abort(404)
+    preferred = preferred_format(request.headers.get('Accept'))
+    for fmt in [preferred] + [f for f in output_formats() if f != preferred]:
+        relative = ensure_variant(app.config['UPLOAD_FOLDER'], sha256, variant, fmt)
+        if relative:
+            response = send_upload(app.config['UPLOAD_FOLDER'], relative,
+                                   etag=f'{sha256}-{variant}-{fmt}', immutable=True)
+            response.vary.add('Accept')
+            return response
+    abort(404)
 
 
 # --- Lists Routes ---
 @app.route('/lists/assets')
 @login_required
 def lists_assets():
-    assets = sorted([(name, type('Obj', (), d)) for name, d in system.inventory.items()], key=lambda x: x[0])
+    assets = [(name, system.inventory[name]) for name in system.asset_index.sorted_names('name') if name in system.inventory]
     return render_template('lists_assets.html', title='Lists of Assets', assets=assets)
 
 
@@ -3495,225 +3996,68 @@ def lists_contracts():
 
 
 # --- Alerts Routes ---
-@app.route('/alerts/assets-past-due')
-@login_required
-def alerts_assets_past_due():
-    """Display assets that are past their due date for check-in"""
-    past_due_assets = []
+# Served from the precomputed alerts table (utils/alerts.py); the evaluator
+# thread rebuilds it every DATABASE_SETTINGS['alert_refresh_minutes'].
+def _render_alert_page(page, template, title, key, label):
+    from utils.alerts import fetch_alerts
+    rows = []
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        # Get checked out assets past their expected return date
-        cursor.execute("""
-            SELECT asset_name, checkout_date, expected_return_date, 
-                   checked_out_to, DATEDIFF(CURDATE(), expected_return_date) as days_overdue
-            FROM asset_checkout
-            WHERE status = 'checked_out' 
-            AND expected_return_date < CURDATE()
-            ORDER BY expected_return_date ASC
-        """)
-        rows = cursor.fetchall()
-        for row in rows:
-            past_due_assets.append({
-                'asset_name': row[0],
-                'checkout_date': row[1],
-                'expected_return_date': row[2],
-                'checked_out_to': row[3],
-                'days_overdue': row[4]
-            })
+        rows = fetch_alerts(cursor, page)
         cursor.close()
         conn.close()
     except Exception as e:
-        flash(f'Error loading past due assets: {str(e)}', 'error')
-    
-    return render_template('alerts_assets_past_due.html', 
-                         title='Assets Past Due', 
-                         past_due_assets=past_due_assets)
+        flash(f'Error loading {label}: {str(e)}', 'error')
+    return render_template(template, title=title, **{key: rows})
+
+
+@app.route('/alerts/assets-past-due')
+@login_required
+def alerts_assets_past_due():
+    """Display assets that are past their due date for check-in"""
+    return _render_alert_page('assets-past-due', 'alerts_assets_past_due.html',
+                              'Assets Past Due', 'past_due_assets', 'past due assets')
 
 
 @app.route('/alerts/contracts-expiring')
 @login_required
 def alerts_contracts_expiring():
     """Display contracts expiring within the next 30 days"""
-    expiring_contracts = []
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT contract_name, contract_type, start_date, end_date, 
-                   vendor, DATEDIFF(end_date, CURDATE()) as days_until_expiry
-            FROM contracts
-            WHERE end_date BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-            AND status != 'expired'
-            ORDER BY end_date ASC
-        """)
-        rows = cursor.fetchall()
-        for row in rows:
-            expiring_contracts.append({
-                'contract_name': row[0],
-                'contract_type': row[1],
-                'start_date': row[2],
-                'end_date': row[3],
-                'vendor': row[4],
-                'days_until_expiry': row[5]
-            })
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        flash(f'Error loading expiring contracts: {str(e)}', 'error')
-    
-    return render_template('alerts_contracts_expiring.html', 
-                         title='Contracts Expiring', 
-                         expiring_contracts=expiring_contracts)
+    return _render_alert_page('contracts-expiring', 'alerts_contracts_expiring.html',
+                              'Contracts Expiring', 'expiring_contracts', 'expiring contracts')
 
 
 @app.route('/alerts/leases-expiring')
 @login_required
 def alerts_leases_expiring():
     """Display leases expiring within the next 30 days"""
-    expiring_leases = []
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT asset_name, lease_start_date, lease_end_date, 
-                   lessor, monthly_payment, DATEDIFF(lease_end_date, CURDATE()) as days_until_expiry
-            FROM asset_leases
-            WHERE lease_end_date BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-            AND status = 'active'
-            ORDER BY lease_end_date ASC
-        """)
-        rows = cursor.fetchall()
-        for row in rows:
-            expiring_leases.append({
-                'asset_name': row[0],
-                'lease_start_date': row[1],
-                'lease_end_date': row[2],
-                'lessor': row[3],
-                'monthly_payment': row[4],
-                'days_until_expiry': row[5]
-            })
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        flash(f'Error loading expiring leases: {str(e)}', 'error')
-    
-    return render_template('alerts_leases_expiring.html', 
-                         title='Leases Expiring', 
-                         expiring_leases=expiring_leases)
+    return _render_alert_page('leases-expiring', 'alerts_leases_expiring.html',
+                              'Leases Expiring', 'expiring_leases', 'expiring leases')
 
 
 @app.route('/alerts/maintenance-due')
 @login_required
 def alerts_maintenance_due():
     """Display maintenance that is due within the next 7 days"""
-    maintenance_due = []
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        # Check if table exists first
-        cursor.execute("SHOW TABLES LIKE 'asset_maintenance'")
-        if cursor.fetchone():
-            cursor.execute("""
-                SELECT asset_name, maintenance_type, scheduled_date, 
-                       description, DATEDIFF(scheduled_date, CURDATE()) as days_until_due
-                FROM asset_maintenance
-                WHERE scheduled_date BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL 7 DAY)
-                AND status = 'scheduled'
-                ORDER BY scheduled_date ASC
-            """)
-            rows = cursor.fetchall()
-            for row in rows:
-                maintenance_due.append({
-                    'asset_name': row[0],
-                    'maintenance_type': row[1],
-                    'scheduled_date': row[2],
-                    'description': row[3],
-                    'days_until_due': row[4]
-                })
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        flash(f'Error loading maintenance due: {str(e)}', 'error')
-    
-    return render_template('alerts_maintenance_due.html', 
-                         title='Maintenance Due', 
-                         maintenance_due=maintenance_due)
+    return _render_alert_page('maintenance-due', 'alerts_maintenance_due.html',
+                              'Maintenance Due', 'maintenance_due', 'maintenance due')
 
 
 @app.route('/alerts/maintenance-overdue')
 @login_required
 def alerts_maintenance_overdue():
     """Display maintenance that is overdue"""
-    maintenance_overdue = []
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        # Check if table exists first
-        cursor.execute("SHOW TABLES LIKE 'asset_maintenance'")
-        if cursor.fetchone():
-            cursor.execute("""
-                SELECT asset_name, maintenance_type, scheduled_date, 
-                       description, DATEDIFF(CURDATE(), scheduled_date) as days_overdue
-                FROM asset_maintenance
-                WHERE scheduled_date < CURDATE()
-                AND status = 'scheduled'
-                ORDER BY scheduled_date ASC
-            """)
-            rows = cursor.fetchall()
-            for row in rows:
-                maintenance_overdue.append({
-                    'asset_name': row[0],
-                    'maintenance_type': row[1],
-                    'scheduled_date': row[2],
-                    'description': row[3],
-                    'days_overdue': row[4]
-                })
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        flash(f'Error loading overdue maintenance: {str(e)}', 'error')
-    
-    return render_template('alerts_maintenance_overdue.html', 
-                         title='Maintenance Overdue', 
-                         maintenance_overdue=maintenance_overdue)
+    return _render_alert_page('maintenance-overdue', 'alerts_maintenance_overdue.html',
+                              'Maintenance Overdue', 'maintenance_overdue', 'overdue maintenance')
 
 
 @app.route('/alerts/warranties-expiring')
 @login_required
 def alerts_warranties_expiring():
     """Display warranties expiring within the next 30 days"""
-    expiring_warranties = []
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT asset_name, warranty_start_date, warranty_end_date, 
-                   warranty_provider, coverage_details, 
-                   DATEDIFF(warranty_end_date, CURDATE()) as days_until_expiry
-            FROM asset_warranties
-            WHERE warranty_end_date BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-            AND status = 'active'
-            ORDER BY warranty_end_date ASC
-        """)
-        rows = cursor.fetchall()
-        for row in rows:
-            expiring_warranties.append({
-                'asset_name': row[0],
-                'warranty_start_date': row[1],
-                'warranty_end_date': row[2],
-                'warranty_provider': row[3],
-                'coverage_details': row[4],
-                'days_until_expiry': row[5]
-            })
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        flash(f'Error loading expiring warranties: {str(e)}', 'error')
-    
-    return render_template('alerts_warranties_expiring.html', 
-                         title='Warranties Expiring', 
-                         expiring_warranties=expiring_warranties)
+    return _render_alert_page('warranties-expiring', 'alerts_warranties_expiring.html',
+                              'Warranties Expiring', 'expiring_warranties', 'expiring warranties')
 
 
 # --- Reports Routes ---
@@ -3730,10 +4074,10 @@ def report_automated():
     recent_activity = []
     try:
         system.cursor.execute("""
-            SELECT transaction_date, asset_name, action, quantity, notes
+            SELECT created_at, asset_name, action, quantity, notes
             FROM asset_transactions
-            WHERE transaction_date >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-            ORDER BY transaction_date DESC
+            WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
+            ORDER BY created_at DESC
             LIMIT 20
         """)
         rows = system.cursor.fetchall()
@@ -4265,34 +4609,46 @@ def report_status():
 @app.route('/reports/transaction')
 @login_required
 def report_transaction():
-    # Get all transactions (both checkin and checkout)
+    # Keyset-paginated transaction history (newest first) with optional filters
+    from utils.transactions import (parse_transaction_filters, filter_query_args,
+                                    fetch_transaction_page, TRANSACTION_ACTIONS)
+    filters = parse_transaction_filters(request.args)
     try:
-        system.cursor.execute("""
-            SELECT t.id, t.asset_name, t.action, t.quantity, t.person, t.department, 
-                   t.location, t.username, t.created_at
-            FROM asset_transactions t
-            ORDER BY t.created_at DESC
-            LIMIT 100
-        """)
-        transactions = system.cursor.fetchall()
-        
-        transaction_data = []
-        for row in transactions:
-            transaction_data.append({
-                'id': row[0],
-                'item_name': row[1],
-                'action': row[2],
-                'quantity': row[3],
-                'person': row[4],
-                'department': row[5],
-                'location': row[6],
-                'username': row[7],
-                'created_at': row[8]
-            })
-        
-        return render_template('report_transaction.html', title='Transaction Report', transactions=transaction_data)
+        page = fetch_transaction_page(system.cursor, filters,
+                                      after=request.args.get('after'),
+                                      before=request.args.get('before'),
+                                      limit=request.args.get('limit'))
     except Exception as e:
-        return render_template('report_transaction.html', title='Transaction Report', transactions=[])
+        flash(f'Error loading transactions: {str(e)}', 'error')
+        page = {'transactions': [], 'next_cursor': None, 'prev_cursor': None, 'limit': 0}
+
+    return render_template('report_transaction.html', title='Transaction Report',
+                           transactions=page['transactions'],
+                           next_cursor=page['next_cursor'],
+                           prev_cursor=page['prev_cursor'],
+                           limit=page['limit'],
+                           filters=filter_query_args(filters),
+                           actions=TRANSACTION_ACTIONS)
+
+
+@app.route('/api/reports/transactions')
+@login_required
+def api_transactions():
+    """JSON feed of the transaction history; follow next_cursor for older rows"""
+    from utils.transactions import parse_transaction_filters, fetch_transaction_page
+    filters = parse_transaction_filters(request.args)
+    try:
+        page = fetch_transaction_page(system.cursor, filters,
+                                      after=request.args.get('after'),
+                                      before=request.args.get('before'),
+                                      limit=request.args.get('limit'))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    for txn in page['transactions']:
+        if txn['created_at'] is not None:
+            txn['created_at'] = txn['created_at'].isoformat()
+    return jsonify(page)
 
 
 @app.route('/reports/other')
@@ -4597,26 +4953,17 @@ def export_transactions():
         date_to = request.form.get('date_to')
         
         try:
+            from utils.transactions import parse_transaction_filters, fetch_transactions_for_export
             conn = get_db_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = "SELECT * FROM asset_transactions WHERE 1=1"
-            params = []
-            
-            if transaction_type != 'all':
-                query += " AND action = %s"
-                params.append(transaction_type)
-            if date_from:
-                query += " AND timestamp >= %s"
-                params.append(date_from)
-            if date_to:
-                query += " AND timestamp <= %s"
-                params.append(date_to)
-            
-            query += " ORDER BY timestamp DESC"
-            
-            cursor.execute(query, params) if params else cursor.execute(query)
-            transactions = cursor.fetchall()
+            # Archived months are only read when the date range reaches them
+            filters = parse_transaction_filters({
+                'action': transaction_type if transaction_type != 'all' else '',
+                'date_from': date_from,
+                'date_to': date_to,
+            })
+            transactions = fetch_transactions_for_export(cursor, filters)
             cursor.close()
             conn.close()
             
@@ -4780,6 +5127,8 @@ def email_settings():
             EMAIL_CONFIG['smtp_server'] = smtp_server
             EMAIL_CONFIG['smtp_port'] = smtp_port
             EMAIL_CONFIG['enabled'] = email_enabled
+            from utils.mail_queue import reset_mail_queue
+            reset_mail_queue()
             
             flash('Email settings saved successfully!', 'success')
             return redirect(url_for('email_settings'))
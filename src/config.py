@@ -39,7 +39,17 @@ EMAIL_CONFIG = {
     "sender_password": os.getenv("EMAIL_PASSWORD", None),
     "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
     "smtp_port": int(os.getenv("SMTP_PORT", "587")),
-    "enabled": os.getenv("EMAIL_ENABLED", "False").lower() == "true"
+    "enabled": os.getenv("EMAIL_ENABLED", "False").lower() == "true",
+    # Low-stock and other system alerts
+    "recipient": os.getenv("EMAIL_RECIPIENT", None),
+    # Outbound queue (see utils/mail_queue.py); SMTP_STARTTLS=false for a local test SMTP server
+    "smtp_starttls": os.getenv("SMTP_STARTTLS", "True").lower() == "true",
+    "queue_path": os.getenv("MAIL_QUEUE_PATH", "/root/assetManagement/mail/mail_queue.sqlite3"),
+    "queue_workers": int(os.getenv("MAIL_QUEUE_WORKERS", "2")),
+    "pool_size": int(os.getenv("SMTP_POOL_SIZE", "2")),
+    "max_attempts": int(os.getenv("MAIL_MAX_ATTEMPTS", "8")),
+    # Alerts are batched per recipient and type and sent as one digest per window
+    "digest_window_minutes": int(os.getenv("ALERT_DIGEST_WINDOW_MINUTES", "10"))
 }
 
 # Flask Configuration
@@ -72,6 +82,15 @@ FLASK_CONFIG = {
     "MAX_CONTENT_LENGTH": int(os.getenv("MAX_UPLOAD_SIZE", str(16 * 1024 * 1024))),  # 16MB default
     "UPLOAD_FOLDER": os.getenv("UPLOAD_FOLDER", "/root/assetManagement/uploads"),
     "ALLOWED_EXTENSIONS": {"pdf", "png", "jpg", "jpeg", "gif", "doc", "docx", "xls", "xlsx", "csv", "txt"},
+    # Chunked, resumable attachment uploads (/api/uploads)
+    "UPLOAD_CHUNK_SIZE": int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024))),
+    "MAX_CHUNKED_UPLOAD_SIZE": int(os.getenv("MAX_CHUNKED_UPLOAD_SIZE", str(2 * 1024 ** 3))),  # 2GB
+    "UPLOAD_SESSION_TTL_HOURS": float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")),
+    # Unreferenced attachment blobs are kept this long before attachments.py gc deletes them
+    "BLOB_GC_GRACE_HOURS": float(os.getenv("BLOB_GC_GRACE_HOURS", "24")),
+    # How /uploads responses send file bytes: flask, x-accel (nginx) or x-sendfile (Apache/lighttpd)
+    "FILE_DELIVERY_MODE": os.getenv("FILE_DELIVERY_MODE", "flask").lower(),
+    "X_ACCEL_PREFIX": os.getenv("X_ACCEL_PREFIX", "/protected-uploads/"),
     # Rate limiting
     "RATELIMIT_ENABLED": os.getenv("RATELIMIT_ENABLED", "True").lower() == "true",
     "RATELIMIT_DEFAULT": os.getenv("RATELIMIT_DEFAULT", "200 per hour"),
@@ -98,5 +117,15 @@ DATABASE_SETTINGS = {
     "enable_query_logging": os.getenv("ENABLE_QUERY_LOGGING", "false").lower() == "true",
     "connection_pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
     "connection_timeout": int(os.getenv("DB_TIMEOUT", "30")),
-    "enable_auto_optimize": os.getenv("ENABLE_AUTO_OPTIMIZE", "false").lower() == "true"
+    "enable_auto_optimize": os.getenv("ENABLE_AUTO_OPTIMIZE", "false").lower() == "true",
+    # Transaction log partitioning / archiving (see archive_transactions.py)
+    "transaction_retention_months": int(os.getenv("TRANSACTION_RETENTION_MONTHS", "24")),
+    "transaction_partitions_ahead": int(os.getenv("TRANSACTION_PARTITIONS_AHEAD", "3")),
+    "transaction_archive_dir": os.getenv("TRANSACTION_ARCHIVE_DIR",
+                                         os.path.join(os.getenv("BACKUP_DIR", "/root/assetManagement/backups/"),
+                                                      "transactions")),
+    # Precomputed /alerts pages (utils/alerts.py)
+    "alert_refresh_minutes": int(os.getenv("ALERT_REFRESH_MINUTES", "15")),
+    # Inventory change outbox (utils/events.py), pruned by archive_transactions.py
+    "event_retention_days": int(os.getenv("EVENT_RETENTION_DAYS", "90"))
 }
@@ -0,0 +1,187 @@
+"""
+Versioned Schema Migrations
+Discovers numbered migrations in src/db/migrations and applies the pending ones in order.
+
+Migrations are either ``NNNN_description.sql`` files (statements separated by
+``;`` at the end of a line) or ``NNNN_description.py`` modules exposing
+``upgrade(cursor)``. Applied versions are recorded in ``schema_migrations``.
+MySQL commits DDL implicitly, so every migration is written to be safe to
+re-run if it fails half way.
+"""
+
+import hashlib
+import importlib.util
+import os
+import re
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+
+_FILENAME_RE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.(sql|py)$')
+
+Migration = namedtuple('Migration', ['version', 'name', 'path', 'kind'])
+
+
+def connect():
+    """Open a connection using the application's DB_CONFIG"""
+    import mysql.connector
+    from config import DB_CONFIG
+    return mysql.connector.connect(
+        host=DB_CONFIG['host'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        database=DB_CONFIG['database'],
+        port=DB_CONFIG.get('port', 3306)
+    )
+
+
+def discover_migrations(migrations_dir: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Return all migrations on disk ordered by version"""
+    found: Dict[int, Migration] = {}
+    for filename in os.listdir(migrations_dir):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in found:
+            raise ValueError(f"Duplicate migration version {version:04d}: {filename}")
+        found[version] = Migration(version, match.group(2), os.path.join(migrations_dir, filename), match.group(3))
+    return [found[v] for v in sorted(found)]
+
+
+def split_sql(script: str) -> List[str]:
+    """Split a migration script into statements, dropping ``--`` comment lines"""
+    statements, current = [], []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('--'):
+            continue
+        current.append(line)
+        if stripped.endswith(';'):
+            statement = '\n'.join(current).strip().rstrip(';').strip()
+            if statement:
+                statements.append(statement)
+            current = []
+    tail = '\n'.join(current).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def checksum(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# ---- Introspection helpers for idempotent Python migrations ----
+
+def table_exists(cursor, table: str) -> bool:
+    cursor.execute("""
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def column_names(cursor, table: str) -> set:
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return {r[0] for r in cursor.fetchall()}
+
+
+def index_names(cursor, table: str) -> set:
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return {r[0] for r in cursor.fetchall()}
+
+
+class MigrationRunner:
+    """Applies and reports on schema migrations for one connection"""
+
+    def __init__(self, conn, migrations_dir: str = MIGRATIONS_DIR):
+        self.conn = conn
+        self.migrations_dir = migrations_dir
+
+    def ensure_version_table(self):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.commit()
+        cursor.close()
+
+    def applied(self) -> Dict[int, dict]:
+        """Map of applied version -> {name, checksum, applied_at}"""
+        cursor = self.conn.cursor()
+        if not table_exists(cursor, 'schema_migrations'):
+            cursor.close()
+            return {}
+        cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations")
+        rows = {r[0]: {'name': r[1], 'checksum': r[2], 'applied_at': r[3]} for r in cursor.fetchall()}
+        cursor.close()
+        return rows
+
+    def pending(self) -> List[Migration]:
+        applied = self.applied()
+        return [m for m in discover_migrations(self.migrations_dir) if m.version not in applied]
+
+    def status(self) -> List[dict]:
+        """One entry per known migration with its applied state and checksum drift"""
+        applied = self.applied()
+        report = []
+        for m in discover_migrations(self.migrations_dir):
+            row = applied.get(m.version)
+            report.append({
+                'version': m.version,
+                'name': m.name,
+                'applied_at': row['applied_at'] if row else None,
+                'modified': bool(row) and row['checksum'] != checksum(m.path),
+            })
+        return report
+
+    def _apply(self, migration: Migration):
+        cursor = self.conn.cursor()
+        try:
+            if migration.kind == 'sql':
+                with open(migration.path, encoding='utf-8') as f:
+                    for statement in split_sql(f.read()):
+                        cursor.execute(statement)
+            else:
+                spec = importlib.util.spec_from_file_location(
+                    f"migration_{migration.version:04d}", migration.path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                module.upgrade(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, checksum(migration.path))
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def upgrade(self, target: Optional[int] = None, on_apply=None) -> List[Migration]:
+        """Apply pending migrations up to and including ``target`` (all when None)"""
+        self.ensure_version_table()
+        done = []
+        for migration in self.pending():
+            if target is not None and migration.version > target:
+                break
+            if on_apply:
+                on_apply(migration)
+            self._apply(migration)
+            done.append(migration)
+        return done
@@ -0,0 +1,24 @@
+"""
+Composite indexes matching the report query shapes on asset_transactions.
+
+Every report filters on one column and sorts by created_at (newest first), and
+the transaction report pages over (created_at, id), so each index ends in that
+sort key. idx_txn_asset_created also serves the asset_name foreign key.
+"""
+
+from db.migrate import index_names
+
+INDEXES = (
+    ('idx_txn_created', 'created_at, id'),
+    ('idx_txn_action_created', 'action, created_at, id'),
+    ('idx_txn_asset_created', 'asset_name, created_at, id'),
+    ('idx_txn_person_created', 'person, created_at, id'),
+    ('idx_txn_department_created', 'department, created_at, id'),
+)
+
+
+def upgrade(cursor):
+    existing = index_names(cursor, 'asset_transactions')
+    missing = [f'ADD INDEX {name} ({columns})' for name, columns in INDEXES if name not in existing]
+    if missing:
+        cursor.execute('ALTER TABLE asset_transactions ' + ', '.join(missing))
@@ -0,0 +1,10 @@
+-- Normalize asset_transactions.action from a free VARCHAR(50) to a 1-byte ENUM.
+-- Shrinks every row and the (action, created_at, id) index, and rejects typos.
+-- If the ALTER fails, list the offending values with
+--   SELECT DISTINCT action FROM asset_transactions;
+-- fix or extend them, then re-run: python migrate.py up
+
+UPDATE asset_transactions SET action = LOWER(TRIM(action)) WHERE action <> LOWER(TRIM(action));
+
+ALTER TABLE asset_transactions
+    MODIFY COLUMN action ENUM('checkout','checkin','assign','dispose','maintenance','move','reserve','lease','contract') NOT NULL;
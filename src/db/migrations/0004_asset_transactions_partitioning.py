@@ -0,0 +1,83 @@
+"""
+Monthly RANGE partitioning of asset_transactions plus the archive tables.
+
+MySQL does not allow foreign keys on partitioned tables and requires the
+partitioning column in every unique key, so the asset_name foreign key is
+dropped (InventorySystem.remove_item now deletes the history explicitly) and
+the primary key becomes (id, created_at). Rewrites the table; run off-hours
+on large databases.
+"""
+
+from datetime import date
+
+from db.transaction_archive import (ARCHIVE_TABLE, ARCHIVE_LOG_TABLE, HOT_TABLE,
+                                    add_months, month_range, month_start, partition_clause)
+
+MONTHS_AHEAD = 3
+
+
+def upgrade(cursor):
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+            id INT NOT NULL,
+            asset_name VARCHAR(255) NOT NULL,
+            action ENUM('checkout','checkin','assign','dispose','maintenance','move','reserve','lease','contract') NOT NULL,
+            quantity INT NOT NULL,
+            person VARCHAR(255),
+            department VARCHAR(255),
+            location VARCHAR(255),
+            notes TEXT,
+            username VARCHAR(255),
+            user_id VARCHAR(255),
+            created_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (id, created_at),
+            INDEX idx_txn_arch_created (created_at, id),
+            INDEX idx_txn_arch_action_created (action, created_at, id),
+            INDEX idx_txn_arch_asset_created (asset_name, created_at, id),
+            INDEX idx_txn_arch_person_created (person, created_at, id),
+            INDEX idx_txn_arch_department_created (department, created_at, id)
+        ) ROW_FORMAT=COMPRESSED
+    ''')
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_LOG_TABLE} (
+            partition_name VARCHAR(16) PRIMARY KEY,
+            range_start DATETIME NOT NULL,
+            range_end DATETIME NOT NULL,
+            row_count INT NOT NULL DEFAULT 0,
+            export_path VARCHAR(512),
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_archive_range_end (range_end)
+        )
+    ''')
+
+    cursor.execute("""
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    """, (HOT_TABLE,))
+    if cursor.fetchone()[0] > 0:
+        return
+
+    cursor.execute("""
+        SELECT CONSTRAINT_NAME FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_TYPE = 'FOREIGN KEY'
+    """, (HOT_TABLE,))
+    for (constraint,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {HOT_TABLE} DROP FOREIGN KEY `{constraint}`")
+
+    cursor.execute(f"""
+        ALTER TABLE {HOT_TABLE}
+            MODIFY COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (id, created_at)
+    """)
+
+    cursor.execute(f"SELECT MIN(created_at) FROM {HOT_TABLE}")
+    oldest = cursor.fetchone()[0]
+    this_month = month_start(date.today())
+    first = month_start(oldest.date()) if oldest else this_month
+    months = month_range(first, add_months(this_month, MONTHS_AHEAD))
+    cursor.execute(f"""
+        ALTER TABLE {HOT_TABLE} PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+            {partition_clause(months)}
+        )
+    """)
@@ -0,0 +1,18 @@
+-- Pending and recently sent alert events, batched into one digest email per
+-- (recipient, alert_type). The unique key deduplicates repeats of the same
+-- event; sent_at doubles as the throttle state (see utils/alert_digest.py).
+CREATE TABLE IF NOT EXISTS alert_digest_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    recipient VARCHAR(255) NOT NULL,
+    alert_type VARCHAR(32) NOT NULL,
+    dedup_key VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    summary VARCHAR(500) NOT NULL,
+    body TEXT,
+    occurrences INT NOT NULL DEFAULT 1,
+    first_seen_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME NULL,
+    UNIQUE KEY uq_digest_event (recipient, alert_type, dedup_key),
+    INDEX idx_digest_pending (sent_at, recipient, alert_type, first_seen_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
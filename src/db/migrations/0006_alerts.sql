@@ -0,0 +1,17 @@
+-- Precomputed alert rows served by the /alerts/* pages and the sidebar badge.
+-- Rebuilt per kind by utils/alerts.py (AlertEvaluator) from asset_checkout,
+-- contracts, asset_leases, asset_maintenance and asset_warranties; the pages
+-- only range-scan (kind, due_date).
+CREATE TABLE IF NOT EXISTS alerts (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(16) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    category VARCHAR(255),
+    party VARCHAR(255),
+    start_date DATE,
+    due_date DATE NOT NULL,
+    amount DECIMAL(12,2),
+    details TEXT,
+    computed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_alerts_kind_due (kind, due_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
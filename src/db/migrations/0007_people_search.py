@@ -0,0 +1,32 @@
+"""
+FULLTEXT search indexes on employees and customers, plus the search_ngrams
+trigram table that serves an entity when its FULLTEXT index cannot be created
+(see utils/people_search.py). The trigram rows are built here only for tables
+left without a FULLTEXT index.
+"""
+
+from db.migrate import index_names, table_exists
+from utils.people_search import NGRAM_TABLE, SEARCH_ENTITIES, rebuild_ngrams
+
+
+def upgrade(cursor):
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {NGRAM_TABLE} (
+            entity VARCHAR(16) NOT NULL,
+            entity_id INT NOT NULL,
+            gram VARCHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+            PRIMARY KEY (entity, gram, entity_id),
+            INDEX idx_search_ngrams_entity (entity, entity_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    ''')
+    for entity, spec in SEARCH_ENTITIES.items():
+        if not table_exists(cursor, spec['table']):
+            continue
+        if spec['index'] in index_names(cursor, spec['table']):
+            continue
+        try:
+            cursor.execute(f"ALTER TABLE {spec['table']} ADD FULLTEXT INDEX {spec['index']} "
+                           f"({', '.join(spec['columns'])})")
+        except Exception as e:
+            print(f"FULLTEXT index on {spec['table']} not available ({e}); using {NGRAM_TABLE}")
+            rebuild_ngrams(cursor, entity)
@@ -0,0 +1,31 @@
+"""
+Maintained apo.file_count counter (backfilled from apo_files) and the
+(filter, apo_date, id) indexes behind the keyset-paginated APO list.
+Skipped when the APO tables have not been created yet: sql/create_apo_table.sql
+(and create_lpo_table.sql) create apo with the column and indexes already.
+"""
+
+from db.migrate import column_names, index_names, table_exists
+
+APO_INDEXES = (
+    ('idx_apo_date_id', '(apo_date, id)'),
+    ('idx_apo_status_date_id', '(status, apo_date, id)'),
+    ('idx_apo_supplier_date_id', '(supplier, apo_date, id)'),
+)
+
+
+def upgrade(cursor):
+    if not table_exists(cursor, 'apo'):
+        return
+    if 'file_count' not in column_names(cursor, 'apo'):
+        cursor.execute('ALTER TABLE apo ADD COLUMN file_count INT NOT NULL DEFAULT 0')
+        if table_exists(cursor, 'apo_files'):
+            cursor.execute('''
+                UPDATE apo a
+                JOIN (SELECT apo_id, COUNT(*) AS n FROM apo_files GROUP BY apo_id) f ON f.apo_id = a.id
+                SET a.file_count = f.n
+            ''')
+    existing = index_names(cursor, 'apo')
+    missing = [f'ADD INDEX {name} {columns}' for name, columns in APO_INDEXES if name not in existing]
+    if missing:
+        cursor.execute('ALTER TABLE apo ' + ', '.join(missing))
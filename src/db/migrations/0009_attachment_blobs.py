@@ -0,0 +1,53 @@
+"""
+Deduplicated attachment metadata: the attachment_blobs reference-count table,
+a sha256 column on apo_files and the contract_files table, both pointing at
+blobs in UPLOAD_FOLDER/blobs (see utils/blob_store.py). Rows already stored as
+blobs are linked here; older timestamp-named files are moved over with
+``python3 attachments.py import-legacy``. apo_files is only altered when it
+exists; sql/create_apo_table.sql (and create_lpo_table.sql) create it with
+the sha256 column and index already.
+"""
+
+from db.migrate import column_names, index_names, table_exists
+from utils.blob_store import BLOB_TABLE, BLOB_DIR, recount_blobs
+
+
+def upgrade(cursor):
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {BLOB_TABLE} (
+            sha256 CHAR(64) CHARACTER SET ascii NOT NULL PRIMARY KEY,
+            size BIGINT NOT NULL DEFAULT 0,
+            ref_count INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            unreferenced_at TIMESTAMP NULL,
+            INDEX idx_attachment_blobs_unreferenced (ref_count, unreferenced_at)
+        ) ENGINE=InnoDB
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contract_files (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            contract_number VARCHAR(100) NULL,
+            original_filename VARCHAR(255) NOT NULL,
+            saved_filename VARCHAR(255) NOT NULL,
+            sha256 CHAR(64) CHARACTER SET ascii NOT NULL,
+            file_size BIGINT,
+            file_type VARCHAR(100),
+            uploaded_by VARCHAR(255),
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_contract_files_contract (contract_number),
+            INDEX idx_contract_files_sha256 (sha256)
+        )
+    ''')
+    tables = ['contract_files']
+    if table_exists(cursor, 'apo_files'):
+        tables.insert(0, 'apo_files')
+        if 'sha256' not in column_names(cursor, 'apo_files'):
+            cursor.execute('ALTER TABLE apo_files ADD COLUMN sha256 CHAR(64) CHARACTER SET ascii NULL')
+        if 'idx_apo_files_sha256' not in index_names(cursor, 'apo_files'):
+            cursor.execute('ALTER TABLE apo_files ADD INDEX idx_apo_files_sha256 (sha256)')
+        # Uploads made since attachments moved to the blob store already name their blob
+        cursor.execute('''
+            UPDATE apo_files SET sha256 = SUBSTRING_INDEX(saved_filename, '/', -1)
+            WHERE sha256 IS NULL AND saved_filename LIKE %s
+        ''', (f'{BLOB_DIR}/%',))
+    recount_blobs(cursor, tables)
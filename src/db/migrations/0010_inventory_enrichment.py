@@ -0,0 +1,28 @@
+"""
+Calculated enrichment columns on inventory (previously added by the
+/data-quality/enrich request itself) plus the change tracking behind
+incremental enrichment: updated_at moves on every write to a row,
+enriched_at records when the calculated columns were last refreshed.
+"""
+
+from db.migrate import column_names, index_names
+
+ENRICHMENT_COLUMNS = (
+    ('age_years', 'DECIMAL(10,2) DEFAULT 0'),
+    ('depreciation_value', 'DECIMAL(15,2) DEFAULT 0'),
+    ('book_value', 'DECIMAL(15,2) DEFAULT 0'),
+    ('lifecycle_status', "VARCHAR(50) DEFAULT 'Unknown'"),
+    ('risk_level', "VARCHAR(20) DEFAULT 'Low'"),
+    ('updated_at', 'TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
+    ('enriched_at', 'DATETIME NULL'),
+)
+
+
+def upgrade(cursor):
+    cols = column_names(cursor, 'inventory')
+    missing = [f'ADD COLUMN {column} {definition}'
+               for column, definition in ENRICHMENT_COLUMNS if column not in cols]
+    if 'idx_inventory_enrichment' not in index_names(cursor, 'inventory'):
+        missing.append('ADD INDEX idx_inventory_enrichment (enriched_at, updated_at)')
+    if missing:
+        cursor.execute('ALTER TABLE inventory ' + ', '.join(missing))
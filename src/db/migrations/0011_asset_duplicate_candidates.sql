@@ -0,0 +1,16 @@
+-- Review queue of suspected duplicate assets found by utils/duplicates.py
+-- (blocking + token-set similarity). One row per unordered pair, stored with
+-- asset_a < asset_b; a reviewer's decision survives later scans.
+CREATE TABLE IF NOT EXISTS asset_duplicate_candidates (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    asset_a VARCHAR(255) NOT NULL,
+    asset_b VARCHAR(255) NOT NULL,
+    score DECIMAL(5,4) NOT NULL,
+    reason VARCHAR(255),
+    status ENUM('pending', 'duplicate', 'not_duplicate') NOT NULL DEFAULT 'pending',
+    detected_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    reviewed_by VARCHAR(255),
+    reviewed_at DATETIME,
+    UNIQUE KEY uq_duplicate_pair (asset_a, asset_b),
+    INDEX idx_duplicate_status_score (status, score)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
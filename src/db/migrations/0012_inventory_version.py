@@ -0,0 +1,12 @@
+"""
+Optimistic-concurrency counter on inventory rows. Quantity changes are
+relative UPDATEs that bump it; the edit form only saves when the version
+it was loaded with is still current.
+"""
+
+from db.migrate import column_names
+
+
+def upgrade(cursor):
+    if 'version' not in column_names(cursor, 'inventory'):
+        cursor.execute('ALTER TABLE inventory ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 0')
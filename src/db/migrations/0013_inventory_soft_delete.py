@@ -0,0 +1,18 @@
+"""
+Soft delete for inventory: retired assets keep their row and transaction
+history with deleted_at set, and are left out of the in-memory cache.
+asset_transactions(asset_name, ...) is already indexed by 0002, so bulk
+deletes of history are index range deletes.
+"""
+
+from db.migrate import column_names, index_names
+
+
+def upgrade(cursor):
+    parts = []
+    if 'deleted_at' not in column_names(cursor, 'inventory'):
+        parts.append('ADD COLUMN deleted_at DATETIME NULL')
+    if 'idx_inventory_deleted_at' not in index_names(cursor, 'inventory'):
+        parts.append('ADD INDEX idx_inventory_deleted_at (deleted_at)')
+    if parts:
+        cursor.execute('ALTER TABLE inventory ' + ', '.join(parts))
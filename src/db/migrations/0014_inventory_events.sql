@@ -0,0 +1,14 @@
+-- Outbox of inventory writes (see utils/events.py). Each row is inserted in
+-- the same transaction as the change it describes, so the log never shows a
+-- write that was rolled back nor misses one that committed. asset_name is
+-- NULL for set-based writes that may touch any asset; changes is JSON.
+CREATE TABLE IF NOT EXISTS inventory_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    action VARCHAR(32) NOT NULL,
+    asset_name VARCHAR(255) NULL,
+    changes TEXT NULL,
+    username VARCHAR(255) NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_inventory_events_asset (asset_name, id),
+    INDEX idx_inventory_events_created (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
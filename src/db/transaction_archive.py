@@ -0,0 +1,158 @@
+"""
+Transaction Log Partitioning and Archiving
+Monthly RANGE partitions on asset_transactions.created_at; partitions older than
+the retention window are copied to asset_transactions_archive (optionally also
+to CSV.gz files) and dropped from the hot table.
+"""
+
+import csv
+import gzip
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+HOT_TABLE = 'asset_transactions'
+ARCHIVE_TABLE = 'asset_transactions_archive'
+ARCHIVE_LOG_TABLE = 'transaction_archive_log'
+
+COLUMNS = ('id', 'asset_name', 'action', 'quantity', 'person', 'department', 'location',
+           'notes', 'username', 'user_id', 'created_at')
+
+_PARTITION_RE = re.compile(r'^p(\d{4})(\d{2})$')
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, months: int) -> date:
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(first: date, last: date) -> List[date]:
+    """First-of-month dates from first to last inclusive"""
+    months, current = [], month_start(first)
+    while current <= last:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+def partition_name(month: date) -> str:
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Inverse of partition_name; None for pmax or foreign names"""
+    match = _PARTITION_RE.match(name or '')
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def partition_definition(month: date) -> str:
+    upper = add_months(month, 1)
+    return (f"PARTITION {partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{upper.isoformat()} 00:00:00'))")
+
+
+def partition_clause(months: List[date]) -> str:
+    """Partition list for the given months followed by the catch-all pmax"""
+    parts = [partition_definition(m) for m in months]
+    parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return ',\n    '.join(parts)
+
+
+def archive_cutoff(retention_months: int, today: Optional[date] = None) -> date:
+    """Partitions for months strictly before this date are eligible for archiving"""
+    return add_months(month_start(today or date.today()), -retention_months)
+
+
+def list_partitions(cursor) -> List[Tuple[str, Optional[date], int]]:
+    """(name, month, approximate rows) for each partition of the hot table, oldest first"""
+    cursor.execute("""
+        SELECT PARTITION_NAME, TABLE_ROWS FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (HOT_TABLE,))
+    return [(name, partition_month(name), rows or 0) for name, rows in cursor.fetchall()]
+
+
+def ensure_future_partitions(cursor, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """Split pmax so that monthly partitions exist up to months_ahead from now"""
+    months = [m for _, m, _ in list_partitions(cursor) if m]
+    if not months:
+        return []
+    target = add_months(month_start(today or date.today()), months_ahead)
+    new_months = month_range(add_months(max(months), 1), target)
+    if new_months:
+        cursor.execute(f"""
+            ALTER TABLE {HOT_TABLE} REORGANIZE PARTITION pmax INTO (
+                {partition_clause(new_months)}
+            )
+        """)
+    return [partition_name(m) for m in new_months]
+
+
+def _export_partition(cursor, name: str, export_dir: str) -> str:
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{HOT_TABLE}_{name}.csv.gz")
+    cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM {HOT_TABLE} PARTITION ({name}) ORDER BY created_at, id")
+    with gzip.open(path, 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            writer.writerows(rows)
+    return path
+
+
+def archive_old_partitions(conn, retention_months: int, export_dir: Optional[str] = None,
+                           dry_run: bool = False, today: Optional[date] = None, on_partition=None) -> List[dict]:
+    """
+    Move every monthly partition older than the retention window to cold storage.
+
+    Each partition is copied into the archive table (INSERT IGNORE, so a re-run
+    after a crash does not duplicate rows), optionally streamed to CSV.gz,
+    logged in transaction_archive_log and only then dropped from the hot table.
+    Partitions are processed oldest first, which keeps the archive contiguous.
+    """
+    cursor = conn.cursor()
+    cutoff = archive_cutoff(retention_months, today)
+    done = []
+    try:
+        for name, month, approx_rows in list_partitions(cursor):
+            if month is None or month >= cutoff:
+                continue
+            if on_partition:
+                on_partition(name, approx_rows)
+            if dry_run:
+                done.append({'partition': name, 'rows': approx_rows, 'export_path': None})
+                continue
+
+            cursor.execute(f"SELECT COUNT(*) FROM {HOT_TABLE} PARTITION ({name})")
+            row_count = cursor.fetchone()[0]
+            cursor.execute(f"""
+                INSERT IGNORE INTO {ARCHIVE_TABLE} ({', '.join(COLUMNS)})
+                SELECT {', '.join(COLUMNS)} FROM {HOT_TABLE} PARTITION ({name})
+            """)
+            export_path = _export_partition(cursor, name, export_dir) if export_dir else None
+            cursor.execute(f"""
+                INSERT INTO {ARCHIVE_LOG_TABLE} (partition_name, range_start, range_end, row_count, export_path)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE row_count = VALUES(row_count), export_path = VALUES(export_path),
+                                        archived_at = CURRENT_TIMESTAMP
+            """, (name, datetime.combine(month, datetime.min.time()),
+                  datetime.combine(add_months(month, 1), datetime.min.time()), row_count, export_path))
+            conn.commit()
+            # DDL commits implicitly; the rows are already safe in the archive
+            cursor.execute(f"ALTER TABLE {HOT_TABLE} DROP PARTITION {name}")
+            done.append({'partition': name, 'rows': row_count, 'export_path': export_path})
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return done
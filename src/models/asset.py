@@ -0,0 +1,110 @@
+"""
+Asset Record
+Compact per-asset record used by the in-memory inventory cache (system.inventory)
+"""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional
+
+# Column order of InventorySystem._load_inventory (everything but the name key);
+# version is the row's optimistic-concurrency counter (see update_quantity)
+ASSET_FIELDS = (
+    'quantity', 'price', 'description', 'low_stock_threshold', 'category', 'supplier',
+    'department', 'funding_source', 'location', 'model', 'brand', 'serial_number',
+    'purchase_date', 'depreciation_method', 'useful_life_years', 'salvage_value',
+    'version',
+)
+_FIELD_SET = frozenset(ASSET_FIELDS)
+
+# Low-cardinality text columns; interning makes every asset share one string per value
+_INTERNED_FIELDS = frozenset((
+    'category', 'supplier', 'department', 'funding_source', 'location', 'brand', 'depreciation_method',
+))
+
+
+def _intern(field: str, value: Any) -> Any:
+    if field in _INTERNED_FIELDS and type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+class AssetRecord(MutableMapping):
+    """
+    A __slots__ record holding one inventory row.
+
+    Behaves like the dict it replaces (``rec['quantity']``, ``rec.get(...)``,
+    ``rec.update(...)``, ``dict(rec)``) and also exposes fields as attributes,
+    so templates can use ``rec.quantity`` without wrapping. Keys outside
+    ASSET_FIELDS are kept in a small overflow dict created on first use.
+    """
+
+    __slots__ = ASSET_FIELDS + ('_extra',)
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, **kwargs):
+        self._extra = None
+        for field in ASSET_FIELDS:
+            object.__setattr__(self, field, None)
+        if data:
+            self.update(data)
+        if kwargs:
+            self.update(kwargs)
+
+    @classmethod
+    def from_values(cls, values) -> 'AssetRecord':
+        """Build a record from a sequence ordered like ASSET_FIELDS (fast path for loading)"""
+        record = cls.__new__(cls)
+        record._extra = None
+        values = tuple(values)
+        for field, value in zip(ASSET_FIELDS, values):
+            object.__setattr__(record, field, _intern(field, value))
+        for field in ASSET_FIELDS[len(values):]:
+            object.__setattr__(record, field, None)
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELD_SET:
+            object.__setattr__(self, key, _intern(key, value))
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in _FIELD_SET:
+            raise KeyError(f"'{key}' is a fixed asset field and cannot be removed")
+        if self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_SET or (self._extra is not None and key in self._extra)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from ASSET_FIELDS
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return len(ASSET_FIELDS) + (len(self._extra) if self._extra else 0)
+
+    def copy(self) -> Dict[str, Any]:
+        """Plain dict snapshot, safe to annotate with extra keys"""
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"AssetRecord({dict(self)!r})"
@@ -0,0 +1,185 @@
+// ========================================
+// CHUNKED, RESUMABLE ATTACHMENT UPLOADS
+// ========================================
+// Splits files into chunks, sends several in parallel with a per-chunk
+// checksum (SHA-256 via WebCrypto, CRC32 where WebCrypto is unavailable),
+// retries failed chunks and resumes interrupted uploads from the chunks the
+// server already has. Completed uploads are referenced by forms through
+// hidden "upload_ids" inputs.
+
+const CRC32_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) {
+            c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+        }
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+function crc32Hex(bytes) {
+    let crc = 0xffffffff;
+    for (let i = 0; i < bytes.length; i++) {
+        crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+    }
+    return ((crc ^ 0xffffffff) >>> 0).toString(16).padStart(8, '0');
+}
+
+async function chunkChecksum(buffer) {
+    if (window.crypto && window.crypto.subtle) {
+        const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+        const hex = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+        return { header: 'X-Chunk-SHA256', value: hex };
+    }
+    return { header: 'X-Chunk-CRC32', value: crc32Hex(new Uint8Array(buffer)) };
+}
+
+class ChunkedUploader {
+    constructor(options = {}) {
+        this.purpose = options.purpose;
+        this.csrfToken = options.csrfToken;
+        this.concurrency = options.concurrency || 4;
+        this.retries = options.retries || 5;
+        this.onProgress = options.onProgress || (() => {});
+    }
+
+    resumeKey(file) {
+        return `chunked-upload:${this.purpose}:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    async request(method, url, body, headers = {}) {
+        const response = await fetch(url, {
+            method,
+            body,
+            credentials: 'same-origin',
+            headers: Object.assign({ 'X-CSRFToken': this.csrfToken }, headers)
+        });
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok) {
+            const error = new Error(data.error || `HTTP ${response.status}`);
+            error.status = response.status;
+            throw error;
+        }
+        return data;
+    }
+
+    async start(file) {
+        const key = this.resumeKey(file);
+        const previous = localStorage.getItem(key);
+        if (previous) {
+            try {
+                return await this.request('GET', `/api/uploads/${previous}`);
+            } catch (e) {
+                localStorage.removeItem(key);
+            }
+        }
+        const upload = await this.request('POST', '/api/uploads', JSON.stringify({
+            filename: file.name,
+            size: file.size,
+            mimetype: file.type,
+            purpose: this.purpose
+        }), { 'Content-Type': 'application/json' });
+        localStorage.setItem(key, upload.upload_id);
+        return upload;
+    }
+
+    async sendChunk(file, upload, index) {
+        const start = index * upload.chunk_size;
+        const buffer = await file.slice(start, Math.min(start + upload.chunk_size, file.size)).arrayBuffer();
+        const checksum = await chunkChecksum(buffer);
+        for (let attempt = 0; ; attempt++) {
+            try {
+                return await this.request('PUT', `/api/uploads/${upload.upload_id}/chunks/${index}`, buffer, {
+                    'Content-Type': 'application/octet-stream',
+                    [checksum.header]: checksum.value
+                });
+            } catch (e) {
+                if (attempt >= this.retries || (e.status && e.status < 500 && e.status !== 408 && e.status !== 422)) {
+                    throw e;
+                }
+                await new Promise(resolve => setTimeout(resolve, Math.min(30000, 1000 * 2 ** attempt)));
+            }
+        }
+    }
+
+    async upload(file) {
+        let upload = await this.start(file);
+        if (!upload.complete) {
+            const have = new Set(upload.received);
+            const pending = [];
+            for (let i = 0; i < upload.total_chunks; i++) {
+                if (!have.has(i)) pending.push(i);
+            }
+            let done = upload.total_chunks - pending.length;
+            this.onProgress(file, done, upload.total_chunks);
+            const worker = async () => {
+                while (pending.length) {
+                    const index = pending.shift();
+                    await this.sendChunk(file, upload, index);
+                    done += 1;
+                    this.onProgress(file, done, upload.total_chunks);
+                }
+            };
+            const workers = [];
+            for (let i = 0; i < Math.min(this.concurrency, pending.length); i++) {
+                workers.push(worker());
+            }
+            await Promise.all(workers);
+            upload = await this.request('POST', `/api/uploads/${upload.upload_id}/complete`);
+        }
+        localStorage.removeItem(this.resumeKey(file));
+        return upload;
+    }
+
+    async uploadAll(files) {
+        const uploads = [];
+        for (const file of Array.from(files)) {
+            uploads.push(await this.upload(file));
+        }
+        return uploads;
+    }
+
+    // Upload the input's files before the form is submitted and send their
+    // upload ids instead of the file bodies
+    static attachToForm(form, fileInput, options) {
+        const button = form.querySelector('[type="submit"]');
+        const label = button ? button.innerHTML : '';
+        const uploader = new ChunkedUploader(Object.assign({
+            csrfToken: form.querySelector('input[name="csrf_token"]').value,
+            onProgress: (file, done, total) => {
+                if (button) button.innerHTML = `⏳ ${file.name} ${Math.round(100 * done / total)}%`;
+            }
+        }, options));
+        form.addEventListener('submit', async function(e) {
+            if (e.defaultPrevented || !fileInput.files.length || form.dataset.uploaded) {
+                return;
+            }
+            e.preventDefault();
+            if (button) button.disabled = true;
+            try {
+                const uploads = await uploader.uploadAll(fileInput.files);
+                uploads.forEach(upload => {
+                    const input = document.createElement('input');
+                    input.type = 'hidden';
+                    input.name = 'upload_ids';
+                    input.value = upload.upload_id;
+                    form.appendChild(input);
+                });
+                fileInput.disabled = true;
+                form.dataset.uploaded = '1';
+                form.submit();
+            } catch (err) {
+                alert('❌ Upload failed: ' + err.message + '\nSubmit again to resume.');
+                if (button) {
+                    button.disabled = false;
+                    button.innerHTML = label;
+                }
+            }
+        });
+        return uploader;
+    }
+}
+
+window.ChunkedUploader = ChunkedUploader;
@@ -0,0 +1,257 @@
+"""
+Alert Digests
+Collects alert events per recipient and type and sends one aggregated email per window
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+# alert_type -> (digest title, throttle minutes). Within the throttle period a
+# repeat of an already-sent event (same dedup key) is suppressed; after it the
+# event is re-armed and goes out in the next digest.
+ALERT_TYPES = OrderedDict([
+    ('low_stock', ('Low stock', 24 * 60)),
+    ('past_due', ('Assets past due', 24 * 60)),
+    ('warranty_expiring', ('Warranties expiring', 7 * 24 * 60)),
+    ('maintenance_due', ('Maintenance due', 24 * 60)),
+    ('checkout', ('Checkouts', 0)),
+    ('assignment', ('Asset assignments', 0)),
+])
+
+DIGEST_LOCK = 'alert_digest_flush'
+
+_RECORD_SQL = """
+    INSERT INTO alert_digest_events (recipient, alert_type, dedup_key, subject, summary, body)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        occurrences = IF(sent_at IS NULL, occurrences + 1,
+                         IF(sent_at < NOW() - INTERVAL %s MINUTE, 1, occurrences)),
+        first_seen_at = IF(sent_at < NOW() - INTERVAL %s MINUTE, NOW(), first_seen_at),
+        subject = IF(sent_at IS NULL OR sent_at < NOW() - INTERVAL %s MINUTE, VALUES(subject), subject),
+        summary = IF(sent_at IS NULL OR sent_at < NOW() - INTERVAL %s MINUTE, VALUES(summary), summary),
+        body = IF(sent_at IS NULL OR sent_at < NOW() - INTERVAL %s MINUTE, VALUES(body), body),
+        last_seen_at = NOW(),
+        sent_at = IF(sent_at < NOW() - INTERVAL %s MINUTE, NULL, sent_at)
+"""
+
+
+def record_alert(cursor, recipient: str, alert_type: str, dedup_key: str, subject: str,
+                 summary: str, body: Optional[str] = None):
+    """Add an event to the recipient's pending digest (caller commits)"""
+    if alert_type not in ALERT_TYPES:
+        raise ValueError(f"Unknown alert type: {alert_type}")
+    throttle = ALERT_TYPES[alert_type][1]
+    cursor.execute(_RECORD_SQL, (recipient, alert_type, str(dedup_key)[:255], subject[:255], summary[:500],
+                                 body) + (throttle,) * 6)
+
+
+def notify(alert_type: str, recipient: str, dedup_key: str, subject: str, summary: str,
+           body: Optional[str] = None, conn=None) -> bool:
+    """
+    Record an alert for digest delivery. Opens its own connection unless one
+    is given; returns False when email is not configured or recording fails.
+    """
+    from config import EMAIL_CONFIG
+    if not EMAIL_CONFIG.get('sender_email') or not recipient:
+        print("Email configuration incomplete. Skipping email notification.")
+        return False
+    own = conn is None
+    try:
+        if own:
+            from db.migrate import connect
+            conn = connect()
+        cursor = conn.cursor()
+        try:
+            record_alert(cursor, recipient, alert_type, dedup_key, subject, summary, body)
+            conn.commit()
+        finally:
+            cursor.close()
+        wake_digest_scheduler()
+        return True
+    except Exception as e:
+        print(f"Could not record alert: {e}")
+        return False
+    finally:
+        if own and conn is not None:
+            conn.close()
+
+
+def build_digest(alert_type: str, events: Sequence[Dict[str, Any]]) -> Tuple[str, str]:
+    """Subject and body for one digest; a single event is sent as its own message"""
+    if len(events) == 1 and events[0].get('body'):
+        return events[0]['subject'], events[0]['body']
+    title = ALERT_TYPES.get(alert_type, (alert_type.replace('_', ' ').capitalize(), 0))[0]
+    subject = f"{title}: {len(events)} alert{'s' if len(events) != 1 else ''}"
+    lines = [f"{title} - {len(events)} item{'s' if len(events) != 1 else ''}", '']
+    for event in events:
+        repeat = f" (x{event['occurrences']})" if event.get('occurrences', 1) > 1 else ''
+        lines.append(f"• {event['summary']}{repeat}")
+    lines += ['', 'This is an automated digest from the Asset Management System.',
+              'Please do not reply to this email.']
+    return subject, '\n'.join(lines)
+
+
+def flush_digests(conn, window_minutes: int = 10, send: Optional[Callable[[str, str, str], bool]] = None) -> int:
+    """
+    Send one digest per (recipient, alert_type) whose oldest pending event is
+    at least ``window_minutes`` old. Returns the number of digests sent.
+    """
+    if send is None:
+        from utils.mail_queue import queue_email as send
+    cursor = conn.cursor()
+    sent = 0
+    try:
+        cursor.execute("""
+            SELECT recipient, alert_type FROM alert_digest_events
+            WHERE sent_at IS NULL
+            GROUP BY recipient, alert_type
+            HAVING MIN(first_seen_at) <= NOW() - INTERVAL %s MINUTE
+        """, (window_minutes,))
+        groups = cursor.fetchall()
+        for recipient, alert_type in groups:
+            cursor.execute("""
+                SELECT id, subject, summary, body, occurrences FROM alert_digest_events
+                WHERE sent_at IS NULL AND recipient = %s AND alert_type = %s
+                ORDER BY first_seen_at, id
+            """, (recipient, alert_type))
+            events = [{'id': r[0], 'subject': r[1], 'summary': r[2], 'body': r[3], 'occurrences': r[4]}
+                      for r in cursor.fetchall()]
+            if not events:
+                continue
+            subject, body = build_digest(alert_type, events)
+            if not send(recipient, subject, body):
+                continue
+            ids = [e['id'] for e in events]
+            cursor.execute(f"UPDATE alert_digest_events SET sent_at = NOW() "
+                           f"WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            conn.commit()
+            sent += 1
+        # Sent events past every throttle period no longer suppress anything
+        longest = max(throttle for _, throttle in ALERT_TYPES.values())
+        cursor.execute("DELETE FROM alert_digest_events WHERE sent_at < NOW() - INTERVAL %s MINUTE",
+                       (longest + window_minutes,))
+        conn.commit()
+    finally:
+        cursor.close()
+    return sent
+
+
+# digest alert_type -> /alerts pages it is built from (see utils/alerts.py)
+SCHEDULED_ALERTS = (
+    ('past_due', ('assets-past-due',)),
+    ('warranty_expiring', ('warranties-expiring',)),
+    ('maintenance_due', ('maintenance-overdue', 'maintenance-due')),
+)
+
+_SCHEDULED_SUMMARY = {
+    'assets-past-due': "{asset_name} was due back {expected_return_date} ({checked_out_to})",
+    'warranties-expiring': "{asset_name} warranty ends {warranty_end_date} ({warranty_provider})",
+    'maintenance-overdue': "{asset_name} maintenance overdue since {scheduled_date} ({maintenance_type})",
+    'maintenance-due': "{asset_name} maintenance scheduled {scheduled_date} ({maintenance_type})",
+}
+_SCHEDULED_DATE = {'assets-past-due': 'expected_return_date', 'warranties-expiring': 'warranty_end_date',
+                   'maintenance-overdue': 'scheduled_date', 'maintenance-due': 'scheduled_date'}
+
+
+def collect_scheduled_alerts(conn, recipient: str) -> int:
+    """Record past-due, warranty and maintenance alerts for ``recipient``; dedup keeps reruns cheap"""
+    from utils.alerts import fetch_alerts
+    cursor = conn.cursor()
+    recorded = 0
+    try:
+        for alert_type, pages in SCHEDULED_ALERTS:
+            for page in pages:
+                for row in fetch_alerts(cursor, page):
+                    summary = _SCHEDULED_SUMMARY[page].format(**{k: v if v is not None else 'N/A'
+                                                                 for k, v in row.items()})
+                    record_alert(cursor, recipient, alert_type, f"{row['asset_name']}:{row[_SCHEDULED_DATE[page]]}",
+                                 ALERT_TYPES[alert_type][0], summary)
+                    recorded += 1
+        conn.commit()
+    finally:
+        cursor.close()
+    return recorded
+
+
+class DigestScheduler:
+    """
+    Background thread that flushes due digests every ``interval`` seconds and
+    rescans the date-driven alerts every ``scan_interval`` seconds. A MySQL
+    named lock keeps several app processes from sending the same digest.
+    """
+
+    def __init__(self, window_minutes: int = 10, interval: float = 60.0, scan_interval: float = 3600.0,
+                 recipient: Optional[str] = None):
+        self.window_minutes = window_minutes
+        self.interval = interval
+        self.scan_interval = scan_interval
+        self.recipient = recipient
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_scan = 0.0
+
+    def run_once(self):
+        from db.migrate import connect
+        conn = connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT GET_LOCK(%s, 0)', (DIGEST_LOCK,))
+            if cursor.fetchone()[0] != 1:
+                return
+            try:
+                if self.recipient and time.time() - self._last_scan >= self.scan_interval:
+                    collect_scheduled_alerts(conn, self.recipient)
+                    self._last_scan = time.time()
+                flush_digests(conn, self.window_minutes)
+            finally:
+                cursor.execute('SELECT RELEASE_LOCK(%s)', (DIGEST_LOCK,))
+                cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Alert digest error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='alert-digest', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+_scheduler: Optional[DigestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def start_digest_scheduler() -> DigestScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from config import EMAIL_CONFIG
+            _scheduler = DigestScheduler(window_minutes=EMAIL_CONFIG.get('digest_window_minutes', 10),
+                                         recipient=EMAIL_CONFIG.get('recipient'))
+            _scheduler.start()
+    return _scheduler
+
+
+def wake_digest_scheduler():
+    """Make sure the scheduler runs; with a zero window flush right away"""
+    scheduler = start_digest_scheduler()
+    if scheduler.window_minutes <= 0:
+        scheduler.wake()
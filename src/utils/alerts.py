@@ -0,0 +1,271 @@
+"""
+Precomputed Alerts
+Periodically evaluates the date-driven alert sets into the alerts table and serves the /alerts/* pages and badge
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+ALERTS_TABLE = 'alerts'
+EVALUATOR_LOCK = 'alerts_refresh'
+
+# Stored rows reach one day past each page window so the pages stay correct
+# across midnight until the next refresh.
+SLACK_DAYS = 1
+
+# kind -> (source table, SELECT of subject, category, party, start_date, due_date, amount, details)
+ALERT_SOURCES = OrderedDict([
+    ('checkout', ('asset_checkout', """
+        SELECT asset_name, NULL, checked_out_to, checkout_date, expected_return_date, NULL, NULL
+        FROM asset_checkout
+        WHERE status = 'checked_out' AND expected_return_date < CURDATE() + INTERVAL %(slack)s DAY
+    """)),
+    ('contract', ('contracts', """
+        SELECT contract_name, contract_type, vendor, start_date, end_date, NULL, NULL
+        FROM contracts
+        WHERE status != 'expired'
+        AND end_date BETWEEN CURDATE() - INTERVAL %(slack)s DAY AND CURDATE() + INTERVAL 30 + %(slack)s DAY
+    """)),
+    ('lease', ('asset_leases', """
+        SELECT asset_name, NULL, lessor, lease_start_date, lease_end_date, monthly_payment, NULL
+        FROM asset_leases
+        WHERE status = 'active'
+        AND lease_end_date BETWEEN CURDATE() - INTERVAL %(slack)s DAY AND CURDATE() + INTERVAL 30 + %(slack)s DAY
+    """)),
+    ('maintenance', ('asset_maintenance', """
+        SELECT asset_name, maintenance_type, NULL, NULL, scheduled_date, NULL, description
+        FROM asset_maintenance
+        WHERE status = 'scheduled' AND scheduled_date < CURDATE() + INTERVAL 8 + %(slack)s DAY
+    """)),
+    ('warranty', ('asset_warranties', """
+        SELECT asset_name, NULL, warranty_provider, warranty_start_date, warranty_end_date, NULL, coverage_details
+        FROM asset_warranties
+        WHERE status = 'active'
+        AND warranty_end_date BETWEEN CURDATE() - INTERVAL %(slack)s DAY AND CURDATE() + INTERVAL 30 + %(slack)s DAY
+    """)),
+])
+
+# page -> kind, due_date window in days from today (None = open), days-column name
+# and direction, and template key -> alerts column
+ALERT_PAGES = OrderedDict([
+    ('assets-past-due', {
+        'kind': 'checkout', 'window': (None, -1), 'days': ('days_overdue', -1),
+        'fields': {'asset_name': 'subject', 'checked_out_to': 'party', 'checkout_date': 'start_date',
+                   'expected_return_date': 'due_date'},
+    }),
+    ('contracts-expiring', {
+        'kind': 'contract', 'window': (0, 30), 'days': ('days_until_expiry', 1),
+        'fields': {'contract_name': 'subject', 'contract_type': 'category', 'vendor': 'party',
+                   'start_date': 'start_date', 'end_date': 'due_date'},
+    }),
+    ('leases-expiring', {
+        'kind': 'lease', 'window': (0, 30), 'days': ('days_until_expiry', 1),
+        'fields': {'asset_name': 'subject', 'lessor': 'party', 'lease_start_date': 'start_date',
+                   'lease_end_date': 'due_date', 'monthly_payment': 'amount'},
+    }),
+    ('maintenance-due', {
+        'kind': 'maintenance', 'window': (0, 7), 'days': ('days_until_due', 1),
+        'fields': {'asset_name': 'subject', 'maintenance_type': 'category', 'scheduled_date': 'due_date',
+                   'description': 'details'},
+    }),
+    ('maintenance-overdue', {
+        'kind': 'maintenance', 'window': (None, -1), 'days': ('days_overdue', -1),
+        'fields': {'asset_name': 'subject', 'maintenance_type': 'category', 'scheduled_date': 'due_date',
+                   'description': 'details'},
+    }),
+    ('warranties-expiring', {
+        'kind': 'warranty', 'window': (0, 30), 'days': ('days_until_expiry', 1),
+        'fields': {'asset_name': 'subject', 'warranty_provider': 'party', 'warranty_start_date': 'start_date',
+                   'warranty_end_date': 'due_date', 'coverage_details': 'details'},
+    }),
+])
+
+_COLUMNS = ('subject', 'category', 'party', 'start_date', 'due_date', 'amount', 'details')
+
+
+def page_bounds(page: str, today: Optional[date] = None):
+    """(first, last) due_date for a page, either may be None"""
+    today = today or date.today()
+    lower, upper = ALERT_PAGES[page]['window']
+    return (today + timedelta(days=lower) if lower is not None else None,
+            today + timedelta(days=upper) if upper is not None else None)
+
+
+def _window_clause(page: str, today: Optional[date] = None):
+    first, last = page_bounds(page, today)
+    sql, params = ['kind = %s'], [ALERT_PAGES[page]['kind']]
+    if first is not None:
+        sql.append('due_date >= %s')
+        params.append(first)
+    if last is not None:
+        sql.append('due_date <= %s')
+        params.append(last)
+    return ' AND '.join(sql), params
+
+
+def refresh_alerts(conn, kinds: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    Rebuild the stored rows of each kind from its source table, one
+    transaction per kind so readers never see a half-built set. Kinds whose
+    source table does not exist are emptied. Returns rows stored per kind.
+    """
+    from db.migrate import table_exists
+    cursor = conn.cursor()
+    stored = {}
+    try:
+        for kind in kinds or ALERT_SOURCES:
+            table, select = ALERT_SOURCES[kind]
+            exists = table_exists(cursor, table)
+            try:
+                cursor.execute(f'DELETE FROM {ALERTS_TABLE} WHERE kind = %s', (kind,))
+                count = 0
+                if exists:
+                    cursor.execute(
+                        f"INSERT INTO {ALERTS_TABLE} (kind, {', '.join(_COLUMNS)}) "
+                        f"SELECT %(kind)s, src.* FROM ({select}) AS src",
+                        {'kind': kind, 'slack': SLACK_DAYS}
+                    )
+                    count = cursor.rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            stored[kind] = count
+    finally:
+        cursor.close()
+    invalidate_alert_counts()
+    return stored
+
+
+def fetch_alerts(cursor, page: str, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Rows for one /alerts page, shaped with the keys its template expects"""
+    today = today or date.today()
+    spec = ALERT_PAGES[page]
+    where, params = _window_clause(page, today)
+    cursor.execute(f"SELECT {', '.join(_COLUMNS)} FROM {ALERTS_TABLE} WHERE {where} ORDER BY due_date, subject",
+                   params)
+    days_key, sign = spec['days']
+    rows = []
+    for values in cursor.fetchall():
+        row = values if isinstance(values, dict) else dict(zip(_COLUMNS, values))
+        item = {key: row[column] for key, column in spec['fields'].items()}
+        due = row['due_date']
+        item[days_key] = sign * (due - today).days if due else None
+        rows.append(item)
+    return rows
+
+
+def count_alerts(cursor, today: Optional[date] = None) -> Dict[str, int]:
+    """Rows per page in a single scan of the alerts table"""
+    parts, params = [], []
+    for page in ALERT_PAGES:
+        where, page_params = _window_clause(page, today)
+        parts.append(f'COALESCE(SUM({where}), 0)')
+        params.extend(page_params)
+    cursor.execute(f"SELECT {', '.join(parts)} FROM {ALERTS_TABLE}", params)
+    row = cursor.fetchone()
+    values = list(row.values()) if isinstance(row, dict) else list(row)
+    return {page: int(value) for page, value in zip(ALERT_PAGES, values)}
+
+
+# Per-process cache of the badge counts; the page header reads it on every request
+_counts_cache: Dict[str, Any] = {'value': None, 'expires': 0.0, 'day': None}
+COUNTS_TTL = 60
+
+
+def invalidate_alert_counts():
+    _counts_cache['value'] = None
+
+
+def cached_alert_counts(connect) -> Dict[str, int]:
+    """Page counts for the sidebar, refreshed at most once per COUNTS_TTL seconds"""
+    now = time.time()
+    today = date.today()
+    if _counts_cache['value'] is None or now >= _counts_cache['expires'] or _counts_cache['day'] != today:
+        conn = connect()
+        try:
+            cursor = conn.cursor()
+            try:
+                counts = count_alerts(cursor, today)
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+        _counts_cache.update(value=counts, expires=now + COUNTS_TTL, day=today)
+    return _counts_cache['value']
+
+
+class AlertEvaluator:
+    """
+    Background thread that rebuilds the alerts table every ``interval``
+    seconds, or sooner when ``request_refresh()`` is called after a write to
+    one of the source tables. A MySQL named lock lets only one app process
+    evaluate at a time.
+    """
+
+    def __init__(self, interval: float = 900.0):
+        self.interval = interval
+        self._pending: set = set()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def request_refresh(self, kind: Optional[str] = None):
+        self._pending.add(kind)
+        self._wake.set()
+
+    def run_once(self, kinds: Optional[Sequence[str]] = None) -> Optional[Dict[str, int]]:
+        from db.migrate import connect
+        conn = connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT GET_LOCK(%s, 0)', (EVALUATOR_LOCK,))
+            if cursor.fetchone()[0] != 1:
+                return None
+            try:
+                return refresh_alerts(conn, kinds)
+            finally:
+                cursor.execute('SELECT RELEASE_LOCK(%s)', (EVALUATOR_LOCK,))
+                cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _run(self):
+        kinds = None
+        while True:
+            try:
+                self.run_once(kinds)
+            except Exception as e:
+                print(f"Alert evaluation error: {e}")
+            woken = self._wake.wait(self.interval)
+            self._wake.clear()
+            pending, self._pending = self._pending, set()
+            kinds = None if not woken or None in pending else sorted(pending)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='alert-evaluator', daemon=True)
+            self._thread.start()
+
+
+_evaluator: Optional[AlertEvaluator] = None
+_evaluator_lock = threading.Lock()
+
+
+def start_alert_evaluator() -> AlertEvaluator:
+    global _evaluator
+    with _evaluator_lock:
+        if _evaluator is None:
+            from config import DATABASE_SETTINGS
+            _evaluator = AlertEvaluator(interval=DATABASE_SETTINGS.get('alert_refresh_minutes', 15) * 60)
+            _evaluator.start()
+    return _evaluator
+
+
+def request_alert_refresh(kind: Optional[str] = None):
+    """Call after writing to a source table so its alerts are rebuilt without waiting"""
+    if _evaluator is not None:
+        _evaluator.request_refresh(kind)
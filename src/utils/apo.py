@@ -0,0 +1,132 @@
+"""
+Purchase Order Queries
+Filtered, keyset-paginated access to asset purchase orders and their file_count counter
+"""
+
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional
+
+from utils.pagination import clamp_limit, decode_cursor, encode_cursor, seek_clause
+
+# Values offered by the list page's status filter
+APO_STATUSES = ('Pending', 'Approved', 'Processing', 'Delivered', 'Cancelled')
+
+# Sort key of the list (newest first); every filter index ends with these columns
+SORT_COLUMNS = ('a.apo_date', 'a.id')
+
+# Equality filters accepted from the query string, mapped to their columns
+FILTER_COLUMNS = {
+    'status': 'a.status',
+    'supplier': 'a.supplier',
+}
+
+LIST_COLUMNS = ('id', 'apo_number', 'supplier', 'department', 'apo_date', 'delivery_date',
+                'amount', 'status', 'file_count')
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def parse_apo_filters(args) -> Dict[str, Any]:
+    """Normalize list filters from request args (or any mapping)"""
+    filters: Dict[str, Any] = {}
+    for key in FILTER_COLUMNS:
+        value = (args.get(key) or '').strip()
+        if value:
+            filters[key] = value
+    for key in ('date_from', 'date_to'):
+        parsed = _parse_date(args.get(key))
+        if parsed:
+            filters[key] = parsed
+    return filters
+
+
+def filter_query_args(filters: Dict[str, Any]) -> Dict[str, str]:
+    """Render filters back into query-string arguments for pagination links"""
+    return {key: (value.isoformat() if isinstance(value, date) else value)
+            for key, value in filters.items()}
+
+
+def build_filter_clause(filters: Dict[str, Any]):
+    """Return (conditions, params) for the given filters; dates bound apo_date inclusively"""
+    conditions: List[str] = []
+    params: List[Any] = []
+    for key, column in FILTER_COLUMNS.items():
+        if filters.get(key):
+            conditions.append(f"{column} = %s")
+            params.append(filters[key])
+    if filters.get('date_from'):
+        conditions.append("a.apo_date >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        conditions.append("a.apo_date <= %s")
+        params.append(filters['date_to'])
+    return conditions, params
+
+
+def fetch_apo_page(cursor, filters: Dict[str, Any], after: Optional[str] = None,
+                   before: Optional[str] = None, limit: Any = None) -> Dict[str, Any]:
+    """
+    Fetch one page of purchase orders, newest apo_date first.
+
+    ``after`` continues towards older orders and ``before`` walks back towards
+    newer ones; both are cursors previously returned as next_cursor/prev_cursor.
+    File counts come from the maintained ``apo.file_count`` column, so a page
+    is one index range scan of ``limit + 1`` rows with no join or GROUP BY.
+    """
+    limit = clamp_limit(limit, default=24, maximum=200)
+    conditions, params = build_filter_clause(filters)
+
+    after_key = decode_cursor(after, len(SORT_COLUMNS))
+    before_key = None if after_key else decode_cursor(before, len(SORT_COLUMNS))
+    backwards = before_key is not None
+    boundary = before_key or after_key
+    if boundary:
+        clause, seek_params = seek_clause(SORT_COLUMNS, boundary, descending=not backwards)
+        conditions.append(clause)
+        params.extend(seek_params)
+
+    direction = 'ASC' if backwards else 'DESC'
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    cursor.execute(f"""
+        SELECT {', '.join('a.' + c for c in LIST_COLUMNS)}
+        FROM apo a
+        {where}
+        ORDER BY a.apo_date {direction}, a.id {direction}
+        LIMIT %s
+    """, params + [limit + 1])
+    rows = cursor.fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    apos = [row if isinstance(row, dict) else dict(zip(LIST_COLUMNS, row)) for row in rows]
+
+    has_older = more if not backwards else True
+    has_newer = more if backwards else after_key is not None
+    next_cursor = prev_cursor = None
+    if apos and has_older:
+        next_cursor = encode_cursor([apos[-1]['apo_date'], apos[-1]['id']])
+    if apos and has_newer:
+        prev_cursor = encode_cursor([apos[0]['apo_date'], apos[0]['id']])
+
+    return {
+        'apos': apos,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'limit': limit,
+    }
+
+
+def add_file_count(cursor, apo_id: Any, delta: int):
+    """Move an order's file_count with the apo_files rows it counts (same transaction)"""
+    if delta:
+        cursor.execute("UPDATE apo SET file_count = GREATEST(file_count + %s, 0) WHERE id = %s",
+                       (delta, apo_id))
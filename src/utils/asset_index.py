@@ -0,0 +1,142 @@
+"""
+Asset Listing Index
+Sorted, filterable views over the in-memory inventory for paginated asset listings
+"""
+
+import math
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Columns the asset list can be ordered by
+SORT_FIELDS = ('name', 'quantity', 'price', 'category', 'brand', 'model', 'serial_number',
+               'purchase_date', 'location', 'department', 'supplier')
+NUMERIC_FIELDS = {'quantity', 'price'}
+
+# Columns with exact-match filters (value -> names postings)
+FILTER_FIELDS = ('category', 'location', 'department', 'supplier', 'brand')
+
+
+def _normalize(field: str, value: Any) -> Any:
+    if value is None or value == '':
+        return None
+    if field in NUMERIC_FIELDS:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).casefold()
+
+
+class AssetIndex:
+    """
+    Lazily built sort orders and filter postings over ``system.inventory``.
+
+    Each sort order is a list of asset names built once (O(n log n)) and then
+    reused by every request until a write calls ``invalidate()``; a page is a
+    slice of that list. Missing values always sort last. A view built while a
+    write invalidates the index is used for that request but not cached.
+    """
+
+    def __init__(self, inventory: Dict[str, Dict[str, Any]]):
+        self._inventory = inventory
+        self._sorted: Dict[Tuple[str, bool], List[str]] = {}
+        self._ranks: Dict[Tuple[str, bool], Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {}
+        self._generation = 0
+
+    def invalidate(self):
+        """Drop all derived views; call after any change to the inventory"""
+        self._generation += 1
+        self._sorted.clear()
+        self._ranks.clear()
+        self._postings.clear()
+
+    def _snapshot(self):
+        return list(self._inventory.items())
+
+    def sorted_names(self, field: str = 'name', descending: bool = False) -> List[str]:
+        if field not in SORT_FIELDS:
+            field = 'name'
+        key = (field, descending)
+        names = self._sorted.get(key)
+        if names is None:
+            generation = self._generation
+            present, missing = [], []
+            for name, record in self._snapshot():
+                value = name.casefold() if field == 'name' else _normalize(field, record.get(field))
+                if value is None:
+                    missing.append(name)
+                else:
+                    present.append((value, name))
+            present.sort(reverse=descending)
+            missing.sort()
+            names = [name for _, name in present] + missing
+            if generation == self._generation:
+                self._sorted[key] = names
+        return names
+
+    def postings(self, field: str) -> Dict[Any, Set[str]]:
+        """Map of filter value -> set of asset names holding it"""
+        index = self._postings.get(field)
+        if index is None:
+            generation = self._generation
+            index = {}
+            for name, record in self._snapshot():
+                value = record.get(field)
+                if value:
+                    index.setdefault(value, set()).add(name)
+            if generation == self._generation:
+                self._postings[field] = index
+        return index
+
+    def filter_values(self, field: str) -> List[str]:
+        return sorted(self.postings(field), key=lambda v: str(v).casefold())
+
+    def page(self, sort: str = 'name', descending: bool = False, filters: Optional[Dict[str, str]] = None,
+             q: Optional[str] = None, page: int = 1, per_page: int = 50,
+             matches: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Return one page of asset names plus paging metadata.
+        ``matches`` restricts the page to those names (e.g. SearchIndex results)."""
+        candidates: Optional[Set[str]] = set(matches) if matches is not None else None
+        for field, value in (filters or {}).items():
+            if field not in FILTER_FIELDS or not value:
+                continue
+            matches = self.postings(field).get(value, set())
+            candidates = set(matches) if candidates is None else candidates & matches
+        if q:
+            needle = q.casefold()
+            pool = candidates if candidates is not None else self._inventory.keys()
+            candidates = {name for name in pool if needle in name.casefold()}
+
+        ordered = self.sorted_names(sort, descending)
+        if candidates is not None:
+            if len(candidates) * 8 < len(ordered):
+                # Small result: sorting the matches is cheaper than walking the whole order
+                rank = self._rank(sort, descending)
+                ordered = sorted(candidates, key=lambda n: rank.get(n, len(rank)))
+            else:
+                ordered = [name for name in ordered if name in candidates]
+
+        total = len(ordered)
+        pages = max(1, math.ceil(total / per_page))
+        page = min(max(1, page), pages)
+        start = (page - 1) * per_page
+        return {
+            'names': ordered[start:start + per_page],
+            'total': total,
+            'page': page,
+            'pages': pages,
+            'per_page': per_page,
+        }
+
+    def _rank(self, field: str, descending: bool) -> Dict[str, int]:
+        key = (field if field in SORT_FIELDS else 'name', descending)
+        rank = self._ranks.get(key)
+        if rank is None:
+            generation = self._generation
+            rank = {name: i for i, name in enumerate(self.sorted_names(field, descending))}
+            if generation == self._generation:
+                self._ranks[key] = rank
+        return rank
@@ -0,0 +1,297 @@
+"""
+Blob Store
+Content-addressed, deduplicated attachment storage under UPLOAD_FOLDER/blobs, keyed by SHA-256
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+BLOB_DIR = 'blobs'
+COPY_BUFFER = 1024 * 1024
+
+# One row per stored blob with the number of attachment rows pointing at it
+BLOB_TABLE = 'attachment_blobs'
+
+# Metadata tables whose rows reference blobs through a sha256 column
+ATTACHMENT_TABLES = ('apo_files', 'contract_files')
+
+# Where each table's pre-blob-store files were saved, relative to UPLOAD_FOLDER
+LEGACY_DIRS = {'apo_files': 'apo'}
+
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def is_sha256(value: Optional[str]) -> bool:
+    return bool(value) and bool(_SHA256.match(value))
+
+
+class BlobStore:
+    """
+    Files stored once per content at ``blobs/<first two hex digits>/<sha256>``.
+    Writes go to a temporary file in the same filesystem and are renamed into
+    place, so a blob path either holds the complete content or does not exist.
+    """
+
+    def __init__(self, upload_root: str):
+        self.upload_root = upload_root
+        self.root = os.path.join(upload_root, BLOB_DIR)
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+
+    def relative_path(self, sha256: str) -> str:
+        """Path of a blob relative to UPLOAD_FOLDER (what metadata rows store)"""
+        if not is_sha256(sha256):
+            raise ValueError(f"Not a SHA-256 digest: {sha256!r}")
+        return f'{BLOB_DIR}/{sha256[:2]}/{sha256}'
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.upload_root, *self.relative_path(sha256).split('/'))
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path(sha256))
+
+    def temp_file(self):
+        """(fd, path) of a new temporary file on the blob filesystem"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return tempfile.mkstemp(dir=self.tmp_dir, suffix='.part')
+
+    def put_file(self, src: str, sha256: str) -> str:
+        """Move a fully written file with the given digest into the store; returns the blob path"""
+        dest = self.path(sha256)
+        if os.path.exists(dest):
+            # Already stored: drop the copy and refresh the mtime so the
+            # garbage collector's grace period covers the row about to be written
+            os.remove(src)
+            os.utime(dest)
+            return dest
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(src, dest)
+        return dest
+
+    def put_stream(self, stream: BinaryIO) -> Tuple[str, int]:
+        """Store a readable stream; returns (sha256, size)"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = self.temp_file()
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    block = stream.read(COPY_BUFFER)
+                    if not block:
+                        break
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+            sha256 = digest.hexdigest()
+            self.put_file(tmp, sha256)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return sha256, size
+
+    def adopt(self, src: str) -> Tuple[str, int]:
+        """
+        Add an existing file to the store without copying its bytes: the blob
+        is a hard link to ``src`` (a copy only across filesystems), and ``src``
+        is left in place for the caller to remove once its rows are committed.
+        Returns (sha256, size).
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(src, 'rb') as f:
+            while True:
+                block = f.read(COPY_BUFFER)
+                if not block:
+                    break
+                digest.update(block)
+                size += len(block)
+        sha256 = digest.hexdigest()
+        dest = self.path(sha256)
+        if os.path.exists(dest):
+            os.utime(dest)
+            return sha256, size
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.link(src, dest)
+        except FileExistsError:
+            pass
+        except OSError:
+            fd, tmp = self.temp_file()
+            os.close(fd)
+            shutil.copyfile(src, tmp)
+            self.put_file(tmp, sha256)
+        return sha256, size
+
+    def iter_blobs(self) -> Iterator[Tuple[str, str]]:
+        """(sha256, path) of every stored blob"""
+        if not os.path.isdir(self.root):
+            return
+        for prefix in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if is_sha256(name) and name.startswith(prefix):
+                    yield name, os.path.join(directory, name)
+
+
+# --- reference counts (same transaction as the attachment rows) ---
+
+def retain_blob(cursor, sha256: str, size: int):
+    """Count one more attachment row pointing at a blob"""
+    cursor.execute(f"""
+        INSERT INTO {BLOB_TABLE} (sha256, size, ref_count) VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE ref_count = ref_count + 1, unreferenced_at = NULL
+    """, (sha256, size))
+
+
+def _references_sql(tables) -> str:
+    return ' UNION ALL '.join(f'SELECT sha256, file_size FROM {table} WHERE sha256 IS NOT NULL'
+                              for table in tables)
+
+
+def recount_blobs(cursor, tables=ATTACHMENT_TABLES):
+    """
+    Recompute every ref_count from the attachment tables. Attachment rows
+    are never released one by one (apo_files rows go with their APO by
+    cascade), so removals are picked up here and the collector never
+    trusts a stale count.
+    """
+    if not tables:
+        cursor.execute(f"""
+            UPDATE {BLOB_TABLE}
+            SET unreferenced_at = COALESCE(unreferenced_at, CURRENT_TIMESTAMP), ref_count = 0
+        """)
+        return
+    references = _references_sql(tables)
+    cursor.execute(f"""
+        INSERT IGNORE INTO {BLOB_TABLE} (sha256, size, ref_count)
+        SELECT sha256, COALESCE(MAX(file_size), 0), 0 FROM ({references}) r GROUP BY sha256
+    """)
+    cursor.execute(f"""
+        UPDATE {BLOB_TABLE} b
+        LEFT JOIN (SELECT sha256, COUNT(*) AS n FROM ({references}) r GROUP BY sha256) c
+               ON c.sha256 = b.sha256
+        SET b.unreferenced_at = IF(c.n IS NULL, COALESCE(b.unreferenced_at, CURRENT_TIMESTAMP), NULL),
+            b.ref_count = COALESCE(c.n, 0)
+    """)
+
+
+def existing_tables(cursor, tables=ATTACHMENT_TABLES) -> List[str]:
+    from db.migrate import table_exists
+    return [table for table in tables if table_exists(cursor, table)]
+
+
+# --- maintenance ---
+
+def blob_usage(cursor, tables=ATTACHMENT_TABLES) -> Dict[str, int]:
+    """Stored vs. referenced bytes: what deduplication is saving"""
+    cursor.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(ref_count), 0),
+               COALESCE(SUM(ref_count = 0), 0)
+        FROM {BLOB_TABLE}
+    """)
+    blobs, stored, references, unreferenced = cursor.fetchone()
+    logical = 0
+    if tables:
+        cursor.execute(f"SELECT COALESCE(SUM(file_size), 0) FROM ({_references_sql(tables)}) r")
+        logical = cursor.fetchone()[0]
+    return {'blobs': int(blobs), 'stored_bytes': int(stored), 'references': int(references),
+            'unreferenced': int(unreferenced), 'referenced_bytes': int(logical)}
+
+
+def import_legacy_files(cursor, store: BlobStore, table: str = 'apo_files') -> Dict[str, Any]:
+    """
+    Move rows saved before the blob store (``<timestamp>_<name>`` files) onto
+    blobs. Each file is hard-linked into the store and its row repointed;
+    the returned ``legacy_paths`` are safe to delete once the caller commits.
+    """
+    legacy_dir = os.path.join(store.upload_root, LEGACY_DIRS.get(table, ''))
+    cursor.execute(f"SELECT id, saved_filename FROM {table} WHERE sha256 IS NULL")
+    result = {'imported': 0, 'duplicates': 0, 'missing': [], 'legacy_paths': []}
+    for row_id, saved_filename in cursor.fetchall():
+        name = os.path.basename(saved_filename or '')
+        path = os.path.join(legacy_dir, name)
+        if not name or not os.path.isfile(path):
+            result['missing'].append(row_id)
+            continue
+        sha256, size = store.adopt(path)
+        cursor.execute(f"""
+            UPDATE {table} SET sha256 = %s, saved_filename = %s, file_size = %s WHERE id = %s
+        """, (sha256, store.relative_path(sha256), size, row_id))
+        cursor.execute(f"SELECT ref_count FROM {BLOB_TABLE} WHERE sha256 = %s", (sha256,))
+        row = cursor.fetchone()
+        if row and row[0] > 0:
+            result['duplicates'] += 1
+        retain_blob(cursor, sha256, size)
+        result['imported'] += 1
+        result['legacy_paths'].append(path)
+    return result
+
+
+def collect_garbage(cursor, store: BlobStore, grace_hours: float = 24,
+                    tables=ATTACHMENT_TABLES, dry_run: bool = False,
+                    now: Optional[float] = None,
+                    on_remove: Optional[Callable[[str], None]] = None) -> Dict[str, int]:
+    """
+    Delete blobs no attachment row references. A blob must have been
+    unreferenced, and its file untouched, for ``grace_hours``: uploads store
+    the blob before their transaction inserts the row, and put_file refreshes
+    the mtime of a blob it deduplicates against. Also removes blob files with
+    no attachment_blobs row (uploads whose transaction rolled back) and stale
+    temporary files. ``on_remove`` is called with each deleted digest (to drop
+    derived files such as thumbnails). Returns counts of what was (or would be) removed.
+    """
+    now = now if now is not None else time.time()
+    cutoff = now - grace_hours * 3600
+    removed = {'blobs': 0, 'bytes': 0, 'strays': 0, 'temp_files': 0}
+    recount_blobs(cursor, tables)
+
+    cursor.execute(f"""
+        SELECT sha256, size FROM {BLOB_TABLE}
+        WHERE ref_count = 0 AND unreferenced_at < NOW() - INTERVAL %s SECOND
+    """, (int(grace_hours * 3600),))
+    for sha256, size in cursor.fetchall():
+        path = store.path(sha256)
+        if os.path.exists(path) and os.path.getmtime(path) > cutoff:
+            continue
+        if not dry_run:
+            cursor.execute(f"DELETE FROM {BLOB_TABLE} WHERE sha256 = %s AND ref_count = 0", (sha256,))
+            if not cursor.rowcount:
+                continue
+            if os.path.exists(path):
+                os.remove(path)
+            if on_remove:
+                on_remove(sha256)
+        removed['blobs'] += 1
+        removed['bytes'] += int(size or 0)
+
+    candidates = [(sha256, path) for sha256, path in store.iter_blobs() if os.path.getmtime(path) <= cutoff]
+    for start in range(0, len(candidates), 500):
+        batch = candidates[start:start + 500]
+        cursor.execute(f"SELECT sha256 FROM {BLOB_TABLE} WHERE sha256 IN ({', '.join(['%s'] * len(batch))})",
+                       [sha256 for sha256, _ in batch])
+        known = {row[0] for row in cursor.fetchall()}
+        for sha256, path in batch:
+            if sha256 in known:
+                continue
+            removed['strays'] += 1
+            removed['bytes'] += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+                if on_remove:
+                    on_remove(sha256)
+
+    if os.path.isdir(store.tmp_dir):
+        for name in os.listdir(store.tmp_dir):
+            path = os.path.join(store.tmp_dir, name)
+            if os.path.getmtime(path) <= cutoff:
+                removed['temp_files'] += 1
+                if not dry_run:
+                    os.remove(path)
+    return removed
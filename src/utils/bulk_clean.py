@@ -0,0 +1,125 @@
+"""
+Bulk Data Cleaning
+Set-based standardization of inventory categories, suppliers and locations: each
+distinct value is standardized once and every remapping is applied by one UPDATE
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.data_quality import DataQualityCleaner
+
+# Inventory columns cleaned by /data-quality/clean and the standardizer for each
+STANDARDIZERS = {
+    'category': DataQualityCleaner.standardize_category,
+    'supplier': DataQualityCleaner.standardize_supplier,
+    'location': DataQualityCleaner.standardize_location,
+}
+
+
+@lru_cache(maxsize=16384)
+def standardize_value(column: str, value: Optional[str]) -> str:
+    """Memoized standardization: categories, suppliers and locations have few distinct values"""
+    return STANDARDIZERS[column](value)
+
+
+def distinct_values(cursor, column: str) -> List[Optional[str]]:
+    """
+    Distinct values of an inventory column over live (not retired) assets,
+    compared byte-for-byte so that 'laptop' and 'Laptop' (equal under the
+    column's collation) both come back.
+    """
+    cursor.execute(f"SELECT DISTINCT CAST({column} AS BINARY) FROM inventory WHERE deleted_at IS NULL")
+    values = []
+    for (value,) in cursor.fetchall():
+        if isinstance(value, (bytes, bytearray)):
+            value = bytes(value).decode('utf-8')
+        values.append(value)
+    return values
+
+
+def plan_remaps(cursor, columns=tuple(STANDARDIZERS)) -> Dict[str, Dict[str, List[Optional[str]]]]:
+    """column -> {standard value: [current values that standardize to it]} for values that change"""
+    remaps = {}
+    for column in columns:
+        targets: Dict[str, List[Optional[str]]] = {}
+        for value in distinct_values(cursor, column):
+            standard = standardize_value(column, value)
+            if standard != value:
+                targets.setdefault(standard, []).append(value)
+        remaps[column] = targets
+    return remaps
+
+
+def _match(column: str, values: List[Optional[str]]) -> Tuple[str, List[Any]]:
+    """SQL condition matching any of ``values`` (NULL included) in ``column``"""
+    conditions, params = [], []
+    present = [v for v in values if v is not None]
+    if len(present) < len(values):
+        conditions.append(f"{column} IS NULL")
+    if present:
+        conditions.append(f"{column} IN ({', '.join(['%s'] * len(present))})")
+        params.extend(present)
+    return ' OR '.join(conditions), params
+
+
+def build_clean_update(remaps: Dict[str, Dict[str, List[Optional[str]]]]) -> Tuple[str, List[Any]]:
+    """
+    One UPDATE applying every remapping: a CASE per column plus NULL prices
+    set to 0, restricted to live rows that match at least one remapped value
+    (so with nothing to remap it only touches NULL prices). Retired assets
+    keep their values as they were when retired.
+    """
+    assignments, set_params = [], []
+    filters, where_params = ['price IS NULL'], []
+    for column, targets in remaps.items():
+        if not targets:
+            continue
+        branches = []
+        for standard, values in targets.items():
+            condition, params = _match(column, values)
+            branches.append(f"WHEN {condition} THEN %s")
+            set_params.extend(params + [standard])
+            filters.append(condition)
+            where_params.extend(params)
+        assignments.append(f"{column} = CASE {' '.join(branches)} ELSE {column} END")
+    assignments.append('price = COALESCE(price, 0)')
+    # Cleaned columns are edit-form fields; open edit forms must see the change
+    assignments.append('version = version + 1')
+    sql = (f"UPDATE inventory SET {', '.join(assignments)} "
+           f"WHERE deleted_at IS NULL AND ({' OR '.join(f'({f})' for f in filters)})")
+    return sql, set_params + where_params
+
+
+def clean_inventory(conn, events=None, username: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Standardize every asset in one transaction. Suppliers the cleaning maps
+    to are created first so the supplier foreign key holds. Returns the
+    number of assets changed and the remapped distinct values per column.
+    With an ``events`` bus a 'cleaned' event (any asset may have changed) is
+    recorded in the transaction; the caller publishes it.
+    """
+    cursor = conn.cursor()
+    try:
+        remaps = plan_remaps(cursor)
+        new_suppliers = list(remaps.get('supplier', {}))
+        if new_suppliers:
+            cursor.executemany("INSERT IGNORE INTO suppliers (name) VALUES (%s)",
+                               [(name,) for name in new_suppliers])
+        sql, params = build_clean_update(remaps)
+        cursor.execute(sql, params)
+        changed = cursor.rowcount
+        if events is not None and changed > 0:
+            events.record(cursor, 'cleaned', None, {'assets': changed}, username)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if events is not None:
+            events.discard()
+        raise
+    finally:
+        cursor.close()
+    return {
+        'assets': max(changed, 0),
+        'values': {column: sum(len(v) for v in targets.values()) for column, targets in remaps.items()},
+    }
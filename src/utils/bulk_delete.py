@@ -0,0 +1,111 @@
+"""
+Bulk Asset Deletion
+Chunked set-based deletes of inventory rows and their transaction history,
+and the soft-delete (tombstone) mode that retires assets without losing history
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# Names per DELETE/UPDATE ... WHERE name IN (...); one commit per chunk keeps
+# row locks and undo short however many assets are removed
+CHUNK_SIZE = 500
+
+# History rows keyed by asset_name; asset_transactions is partitioned and cannot
+# cascade, both tables are indexed on (asset_name, created_at, id)
+HISTORY_TABLES = ('asset_transactions', 'asset_transactions_archive')
+
+
+def chunked(names: Sequence[str], size: int = CHUNK_SIZE) -> Iterator[List[str]]:
+    names = list(dict.fromkeys(names))
+    for start in range(0, len(names), size):
+        yield names[start:start + size]
+
+
+def _in(names: Sequence[str]) -> str:
+    return ', '.join(['%s'] * len(names))
+
+
+def _locked_names(cursor, chunk: List[str], condition: str) -> List[str]:
+    """The names in ``chunk`` matching ``condition``, locked until the chunk commits"""
+    cursor.execute(f"SELECT name FROM inventory WHERE name IN ({_in(chunk)}) AND {condition} FOR UPDATE", chunk)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _run_chunks(conn, names: Sequence[str], chunk_size: int, write, events, action: str, condition: str,
+                username: Optional[str] = None) -> int:
+    """
+    Apply ``write(cursor, chunk)`` (returning rows changed) per chunk, one
+    transaction each. With an ``events`` bus the rows actually changed are
+    recorded as ``action`` events in the same transaction and published
+    after its commit.
+    """
+    total = 0
+    cursor = conn.cursor()
+    try:
+        for chunk in chunked(names, chunk_size):
+            try:
+                found = _locked_names(cursor, chunk, condition) if events is not None else None
+                total += write(cursor, chunk)
+                if found:
+                    events.record_many(cursor, action, [(name, None) for name in found], username)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                if events is not None:
+                    events.discard()
+                raise
+            if events is not None:
+                events.publish()
+    finally:
+        cursor.close()
+    return total
+
+
+def hard_delete(conn, names: Sequence[str], chunk_size: int = CHUNK_SIZE,
+                history_tables: Sequence[str] = HISTORY_TABLES, events=None, username: Optional[str] = None) -> int:
+    """Delete assets and their history, one transaction per chunk; returns inventory rows deleted"""
+    def write(cursor, chunk):
+        for table in history_tables:
+            cursor.execute(f"DELETE FROM {table} WHERE asset_name IN ({_in(chunk)})", chunk)
+        cursor.execute(f"DELETE FROM inventory WHERE name IN ({_in(chunk)})", chunk)
+        return cursor.rowcount
+    return _run_chunks(conn, names, chunk_size, write, events, 'deleted', '1 = 1', username)
+
+
+def soft_delete(conn, names: Sequence[str], chunk_size: int = CHUNK_SIZE, events=None,
+                username: Optional[str] = None) -> int:
+    """Tombstone assets (deleted_at = now); history stays. Returns rows retired."""
+    def write(cursor, chunk):
+        cursor.execute(f"""
+            UPDATE inventory SET deleted_at = NOW(), version = version + 1
+            WHERE deleted_at IS NULL AND name IN ({_in(chunk)})
+        """, chunk)
+        return cursor.rowcount
+    return _run_chunks(conn, names, chunk_size, write, events, 'retired', 'deleted_at IS NULL', username)
+
+
+def restore(conn, names: Sequence[str], chunk_size: int = CHUNK_SIZE, events=None,
+            username: Optional[str] = None) -> int:
+    """Bring tombstoned assets back; returns rows restored"""
+    def write(cursor, chunk):
+        cursor.execute(f"""
+            UPDATE inventory SET deleted_at = NULL, version = version + 1
+            WHERE deleted_at IS NOT NULL AND name IN ({_in(chunk)})
+        """, chunk)
+        return cursor.rowcount
+    return _run_chunks(conn, names, chunk_size, write, events, 'restored', 'deleted_at IS NOT NULL', username)
+
+
+def purge_tombstones(conn, older_than_days: int, chunk_size: int = CHUNK_SIZE, events=None) -> Dict[str, int]:
+    """Hard-delete assets retired more than ``older_than_days`` ago"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT name FROM inventory
+            WHERE deleted_at IS NOT NULL AND deleted_at < NOW() - INTERVAL %s DAY
+        """, (int(older_than_days),))
+        names = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    deleted = hard_delete(conn, names, chunk_size, events=events) if names else 0
+    return {'candidates': len(names), 'deleted': deleted}
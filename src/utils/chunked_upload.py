@@ -0,0 +1,264 @@
+"""
+Chunked Uploads
+Resumable, checksummed chunk uploads assembled server-side into the content-addressed blob store
+"""
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import time
+import zlib
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from utils.blob_store import COPY_BUFFER, BlobStore
+
+INCOMING_DIR = '.incoming'
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 32 * 1024 * 1024
+
+# Upload purposes accepted by the API (the attachment kinds that use it)
+PURPOSES = ('apo', 'contracts')
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """A rejected upload request; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def chunk_checksum(data: bytes, algorithm: str) -> str:
+    """Hex digest of a chunk: 'sha256', or 'crc32' for browsers without WebCrypto"""
+    if algorithm == 'sha256':
+        return hashlib.sha256(data).hexdigest()
+    if algorithm == 'crc32':
+        return f'{zlib.crc32(data) & 0xffffffff:08x}'
+    raise UploadError(f"Unsupported checksum algorithm: {algorithm}")
+
+
+class UploadSessions:
+    """
+    One directory per upload under ``UPLOAD_FOLDER/.incoming/<upload_id>``
+    holding ``manifest.json`` and one ``<index>.part`` file per received
+    chunk. Chunks are independent files written via rename, so they may
+    arrive in any order, in parallel, and be resent after a dropped
+    connection; the received set is simply the list of part files.
+    ``complete()`` streams the parts in order into the blob store.
+    """
+
+    def __init__(self, upload_root: str, store: Optional[BlobStore] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_size: int = 2 * 1024 ** 3,
+                 ttl_hours: float = 24):
+        self.root = os.path.join(upload_root, INCOMING_DIR)
+        self.store = store or BlobStore(upload_root)
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.ttl = ttl_hours * 3600
+
+    # --- sessions ---
+
+    def _dir(self, upload_id: str) -> str:
+        if not upload_id or not _UPLOAD_ID.match(upload_id):
+            raise UploadError('Unknown upload', 404)
+        return os.path.join(self.root, upload_id)
+
+    def _load(self, upload_id: str, owner: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self._dir(upload_id), 'manifest.json'), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            raise UploadError('Unknown upload', 404)
+        if manifest['owner'] != owner:
+            raise UploadError('Unknown upload', 404)
+        return manifest
+
+    def _save(self, manifest: Dict[str, Any]):
+        path = os.path.join(self._dir(manifest['upload_id']), 'manifest.json')
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)
+
+    def create(self, filename: str, size: Any, owner: str, purpose: str,
+               mimetype: Optional[str] = None, chunk_size: Any = None) -> Dict[str, Any]:
+        """Start an upload; returns the manifest the client resumes from"""
+        if purpose not in PURPOSES:
+            raise UploadError(f"Unknown upload purpose: {purpose}")
+        try:
+            size = int(size)
+            chunk_size = int(chunk_size) if chunk_size else self.chunk_size
+        except (TypeError, ValueError):
+            raise UploadError('size and chunk_size must be integers')
+        if not filename:
+            raise UploadError('filename is required')
+        if size < 0 or size > self.max_size:
+            raise UploadError(f'File too large (limit {self.max_size // (1024 * 1024)} MB)', 413)
+        chunk_size = max(MIN_CHUNK_SIZE, min(chunk_size, MAX_CHUNK_SIZE))
+        self.purge_stale()
+        upload_id = secrets.token_hex(16)
+        os.makedirs(self._dir(upload_id))
+        manifest = {
+            'upload_id': upload_id,
+            'filename': os.path.basename(filename.replace('\\', '/'))[:255],
+            'mimetype': (mimetype or 'application/octet-stream')[:100],
+            'size': size,
+            'chunk_size': chunk_size,
+            'total_chunks': max(1, -(-size // chunk_size)),
+            'owner': owner,
+            'purpose': purpose,
+            'created_at': time.time(),
+            'sha256': None,
+        }
+        self._save(manifest)
+        return self.describe(manifest)
+
+    def received(self, upload_id: str) -> List[int]:
+        directory = self._dir(upload_id)
+        return sorted(int(name[:-5]) for name in os.listdir(directory)
+                      if name.endswith('.part') and name[:-5].isdigit())
+
+    def describe(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        info = {k: manifest[k] for k in ('upload_id', 'filename', 'size', 'chunk_size', 'total_chunks', 'sha256')}
+        info['received'] = self.received(manifest['upload_id']) if not manifest['sha256'] else []
+        info['complete'] = bool(manifest['sha256'])
+        return info
+
+    def status(self, upload_id: str, owner: str) -> Dict[str, Any]:
+        return self.describe(self._load(upload_id, owner))
+
+    # --- chunks ---
+
+    def expected_length(self, manifest: Dict[str, Any], index: int) -> int:
+        if index < 0 or index >= manifest['total_chunks']:
+            raise UploadError('Chunk index out of range')
+        start = index * manifest['chunk_size']
+        return max(0, min(manifest['chunk_size'], manifest['size'] - start))
+
+    def write_chunk(self, upload_id: str, index: int, stream: BinaryIO, owner: str,
+                    checksum: Optional[str], algorithm: str = 'sha256') -> Dict[str, Any]:
+        """Verify and store one chunk; resending a chunk replaces it"""
+        manifest = self._load(upload_id, owner)
+        if manifest['sha256']:
+            raise UploadError('Upload already completed', 409)
+        if not checksum:
+            raise UploadError('Chunk checksum is required')
+        expected = self.expected_length(manifest, index)
+        data = stream.read(expected + 1)
+        if len(data) != expected:
+            raise UploadError(f'Chunk {index} should be {expected} bytes, got {len(data)}')
+        if chunk_checksum(data, algorithm) != checksum.strip().lower():
+            raise UploadError(f'Checksum mismatch on chunk {index}', 422)
+        directory = self._dir(upload_id)
+        tmp = os.path.join(directory, f'{index:06d}.{secrets.token_hex(4)}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(directory, f'{index:06d}.part'))
+        return {'upload_id': upload_id, 'index': index, 'received': len(self.received(upload_id)),
+                'total_chunks': manifest['total_chunks']}
+
+    # --- completion ---
+
+    def complete(self, upload_id: str, owner: str) -> Dict[str, Any]:
+        """Assemble the chunks into the blob store; idempotent once complete"""
+        manifest = self._load(upload_id, owner)
+        if manifest['sha256']:
+            return self.describe(manifest)
+        directory = self._dir(upload_id)
+        missing = sorted(set(range(manifest['total_chunks'])) - set(self.received(upload_id)))
+        if missing:
+            raise UploadError(f'Missing chunks: {missing[:20]}', 409)
+        lock = os.path.join(directory, 'complete.lock')
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            raise UploadError('Upload is already being assembled', 409)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            fd, tmp = self.store.temp_file()
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    for index in range(manifest['total_chunks']):
+                        with open(os.path.join(directory, f'{index:06d}.part'), 'rb') as part:
+                            while True:
+                                block = part.read(COPY_BUFFER)
+                                if not block:
+                                    break
+                                digest.update(block)
+                                out.write(block)
+                                size += len(block)
+                if size != manifest['size']:
+                    raise UploadError(f"Assembled {size} bytes, expected {manifest['size']}", 409)
+                manifest['sha256'] = digest.hexdigest()
+                self.store.put_file(tmp, manifest['sha256'])
+            except Exception:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._save(manifest)
+            for index in range(manifest['total_chunks']):
+                os.remove(os.path.join(directory, f'{index:06d}.part'))
+        finally:
+            os.remove(lock)
+        return self.describe(manifest)
+
+    def claim(self, upload_id: str, owner: str, purpose: str) -> Dict[str, Any]:
+        """
+        Hand a completed upload to the form that references it and forget the
+        session. Returns filename, mimetype, size, sha256 and the blob path.
+        """
+        manifest = self._load(upload_id, owner)
+        if not manifest['sha256']:
+            raise UploadError('Upload is not complete', 409)
+        if manifest['purpose'] != purpose:
+            raise UploadError('Upload belongs to another form', 400)
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+        return {
+            'filename': manifest['filename'],
+            'mimetype': manifest['mimetype'],
+            'size': manifest['size'],
+            'sha256': manifest['sha256'],
+            'saved_filename': self.store.relative_path(manifest['sha256']),
+        }
+
+    def purge_stale(self, now: Optional[float] = None) -> int:
+        """Remove sessions untouched for longer than the TTL; returns sessions removed"""
+        if not os.path.isdir(self.root):
+            return 0
+        now = now if now is not None else time.time()
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                touched = max([os.path.getmtime(path)] +
+                              [os.path.getmtime(os.path.join(path, f)) for f in os.listdir(path)])
+            except OSError:
+                continue
+            if now - touched > self.ttl:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+_sessions: Dict[str, UploadSessions] = {}
+
+
+def get_upload_sessions(upload_root: str) -> UploadSessions:
+    """Per-process UploadSessions for an upload root, configured from FLASK_CONFIG"""
+    sessions = _sessions.get(upload_root)
+    if sessions is None:
+        from config import FLASK_CONFIG
+        sessions = _sessions[upload_root] = UploadSessions(
+            upload_root,
+            chunk_size=FLASK_CONFIG.get('UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            max_size=FLASK_CONFIG.get('MAX_CHUNKED_UPLOAD_SIZE', 2 * 1024 ** 3),
+            ttl_hours=FLASK_CONFIG.get('UPLOAD_SESSION_TTL_HOURS', 24),
+        )
+    return sessions
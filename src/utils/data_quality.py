@@ -5,9 +5,21 @@ Cleans, enriches, and standardizes asset data for accurate dashboard reporting
 
 import re
 from datetime import datetime, date
+from functools import lru_cache
 from typing import Dict, List, Any, Tuple
 import unicodedata
 
+
+@lru_cache(maxsize=65536)
+def _normalize_text(value: str) -> str:
+    """ASCII-fold and collapse whitespace; cached because the same few values repeat across assets"""
+    if not value.isascii():
+        # Normalize unicode (remove accents, special characters); ASCII is already in NFKD form
+        value = unicodedata.normalize('NFKD', value)
+        value = value.encode('ASCII', 'ignore').decode('ASCII')
+    return ' '.join(value.split())
+
+
 class DataQualityCleaner:
     """
     Handles data cleaning, standardization, and enrichment for asset management
@@ -100,18 +112,7 @@ class DataQualityCleaner:
         if value is None or value == '':
             return ''
         
-        # Convert to string
-        value = str(value)
-        
-        # Normalize unicode (remove accents, special characters)
-        value = unicodedata.normalize('NFKD', value)
-        value = value.encode('ASCII', 'ignore').decode('ASCII')
-        
-        # Remove extra whitespace
-        value = ' '.join(value.split())
-        
-        # Strip and return
-        return value.strip()
+        return _normalize_text(str(value))
     
     @staticmethod
     def standardize_category(category: str) -> str:
@@ -405,15 +406,21 @@ class DataQualityCleaner:
         """
         Generate a data quality report
         """
-        total_assets = len(assets)
-        
-        # Count issues
-        missing_categories = sum(1 for a in assets if not a.get('category') or a.get('category') == 'Uncategorized')
-        missing_suppliers = sum(1 for a in assets if not a.get('supplier') or a.get('supplier') == 'Unknown Supplier')
-        missing_locations = sum(1 for a in assets if not a.get('location') or a.get('location') == 'Unassigned')
-        missing_dates = sum(1 for a in assets if not a.get('purchase_date'))
-        zero_prices = sum(1 for a in assets if DataQualityCleaner.clean_numeric(a.get('price', 0)) == 0)
-        
+        from utils.quality_index import QUALITY_CHECKS
+        counts = {key: sum(1 for a in assets if check(a)) for key, _, check in QUALITY_CHECKS}
+        return DataQualityCleaner.summarize_quality(len(assets), counts)
+
+    @staticmethod
+    def summarize_quality(total_assets: int, counts: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Score, issue totals and recommendations from per-issue asset counts
+        """
+        missing_categories = counts['missing_categories']
+        missing_suppliers = counts['missing_suppliers']
+        missing_locations = counts['missing_locations']
+        missing_dates = counts['missing_dates']
+        zero_prices = counts['zero_prices']
+
         # Calculate quality score (0-100)
         issues = missing_categories + missing_suppliers + missing_locations + missing_dates + zero_prices
         max_issues = total_assets * 5  # 5 fields checked
@@ -0,0 +1,279 @@
+"""
+Duplicate Asset Detection
+Blocking on serial number, brand/model and name tokens, token-set similarity
+within blocks, and the review queue of suspected duplicate pairs
+"""
+
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from utils.data_quality import DataQualityCleaner
+
+# Pairs scoring at least this are queued for review
+DEFAULT_THRESHOLD = 0.9
+
+# Blocks larger than this are too unselective to compare exhaustively (e.g. every
+# asset whose name contains "laptop", or a placeholder serial); their members
+# still meet in smaller blocks
+MAX_BLOCK_SIZE = 100
+
+# A scan asked for several workers scores pairs in worker processes once
+# there are this many (see find_duplicates.py; the web app scans in-process)
+PARALLEL_MIN_PAIRS = 20000
+PAIRS_PER_TASK = 5000
+
+REVIEW_TABLE = 'asset_duplicate_candidates'
+REVIEW_STATUSES = ('pending', 'duplicate', 'not_duplicate')
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+# (name tokens, identity tokens, normalized serial) per asset
+Features = Tuple[FrozenSet[str], FrozenSet[str], str]
+Match = Tuple[str, str, float, str]
+
+
+def _tokens(value: Any) -> List[str]:
+    return _TOKEN.findall(DataQualityCleaner.clean_string(value).casefold())
+
+
+def _joined(value: Any) -> str:
+    """'DELL Latitude-5420' -> 'delllatitude5420'"""
+    return ''.join(_tokens(value))
+
+
+def asset_features(name: str, record: Dict[str, Any]) -> Features:
+    name_tokens = frozenset(_tokens(name))
+    identity = name_tokens | frozenset(_tokens(record.get('brand'))) | frozenset(_tokens(record.get('model')))
+    return name_tokens, identity, _joined(record.get('serial_number'))
+
+
+def blocking_keys(name: str, record: Dict[str, Any], features: Optional[Features] = None) -> Set[str]:
+    """Keys of the blocks an asset belongs to; only assets sharing a key are compared"""
+    name_tokens, _, serial = features or asset_features(name, record)
+    keys = {f'nt:{token}' for token in name_tokens if len(token) > 1}
+    if len(serial) >= 4:
+        keys.add(f'sn:{serial}')
+    model = _joined(record.get('model'))
+    if model:
+        keys.add(f'md:{model}')
+        brand = _joined(record.get('brand'))
+        if brand:
+            keys.add(f'bm:{brand}|{model}')
+    return keys
+
+
+def token_set_ratio(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """
+    Similarity of two token sets in [0, 1], ignoring order and repetition:
+    the shared tokens compared against each side's shared + remaining tokens.
+    """
+    if not a or not b:
+        return 0.0
+    common = ' '.join(sorted(a & b))
+    rest_a = ' '.join(sorted(a - b))
+    rest_b = ' '.join(sorted(b - a))
+    with_a = f'{common} {rest_a}'.strip()
+    with_b = f'{common} {rest_b}'.strip()
+    ratio = SequenceMatcher(None, with_a, with_b).ratio()
+    if common:
+        ratio = max(ratio,
+                    SequenceMatcher(None, common, with_a).ratio(),
+                    SequenceMatcher(None, common, with_b).ratio())
+    return ratio
+
+
+def score_pair(a: Features, b: Features) -> Tuple[float, str]:
+    """(score, reason) for two assets"""
+    serial_a, serial_b = a[2], b[2]
+    if serial_a and serial_b:
+        if serial_a == serial_b:
+            return 1.0, 'Same serial number'
+        # Different serial numbers are different units, however alike the names
+        return 0.0, 'Different serial numbers'
+    score = token_set_ratio(a[1], b[1])
+    return score, f'Similar name/brand/model ({score:.0%})'
+
+
+def score_pairs(pairs: List[Tuple[str, str]], features: Dict[str, Features],
+                threshold: float = DEFAULT_THRESHOLD) -> List[Match]:
+    """(asset_a, asset_b, score, reason) for the pairs scoring at least ``threshold``"""
+    matches = []
+    for a, b in pairs:
+        score, reason = score_pair(features[a], features[b])
+        if score >= threshold:
+            matches.append((a, b, round(score, 4), reason))
+    return matches
+
+
+def _score_task(args) -> List[Match]:
+    return score_pairs(*args)
+
+
+class DuplicateIndex:
+    """
+    ``blocking key -> asset names`` over the inventory, so one asset is
+    checked against the handful of assets sharing a block and a full scan
+    compares pairs within blocks instead of every asset with every other.
+    Maintained like the other inventory indexes: ``asset_changed(name)``
+    re-blocks one asset, ``asset_changed()`` schedules a rebuild.
+    """
+
+    def __init__(self, inventory: Dict[str, Dict[str, Any]]):
+        self._inventory = inventory
+        self._blocks: Dict[str, Set[str]] = {}
+        self._keys: Dict[str, Set[str]] = {}
+        self._features: Dict[str, Features] = {}
+        self._built = False
+        self._lock = threading.RLock()
+
+    # --- maintenance ---
+
+    def asset_changed(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._built = False
+            elif self._built:
+                self._remove(name)
+                record = self._inventory.get(name)
+                if record is not None:
+                    self._add(name, record)
+
+    def _ensure(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            self._blocks = {}
+            self._keys = {}
+            self._features = {}
+            for name, record in list(self._inventory.items()):
+                self._add(name, record)
+            self._built = True
+
+    def _add(self, name: str, record: Dict[str, Any]):
+        features = self._features[name] = asset_features(name, record)
+        keys = self._keys[name] = blocking_keys(name, record, features)
+        for key in keys:
+            self._blocks.setdefault(key, set()).add(name)
+
+    def _remove(self, name: str):
+        self._features.pop(name, None)
+        for key in self._keys.pop(name, ()):
+            members = self._blocks.get(key)
+            if members is None:
+                continue
+            members.discard(name)
+            if not members:
+                del self._blocks[key]
+
+    # --- queries ---
+
+    def _block_pairs(self, members: Set[str]) -> Iterable[Tuple[str, str]]:
+        ordered = sorted(members)
+        for i, a in enumerate(ordered):
+            for b in ordered[i + 1:]:
+                yield a, b
+
+    def candidates(self, name: str) -> Set[str]:
+        """Assets sharing a (selective) block with ``name``"""
+        self._ensure()
+        with self._lock:
+            found: Set[str] = set()
+            for key in self._keys.get(name, ()):
+                members = self._blocks[key]
+                if len(members) <= MAX_BLOCK_SIZE:
+                    found.update(members)
+            found.discard(name)
+            return found
+
+    def matches(self, name: str, threshold: float = DEFAULT_THRESHOLD) -> List[Match]:
+        """Incremental check of one asset (e.g. right after it was added)"""
+        with self._lock:
+            candidates = self.candidates(name)
+            if name not in self._features:
+                return []
+            pairs = [tuple(sorted((name, other))) for other in candidates]
+            return score_pairs(pairs, {n: self._features[n] for n in candidates | {name}}, threshold)
+
+    def candidate_pairs(self) -> List[Tuple[str, str]]:
+        """Distinct pairs that share at least one selective block"""
+        self._ensure()
+        with self._lock:
+            pairs: Set[Tuple[str, str]] = set()
+            for key, members in self._blocks.items():
+                if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+                    continue
+                pairs.update(self._block_pairs(members))
+            return sorted(pairs)
+
+    def scan(self, threshold: float = DEFAULT_THRESHOLD, workers: int = 1) -> Dict[str, Any]:
+        """
+        Score every candidate pair, in this process by default. With
+        ``workers`` > 1 (0 means CPU count) large scans are split into tasks
+        for a process pool. The pool spawns fresh interpreters instead of
+        forking, but it is still meant for the command line
+        (find_duplicates.py), not for request threads.
+        """
+        pairs = self.candidate_pairs()
+        with self._lock:
+            features = dict(self._features)
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(pairs) >= PARALLEL_MIN_PAIRS:
+            tasks = []
+            for start in range(0, len(pairs), PAIRS_PER_TASK):
+                chunk = pairs[start:start + PAIRS_PER_TASK]
+                names = {n for pair in chunk for n in pair}
+                tasks.append((chunk, {n: features[n] for n in names}, threshold))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                matches = [m for result in pool.map(_score_task, tasks) for m in result]
+        else:
+            matches = score_pairs(pairs, features, threshold)
+        matches.sort(key=lambda m: (-m[2], m[0], m[1]))
+        return {'assets': len(features), 'pairs': len(pairs), 'matches': matches}
+
+
+# --- review queue ---
+
+def enqueue_matches(cursor, matches: List[Match]) -> int:
+    """Queue suspected pairs for review; pairs already decided keep their decision"""
+    if not matches:
+        return 0
+    cursor.executemany(f"""
+        INSERT INTO {REVIEW_TABLE} (asset_a, asset_b, score, reason)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE score = VALUES(score), reason = VALUES(reason)
+    """, [(a, b, score, reason) for a, b, score, reason in matches])
+    return len(matches)
+
+
+def pending_reviews(cursor, page: int = 1, per_page: int = 50) -> Dict[str, Any]:
+    """One page of pending pairs whose assets both still exist, best score first"""
+    page = max(1, page)
+    cursor.execute(f"""
+        SELECT d.id, d.asset_a, d.asset_b, d.score, d.reason, d.detected_at
+        FROM {REVIEW_TABLE} d
+        JOIN inventory a ON a.name = d.asset_a AND a.deleted_at IS NULL
+        JOIN inventory b ON b.name = d.asset_b AND b.deleted_at IS NULL
+        WHERE d.status = 'pending'
+        ORDER BY d.score DESC, d.id
+        LIMIT %s OFFSET %s
+    """, (per_page + 1, (page - 1) * per_page))
+    rows = cursor.fetchall()
+    return {'items': rows[:per_page], 'page': page, 'per_page': per_page,
+            'has_prev': page > 1, 'has_next': len(rows) > per_page}
+
+
+def resolve_review(cursor, review_id: int, status: str, reviewed_by: Optional[str]) -> bool:
+    if status not in REVIEW_STATUSES:
+        raise ValueError(f"Unknown review status: {status!r}")
+    cursor.execute(f"""
+        UPDATE {REVIEW_TABLE} SET status = %s, reviewed_by = %s, reviewed_at = NOW()
+        WHERE id = %s
+    """, (status, reviewed_by, review_id))
+    return cursor.rowcount > 0
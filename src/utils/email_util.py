@@ -1,21 +1,9 @@
 def send_email(sender, recipient, subject, body, smtp_server='smtp.gmail.com', port=587, password=None):
+    """Send one message synchronously (used to test SMTP settings); notifications go through queue_email"""
     import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-
-    # Create message with HTML support
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = sender
-    msg['To'] = recipient
-    
-    # Create both plain text and HTML versions
-    text_part = MIMEText(body, 'plain')
-    html_body = body.replace('\n', '<br>')
-    html_part = MIMEText(f'<html><body>{html_body}</body></html>', 'html')
-    
-    msg.attach(text_part)
-    msg.attach(html_part)
+    from utils.mail_queue import build_message
+
+    msg = build_message(sender, recipient, subject, body)
 
     try:
         with smtplib.SMTP(smtp_server, port) as server:
@@ -73,22 +61,11 @@ Best regards,
 Asset Management Team
 """
     
-    # Get email configuration from database or config
-    try:
-        from config import EMAIL_CONFIG
-        sender = EMAIL_CONFIG.get('sender_email')
-        password = EMAIL_CONFIG.get('sender_password')
-        smtp_server = EMAIL_CONFIG.get('smtp_server', 'smtp.gmail.com')
-        port = EMAIL_CONFIG.get('smtp_port', 587)
-        
-        if sender and password and recipient_email:
-            return send_email(sender, recipient_email, subject, body, smtp_server, port, password)
-        else:
-            print("Email configuration incomplete. Skipping email notification.")
-            return False
-    except Exception as e:
-        print(f"Email notification failed: {e}")
-        return False
+    # Batched per recipient by the digest engine, then delivered by the mail queue
+    import time
+    from utils.alert_digest import notify
+    summary = f"{asset_name} assigned by {assigned_by} on {asset_details.get('assignment_date', 'N/A')}"
+    return notify('assignment', recipient_email, f"{asset_name}:{time.time():.6f}", subject, summary, body)
 
 def send_checkout_notification_email(recipient_email, recipient_name, item_name, quantity, checkout_details, notes=None):
     """Send email notification when items are checked out to a user"""
@@ -130,22 +107,57 @@ Best regards,
 Asset Management Team
 """
     
-    # Get email configuration from database or config
-    try:
-        from config import EMAIL_CONFIG
-        sender = EMAIL_CONFIG.get('sender_email')
-        password = EMAIL_CONFIG.get('sender_password')
-        smtp_server = EMAIL_CONFIG.get('smtp_server', 'smtp.gmail.com')
-        port = EMAIL_CONFIG.get('smtp_port', 587)
-        
-        if sender and password and recipient_email:
-            return send_email(sender, recipient_email, subject, body, smtp_server, port, password)
-        else:
-            print("Email configuration incomplete. Skipping email notification.")
-            return False
-    except Exception as e:
-        print(f"Email notification failed: {e}")
-        return False
+    # Batched per recipient by the digest engine, then delivered by the mail queue
+    import time
+    from utils.alert_digest import notify
+    summary = (f"{quantity} x {item_name} checked out on {checkout_details.get('checkout_date', 'N/A')} "
+               f"by {checkout_details.get('checked_out_by', 'N/A')}")
+    return notify('checkout', recipient_email, f"{item_name}:{time.time():.6f}", subject, summary, body)
+
+def send_bulk_transaction_email(recipient_email, recipient_name, action, items, details, notes=None):
+    """One notification for a whole bulk checkout/checkin; ``items`` are (item_name, quantity)"""
+    verb = 'checked out' if action == 'checkout' else 'returned'
+    title = 'CHECKOUT DETAILS' if action == 'checkout' else 'CHECK-IN DETAILS'
+    total_units = sum(quantity for _, quantity in items)
+    subject = f"Asset {'Checkout' if action == 'checkout' else 'Check-in'} Notification: {len(items)} item(s)"
+    lines = '\n'.join(f"• {quantity} x {item_name}" for item_name, quantity in items)
+
+    body = f"""
+Dear {recipient_name},
+
+You have {verb} the following item(s):
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{title}
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+{lines}
+
+Total Units: {total_units}
+Department: {details.get('department', 'N/A')}
+Location: {details.get('location', 'N/A')}
+Date: {details.get('date', 'N/A')}
+Processed By: {details.get('processed_by', 'N/A')}
+"""
+
+    if notes:
+        body += f"\nAdditional Notes:\n{notes}\n"
+
+    body += """
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+This is an automated notification from the Asset Management System.
+Please do not reply to this email.
+
+Best regards,
+Asset Management Team
+"""
+
+    import time
+    from utils.alert_digest import notify
+    summary = (f"{total_units} unit(s) of {len(items)} item(s) {verb} on {details.get('date', 'N/A')} "
+               f"by {details.get('processed_by', 'N/A')}")
+    return notify('checkout', recipient_email, f"bulk-{action}:{time.time():.6f}", subject, summary, body)
 
 def configure_email_settings():
     sender = input("Enter sender email: ")
@@ -0,0 +1,188 @@
+"""
+Asset Enrichment
+Batch calculation of age, book value, lifecycle and risk for inventory rows,
+written back only where the stored values changed
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Rows per INSERT into the temporary table the UPDATE joins against
+WRITE_BATCH = 1000
+
+# Calculated columns in the order enrich_rows() returns them (see migration 0010)
+ENRICHED_COLUMNS = ('age_years', 'depreciation_value', 'book_value', 'lifecycle_status', 'risk_level')
+
+# Age thresholds in years, oldest first
+LIFECYCLE_STAGES = ((5, 'End of Life'), (3, 'Aging'), (1, 'Mature'), (0, 'New'))
+RISK_LEVELS = ((3, 'Medium'), (0, 'Low'))
+
+_SELECT = """
+    SELECT name, price, purchase_date, salvage_value, useful_life_years, depreciation_method,
+           age_years, depreciation_value, book_value, lifecycle_status, risk_level,
+           enriched_at IS NULL OR updated_at > enriched_at AS stale
+    FROM inventory
+    WHERE deleted_at IS NULL
+"""
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def depreciated_value(purchase_price, purchase_date, salvage_value, useful_life_years,
+                      method='straight_line', today: Optional[date] = None):
+    """Current value of an asset; the formula behind the asset list's current value column"""
+    if not purchase_date or not purchase_price:
+        return purchase_price
+
+    try:
+        purchase_date = _as_date(purchase_date)
+        years_owned = ((today or date.today()) - purchase_date).days / 365.25
+
+        if years_owned >= useful_life_years:
+            return salvage_value
+
+        depreciable_amount = purchase_price - salvage_value
+
+        if method == 'straight_line':
+            annual_depreciation = depreciable_amount / useful_life_years
+            accumulated_depreciation = annual_depreciation * years_owned
+            current_value = purchase_price - accumulated_depreciation
+        elif method == 'declining_balance':
+            rate = 2.0 / useful_life_years  # Double declining balance
+            current_value = purchase_price * ((1 - rate) ** years_owned)
+            current_value = max(current_value, salvage_value)
+        else:
+            current_value = purchase_price
+
+        return max(current_value, salvage_value)
+    except Exception:
+        return purchase_price
+
+
+def _stage(age: float, stages) -> str:
+    for threshold, label in stages:
+        if age >= threshold:
+            return label
+    return stages[-1][1]
+
+
+def enrich_rows(rows: Sequence[Tuple], today: Optional[date] = None) -> List[Tuple]:
+    """
+    Calculated columns for many assets in one pass. ``rows`` are
+    (name, price, purchase_date, salvage_value, useful_life_years, depreciation_method);
+    returns (name, age_years, depreciation_value, book_value, lifecycle_status, risk_level).
+    """
+    today = today or date.today()
+    parsed: Dict[Any, Optional[date]] = {}
+    results = []
+    for name, price, purchase_date, salvage, life, method in rows:
+        price = float(price or 0)
+        salvage = float(salvage or 0)
+        life = life or 5
+        if purchase_date not in parsed:
+            try:
+                parsed[purchase_date] = _as_date(purchase_date) if purchase_date else None
+            except ValueError:
+                parsed[purchase_date] = None
+        purchased = parsed[purchase_date]
+        if purchased is None:
+            results.append((name, 0.0, 0.0, round(price, 2), 'Unknown', 'Low'))
+            continue
+        age = max(round((today - purchased).days / 365.25, 2), 0.0)
+        book = round(float(depreciated_value(price, purchased, salvage, life,
+                                             method or 'straight_line', today)), 2)
+        results.append((name, age, round(price - book, 2), book,
+                        _stage(age, LIFECYCLE_STAGES), _stage(age, RISK_LEVELS)))
+    return results
+
+
+def _normalized(values: Sequence[Any]) -> Tuple:
+    """Stored column values in the form enrich_rows() produces, for comparison"""
+    return tuple(round(float(v), 2) if isinstance(v, (Decimal, float, int)) else v for v in values)
+
+
+def changed_rows(cursor, incremental: bool = False, today: Optional[date] = None) -> Tuple[int, List[Tuple]]:
+    """
+    (assets examined, rows to write). Incremental runs only look at rows
+    written since their last enrichment; either way a row is only returned
+    when a calculated value differs or it has not been stamped yet.
+    """
+    sql = _SELECT + (" AND (enriched_at IS NULL OR updated_at > enriched_at)" if incremental else "")
+    cursor.execute(sql)
+    fetched = cursor.fetchall()
+    enriched = enrich_rows([row[:6] for row in fetched], today)
+    pending = [values for row, values in zip(fetched, enriched)
+               if row[11] or _normalized(row[6:11]) != values[1:]]
+    return len(fetched), pending
+
+
+def write_enrichment(cursor, rows: Sequence[Tuple]):
+    """
+    Apply calculated values with one UPDATE ... JOIN against a temporary
+    table filled by batched INSERTs. updated_at is assigned to itself so
+    enrichment does not mark the rows as changed again.
+    """
+    if not rows:
+        return
+    cursor.execute("""
+        CREATE TEMPORARY TABLE IF NOT EXISTS tmp_inventory_enrichment (
+            name VARCHAR(255) PRIMARY KEY,
+            age_years DECIMAL(10,2),
+            depreciation_value DECIMAL(15,2),
+            book_value DECIMAL(15,2),
+            lifecycle_status VARCHAR(50),
+            risk_level VARCHAR(20)
+        )
+    """)
+    try:
+        cursor.execute("DELETE FROM tmp_inventory_enrichment")
+        for start in range(0, len(rows), WRITE_BATCH):
+            cursor.executemany("""
+                INSERT INTO tmp_inventory_enrichment
+                (name, age_years, depreciation_value, book_value, lifecycle_status, risk_level)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, list(rows[start:start + WRITE_BATCH]))
+        cursor.execute("""
+            UPDATE inventory i
+            JOIN tmp_inventory_enrichment t ON t.name = i.name
+            SET i.age_years = t.age_years,
+                i.depreciation_value = t.depreciation_value,
+                i.book_value = t.book_value,
+                i.lifecycle_status = t.lifecycle_status,
+                i.risk_level = t.risk_level,
+                i.enriched_at = NOW(),
+                i.updated_at = i.updated_at
+        """)
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS tmp_inventory_enrichment")
+
+
+def enrich_inventory(conn, incremental: bool = False, today: Optional[date] = None,
+                     events=None) -> Dict[str, int]:
+    """
+    Enrich the inventory in one transaction; returns assets examined and rows
+    updated. With an ``events`` bus one 'enriched' event per updated asset is
+    recorded in the transaction; the caller publishes them.
+    """
+    cursor = conn.cursor()
+    try:
+        examined, rows = changed_rows(cursor, incremental, today)
+        write_enrichment(cursor, rows)
+        if events is not None:
+            events.record_many(cursor, 'enriched', [(row[0], dict(zip(ENRICHED_COLUMNS, row[1:]))) for row in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if events is not None:
+            events.discard()
+        raise
+    finally:
+        cursor.close()
+    return {'examined': examined, 'updated': len(rows)}
@@ -0,0 +1,196 @@
+"""
+Inventory Change Events
+A transactional outbox of inventory writes (inventory_events rows inserted in
+the same transaction as the change) and the in-process bus that hands each
+committed batch of events to its subscribers
+"""
+
+import json
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+EVENT_TABLE = 'inventory_events'
+
+# Outbox readers only see events at least this old. ids are assigned at
+# INSERT, not at commit, so a transaction that commits late makes a lower id
+# appear after higher ones; a poller that had already moved past it would
+# never see it. Writers record their events last, right before committing,
+# so the window only has to cover the insert-to-commit gap.
+EVENT_SETTLE_SECONDS = 5
+
+# Writes to the inventory row itself
+INVENTORY_ACTIONS = (
+    'created', 'updated', 'moved', 'assigned', 'adjusted', 'checkout', 'checkin', 'dispose',
+    'deleted', 'retired', 'restored', 'cleaned', 'enriched',
+)
+# Writes to the asset's transaction log only
+LOG_ACTIONS = ('reserve', 'maintenance')
+ACTIONS = INVENTORY_ACTIONS + LOG_ACTIONS
+
+# Actions that change columns held in the in-memory cache (enrichment only
+# writes calculated columns the cache does not load)
+CACHE_ACTIONS = frozenset(INVENTORY_ACTIONS) - {'enriched'}
+
+_INSERT_SQL = f"""
+    INSERT INTO {EVENT_TABLE} (action, asset_name, changes, username)
+    VALUES (%s, %s, %s, %s)
+"""
+
+
+class InventoryEvent(NamedTuple):
+    """
+    One committed write. ``asset_name`` None means a set-based write that
+    may have touched any asset (e.g. a data clean-up); ``changes`` holds the
+    values written. ``id`` is None for events recorded in bulk.
+    """
+    id: Optional[int]
+    action: str
+    asset_name: Optional[str]
+    changes: Dict[str, Any]
+    username: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+Subscriber = Callable[[List[InventoryEvent]], Any]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode(changes: Optional[Dict[str, Any]]) -> Optional[str]:
+    return json.dumps(changes, default=_json_default, sort_keys=True) if changes else None
+
+
+def _check_action(action: str):
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown inventory event: {action}")
+
+
+class EventBus:
+    """
+    Record events with ``record``/``record_many`` inside the write's
+    transaction, then ``publish()`` after the commit (or ``discard()`` after
+    a rollback). Events are queued per thread, so each request publishes
+    only its own writes. Subscribers receive the list of events committed
+    together and are isolated from each other: a failing subscriber is
+    logged and cannot undo the committed write or starve the others.
+    Processes that do not share this bus read the outbox with ``events_since``.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Tuple[Subscriber, Optional[frozenset]]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # --- subscribers ---
+
+    def subscribe(self, handler: Subscriber, actions: Optional[Iterable[str]] = None) -> Subscriber:
+        """Deliver committed events (only ``actions``, if given) to ``handler(events)``"""
+        with self._lock:
+            self._subscribers.append((handler, frozenset(actions) if actions is not None else None))
+        return handler
+
+    def unsubscribe(self, handler: Subscriber):
+        with self._lock:
+            self._subscribers = [(h, a) for h, a in self._subscribers if h != handler]
+
+    # --- recording (caller's transaction) ---
+
+    def _pending(self) -> List[InventoryEvent]:
+        pending = getattr(self._local, 'events', None)
+        if pending is None:
+            pending = self._local.events = []
+        return pending
+
+    def record(self, cursor, action: str, asset_name: Optional[str] = None,
+               changes: Optional[Dict[str, Any]] = None, username: Optional[str] = None) -> InventoryEvent:
+        """Write one event to the outbox on ``cursor``; it is delivered on publish()"""
+        _check_action(action)
+        cursor.execute(_INSERT_SQL, (action, asset_name, _encode(changes), username))
+        event = InventoryEvent(getattr(cursor, 'lastrowid', None), action, asset_name, dict(changes or {}), username)
+        self._pending().append(event)
+        return event
+
+    def record_many(self, cursor, action: str, items: Sequence[Tuple[Optional[str], Optional[Dict[str, Any]]]],
+                    username: Optional[str] = None) -> int:
+        """Write one event per (asset_name, changes) in a single executemany"""
+        _check_action(action)
+        if not items:
+            return 0
+        cursor.executemany(_INSERT_SQL, [(action, name, _encode(changes), username) for name, changes in items])
+        self._pending().extend(InventoryEvent(None, action, name, dict(changes or {}), username)
+                               for name, changes in items)
+        return len(items)
+
+    def discard(self):
+        """Forget this thread's queued events (their transaction was rolled back)"""
+        self._local.events = []
+
+    # --- delivery (after commit) ---
+
+    def publish(self) -> int:
+        """Deliver this thread's committed events to the subscribers; returns how many"""
+        events = self._pending()
+        if not events:
+            return 0
+        self._local.events = []
+        self.deliver(events)
+        return len(events)
+
+    def deliver(self, events: List[InventoryEvent]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for handler, actions in subscribers:
+            batch = events if actions is None else [e for e in events if e.action in actions]
+            if not batch:
+                continue
+            try:
+                handler(batch)
+            except Exception as e:
+                print(f"Warning: inventory event subscriber {getattr(handler, '__name__', handler)} failed: {e}")
+
+
+# --- outbox readers ---
+
+def events_since(cursor, after_id: int = 0, limit: int = 500, asset_name: Optional[str] = None,
+                 settle_seconds: int = EVENT_SETTLE_SECONDS) -> List[InventoryEvent]:
+    """
+    Outbox events with id > ``after_id`` in id order, for consumers outside
+    this process that poll with the last id they saw. Only events older than
+    ``settle_seconds`` are returned, so no lower id can still be uncommitted
+    behind them (see EVENT_SETTLE_SECONDS).
+    """
+    sql = (f"SELECT id, action, asset_name, changes, username, created_at FROM {EVENT_TABLE} "
+           f"WHERE id > %s AND created_at < NOW() - INTERVAL %s SECOND")
+    params: List[Any] = [int(after_id), int(settle_seconds)]
+    if asset_name is not None:
+        sql += " AND asset_name = %s"
+        params.append(asset_name)
+    sql += " ORDER BY id LIMIT %s"
+    params.append(int(limit))
+    cursor.execute(sql, params)
+    return [InventoryEvent(row[0], row[1], row[2], json.loads(row[3]) if row[3] else {}, row[4], row[5])
+            for row in cursor.fetchall()]
+
+
+def prune_events(conn, older_than_days: int, batch: int = 10000) -> int:
+    """Delete outbox events older than ``older_than_days``, ``batch`` rows per commit"""
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        while True:
+            cursor.execute(f"DELETE FROM {EVENT_TABLE} WHERE created_at < NOW() - INTERVAL %s DAY LIMIT %s",
+                           (int(older_than_days), int(batch)))
+            conn.commit()
+            deleted += max(cursor.rowcount, 0)
+            if cursor.rowcount < batch:
+                return deleted
+    finally:
+        cursor.close()
@@ -0,0 +1,260 @@
+"""
+Expiry Index
+Date-ordered in-memory index of warranty, contract, lease, maintenance and
+end-of-life dates for range lookups
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+EXPIRY_KINDS = ('warranty', 'contract', 'lease', 'maintenance', 'end_of_life')
+
+# Schedule tables loaded by load_schedules(): kind, table, SELECT of (id, asset, date)
+SCHEDULE_SOURCES = (
+    ('warranty', 'asset_warranties',
+     "SELECT id, asset_name, warranty_end_date FROM asset_warranties WHERE status = 'active'"),
+    ('contract', 'contracts',
+     "SELECT id, contract_name, end_date FROM contracts WHERE status != 'expired'"),
+    ('lease', 'asset_leases',
+     "SELECT id, asset_name, lease_end_date FROM asset_leases WHERE status = 'active'"),
+    ('maintenance', 'asset_maintenance',
+     "SELECT id, asset_name, scheduled_date FROM asset_maintenance WHERE status = 'scheduled'"),
+)
+
+_DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%m/%d/%Y')
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_string(value: str) -> Optional[date]:
+    value = value.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """date for a date/datetime/string value, None when missing or unparseable"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return _parse_date_string(str(value))
+
+
+def end_of_life(record: Dict[str, Any]) -> Optional[date]:
+    """purchase_date + useful_life_years, None when either is missing"""
+    purchased = parse_date(record.get('purchase_date'))
+    try:
+        years = int(record.get('useful_life_years') or 0)
+    except (TypeError, ValueError):
+        return None
+    if purchased is None or years <= 0:
+        return None
+    try:
+        return purchased.replace(year=purchased.year + years)
+    except ValueError:  # 29 February
+        return purchased.replace(year=purchased.year + years, day=28)
+
+
+# Dates derived from inventory columns, re-read when an asset is edited (kind -> function of the record)
+INVENTORY_DATES = (
+    ('end_of_life', end_of_life),
+)
+
+
+class ExpiryIndex:
+    """
+    One sorted list of ``(date, key)`` per kind, plus ``key -> (date, asset)``
+    so an entry can be moved or dropped with two bisects.
+
+    Inventory-derived entries are keyed by asset name and are rebuilt lazily
+    after a full reload, or per asset when ``asset_changed(name)`` is called.
+    Schedule-table entries are keyed ``table:id``; with a loader set by
+    ``refresh_schedules_every`` they are reloaded once older than its TTL.
+    Lookups are range slices: O(log n + matches) instead of a scan with a
+    date parse per asset.
+    """
+
+    def __init__(self, inventory: Dict[str, Dict[str, Any]]):
+        self._inventory = inventory
+        self._sorted: Dict[str, List[Tuple[date, str]]] = {kind: [] for kind in EXPIRY_KINDS}
+        self._entries: Dict[Tuple[str, str], Tuple[date, str]] = {}
+        self._by_asset: Dict[Tuple[str, str], Set[str]] = {}
+        self._inventory_keys: set = set()
+        self._inventory_built = False
+        self._lock = threading.RLock()
+        self._schedule_loader: Optional[Callable[[], Any]] = None
+        self._schedule_ttl = 0.0
+        self._schedules_loaded_at: Optional[float] = None
+        self._schedule_refresh = threading.Lock()
+
+    # --- maintenance ---
+
+    def set(self, kind: str, key: str, when: Any, asset: Optional[str] = None):
+        """Add or move an entry; a missing date removes it"""
+        with self._lock:
+            self._remove(kind, key)
+            when = parse_date(when)
+            if when is None:
+                return
+            asset = asset if asset is not None else key
+            insort(self._sorted[kind], (when, key))
+            self._entries[(kind, key)] = (when, asset)
+            self._by_asset.setdefault((kind, asset), set()).add(key)
+
+    def remove(self, kind: str, key: str):
+        with self._lock:
+            self._remove(kind, key)
+
+    def _remove(self, kind: str, key: str):
+        entry = self._entries.pop((kind, key), None)
+        if entry is None:
+            return
+        keys = self._by_asset.get((kind, entry[1]))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_asset[(kind, entry[1])]
+        entries = self._sorted[kind]
+        i = bisect_left(entries, (entry[0], key))
+        if i < len(entries) and entries[i] == (entry[0], key):
+            del entries[i]
+
+    def asset_changed(self, name: Optional[str] = None):
+        """Re-read one asset's date fields, or all of them (lazily) when name is None"""
+        with self._lock:
+            if name is None:
+                self._inventory_built = False
+                return
+            if not self._inventory_built:
+                return
+            record = self._inventory.get(name)
+            for kind, derive in INVENTORY_DATES:
+                self._set_inventory(kind, name, derive(record) if record is not None else None)
+
+    def _set_inventory(self, kind: str, name: str, when: Any):
+        self.set(kind, name, when)
+        if (kind, name) in self._entries:
+            self._inventory_keys.add((kind, name))
+        else:
+            self._inventory_keys.discard((kind, name))
+
+    def _ensure_inventory(self):
+        if self._inventory_built:
+            return
+        with self._lock:
+            if self._inventory_built:
+                return
+            for kind, key in self._inventory_keys:
+                self._remove(kind, key)
+            self._inventory_keys.clear()
+            for name, record in list(self._inventory.items()):
+                for kind, derive in INVENTORY_DATES:
+                    self._set_inventory(kind, name, derive(record))
+            self._inventory_built = True
+
+    def load_schedules(self, cursor) -> int:
+        """(Re)load entries from the schedule tables that exist; returns entries loaded"""
+        from db.migrate import table_exists
+        self._schedules_loaded_at = time.monotonic()
+        loaded = 0
+        for kind, table, query in SCHEDULE_SOURCES:
+            if not table_exists(cursor, table):
+                continue
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            with self._lock:
+                prefix = f'{table}:'
+                for key in [k for (entry_kind, k) in self._entries if entry_kind == kind and k.startswith(prefix)]:
+                    self._remove(kind, key)
+                for row_id, asset, when in rows:
+                    self.set(kind, f'{prefix}{row_id}', when, asset)
+                    loaded += 1
+        return loaded
+
+    def refresh_schedules_every(self, seconds: float, loader: Callable[[], Any]):
+        """
+        Keep the schedule tables current: a lookup made more than ``seconds``
+        after the last load calls ``loader()`` (which calls load_schedules
+        with a cursor of its own) first. Rows written by other processes
+        therefore show up within one TTL without a restart.
+        """
+        self._schedule_ttl = seconds
+        self._schedule_loader = loader
+
+    def _ensure_schedules(self):
+        if self._schedule_loader is None:
+            return
+        loaded_at = self._schedules_loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self._schedule_ttl:
+            return
+        # One thread reloads; concurrent lookups answer from the current entries
+        if not self._schedule_refresh.acquire(blocking=False):
+            return
+        try:
+            if self._schedules_loaded_at == loaded_at:
+                self._schedule_loader()
+        except Exception as e:
+            print(f"Warning reloading expiry schedules: {e}")
+        finally:
+            if self._schedules_loaded_at == loaded_at:
+                # Failed reloads are retried after the TTL, not on every lookup
+                self._schedules_loaded_at = time.monotonic()
+            self._schedule_refresh.release()
+
+    # --- lookups ---
+
+    def between(self, kind: str, start: Optional[date] = None, end: Optional[date] = None,
+                inclusive_end: bool = True) -> List[Dict[str, Any]]:
+        """Entries dated from ``start`` to ``end`` (either open), in date order"""
+        self._ensure_inventory()
+        self._ensure_schedules()
+        with self._lock:
+            entries = self._sorted[kind]
+            lo = bisect_left(entries, (start,)) if start is not None else 0
+            if end is None:
+                hi = len(entries)
+            elif inclusive_end:
+                hi = bisect_right(entries, (end, '\U0010ffff'))
+            else:
+                hi = bisect_left(entries, (end,))
+            return [{'date': when, 'key': key, 'asset': self._entries[(kind, key)][1]}
+                    for when, key in entries[lo:hi]]
+
+    def expired(self, kind: str, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Entries dated before today"""
+        return self.between(kind, None, today or date.today(), inclusive_end=False)
+
+    def expiring(self, kind: str, days: int = 30, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Entries dated from today up to (not including) today + days"""
+        today = today or date.today()
+        return self.between(kind, today, today + timedelta(days=days), inclusive_end=False)
+
+    def date_of(self, kind: str, key: str) -> Optional[date]:
+        self._ensure_inventory()
+        self._ensure_schedules()
+        entry = self._entries.get((kind, key))
+        return entry[0] if entry else None
+
+    def next_for_asset(self, kind: str, asset: str, today: Optional[date] = None) -> Optional[date]:
+        """An asset's earliest ``kind`` date from today on, else its latest past one"""
+        self._ensure_inventory()
+        self._ensure_schedules()
+        today = today or date.today()
+        with self._lock:
+            dates = sorted(self._entries[(kind, key)][0] for key in self._by_asset.get((kind, asset), ()))
+        upcoming = [d for d in dates if d >= today]
+        return upcoming[0] if upcoming else (dates[-1] if dates else None)
+
+    def __len__(self) -> int:
+        self._ensure_inventory()
+        return len(self._entries)
@@ -0,0 +1,160 @@
+"""
+File Delivery
+Serve uploaded files with strong ETags, conditional and Range requests, or hand
+the transfer to the front-end web server (X-Accel-Redirect / X-Sendfile). The
+content type is decided here from the file itself, never from the uploader.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+from utils.blob_store import BLOB_DIR, COPY_BUFFER, is_sha256
+
+# 'flask' streams from the worker (sendfile via wsgi.file_wrapper where the
+# server supports it); 'x-accel' (nginx) and 'x-sendfile' (Apache, lighttpd)
+# only return headers and let the web server send the bytes
+DELIVERY_MODES = ('flask', 'x-accel', 'x-sendfile')
+
+# Blobs never change under their name, so browsers may keep them for a year
+BLOB_MAX_AGE = 365 * 24 * 3600
+
+# Leading bytes -> types a browser may render inline. Everything else is sent
+# as a download: an uploaded HTML or SVG file shown inline would run script
+# in the app's origin.
+_INLINE_SIGNATURES = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+# Extension -> type for downloads that are not sniffed as inline content
+DOWNLOAD_TYPES = {
+    '.csv': 'text/csv',
+    '.txt': 'text/plain',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.zip': 'application/zip',
+}
+
+_ETAG_CACHE_SIZE = 4096
+_etags: 'OrderedDict[Tuple, str]' = OrderedDict()
+
+
+def content_etag(path: str, st: Optional[os.stat_result] = None) -> str:
+    """
+    Strong ETag for a file: its SHA-256. Blobs are named by their digest; other
+    files are hashed once and cached per (path, inode, size, mtime).
+    """
+    name = os.path.basename(path)
+    if is_sha256(name) and os.path.basename(os.path.dirname(os.path.dirname(path))) == BLOB_DIR:
+        return name
+    st = st or os.stat(path)
+    key = (path, st.st_ino, st.st_size, st.st_mtime_ns)
+    etag = _etags.get(key)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(COPY_BUFFER)
+                if not block:
+                    break
+                digest.update(block)
+        etag = _etags[key] = digest.hexdigest()
+        while len(_etags) > _ETAG_CACHE_SIZE:
+            _etags.popitem(last=False)
+    else:
+        _etags.move_to_end(key)
+    return etag
+
+
+def sniff_type(path: str, download_name: str) -> Tuple[str, bool]:
+    """
+    (mimetype, inline) for a file: images and PDFs recognised by their leading
+    bytes may be shown inline; anything else gets an allowlisted type for its
+    extension, or application/octet-stream, and must be downloaded.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(16)
+    for magic, mimetype in _INLINE_SIGNATURES:
+        if head.startswith(magic):
+            return mimetype, True
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'image/webp', True
+    extension = os.path.splitext(download_name)[1].lower()
+    return DOWNLOAD_TYPES.get(extension, 'application/octet-stream'), False
+
+
+def content_disposition(filename: str, as_attachment: bool) -> str:
+    kind = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return f'{kind}; filename="{filename.replace(chr(34), "")}"'
+    except UnicodeEncodeError:
+        fallback = filename.encode('ascii', 'ignore').decode('ascii').replace('"', '') or 'download'
+        return f"{kind}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def send_upload(upload_root: str, relative_path: str, download_name: Optional[str] = None,
+                as_attachment: bool = False,
+                etag: Optional[str] = None, mode: Optional[str] = None,
+                accel_prefix: Optional[str] = None, immutable: Optional[bool] = None):
+    """
+    Response for a file under the upload root. Callers do their access checks
+    first; this only decides how the bytes reach the client. 304 answers are
+    produced here in every mode; Range requests get a 206 from send_file in
+    'flask' mode and from the web server in the header-only modes.
+    ``immutable`` (default: blobs) marks content that never changes under its URL.
+    The type comes from ``sniff_type``; files it does not allow inline are
+    always sent as attachments, and every response carries nosniff.
+    """
+    path = safe_join(upload_root, relative_path)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    from config import FLASK_CONFIG
+    mode = mode or FLASK_CONFIG.get('FILE_DELIVERY_MODE', 'flask')
+    if mode not in DELIVERY_MODES:
+        raise ValueError(f"Unknown FILE_DELIVERY_MODE: {mode}")
+    st = os.stat(path)
+    etag = etag or content_etag(path, st)
+    download_name = download_name or os.path.basename(path)
+    mimetype, inline = sniff_type(path, download_name)
+    as_attachment = as_attachment or not inline
+    if immutable is None:
+        immutable = relative_path.replace('\\', '/').startswith(BLOB_DIR + '/')
+
+    if mode == 'flask':
+        response = send_file(path, mimetype=mimetype, as_attachment=as_attachment,
+                             download_name=download_name, conditional=True, etag=etag,
+                             last_modified=st.st_mtime, max_age=BLOB_MAX_AGE if immutable else 0)
+    else:
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['Content-Disposition'] = content_disposition(download_name, as_attachment)
+        response.set_etag(etag)
+        response.last_modified = st.st_mtime
+        response.make_conditional(request)
+        if response.status_code == 200:
+            if mode == 'x-accel':
+                prefix = (accel_prefix or FLASK_CONFIG.get('X_ACCEL_PREFIX', '/protected-uploads/')).rstrip('/')
+                response.headers['X-Accel-Redirect'] = f"{prefix}/{quote(relative_path.replace(os.sep, '/'))}"
+            else:
+                response.headers['X-Sendfile'] = os.path.abspath(path)
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    # Access-checked content: browsers may cache it, shared caches may not
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if immutable:
+        response.cache_control.max_age = BLOB_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
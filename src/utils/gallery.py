@@ -0,0 +1,45 @@
+"""
+Gallery
+Image and document attachments (APO and contract files) for the gallery pages
+"""
+
+from typing import Any, Dict
+
+GALLERY_KINDS = ('images', 'documents')
+DEFAULT_PER_PAGE = 48
+
+_KIND_FILTERS = {
+    'images': "{col} LIKE 'image/%%'",
+    'documents': "({col} IS NULL OR {col} NOT LIKE 'image/%%')",
+}
+
+
+def fetch_gallery(cursor, kind: str, page: int = 1, per_page: int = DEFAULT_PER_PAGE) -> Dict[str, Any]:
+    """One page of attachments, newest first; has_next comes from fetching one extra row, not a COUNT"""
+    if kind not in GALLERY_KINDS:
+        raise ValueError(f"Unknown gallery: {kind}")
+    kind_filter = _KIND_FILTERS[kind]
+    page = max(1, page)
+    cursor.execute(f"""
+        SELECT 'apo' AS source, f.id, f.original_filename, f.file_type, f.file_size, f.sha256,
+               f.uploaded_at, a.apo_number AS reference
+        FROM apo_files f JOIN apo a ON a.id = f.apo_id
+        WHERE f.sha256 IS NOT NULL AND {kind_filter.format(col='f.file_type')}
+        UNION ALL
+        SELECT 'contract' AS source, id, original_filename, file_type, file_size, sha256,
+               uploaded_at, contract_number AS reference
+        FROM contract_files
+        WHERE {kind_filter.format(col='file_type')}
+        ORDER BY uploaded_at DESC, id DESC
+        LIMIT %s OFFSET %s
+    """, (per_page + 1, (page - 1) * per_page))
+    rows = cursor.fetchall()
+    columns = ('source', 'id', 'original_filename', 'file_type', 'file_size', 'sha256', 'uploaded_at', 'reference')
+    items = [row if isinstance(row, dict) else dict(zip(columns, row)) for row in rows[:per_page]]
+    return {
+        'items': items,
+        'page': page,
+        'per_page': per_page,
+        'has_prev': page > 1,
+        'has_next': len(rows) > per_page,
+    }
@@ -0,0 +1,392 @@
+"""
+Mail Queue
+Durable outbound email spool (SQLite) drained by background sender threads over pooled SMTP connections
+"""
+
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Callable, Dict, List, Optional
+
+SPOOL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mail_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_mail_queue_due ON mail_queue (status, next_attempt_at);
+"""
+
+STATUSES = ('pending', 'sending', 'sent', 'failed')
+
+
+def build_message(sender: str, recipient: str, subject: str, body: str) -> MIMEMultipart:
+    """Plain text + HTML alternative message, as sent by every notification"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg.attach(MIMEText(body, 'plain'))
+    html_body = body.replace('\n', '<br>')
+    msg.attach(MIMEText(f'<html><body>{html_body}</body></html>', 'html'))
+    return msg
+
+
+def backoff_delay(attempts: int, base: float = 30.0, maximum: float = 3600.0) -> float:
+    """Exponential retry delay in seconds after the given number of failed attempts"""
+    return min(maximum, base * (2 ** max(0, attempts - 1)))
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """5xx replies (other than bad credentials) will not succeed on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    code = getattr(error, 'smtp_code', None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+class MailSpool:
+    """
+    SQLite-backed message store shared by every process on the host.
+
+    Each call opens its own short-lived connection, so the spool is safe to
+    use from request threads and sender threads at once. Claiming due rows
+    runs inside ``BEGIN IMMEDIATE`` so two workers never send the same row.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SPOOL_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, recipient: str, subject: str, body: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            cur = conn.execute(
+                'INSERT INTO mail_queue (recipient, subject, body, next_attempt_at, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (recipient, subject, body, now, now)
+            )
+            return cur.lastrowid
+
+    def claim(self, limit: int = 10, now: Optional[float] = None, stale_after: float = 600.0) -> List[Dict[str, Any]]:
+        """Mark up to ``limit`` due messages as sending and return them"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Rows left in 'sending' by a crashed worker go back to pending
+                conn.execute(
+                    "UPDATE mail_queue SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+                    (now - stale_after,)
+                )
+                rows = conn.execute(
+                    "SELECT id, recipient, subject, body, attempts FROM mail_queue "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at, id LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+                if rows:
+                    conn.executemany(
+                        "UPDATE mail_queue SET status = 'sending', claimed_at = ? WHERE id = ?",
+                        [(now, row['id']) for row in rows]
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return [dict(row) for row in rows]
+
+    def mark_sent(self, message_id: int, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE mail_queue SET status = 'sent', attempts = attempts + 1, sent_at = ?, last_error = NULL "
+                "WHERE id = ?", (now, message_id)
+            )
+
+    def mark_retry(self, message_id: int, error: str, delay: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE mail_queue SET status = 'pending', attempts = attempts + 1, next_attempt_at = ?, "
+                "last_error = ? WHERE id = ?", (now + delay, error[:1000], message_id)
+            )
+
+    def mark_failed(self, message_id: int, error: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE mail_queue SET status = 'failed', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (error[:1000], message_id)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) FROM mail_queue GROUP BY status').fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    def next_due(self) -> Optional[float]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT MIN(next_attempt_at) FROM mail_queue WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def purge_sent(self, older_than_days: int = 7, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM mail_queue WHERE status = 'sent' AND sent_at < ?",
+                               (now - older_than_days * 86400,))
+            return cur.rowcount
+
+
+class SMTPPool:
+    """
+    Small pool of logged-in SMTP sessions.
+
+    Connections are reused across messages instead of paying connect +
+    STARTTLS + AUTH each time. A connection idle for longer than
+    ``check_after`` seconds is probed with NOOP before reuse, and any
+    connection that raised during a send is discarded rather than returned.
+    """
+
+    def __init__(self, server: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 size: int = 2, starttls: bool = True, timeout: float = 30.0, check_after: float = 30.0,
+                 smtp_factory: Callable[..., Any] = smtplib.SMTP):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.check_after = check_after
+        self.smtp_factory = smtp_factory
+        self._idle: 'queue.LifoQueue' = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self):
+        conn = self.smtp_factory(self.server, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username and self.password:
+            conn.login(self.username, self.password)
+        return conn
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _alive(self, conn) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except Exception:
+            return False
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = None
+        try:
+            while conn is None:
+                try:
+                    candidate, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._open()
+                    break
+                if time.monotonic() - idle_since < self.check_after or self._alive(candidate):
+                    conn = candidate
+                else:
+                    self._close(candidate)
+            yield conn
+        except Exception:
+            if conn is not None:
+                self._close(conn)
+            raise
+        else:
+            self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+
+class MailQueue:
+    """
+    Outbound email queue: ``send()`` only writes to the spool and returns.
+
+    Background daemon threads (``start()``) claim due messages and deliver
+    them through an SMTPPool. Transient failures are retried with
+    exponential backoff up to ``max_attempts``; permanent ones are marked
+    failed. ``process_once()`` runs a single delivery pass synchronously and
+    is what the workers loop on.
+    """
+
+    def __init__(self, spool: MailSpool, pool: SMTPPool, sender: str, workers: int = 2,
+                 max_attempts: int = 8, batch_size: int = 10, base_delay: float = 30.0, max_delay: float = 3600.0):
+        self.spool = spool
+        self.pool = pool
+        self.sender = sender
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def send(self, recipient: str, subject: str, body: str) -> int:
+        message_id = self.spool.enqueue(recipient, subject, body)
+        self._wake.set()
+        return message_id
+
+    def process_once(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Deliver one batch of due messages; returns counts of sent/retry/failed"""
+        result = {'sent': 0, 'retry': 0, 'failed': 0}
+        for message in self.spool.claim(self.batch_size, now=now):
+            try:
+                with self.pool.connection() as smtp:
+                    smtp.send_message(build_message(self.sender, message['recipient'],
+                                                    message['subject'], message['body']))
+            except Exception as e:
+                attempts = message['attempts'] + 1
+                if is_permanent_failure(e) or attempts >= self.max_attempts:
+                    self.spool.mark_failed(message['id'], str(e))
+                    result['failed'] += 1
+                    print(f"Email to {message['recipient']} failed permanently: {e}")
+                else:
+                    self.spool.mark_retry(message['id'], str(e),
+                                          backoff_delay(attempts, self.base_delay, self.max_delay), now=now)
+                    result['retry'] += 1
+            else:
+                self.spool.mark_sent(message['id'], now=now)
+                result['sent'] += 1
+        return result
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                result = self.process_once()
+            except Exception as e:
+                print(f"Mail queue worker error: {e}")
+                result = None
+            if result and sum(result.values()) >= self.batch_size:
+                continue
+            next_due = None
+            try:
+                next_due = self.spool.next_due()
+            except Exception:
+                pass
+            timeout = 60.0 if next_due is None else min(60.0, max(0.5, next_due - time.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'mail-queue-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.pool.close_all()
+
+
+_queue: Optional[MailQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_mail_queue(start: bool = True) -> Optional[MailQueue]:
+    """Process-wide queue built from EMAIL_CONFIG; None when no sender is configured"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                from config import EMAIL_CONFIG
+                if not EMAIL_CONFIG.get('sender_email'):
+                    return None
+                pool = SMTPPool(
+                    EMAIL_CONFIG.get('smtp_server', 'smtp.gmail.com'),
+                    EMAIL_CONFIG.get('smtp_port', 587),
+                    username=EMAIL_CONFIG.get('sender_email'),
+                    password=EMAIL_CONFIG.get('sender_password'),
+                    size=EMAIL_CONFIG.get('pool_size', 2),
+                    starttls=EMAIL_CONFIG.get('smtp_starttls', True),
+                )
+                _queue = MailQueue(
+                    MailSpool(EMAIL_CONFIG['queue_path']), pool, EMAIL_CONFIG['sender_email'],
+                    workers=EMAIL_CONFIG.get('queue_workers', 2),
+                    max_attempts=EMAIL_CONFIG.get('max_attempts', 8),
+                )
+    if start:
+        _queue.start()
+    return _queue
+
+
+def reset_mail_queue():
+    """Stop the workers and drop the pooled sessions so the next send picks up new EMAIL_CONFIG"""
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.stop()
+            _queue = None
+
+
+def queue_email(recipient: str, subject: str, body: str) -> bool:
+    """Spool a message for background delivery; True once it is safely queued"""
+    try:
+        mail_queue = get_mail_queue()
+        if mail_queue is None or not recipient:
+            print("Email configuration incomplete. Skipping email notification.")
+            return False
+        mail_queue.send(recipient, subject, body)
+        return True
+    except Exception as e:
+        print(f"Could not queue email: {e}")
+        return False
@@ -0,0 +1,77 @@
+"""
+Page Statistics
+Single-query aggregate statistics for the /employees and /departments pages, cached per filter set
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# entity -> (table, ((template key, aggregate expression), ...))
+PAGE_STATS = {
+    'employees': ('employees', (
+        ('active_count', 'COALESCE(SUM(is_active = TRUE), 0)'),
+        ('total_count', 'COUNT(*)'),
+        ('dept_with_employees',
+         'COUNT(DISTINCT CASE WHEN is_active = TRUE AND department_id IS NOT NULL THEN department_id END)'),
+        ('total_salary', 'COALESCE(SUM(CASE WHEN is_active = TRUE THEN salary END), 0)'),
+    )),
+    'departments': ('departments', (
+        ('active_count', 'COALESCE(SUM(is_active = TRUE), 0)'),
+        ('total_count', 'COUNT(*)'),
+        ('total_budget', 'COALESCE(SUM(CASE WHEN is_active = TRUE THEN budget END), 0)'),
+        ('manager_count',
+         'COUNT(DISTINCT CASE WHEN is_active = TRUE AND manager IS NOT NULL THEN manager END)'),
+    )),
+}
+
+STATS_TTL = 60
+
+_cache: Dict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def fetch_stats(cursor, entity: str, matched: Optional[str] = None,
+                params: Sequence[Any] = (), alias: str = '') -> Dict[str, Any]:
+    """
+    All statistics of an entity in one scan. ``matched`` is an optional row
+    condition (the page's filters, written against ``alias``); its count is
+    returned as ``matched``.
+    """
+    table, aggregates = PAGE_STATS[entity]
+    columns = [expression for _, expression in aggregates]
+    if matched:
+        columns.append(f'COALESCE(SUM({matched}), 0)')
+    select = ', '.join(f'{expression} AS stat_{i}' for i, expression in enumerate(columns))
+    cursor.execute(f"SELECT {select} FROM {table} {alias}".rstrip(), list(params))
+    row = cursor.fetchone()
+    values = [row[f'stat_{i}'] for i in range(len(columns))] if isinstance(row, dict) else list(row)
+    stats = {key: value for (key, _), value in zip(aggregates, values)}
+    if matched:
+        stats['matched'] = int(values[-1])
+    for key, _ in aggregates:
+        if key.endswith('_count') or key == 'dept_with_employees':
+            stats[key] = int(stats[key] or 0)
+    return stats
+
+
+def cached_stats(cursor, entity: str, matched: Optional[str] = None,
+                 params: Sequence[Any] = (), alias: str = '') -> Dict[str, Any]:
+    """fetch_stats() with a per-process cache keyed by entity and filter set"""
+    key = (entity, alias, matched or '', tuple(params))
+    now = time.time()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > now:
+            return dict(entry[1])
+    stats = fetch_stats(cursor, entity, matched, params, alias)
+    with _cache_lock:
+        _cache[key] = (now + STATS_TTL, stats)
+    return dict(stats)
+
+
+def invalidate_stats(entity: Optional[str] = None):
+    """Drop cached statistics after a write (all entities when None)"""
+    with _cache_lock:
+        for key in [k for k in _cache if entity is None or k[0] == entity]:
+            del _cache[key]
@@ -0,0 +1,83 @@
+"""
+Keyset Pagination Helpers
+Opaque cursors and seek predicates for paging large tables without OFFSET
+"""
+
+import base64
+import json
+from datetime import datetime, date
+from typing import Any, List, Optional, Sequence, Tuple
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def clamp_limit(value: Any, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Parse a requested page size and keep it within sane bounds"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise ValueError('Unknown cursor value')
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of a boundary row as an opaque URL-safe token"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[List[Any]]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Returns None for missing or malformed tokens so callers fall back to the first page.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        if not isinstance(values, list) or len(values) != size:
+            return None
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def seek_clause(columns: Sequence[str], values: Sequence[Any], descending: bool = True) -> Tuple[str, List[Any]]:
+    """
+    Build the predicate that positions a query strictly after a boundary row.
+
+    For columns (a, b) in descending order this yields
+    ``(a < %s OR (a = %s AND b < %s))`` which, unlike a row-constructor
+    comparison, lets MySQL range-scan a composite index on (a, b).
+    """
+    op = '<' if descending else '>'
+    branches = []
+    params: List[Any] = []
+    for i, column in enumerate(columns):
+        parts = [f"{prev} = %s" for prev in columns[:i]]
+        parts.append(f"{column} {op} %s")
+        params.extend(values[:i])
+        params.append(values[i])
+        branches.append(parts[0] if len(parts) == 1 else '(' + ' AND '.join(parts) + ')')
+    return '(' + ' OR '.join(branches) + ')', params
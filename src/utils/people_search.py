@@ -0,0 +1,272 @@
+"""
+People Search
+Ranked, paginated employee and customer search over MySQL FULLTEXT indexes,
+with a maintained trigram table as the fallback where FULLTEXT is not available
+"""
+
+import math
+import re
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# entity -> table, FULLTEXT index name, searched columns (in index order), the
+# ORDER BY used after relevance and the columns search() may filter on
+SEARCH_ENTITIES = {
+    'employees': {
+        'table': 'employees',
+        'index': 'ft_employees_search',
+        'columns': ('employee_id', 'first_name', 'last_name', 'email', 'position'),
+        'order': 'last_name, first_name',
+        'filters': ('is_active', 'department_id', 'employment_type'),
+    },
+    'customers': {
+        'table': 'customers',
+        'index': 'ft_customers_search',
+        'columns': ('customer_code', 'company_name', 'contact_name', 'email', 'city', 'country'),
+        'order': 'company_name',
+        'filters': ('is_active', 'status', 'customer_type'),
+    },
+}
+
+NGRAM_TABLE = 'search_ngrams'
+GRAM_SIZE = 3
+MAX_WORD_LENGTH = 64
+INSERT_BATCH = 1000
+
+# InnoDB does not index words shorter than innodb_ft_min_token_size (default 3).
+# Shorter query words only narrow the rows the longer words matched, as word
+# prefixes like the trigram backend; a query with no long word matches nothing
+MIN_TOKEN_SIZE = 3
+
+# Never matches: the clause for a FULLTEXT query with no indexable word
+NO_MATCH = '1 = 0'
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+SearchClause = namedtuple('SearchClause', ['where', 'params', 'rank', 'rank_params'])
+
+
+def query_words(text: Any) -> List[str]:
+    """Distinct lower-cased words of a search string, in order"""
+    return list(dict.fromkeys(w[:MAX_WORD_LENGTH] for w in _WORD.findall(str(text or '').casefold())))
+
+
+def _like_pattern(word: str) -> str:
+    return '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _word_prefix_pattern(word: str) -> str:
+    """REGEXP for ``word`` at the start of a word (query words are \\w+, nothing to escape)"""
+    return '(^|[^[:alnum:]_])' + word
+
+
+def _grams(padded: str) -> List[str]:
+    return [padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)]
+
+
+def text_grams(values: Iterable[Any]) -> Set[str]:
+    """
+    Trigrams of every word in ``values``. Words are padded with two leading
+    spaces and one trailing space (``john`` -> ``"  j", " jo", "joh", "ohn",
+    "hn "``) so short query words can be matched as word prefixes.
+    """
+    grams: Set[str] = set()
+    for value in values:
+        for word in query_words(value):
+            grams.update(_grams('  ' + word + ' '))
+    return grams
+
+
+def word_grams(word: str) -> Tuple[List[str], List[str]]:
+    """
+    (required, prefix) grams for one query word. A word of three or more
+    characters requires its inner trigrams (substring match) and gets a rank
+    boost from the word-start grams; a shorter word can only be matched as a
+    word prefix, so its word-start grams are required.
+    """
+    prefix = _grams('  ' + word)
+    if len(word) < GRAM_SIZE:
+        return prefix, []
+    inner = _grams(word)
+    return inner, [g for g in prefix if g not in inner]
+
+
+# ---- backend detection ----
+
+_backends: Dict[str, str] = {}
+
+
+def search_backend(conn, entity: str) -> str:
+    """'fulltext', 'ngram' or 'like' for an entity; detected once per process"""
+    backend = _backends.get(entity)
+    if backend is None:
+        from db.migrate import index_names, table_exists
+        spec = SEARCH_ENTITIES[entity]
+        cursor = conn.cursor()
+        try:
+            if spec['index'] in index_names(cursor, spec['table']):
+                backend = 'fulltext'
+            elif table_exists(cursor, NGRAM_TABLE):
+                backend = 'ngram'
+            else:
+                backend = 'like'
+        finally:
+            cursor.close()
+        _backends[entity] = backend
+    return backend
+
+
+def reset_backends():
+    _backends.clear()
+
+
+# ---- query building ----
+
+def _column_list(entity: str, alias: str) -> List[str]:
+    prefix = f'{alias}.' if alias else ''
+    return [prefix + column for column in SEARCH_ENTITIES[entity]['columns']]
+
+
+def search_clause(conn, entity: str, text: Any, alias: str = '',
+                  backend: Optional[str] = None) -> Optional[SearchClause]:
+    """
+    WHERE fragment and relevance expression for a search string, or None when
+    it has no words. ``rank`` goes in the SELECT list (its params first),
+    ``where`` is ANDed into the caller's own filters. Under FULLTEXT a
+    string whose words are all shorter than MIN_TOKEN_SIZE matches nothing.
+    """
+    words = query_words(text)
+    if not words:
+        return None
+    backend = backend or search_backend(conn, entity)
+    columns = _column_list(entity, alias)
+    concat = f"CONCAT_WS(' ', {', '.join(columns)})"
+    id_column = f'{alias}.id' if alias else 'id'
+
+    if backend == 'fulltext':
+        long_words = [w for w in words if len(w) >= MIN_TOKEN_SIZE]
+        short_words = [w for w in words if len(w) < MIN_TOKEN_SIZE]
+        if not long_words:
+            return SearchClause(NO_MATCH, [], '0', [])
+        match = f"MATCH({', '.join(columns)}) AGAINST(%s IN BOOLEAN MODE)"
+        expression = ' '.join(f'+{w}*' for w in long_words)
+        where, params = [match], [expression]
+        for word in short_words:
+            where.append(f'{concat} REGEXP %s')
+            params.append(_word_prefix_pattern(word))
+        return SearchClause(' AND '.join(where), params, match, [expression])
+
+    if backend == 'ngram':
+        required: List[str] = []
+        boost: List[str] = []
+        for word in words:
+            word_required, word_boost = word_grams(word)
+            required.extend(g for g in word_required if g not in required)
+            boost.extend(g for g in word_boost if g not in boost and g not in required)
+        all_grams = required + boost
+        gram_marks = ', '.join(['%s'] * len(all_grams))
+        required_marks = ', '.join(['%s'] * len(required))
+        candidates = (f"{id_column} IN (SELECT entity_id FROM {NGRAM_TABLE} "
+                      f"WHERE entity = %s AND gram IN ({required_marks}) "
+                      f"GROUP BY entity_id HAVING COUNT(*) = %s)")
+        where = [candidates]
+        params: List[Any] = [entity] + required + [len(required)]
+        # Trigrams can all be present without the word being; confirm on the candidates
+        for word in words:
+            if len(word) >= GRAM_SIZE:
+                where.append(f'{concat} LIKE %s')
+                params.append(_like_pattern(word))
+        rank = (f"(SELECT COUNT(*) FROM {NGRAM_TABLE} g WHERE g.entity = %s "
+                f"AND g.entity_id = {id_column} AND g.gram IN ({gram_marks}))")
+        return SearchClause(' AND '.join(where), params, rank, [entity] + all_grams)
+
+    where = ' AND '.join(f'{concat} LIKE %s' for _ in words)
+    return SearchClause(where, [_like_pattern(w) for w in words], '0', [])
+
+
+def search(conn, entity: str, text: Any, page: int = 1, per_page: int = 25,
+           filters: Optional[Dict[str, Any]] = None,
+           fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    One page of matching rows, best match first, plus paging metadata.
+    ``filters`` are column = value equality filters; ``fields`` the columns
+    returned (id and the searched columns by default).
+    """
+    spec = SEARCH_ENTITIES[entity]
+    fields = [f't.{column}' for column in (fields or ('id',) + spec['columns'])]
+    where, params = ['1=1'], []
+    for column, value in (filters or {}).items():
+        if column not in spec['filters']:
+            raise ValueError(f"Unsupported filter: {column}")
+        where.append(f't.{column} = %s')
+        params.append(value)
+    clause = search_clause(conn, entity, text, alias='t')
+    rank, rank_params = '0', []
+    if clause is not None:
+        where.append(clause.where)
+        params.extend(clause.params)
+        rank, rank_params = clause.rank, clause.rank_params
+    where_sql = ' AND '.join(where)
+    order = ', '.join(f't.{column.strip()}' for column in spec['order'].split(','))
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT COUNT(*) AS total FROM {spec['table']} t WHERE {where_sql}", params)
+        total = cursor.fetchone()['total']
+        pages = max(1, math.ceil(total / per_page))
+        page = min(max(1, page), pages)
+        cursor.execute(
+            f"SELECT {', '.join(fields)}, {rank} AS relevance FROM {spec['table']} t WHERE {where_sql} "
+            f"ORDER BY relevance DESC, {order}, t.id LIMIT %s OFFSET %s",
+            rank_params + params + [per_page, (page - 1) * per_page]
+        )
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    for row in rows:
+        row['relevance'] = round(float(row['relevance'] or 0), 4)
+    return {'results': rows, 'total': total, 'page': page, 'pages': pages, 'per_page': per_page}
+
+
+# ---- trigram table maintenance ----
+
+def _write_grams(cursor, entity: str, rows: Iterable[Sequence[Any]]):
+    batch = []
+    for row in rows:
+        for gram in text_grams(row[1:]):
+            batch.append((entity, row[0], gram))
+        if len(batch) >= INSERT_BATCH:
+            cursor.executemany(f'INSERT IGNORE INTO {NGRAM_TABLE} (entity, entity_id, gram) VALUES (%s, %s, %s)',
+                               batch)
+            batch = []
+    if batch:
+        cursor.executemany(f'INSERT IGNORE INTO {NGRAM_TABLE} (entity, entity_id, gram) VALUES (%s, %s, %s)',
+                           batch)
+
+
+def reindex(conn, entity: str, entity_id: int):
+    """
+    Refresh one row's trigrams after an insert, update or delete (caller
+    commits). A no-op unless the entity is served by the trigram table.
+    """
+    if search_backend(conn, entity) != 'ngram':
+        return
+    spec = SEARCH_ENTITIES[entity]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'DELETE FROM {NGRAM_TABLE} WHERE entity = %s AND entity_id = %s', (entity, entity_id))
+        cursor.execute(f"SELECT id, {', '.join(spec['columns'])} FROM {spec['table']} WHERE id = %s",
+                       (entity_id,))
+        _write_grams(cursor, entity, cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def rebuild_ngrams(cursor, entity: str) -> int:
+    """Rebuild all trigrams of an entity from its table; returns rows indexed"""
+    spec = SEARCH_ENTITIES[entity]
+    cursor.execute(f'DELETE FROM {NGRAM_TABLE} WHERE entity = %s', (entity,))
+    cursor.execute(f"SELECT id, {', '.join(spec['columns'])} FROM {spec['table']}")
+    rows = cursor.fetchall()
+    _write_grams(cursor, entity, rows)
+    return len(rows)
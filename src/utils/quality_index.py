@@ -0,0 +1,116 @@
+"""
+Data Quality Index
+Per-issue counters and offending asset names, maintained as assets change, for the data quality dashboard
+"""
+
+import math
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from utils.data_quality import DataQualityCleaner
+
+# Issue key (as in generate_data_quality_report), label shown per asset, and the check
+QUALITY_CHECKS = (
+    ('missing_categories', 'Missing category',
+     lambda a: not a.get('category') or a.get('category') == 'Uncategorized'),
+    ('missing_suppliers', 'Missing supplier',
+     lambda a: not a.get('supplier') or a.get('supplier') == 'Unknown Supplier'),
+    ('missing_locations', 'Missing location',
+     lambda a: not a.get('location') or a.get('location') == 'Unassigned'),
+    ('missing_dates', 'Missing purchase date',
+     lambda a: not a.get('purchase_date')),
+    ('zero_prices', 'Zero or invalid price',
+     lambda a: DataQualityCleaner.clean_numeric(a.get('price', 0)) == 0),
+)
+ISSUE_KEYS = tuple(key for key, _, _ in QUALITY_CHECKS)
+ISSUE_LABELS = {key: label for key, label, _ in QUALITY_CHECKS}
+
+
+def asset_issues(record: Dict[str, Any]) -> Tuple[str, ...]:
+    """Issue keys one asset fails"""
+    return tuple(key for key, _, check in QUALITY_CHECKS if check(record))
+
+
+class QualityIndex:
+    """
+    ``issue -> set of asset names`` plus ``name -> issues`` for assets with
+    at least one issue. The report reads the set sizes and the inventory
+    size instead of scanning every asset; ``asset_changed(name)`` re-checks
+    one asset and ``asset_changed()`` schedules a rebuild on next use.
+    """
+
+    def __init__(self, inventory: Dict[str, Dict[str, Any]]):
+        self._inventory = inventory
+        self._offenders: Dict[str, Set[str]] = {key: set() for key in ISSUE_KEYS}
+        self._issues: Dict[str, Tuple[str, ...]] = {}
+        self._ordered: Dict[Optional[str], List[str]] = {}
+        self._built = False
+        self._lock = threading.RLock()
+
+    # --- maintenance ---
+
+    def asset_changed(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._built = False
+            elif self._built:
+                self._remove(name)
+                record = self._inventory.get(name)
+                if record is not None:
+                    self._add(name, record)
+            self._ordered = {}
+
+    def _ensure(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            self._offenders = {key: set() for key in ISSUE_KEYS}
+            self._issues = {}
+            for name, record in list(self._inventory.items()):
+                self._add(name, record)
+            self._ordered = {}
+            self._built = True
+
+    def _add(self, name: str, record: Dict[str, Any]):
+        issues = asset_issues(record)
+        if issues:
+            self._issues[name] = issues
+            for key in issues:
+                self._offenders[key].add(name)
+
+    def _remove(self, name: str):
+        for key in self._issues.pop(name, ()):
+            self._offenders[key].discard(name)
+
+    # --- queries ---
+
+    def counts(self) -> Dict[str, int]:
+        self._ensure()
+        with self._lock:
+            return {key: len(self._offenders[key]) for key in ISSUE_KEYS}
+
+    def report(self) -> Dict[str, Any]:
+        """Same shape as DataQualityCleaner.generate_data_quality_report, without a scan"""
+        self._ensure()
+        with self._lock:
+            return DataQualityCleaner.summarize_quality(len(self._inventory), self.counts())
+
+    def problems(self, page: int = 1, per_page: int = 50, issue: Optional[str] = None) -> Dict[str, Any]:
+        """One page of assets with issues (or with one ``issue``), sorted by name"""
+        if issue is not None and issue not in ISSUE_LABELS:
+            raise ValueError(f"Unknown data quality issue: {issue!r}")
+        self._ensure()
+        with self._lock:
+            ordered = self._ordered.get(issue)
+            if ordered is None:
+                names = self._offenders[issue] if issue else self._issues
+                ordered = self._ordered[issue] = sorted(names, key=str.casefold)
+            total = len(ordered)
+            pages = max(1, math.ceil(total / per_page))
+            page = min(max(1, page), pages)
+            start = (page - 1) * per_page
+            items = [{'name': name, 'issues': [ISSUE_LABELS[key] for key in self._issues.get(name, ())]}
+                     for name in ordered[start:start + per_page]]
+        return {'items': items, 'total': total, 'page': page, 'pages': pages, 'per_page': per_page}
@@ -7,6 +7,8 @@ from datetime import datetime, date, timedelta
 from typing import Dict, List, Tuple, Any, Optional
 from decimal import Decimal
 
+from utils.expiry_index import parse_date
+
 
 class ReportGenerator:
     """Base class for report generation with common utilities"""
@@ -196,32 +198,39 @@ class AutomatedReportGenerator(ReportGenerator):
         """Get assets requiring maintenance"""
         alerts = []
         
-        for name, item in self.system.inventory.items():
-            if item.get('status') == 'maintenance':
-                alerts.append({
-                    'asset': name,
-                    'reason': 'Currently in maintenance',
-                    'severity': 'medium'
-                })
-            
-            # Check warranty expiration
-            warranty_date = item.get('warranty_expiration')
-            if warranty_date:
-                if isinstance(warranty_date, str):
-                    warranty_date = datetime.strptime(warranty_date, '%Y-%m-%d').date()
-                
-                if warranty_date < date.today():
-                    alerts.append({
-                        'asset': name,
-                        'reason': 'Warranty expired',
-                        'severity': 'low'
-                    })
-                elif warranty_date < date.today() + timedelta(days=30):
-                    alerts.append({
-                        'asset': name,
-                        'reason': 'Warranty expiring soon',
-                        'severity': 'medium'
-                    })
+        for name in sorted(self.system.asset_index.postings('status').get('maintenance', ())):
+            alerts.append({
+                'asset': name,
+                'reason': 'Currently in maintenance',
+                'severity': 'medium'
+            })
+        
+        # Warranty expiration: range lookups on the date-ordered expiry index
+        expiry = self.system.expiry_index
+        for entry in expiry.expired('warranty'):
+            alerts.append({
+                'asset': entry['asset'],
+                'reason': 'Warranty expired',
+                'severity': 'low'
+            })
+        for entry in expiry.expiring('warranty', 30):
+            alerts.append({
+                'asset': entry['asset'],
+                'reason': 'Warranty expiring soon',
+                'severity': 'medium'
+            })
+        for entry in expiry.expired('maintenance'):
+            alerts.append({
+                'asset': entry['asset'],
+                'reason': 'Scheduled maintenance overdue',
+                'severity': 'high'
+            })
+        for entry in expiry.expired('end_of_life'):
+            alerts.append({
+                'asset': entry['asset'],
+                'reason': 'Past end of useful life',
+                'severity': 'low'
+            })
         
         return alerts
     
@@ -394,10 +403,11 @@ class AssetReportGenerator(ReportGenerator):
             'salvage_value': item.get('salvage_value', 0)
         }
         
-        # Warranty information
+        # Warranty information (asset_warranties rows, via the expiry index)
+        warranty_end = self.system.expiry_index.next_for_asset('warranty', asset_name)
         warranty_info = {
-            'warranty_expiration': self.format_date(item.get('warranty_expiration')),
-            'warranty_status': self._get_warranty_status(item.get('warranty_expiration'))
+            'warranty_expiration': self.format_date(warranty_end),
+            'warranty_status': self._get_warranty_status(warranty_end)
         }
         
         # Transaction history
@@ -463,12 +473,10 @@ class AssetReportGenerator(ReportGenerator):
     
     def _get_warranty_status(self, warranty_date) -> str:
         """Determine warranty status"""
-        if not warranty_date:
+        warranty_date = parse_date(warranty_date)
+        if warranty_date is None:
             return 'no_warranty'
         
-        if isinstance(warranty_date, str):
-            warranty_date = datetime.strptime(warranty_date, '%Y-%m-%d').date()
-        
         today = date.today()
         
         if warranty_date < today:
@@ -629,20 +637,11 @@ class AuditReportGenerator(ReportGenerator):
     
     def _check_warranty_status(self) -> List[Dict]:
         """Check for warranty-related issues"""
-        issues = []
-        for name, item in self.system.inventory.items():
-            warranty_date = item.get('warranty_expiration')
-            if warranty_date:
-                if isinstance(warranty_date, str):
-                    warranty_date = datetime.strptime(warranty_date, '%Y-%m-%d').date()
-                
-                if warranty_date < date.today():
-                    issues.append({
-                        'asset': name,
-                        'warranty_date': self.format_date(warranty_date),
-                        'issue': 'Warranty expired'
-                    })
-        return issues
+        return [{
+            'asset': entry['asset'],
+            'warranty_date': self.format_date(entry['date']),
+            'issue': 'Warranty expired'
+        } for entry in self.system.expiry_index.expired('warranty')]
     
     def _check_inactive_assets(self) -> List[Dict]:
         """Check for assets with no recent activity"""
@@ -0,0 +1,266 @@
+"""
+Asset Search Index
+In-memory inverted index and prefix trie over asset text fields for search and autocomplete
+"""
+
+import heapq
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Searchable record fields and their ranking weight (the asset name is the key itself)
+SEARCH_FIELDS = (
+    ('name', 5),
+    ('serial_number', 4),
+    ('model', 3),
+    ('brand', 2),
+    ('category', 2),
+    ('supplier', 1),
+    ('location', 1),
+)
+
+# Identifier-like fields also indexed with separators removed ("SN-1001" -> "sn1001")
+JOINED_FIELDS = frozenset(('serial_number', 'model'))
+
+# Bound on how many distinct terms one query prefix may expand to, and how
+# many are looked at to estimate a word's selectivity
+MAX_PREFIX_TERMS = 5000
+MAX_PREFIX_NODES = 20000
+ESTIMATE_TERMS = 64
+ESTIMATE_NODES = 1000
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+_END = ''  # trie key marking "a term ends here"; never a character
+
+
+def tokenize(text: Any, joined: bool = False) -> List[str]:
+    """Lower-cased word tokens; with ``joined`` a value with separators also yields its joined form"""
+    if text is None or text == '':
+        return []
+    text = str(text).casefold()
+    tokens = _TOKEN.findall(text)
+    if joined and len(tokens) > 1:
+        compact = ''.join(tokens)
+        if len(compact) <= 64:
+            tokens.append(compact)
+    return tokens
+
+
+class PrefixTrie:
+    """Character trie of indexed terms; nested dicts, one per character"""
+
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+
+    def add(self, term: str):
+        node = self._root
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[_END] = True
+
+    def discard(self, term: str):
+        path = [self._root]
+        for ch in term:
+            node = path[-1].get(ch)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].pop(_END, None)
+        # Prune now-empty branches bottom-up
+        for i in range(len(term), 0, -1):
+            if path[i]:
+                break
+            del path[i - 1][term[i - 1]]
+
+    def walk(self, prefix: str, limit: int = MAX_PREFIX_TERMS,
+             max_nodes: int = MAX_PREFIX_NODES) -> Tuple[List[str], bool]:
+        """
+        Terms starting with ``prefix``, shortest first (breadth-first), plus
+        whether the walk was complete. Stops after ``limit`` terms or
+        ``max_nodes`` visited nodes, so a short prefix over many long
+        identifiers stays cheap.
+        """
+        node = self._root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return [], True
+        found: List[str] = []
+        level = [(prefix, node)]
+        visited = 0
+        while level:
+            next_level = []
+            for text, current in level:
+                visited += 1
+                if visited > max_nodes:
+                    return found, False
+                for ch in sorted(current):
+                    if ch == _END:
+                        found.append(text)
+                        if len(found) >= limit:
+                            return found, False
+                    else:
+                        next_level.append((text + ch, current[ch]))
+            level = next_level
+        return found, True
+
+    def terms(self, prefix: str, limit: int = MAX_PREFIX_TERMS) -> List[str]:
+        return self.walk(prefix, limit)[0]
+
+
+class SearchIndex:
+    """
+    Token -> {asset name: weight} postings plus a prefix trie of the tokens.
+
+    Every query word is matched as a prefix (so ``lap`` finds ``Laptop``) and
+    all words must match. Results rank by summed field weight, with exact
+    word matches and names starting with the query ahead of the rest.
+    Built lazily from ``system.inventory``; ``asset_changed(name)`` re-indexes
+    one asset in place, ``asset_changed()`` schedules a full rebuild.
+    """
+
+    def __init__(self, inventory: Dict[str, Dict[str, Any]]):
+        self._inventory = inventory
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self._trie = PrefixTrie()
+        self._built = False
+        self._lock = threading.RLock()
+
+    # --- maintenance ---
+
+    def asset_changed(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._built = False
+            elif self._built:
+                self._remove(name)
+                record = self._inventory.get(name)
+                if record is not None:
+                    self._add(name, record)
+
+    def _ensure(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            self._postings = {}
+            self._doc_terms = {}
+            self._trie = PrefixTrie()
+            for name, record in list(self._inventory.items()):
+                self._add(name, record)
+            self._built = True
+
+    def _add(self, name: str, record: Dict[str, Any]):
+        weights: Dict[str, int] = {}
+        for field, weight in SEARCH_FIELDS:
+            value = name if field == 'name' else record.get(field)
+            for token in tokenize(value, joined=field in JOINED_FIELDS):
+                if weights.get(token, 0) < weight:
+                    weights[token] = weight
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._trie.add(token)
+            postings[name] = weight
+        self._doc_terms[name] = set(weights)
+
+    def _remove(self, name: str):
+        for token in self._doc_terms.pop(name, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(name, None)
+            if not postings:
+                del self._postings[token]
+                self._trie.discard(token)
+
+    # --- queries ---
+
+    def _matches(self, terms: List[str], word: str) -> Dict[str, float]:
+        """name -> best score for one query word (exact term beats a longer completion)"""
+        scores: Dict[str, float] = {}
+        for term in terms:
+            bonus = 1.5 if term == word else 1.0
+            for name, weight in self._postings[term].items():
+                score = weight * bonus
+                if scores.get(name, 0) < score:
+                    scores[name] = score
+        return scores
+
+    def _doc_score(self, name: str, word: str) -> float:
+        """Best score of one asset for a query word, from its own (few) terms"""
+        best = 0.0
+        for term in self._doc_terms.get(name, ()):
+            if term.startswith(word):
+                score = self._postings[term][name] * (1.5 if term == word else 1.0)
+                if score > best:
+                    best = score
+        return best
+
+    def scored(self, query: str) -> List[Tuple[float, str]]:
+        words = list(dict.fromkeys(_TOKEN.findall(str(query or '').casefold())))
+        if not words:
+            return []
+        self._ensure()
+        with self._lock:
+            # Estimate each word from a capped trie walk, expand only the most
+            # selective one, then check the other words against each candidate
+            estimates = []
+            for word in words:
+                terms, complete = self._trie.walk(word, ESTIMATE_TERMS, ESTIMATE_NODES)
+                if not terms and complete:
+                    return []
+                size = sum(len(self._postings[t]) for t in terms)
+                if not complete:
+                    size += len(self._inventory)
+                estimates.append((size, word))
+            estimates.sort()
+            first_word = estimates[0][1]
+            totals = self._matches(self._trie.terms(first_word), first_word)
+            for _, word in estimates[1:]:
+                next_totals = {}
+                for name, total in totals.items():
+                    score = self._doc_score(name, word)
+                    if score:
+                        next_totals[name] = total + score
+                totals = next_totals
+                if not totals:
+                    return []
+        needle = ' '.join(words)
+        results = []
+        for name, total in totals.items():
+            folded = name.casefold()
+            if folded.startswith(needle):
+                total += 2.0
+            elif folded.startswith(words[0]):
+                total += 1.0
+            results.append((total, name))
+        return results
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Asset names matching every word of ``query``, best first"""
+        scored = self.scored(query)
+        key = lambda item: (-item[0], item[1].casefold())
+        if limit is not None:
+            return [name for _, name in heapq.nsmallest(limit, scored, key=key)]
+        return [name for _, name in sorted(scored, key=key)]
+
+    def autocomplete(self, query: str, limit: int = 10,
+                     fields: Iterable[str] = ('category', 'brand', 'model', 'serial_number', 'location')
+                     ) -> List[Dict[str, Any]]:
+        """Top ``limit`` matches with a few display fields, for the JSON endpoint"""
+        scored = self.scored(query)
+        top = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1].casefold()))
+        results = []
+        for score, name in top:
+            record = self._inventory.get(name)
+            if record is None:
+                continue
+            item = {'name': name, 'score': round(score, 2)}
+            for field in fields:
+                item[field] = record.get(field)
+            results.append(item)
+        return results
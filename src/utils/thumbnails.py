@@ -0,0 +1,256 @@
+"""
+Thumbnails
+Resized WebP/JPEG variants of image attachments and first-page PDF previews,
+cached on disk under UPLOAD_FOLDER/thumbs and keyed by the source's SHA-256
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from utils.blob_store import COPY_BUFFER, BlobStore, is_sha256
+
+try:
+    from PIL import Image, ImageOps, features
+    HAVE_PIL = True
+except ImportError:
+    HAVE_PIL = False
+
+try:
+    import fitz  # PyMuPDF, optional: renders PDF pages without poppler
+    HAVE_PYMUPDF = True
+except ImportError:
+    HAVE_PYMUPDF = False
+
+THUMB_DIR = 'thumbs'
+
+# Bounding boxes (width, height); images are scaled down to fit, never up
+VARIANTS = {
+    'thumb': (320, 320),
+    'preview': (1280, 1280),
+    'avatar': (160, 160),
+}
+
+# URL/file extension -> (Pillow format, mimetype, save options)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Variants made while the upload request is still running; the rest on first view
+UPLOAD_VARIANTS = ('thumb',)
+
+PDF_RENDER_DPI = 72
+
+
+def webp_supported() -> bool:
+    return HAVE_PIL and features.check('webp')
+
+
+def output_formats() -> List[str]:
+    return ['webp', 'jpg'] if webp_supported() else ['jpg']
+
+
+def preferred_format(accept: Optional[str]) -> str:
+    """WebP for browsers that advertise it, JPEG otherwise"""
+    return 'webp' if accept and 'image/webp' in accept and webp_supported() else 'jpg'
+
+
+def source_kind(path: str) -> Optional[str]:
+    """'pdf' or 'image' from the file's leading bytes, None if neither"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(16)
+    except OSError:
+        return None
+    if head.startswith(b'%PDF-'):
+        return 'pdf'
+    if head.startswith((b'\xff\xd8\xff', b'\x89PNG', b'GIF8', b'BM', b'II*\x00', b'MM\x00*')) or \
+            (head.startswith(b'RIFF') and head[8:12] == b'WEBP'):
+        return 'image'
+    return None
+
+
+def variant_relative_path(sha256: str, variant: str, fmt: str) -> str:
+    if not is_sha256(sha256) or variant not in VARIANTS or fmt not in FORMATS:
+        raise ValueError(f"Unknown thumbnail {variant}/{sha256}.{fmt}")
+    return f'{THUMB_DIR}/{variant}/{sha256[:2]}/{sha256}.{fmt}'
+
+
+def _first_pdf_page(path: str):
+    """First page of a PDF as a Pillow image (PyMuPDF, else poppler's pdftoppm)"""
+    if HAVE_PYMUPDF:
+        with fitz.open(path) as doc:
+            if not doc.page_count:
+                return None
+            pixmap = doc.load_page(0).get_pixmap(dpi=PDF_RENDER_DPI * 2)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    pdftoppm = shutil.which('pdftoppm')
+    if not pdftoppm:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, 'page')
+        subprocess.run([pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-png',
+                        '-r', str(PDF_RENDER_DPI * 2), path, prefix],
+                       check=True, capture_output=True, timeout=60)
+        with Image.open(prefix + '.png') as page:
+            page.load()
+            return page
+
+
+def render_variant(source: str, dest: str, variant: str, fmt: str, kind: Optional[str] = None) -> bool:
+    """Write one variant of ``source`` to ``dest`` (atomically); False if it cannot be rendered"""
+    if not HAVE_PIL:
+        return False
+    kind = kind or source_kind(source)
+    try:
+        if kind == 'pdf':
+            image = _first_pdf_page(source)
+            if image is None:
+                return False
+        elif kind == 'image':
+            with Image.open(source) as opened:
+                opened.draft('RGB', VARIANTS[variant])  # JPEG: decode at reduced scale
+                image = ImageOps.exif_transpose(opened)
+        else:
+            return False
+        image.thumbnail(VARIANTS[variant], Image.LANCZOS)
+        pil_format, _, options = FORMATS[fmt]
+        if pil_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.split()[-1])
+                image = background
+            else:
+                image = image.convert('RGB')
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                image.save(out, pil_format, **options)
+            os.replace(tmp, dest)
+        except Exception:
+            os.remove(tmp)
+            raise
+        return True
+    except Exception as e:
+        print(f"Thumbnail {variant} of {source} failed: {e}")
+        return False
+
+
+def ensure_variant(upload_root: str, sha256: str, variant: str, fmt: str,
+                   source: Optional[str] = None) -> Optional[str]:
+    """
+    Relative path of a cached variant, rendering it first if needed. The
+    source defaults to the blob with that digest. A ``.failed`` marker stops
+    sources that cannot be rendered from being retried on every request.
+    """
+    relative = variant_relative_path(sha256, variant, fmt)
+    dest = os.path.join(upload_root, *relative.split('/'))
+    if os.path.exists(dest):
+        return relative
+    if os.path.exists(dest + '.failed'):
+        return None
+    source = source or BlobStore(upload_root).path(sha256)
+    if not os.path.exists(source):
+        return None
+    if render_variant(source, dest, variant, fmt):
+        return relative
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    open(dest + '.failed', 'w').close()
+    return None
+
+
+def remove_variants(upload_root: str, sha256: str) -> int:
+    """Delete every cached variant (and failure marker) of a digest; returns files removed"""
+    removed = 0
+    for variant in VARIANTS:
+        directory = os.path.join(upload_root, THUMB_DIR, variant, sha256[:2])
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            if name.startswith(sha256 + '.'):
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    return removed
+
+
+def generate_upload_variants(upload_root: str, attachments: List[Dict[str, Any]]) -> int:
+    """Render UPLOAD_VARIANTS for freshly stored attachments; returns the number rendered"""
+    rendered = 0
+    for attachment in attachments:
+        source = BlobStore(upload_root).path(attachment['sha256'])
+        if not source_kind(source):
+            continue
+        for variant in UPLOAD_VARIANTS:
+            for fmt in output_formats():
+                if ensure_variant(upload_root, attachment['sha256'], variant, fmt, source):
+                    rendered += 1
+    return rendered
+
+
+def store_avatar(upload_root: str, picture_path: str) -> Optional[str]:
+    """
+    Render the avatar variants of an uploaded profile picture; returns the
+    digest they are keyed by, or None when the picture cannot be read.
+    """
+    digest = hashlib.sha256()
+    with open(picture_path, 'rb') as f:
+        while True:
+            block = f.read(COPY_BUFFER)
+            if not block:
+                break
+            digest.update(block)
+    sha256 = digest.hexdigest()
+    made = [ensure_variant(upload_root, sha256, 'avatar', fmt, picture_path) for fmt in output_formats()]
+    return sha256 if all(made) else None
+
+
+def backfill(cursor, upload_root: str, variants=UPLOAD_VARIANTS, tables=('apo_files', 'contract_files'),
+             retry: bool = False, on_progress=None) -> Dict[str, int]:
+    """
+    Render missing variants for every referenced blob and move profile
+    pictures still served from static/ onto avatars. ``retry`` clears the
+    ``.failed`` markers first (e.g. after installing poppler for PDFs).
+    """
+    counts = {'sources': 0, 'rendered': 0, 'skipped': 0, 'avatars': 0}
+    if retry:
+        for directory, _, names in os.walk(os.path.join(upload_root, THUMB_DIR)):
+            for name in names:
+                if name.endswith('.failed'):
+                    os.remove(os.path.join(directory, name))
+    store = BlobStore(upload_root)
+    digests = set()
+    for table in tables:
+        cursor.execute(f"SELECT DISTINCT sha256 FROM {table} WHERE sha256 IS NOT NULL")
+        digests.update(row[0] for row in cursor.fetchall())
+    for sha256 in sorted(digests):
+        source = store.path(sha256)
+        if not source_kind(source):
+            counts['skipped'] += 1
+            continue
+        counts['sources'] += 1
+        for variant in variants:
+            for fmt in output_formats():
+                existed = os.path.exists(os.path.join(upload_root, *variant_relative_path(sha256, variant, fmt).split('/')))
+                if not existed and ensure_variant(upload_root, sha256, variant, fmt, source):
+                    counts['rendered'] += 1
+        if on_progress:
+            on_progress(counts)
+
+    static_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+    cursor.execute("SELECT username, profile_picture FROM users WHERE profile_picture LIKE %s", ('/static/%',))
+    for username, url in cursor.fetchall():
+        picture = os.path.join(static_dir, url[len('/static/'):])
+        if not os.path.isfile(picture):
+            continue
+        sha256 = store_avatar(upload_root, picture)
+        if sha256:
+            cursor.execute("UPDATE users SET profile_picture = %s WHERE username = %s",
+                           (f'/thumbnails/avatar/{sha256}', username))
+            counts['avatars'] += 1
+    return counts
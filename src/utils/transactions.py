@@ -0,0 +1,241 @@
+"""
+Transaction History Queries
+Filtered, keyset-paginated access to the asset_transactions log
+"""
+
+import time
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, List, Optional
+
+from utils.pagination import clamp_limit, decode_cursor, encode_cursor, seek_clause
+
+HOT_TABLE = 'asset_transactions'
+ARCHIVE_TABLE = 'asset_transactions_archive'
+
+# Rows older than the watermark live only in the archive table; it moves once
+# a month when archive_transactions.py runs, so a short cache is plenty
+WATERMARK_TTL_SECONDS = 300
+_watermark_cache = {'value': None, 'expires': 0.0}
+
+
+# Values of the asset_transactions.action ENUM (migration 0003)
+TRANSACTION_ACTIONS = ('checkout', 'checkin', 'assign', 'dispose', 'maintenance', 'move', 'reserve', 'lease', 'contract')
+
+# Sort key of the report; every filter index ends with these columns
+SORT_COLUMNS = ('t.created_at', 't.id')
+
+# Equality filters accepted from the query string, mapped to their columns
+FILTER_COLUMNS = {
+    'action': 't.action',
+    'asset': 't.asset_name',
+    'person': 't.person',
+    'department': 't.department',
+}
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def parse_transaction_filters(args) -> Dict[str, Any]:
+    """Normalize report filters from request args (or any mapping)"""
+    filters: Dict[str, Any] = {}
+    for key in FILTER_COLUMNS:
+        value = (args.get(key) or '').strip()
+        if value:
+            filters[key] = value
+    if filters.get('action'):
+        filters['action'] = filters['action'].lower()
+    for key in ('date_from', 'date_to'):
+        parsed = _parse_date(args.get(key))
+        if parsed:
+            filters[key] = parsed
+    return filters
+
+
+def filter_query_args(filters: Dict[str, Any]) -> Dict[str, str]:
+    """Render filters back into query-string arguments for pagination links"""
+    return {key: (value.isoformat() if isinstance(value, date) else value)
+            for key, value in filters.items()}
+
+
+def archive_watermark(cursor) -> Optional[datetime]:
+    """Upper bound of the archived history, or None when nothing is archived"""
+    now = time.monotonic()
+    if now < _watermark_cache['expires']:
+        return _watermark_cache['value']
+    try:
+        cursor.execute("SELECT MAX(range_end) AS watermark FROM transaction_archive_log")
+        row = cursor.fetchone()
+        if isinstance(row, dict):
+            value = row['watermark']
+        else:
+            value = row[0] if row else None
+    except Exception:
+        # Archive tables not migrated yet
+        value = None
+    _watermark_cache['value'] = value
+    _watermark_cache['expires'] = now + WATERMARK_TTL_SECONDS
+    return value
+
+
+def invalidate_archive_watermark():
+    _watermark_cache['expires'] = 0.0
+
+
+def _date_bounds(filters: Dict[str, Any]):
+    lower = upper = None
+    if filters.get('date_from'):
+        lower = datetime.combine(filters['date_from'], datetime.min.time())
+    if filters.get('date_to'):
+        # Inclusive end date: everything before midnight of the following day
+        upper = datetime.combine(filters['date_to'] + timedelta(days=1), datetime.min.time())
+    return lower, upper
+
+
+def tables_for_range(filters: Dict[str, Any], watermark: Optional[datetime]) -> List[str]:
+    """Tables that can hold rows in the filtered date range, newest first"""
+    if watermark is None:
+        return [HOT_TABLE]
+    lower, upper = _date_bounds(filters)
+    tables = []
+    if upper is None or upper > watermark:
+        tables.append(HOT_TABLE)
+    if lower is None or lower < watermark:
+        tables.append(ARCHIVE_TABLE)
+    return tables
+
+
+def build_filter_clause(filters: Dict[str, Any]):
+    """Return (conditions, params) for the given filters"""
+    conditions: List[str] = []
+    params: List[Any] = []
+    for key, column in FILTER_COLUMNS.items():
+        if filters.get(key):
+            conditions.append(f"{column} = %s")
+            params.append(filters[key])
+    lower, upper = _date_bounds(filters)
+    if lower:
+        conditions.append("t.created_at >= %s")
+        params.append(lower)
+    if upper:
+        conditions.append("t.created_at < %s")
+        params.append(upper)
+    return conditions, params
+
+
+def _row_to_transaction(row) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'item_name': row[1],
+        'action': row[2],
+        'quantity': row[3],
+        'person': row[4],
+        'department': row[5],
+        'location': row[6],
+        'username': row[7],
+        'created_at': row[8],
+    }
+
+
+def _select_page(cursor, table: str, conditions: List[str], params: List[Any],
+                 direction: str, limit: int) -> list:
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    cursor.execute(f"""
+        SELECT t.id, t.asset_name, t.action, t.quantity, t.person, t.department,
+               t.location, t.username, t.created_at
+        FROM {table} t
+        {where}
+        ORDER BY t.created_at {direction}, t.id {direction}
+        LIMIT %s
+    """, params + [limit])
+    return cursor.fetchall()
+
+
+def fetch_transaction_page(cursor, filters: Dict[str, Any], after: Optional[str] = None,
+                           before: Optional[str] = None, limit: Any = None) -> Dict[str, Any]:
+    """
+    Fetch one page of transactions, newest first.
+
+    ``after`` continues towards older rows and ``before`` walks back towards
+    newer rows; both are cursors previously returned as next_cursor/prev_cursor.
+    Each page is a single index range scan of ``limit + 1`` rows regardless of
+    how deep into the history the cursor points. Every archived row is older
+    than every hot row, so the archive is only read when the page runs past
+    the hot table and the date range reaches below the archive watermark.
+    """
+    limit = clamp_limit(limit)
+    conditions, params = build_filter_clause(filters)
+
+    after_key = decode_cursor(after, len(SORT_COLUMNS))
+    before_key = None if after_key else decode_cursor(before, len(SORT_COLUMNS))
+    backwards = before_key is not None
+    boundary = before_key or after_key
+    if boundary:
+        clause, seek_params = seek_clause(SORT_COLUMNS, boundary, descending=not backwards)
+        conditions.append(clause)
+        params.extend(seek_params)
+
+    watermark = archive_watermark(cursor)
+    tables = tables_for_range(filters, watermark)
+    if boundary and watermark is not None:
+        # Skip the table that lies entirely on the wrong side of the cursor
+        if not backwards and boundary[0] < watermark:
+            tables = [t for t in tables if t != HOT_TABLE]
+        elif backwards and boundary[0] >= watermark:
+            tables = [t for t in tables if t != ARCHIVE_TABLE]
+    if backwards:
+        tables = list(reversed(tables))
+
+    direction = 'ASC' if backwards else 'DESC'
+    rows: list = []
+    for table in tables:
+        remaining = limit + 1 - len(rows)
+        if remaining <= 0:
+            break
+        rows.extend(_select_page(cursor, table, conditions, params, direction, remaining))
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    transactions = [_row_to_transaction(row) for row in rows]
+
+    has_older = more if not backwards else True
+    has_newer = more if backwards else after_key is not None
+    next_cursor = prev_cursor = None
+    if transactions and has_older:
+        last = transactions[-1]
+        next_cursor = encode_cursor([last['created_at'], last['id']])
+    if transactions and has_newer:
+        first = transactions[0]
+        prev_cursor = encode_cursor([first['created_at'], first['id']])
+
+    return {
+        'transactions': transactions,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'limit': limit,
+    }
+
+
+def fetch_transactions_for_export(cursor, filters: Dict[str, Any]) -> list:
+    """All transactions matching the filters, newest first, including archived ones in range"""
+    conditions, params = build_filter_clause(filters)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    rows = []
+    for table in tables_for_range(filters, archive_watermark(cursor)):
+        cursor.execute(f"""
+            SELECT t.id, t.asset_name, t.action, t.quantity, t.person, t.department,
+                   t.location, t.notes, t.username, t.user_id, t.created_at
+            FROM {table} t
+            {where}
+            ORDER BY t.created_at DESC, t.id DESC
+        """, params)
+        rows.extend(cursor.fetchall())
+    return rows
@@ -8,6 +8,9 @@ export FLASK_HOST=${FLASK_HOST:-0.0.0.0}
 export FLASK_PORT=${FLASK_PORT:-5000}
 export FLASK_DEBUG=${FLASK_DEBUG:-false}
 
+# Apply pending database migrations before serving requests
+python3 migrate.py up || exit 1
+
 # Navigate to source directory
 cd src
 
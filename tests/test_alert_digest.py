@@ -0,0 +1,73 @@
+"""
+Tests for alert digest batching (no database required)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.alert_digest import build_digest, flush_digests
+
+
+class FakeCursor:
+    """Serves pending digest rows for two recipients and records the UPDATEs"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        if sql.startswith('SELECT recipient, alert_type'):
+            self.result = sorted({(e[0], e[1]) for e in self.conn.events})
+        elif sql.startswith('SELECT id'):
+            self.result = [e[2:] for e in self.conn.events if (e[0], e[1]) == tuple(params)]
+        elif sql.startswith('UPDATE'):
+            self.conn.marked.extend(params)
+        else:
+            self.result = []
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, events):
+        self.events = events
+        self.marked = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+
+def test_single_event_keeps_its_own_message():
+    subject, body = build_digest('checkout', [{'subject': 'Asset Checkout', 'summary': 's', 'body': 'Full body'}])
+    assert (subject, body) == ('Asset Checkout', 'Full body')
+
+
+def test_events_become_one_digest_per_recipient_and_type():
+    conn = FakeConnection([
+        ('ops@test', 'low_stock', 1, 'Low Stock Alert', "LOW STOCK: 'Toner'", None, 3),
+        ('ops@test', 'low_stock', 2, 'Low Stock Alert', "LOW STOCK: 'Paper'", None, 1),
+        ('ann@test', 'checkout', 3, 'Asset Checkout', '1 x Laptop', 'body 3', 1),
+        ('ann@test', 'checkout', 4, 'Asset Checkout', '2 x Mouse', 'body 4', 1),
+    ])
+    outbox = []
+    assert flush_digests(conn, send=lambda *msg: outbox.append(msg) or True) == 2
+    assert sorted(conn.marked) == [1, 2, 3, 4]
+    by_recipient = {recipient: (subject, body) for recipient, subject, body in outbox}
+    assert by_recipient['ops@test'][0] == 'Low stock: 2 alerts'
+    assert "LOW STOCK: 'Toner' (x3)" in by_recipient['ops@test'][1]
+    assert '2 x Mouse' in by_recipient['ann@test'][1]
+
+
+def test_failed_send_leaves_events_pending():
+    conn = FakeConnection([('ops@test', 'low_stock', 1, 'Low Stock Alert', 'x', None, 1)])
+    assert flush_digests(conn, send=lambda *msg: False) == 0
+    assert conn.marked == []
@@ -0,0 +1,78 @@
+"""
+Tests for the precomputed alert pages (no database required)
+"""
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.alerts import ALERT_PAGES, page_bounds, fetch_alerts, count_alerts
+
+TODAY = date(2024, 6, 15)
+
+
+class FakeCursor:
+    """Applies the kind/due_date window of the query to stored alert rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append(sql)
+        if sql.startswith('SELECT COALESCE'):
+            self.result = [tuple(len(self._window(page)) for page in ALERT_PAGES)]
+            return
+        kind = params[0]
+        page = next(p for p, spec in ALERT_PAGES.items()
+                    if spec['kind'] == kind and len(params) - 1 == sum(b is not None for b in spec['window'])
+                    and ('>=' in sql) == (spec['window'][0] is not None))
+        self.result = [tuple(r[1:]) for r in self._window(page)]
+
+    def _window(self, page):
+        first, last = page_bounds(page, TODAY)
+        return [r for r in self.rows if r[0] == ALERT_PAGES[page]['kind']
+                and (first is None or r[5] >= first) and (last is None or r[5] <= last)]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+
+ROWS = [
+    # kind, subject, category, party, start_date, due_date, amount, details
+    ('maintenance', 'Generator', 'Service', None, None, date(2024, 6, 10), None, 'Oil change'),
+    ('maintenance', 'Printer', 'Repair', None, None, date(2024, 6, 18), None, None),
+    ('maintenance', 'Van', 'Service', None, None, date(2024, 7, 30), None, None),
+    ('lease', 'Office', None, 'ACME', date(2023, 1, 1), date(2024, 7, 1), 1200, None),
+]
+
+
+def test_page_bounds():
+    assert page_bounds('assets-past-due', TODAY) == (None, date(2024, 6, 14))
+    assert page_bounds('maintenance-due', TODAY) == (TODAY, date(2024, 6, 22))
+
+
+def test_fetch_alerts_shapes_rows_for_templates():
+    cursor = FakeCursor(ROWS)
+    overdue = fetch_alerts(cursor, 'maintenance-overdue', TODAY)
+    assert overdue == [{'asset_name': 'Generator', 'maintenance_type': 'Service',
+                        'scheduled_date': date(2024, 6, 10), 'description': 'Oil change', 'days_overdue': 5}]
+    due = fetch_alerts(cursor, 'maintenance-due', TODAY)
+    assert [(r['asset_name'], r['days_until_due']) for r in due] == [('Printer', 3)]
+    lease = fetch_alerts(cursor, 'leases-expiring', TODAY)[0]
+    assert (lease['lessor'], lease['monthly_payment'], lease['days_until_expiry']) == ('ACME', 1200, 16)
+
+
+def test_counts_come_from_one_query():
+    cursor = FakeCursor(ROWS)
+    counts = count_alerts(cursor, TODAY)
+    assert len(cursor.executed) == 1
+    assert counts['maintenance-overdue'] == 1
+    assert counts['maintenance-due'] == 1
+    assert counts['leases-expiring'] == 1
+    assert counts['assets-past-due'] == 0
@@ -0,0 +1,78 @@
+"""
+Tests for the keyset-paginated APO list (no database required)
+"""
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.apo import LIST_COLUMNS, fetch_apo_page, parse_apo_filters, add_file_count
+from utils.pagination import decode_cursor
+
+
+class FakeCursor:
+    """Serves APO rows ordered by (apo_date, id) and applies the seek predicate in Python"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, list(params)))
+        if not sql.strip().startswith('SELECT'):
+            return
+        params = list(params)
+        limit = params.pop()
+        rows = self.rows
+        if 'a.status = %s' in sql:
+            status = params.pop(0)
+            rows = [r for r in rows if r['status'] == status]
+        descending = 'DESC' in sql
+        if 'a.apo_date <' in sql or 'a.apo_date >' in sql:
+            key = (params[0], params[2])
+            rows = [r for r in rows if ((r['apo_date'], r['id']) < key) == descending
+                    and (r['apo_date'], r['id']) != key]
+        rows = sorted(rows, key=lambda r: (r['apo_date'], r['id']), reverse=descending)
+        self.result = [tuple(r[c] for c in LIST_COLUMNS) for r in rows[:limit]]
+
+    def fetchall(self):
+        return self.result
+
+
+def make_rows(n):
+    return [{'id': i, 'apo_number': f'APO-{i}', 'supplier': 'ACME', 'department': None,
+             'apo_date': date(2024, 1, 1 + i // 2), 'delivery_date': None, 'amount': 100,
+             'status': 'Pending' if i % 3 else 'Approved', 'file_count': i % 4}
+            for i in range(1, n + 1)]
+
+
+def test_pages_walk_newest_first_without_overlap():
+    cursor = FakeCursor(make_rows(7))
+    first = fetch_apo_page(cursor, {}, limit=3)
+    assert [a['id'] for a in first['apos']] == [7, 6, 5]
+    assert first['prev_cursor'] is None and first['next_cursor']
+    second = fetch_apo_page(cursor, {}, after=first['next_cursor'], limit=3)
+    assert [a['id'] for a in second['apos']] == [4, 3, 2]
+    back = fetch_apo_page(cursor, {}, before=second['prev_cursor'], limit=3)
+    assert [a['id'] for a in back['apos']] == [7, 6, 5]
+    last = fetch_apo_page(cursor, {}, after=second['next_cursor'], limit=3)
+    assert [a['id'] for a in last['apos']] == [1] and last['next_cursor'] is None
+    assert decode_cursor(first['next_cursor'], 2) == [date(2024, 1, 3), 5]
+    assert 'JOIN' not in cursor.executed[0][0] and 'GROUP BY' not in cursor.executed[0][0]
+
+
+def test_filters_are_parsed_and_applied():
+    filters = parse_apo_filters({'status': ' Approved ', 'date_from': '2024-01-02', 'date_to': 'bad'})
+    assert filters == {'status': 'Approved', 'date_from': date(2024, 1, 2)}
+    cursor = FakeCursor(make_rows(7))
+    page = fetch_apo_page(cursor, {'status': 'Approved'}, limit=10)
+    assert [a['id'] for a in page['apos']] == [6, 3]
+
+
+def test_file_count_moves_with_uploads():
+    cursor = FakeCursor([])
+    add_file_count(cursor, 5, 0)
+    add_file_count(cursor, 5, 2)
+    assert cursor.executed == [("UPDATE apo SET file_count = GREATEST(file_count + %s, 0) WHERE id = %s", [2, 5])]
@@ -0,0 +1,48 @@
+"""
+Tests for the sorted/filterable asset listing index
+"""
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.asset_index import AssetIndex
+
+
+def make_inventory():
+    return {
+        'Laptop B': {'quantity': 3, 'price': 900.0, 'category': 'Laptop', 'location': 'HQ', 'purchase_date': date(2022, 1, 5)},
+        'laptop a': {'quantity': 1, 'price': 1200.0, 'category': 'Laptop', 'location': None, 'purchase_date': None},
+        'Desk': {'quantity': 10, 'price': 150.0, 'category': 'Furniture', 'location': 'HQ', 'purchase_date': '2021-06-01'},
+        'Chair': {'quantity': 25, 'price': 80.0, 'category': 'Furniture', 'location': 'Branch', 'purchase_date': date(2023, 3, 1)},
+    }
+
+
+def test_sort_orders_are_case_insensitive_with_missing_last():
+    index = AssetIndex(make_inventory())
+    assert index.sorted_names('name') == ['Chair', 'Desk', 'laptop a', 'Laptop B']
+    assert index.sorted_names('price', descending=True)[0] == 'laptop a'
+    assert index.sorted_names('purchase_date') == ['Desk', 'Laptop B', 'Chair', 'laptop a']
+    assert index.sorted_names('purchase_date', descending=True)[-1] == 'laptop a'
+    assert index.sorted_names('not_a_field') == index.sorted_names('name')
+
+
+def test_page_filters_and_search():
+    index = AssetIndex(make_inventory())
+    page = index.page(sort='quantity', filters={'category': 'Furniture'}, per_page=1, page=2)
+    assert page['names'] == ['Chair'] and page['total'] == 2 and page['pages'] == 2
+    page = index.page(filters={'location': 'HQ'}, q='LAP')
+    assert page['names'] == ['Laptop B']
+    page = index.page(page=99, per_page=3)
+    assert page['page'] == 2 and page['names'] == ['Laptop B']
+
+
+def test_invalidate_picks_up_changes():
+    inventory = make_inventory()
+    index = AssetIndex(inventory)
+    assert index.sorted_names('quantity')[0] == 'laptop a'
+    inventory['laptop a']['quantity'] = 100
+    index.invalidate()
+    assert index.sorted_names('quantity')[-1] == 'laptop a'
+    assert index.filter_values('category') == ['Furniture', 'Laptop']
@@ -0,0 +1,56 @@
+"""
+Tests for the compact AssetRecord used by the inventory cache
+"""
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.asset import AssetRecord, ASSET_FIELDS
+
+
+def make_record():
+    return AssetRecord.from_values((3, 900.0, 'Dell laptop', 5, 'Laptop', 'Dell', 'IT', None, 'HQ',
+                                    'XPS 13', 'Dell', 'SN1', date(2022, 1, 5), 'straight_line', 5, 100.0))
+
+
+def test_behaves_like_the_old_dict():
+    rec = make_record()
+    assert rec['quantity'] == 3 and rec.price == 900.0
+    assert rec.get('checked_out', False) is False
+    assert list(rec) == list(ASSET_FIELDS)
+    rec['quantity'] -= 1
+    rec.update({'location': 'Branch', 'current_value': 750.0})
+    assert rec.quantity == 2 and rec['location'] == 'Branch'
+    assert rec['current_value'] == 750.0 and 'current_value' in rec
+    snapshot = rec.copy()
+    assert isinstance(snapshot, dict) and snapshot['serial_number'] == 'SN1'
+    snapshot['name'] = 'x'
+    assert 'name' not in rec
+    assert dict(AssetRecord(snapshot))['name'] == 'x'
+
+
+def test_missing_and_fixed_keys():
+    rec = AssetRecord(quantity=1)
+    assert rec['category'] is None
+    try:
+        rec['nope']
+        assert False, 'expected KeyError'
+    except KeyError:
+        pass
+    try:
+        del rec['quantity']
+        assert False, 'expected KeyError'
+    except KeyError:
+        pass
+
+
+def test_records_are_compact_and_share_category_strings():
+    rec = make_record()
+    assert not hasattr(rec, '__dict__')
+    other = AssetRecord.from_values((1, 1.0, '', 5, ''.join(['Lap', 'top']), 'x', None, None, None,
+                                     None, None, None, None, 'straight_line', 5, 0.0))
+    assert other.category is rec.category
+    legacy = dict(rec)
+    assert sys.getsizeof(rec) < sys.getsizeof(legacy) / 2
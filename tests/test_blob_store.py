@@ -0,0 +1,102 @@
+"""
+Tests for the deduplicated attachment blob store (no database required)
+"""
+import sys
+import os
+import hashlib
+import io
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.blob_store import BlobStore, collect_garbage, import_legacy_files, retain_blob
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class FakeCursor:
+    """Answers the blob store's statements from an in-memory attachment_blobs table"""
+
+    def __init__(self, blobs=None, rows=None):
+        self.blobs = blobs or {}
+        self.rows = rows or []
+        self.executed = []
+        self.result = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.executed.append((sql, tuple(params)))
+        self.result = []
+        if sql.startswith('SELECT id, saved_filename'):
+            self.result = list(self.rows)
+        elif sql.startswith('SELECT sha256, size FROM attachment_blobs WHERE ref_count = 0'):
+            self.result = [(s, b['size']) for s, b in self.blobs.items() if b['ref_count'] == 0]
+        elif sql.startswith('SELECT sha256 FROM attachment_blobs WHERE sha256 IN'):
+            self.result = [(s,) for s in params if s in self.blobs]
+        elif sql.startswith('SELECT ref_count'):
+            blob = self.blobs.get(params[0])
+            self.result = [(blob['ref_count'],)] if blob else []
+        elif sql.startswith('INSERT INTO attachment_blobs'):
+            blob = self.blobs.setdefault(params[0], {'size': params[1], 'ref_count': 0})
+            blob['ref_count'] += 1
+        elif sql.startswith('DELETE FROM attachment_blobs'):
+            self.rowcount = 1 if self.blobs.pop(params[0], None) else 0
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path))
+    first = store.put_stream(io.BytesIO(b'same pdf'))
+    second = store.put_stream(io.BytesIO(b'same pdf'))
+    assert first == second == (sha(b'same pdf'), 8)
+    files = [name for _, _, names in os.walk(tmp_path / 'blobs') for name in names]
+    assert files == [sha(b'same pdf')]
+    assert list(store.iter_blobs()) == [(sha(b'same pdf'), store.path(sha(b'same pdf')))]
+
+
+def test_legacy_files_are_hard_linked_and_repointed(tmp_path):
+    legacy = tmp_path / 'apo'
+    legacy.mkdir()
+    (legacy / '20240101_a.pdf').write_bytes(b'invoice')
+    (legacy / '20240102_a.pdf').write_bytes(b'invoice')
+    store = BlobStore(str(tmp_path))
+    cursor = FakeCursor(rows=[(1, '20240101_a.pdf'), (2, '20240102_a.pdf'), (3, 'gone.pdf')])
+    result = import_legacy_files(cursor, store, 'apo_files')
+    assert result['imported'] == 2 and result['duplicates'] == 1 and result['missing'] == [3]
+    assert os.path.samefile(store.path(sha(b'invoice')), legacy / '20240101_a.pdf')
+    assert cursor.blobs[sha(b'invoice')]['ref_count'] == 2
+    updates = [p for s, p in cursor.executed if s.startswith('UPDATE apo_files')]
+    assert updates[0] == (sha(b'invoice'), store.relative_path(sha(b'invoice')), 7, 1)
+
+
+def test_reference_counting_statements():
+    cursor = FakeCursor()
+    retain_blob(cursor, 'a' * 64, 10)
+    retain_blob(cursor, 'a' * 64, 10)
+    assert cursor.blobs['a' * 64]['ref_count'] == 2
+
+
+def test_gc_removes_unreferenced_and_stray_blobs_after_grace(tmp_path):
+    store = BlobStore(str(tmp_path))
+    kept, dropped, stray, fresh = (store.put_stream(io.BytesIO(d))[0] for d in (b'kept', b'dropped', b'stray', b'fresh'))
+    old = time.time() - 48 * 3600
+    for digest in (kept, dropped, stray):
+        os.utime(store.path(digest), (old, old))
+    cursor = FakeCursor(blobs={kept: {'size': 4, 'ref_count': 1}, dropped: {'size': 7, 'ref_count': 0},
+                               fresh: {'size': 5, 'ref_count': 0}})
+
+    preview = collect_garbage(cursor, store, grace_hours=24, dry_run=True)
+    assert preview['blobs'] == 1 and preview['strays'] == 1 and store.exists(dropped)
+
+    removed = collect_garbage(cursor, store, grace_hours=24)
+    assert removed == {'blobs': 1, 'bytes': 12, 'strays': 1, 'temp_files': 0}
+    assert store.exists(kept) and store.exists(fresh)
+    assert not store.exists(dropped) and not store.exists(stray)
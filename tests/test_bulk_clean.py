@@ -0,0 +1,74 @@
+"""
+Tests for set-based data-quality cleaning (runs the generated UPDATE on SQLite)
+"""
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.bulk_clean import build_clean_update, plan_remaps, standardize_value
+from utils.data_quality import DataQualityCleaner
+
+ROWS = [
+    ('A1', 'laptops', 'hewlett packard', 'hq', 1200),
+    ('A2', 'Laptop', 'HP', 'Headquarters', None),
+    ('A3', None, 'dell inc.', '  warehouse ', 300),
+    ('A4', 'printer', None, 'branch office', 80),
+    ('A5', 'Laptop', 'HP', 'Headquarters', 900),
+]
+
+
+class DistinctCursor:
+    """Answers the SELECT DISTINCT CAST(... AS BINARY) queries from ROWS"""
+
+    COLUMNS = {'category': 1, 'supplier': 2, 'location': 3}
+
+    def __init__(self):
+        self.queries = 0
+
+    def execute(self, sql, params=()):
+        self.queries += 1
+        column = sql.split('CAST(')[1].split(' ')[0]
+        index = self.COLUMNS[column]
+        self.result = [(None if r[index] is None else r[index].encode('utf-8'),) for r in {r[index]: r for r in ROWS}.values()]
+
+    def fetchall(self):
+        return self.result
+
+
+def test_every_remapping_goes_out_in_one_update():
+    cursor = DistinctCursor()
+    remaps = plan_remaps(cursor)
+    assert cursor.queries == 3
+    assert remaps['category'] == {'Laptop': ['laptops'], 'Uncategorized': [None], 'Printer': ['printer']}
+    assert remaps['supplier']['HP'] == ['hewlett packard']
+
+    sql, params = build_clean_update(remaps)
+    assert sql.count('UPDATE') == 1 and sql.count('CASE') == 3
+
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE inventory (name TEXT, category TEXT, supplier TEXT, location TEXT, price REAL)')
+    db.executemany('INSERT INTO inventory VALUES (?, ?, ?, ?, ?)', ROWS)
+    db.execute('ALTER TABLE inventory ADD COLUMN version INT DEFAULT 0')
+    db.execute('ALTER TABLE inventory ADD COLUMN deleted_at TEXT')
+    db.execute("INSERT INTO inventory VALUES ('R1', 'laptops', 'HP', 'hq', NULL, 0, '2024-05-01 10:00:00')")
+    changed = db.execute(sql.replace('%s', '?'), params).rowcount
+    versions = dict(db.execute('SELECT name, version FROM inventory'))
+    rows = {r[0]: r[1:5] for r in db.execute('SELECT * FROM inventory')}
+    assert changed == 4  # A5 is already clean, R1 is retired
+    assert rows['R1'] == ('laptops', 'HP', 'hq', None)
+    assert rows['A1'] == ('Laptop', 'HP', 'Headquarters', 1200)
+    assert rows['A2'] == ('Laptop', 'HP', 'Headquarters', 0)
+    assert rows['A3'] == ('Uncategorized', 'Dell', 'Warehouse', 300)
+    assert rows['A4'] == ('Printer', 'Unknown Supplier', 'Branch Office', 80)
+    assert versions == {'A1': 1, 'A2': 1, 'A3': 1, 'A4': 1, 'A5': 0, 'R1': 0}
+
+
+def test_standardization_is_memoized_and_unchanged():
+    standardize_value.cache_clear()
+    for _ in range(1000):
+        assert standardize_value('category', ' notebooks ') == 'Laptop'
+    assert standardize_value.cache_info().misses == 1
+    assert DataQualityCleaner.clean_string('  Café   Central ') == 'Cafe Central'
+    assert DataQualityCleaner.clean_string(42) == '42'
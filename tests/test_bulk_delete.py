@@ -0,0 +1,112 @@
+"""
+Tests for chunked bulk deletes and soft delete (no database required)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from AssetManagement import InventorySystem
+from utils.bulk_delete import hard_delete, purge_tombstones, soft_delete
+from utils.events import EventBus
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.db.executed.append((sql, list(params)))
+        self.rowcount = len([name for name in params if name in self.db.rows])
+        if sql.startswith('SELECT'):
+            self.rowcount = 0
+
+    def executemany(self, sql, rows):
+        self.db.executed.append((' '.join(sql.split()), list(rows)))
+
+    def fetchall(self):
+        sql, params = self.db.executed[-1]
+        if 'IN (' in sql:
+            return [(name,) for name in params if name in self.db.rows]
+        return [(name,) for name in sorted(self.db.rows)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=()):
+        self.rows = set(rows)
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_hard_delete_runs_one_in_list_per_table_per_chunk():
+    names = [f'Asset {i}' for i in range(1200)]
+    conn = FakeConnection(names[:1100])
+    assert hard_delete(conn, names + names[:10], chunk_size=500) == 1100
+    assert conn.commits == 3
+    tables = [sql.split(' WHERE')[0] for sql, _ in conn.executed]
+    assert tables == ['DELETE FROM asset_transactions', 'DELETE FROM asset_transactions_archive',
+                      'DELETE FROM inventory'] * 3
+    assert [len(params) for _, params in conn.executed[::3]] == [500, 500, 200]
+    assert conn.executed[2][0].endswith('WHERE name IN (' + ', '.join(['%s'] * 500) + ')')
+
+
+def test_soft_delete_only_tombstones_live_rows():
+    conn = FakeConnection(['A', 'B'])
+    assert soft_delete(conn, ['A', 'B', 'C']) == 2
+    sql, params = conn.executed[0]
+    assert sql.startswith('UPDATE inventory SET deleted_at = NOW()') and 'deleted_at IS NULL' in sql
+    assert params == ['A', 'B', 'C'] and conn.commits == 1
+
+
+def test_purge_deletes_old_tombstones():
+    conn = FakeConnection(['Old'])
+    assert purge_tombstones(conn, 30) == {'candidates': 1, 'deleted': 1}
+    assert conn.executed[0][1] == [30]
+
+
+def test_remove_items_updates_the_cache_once():
+    system = InventorySystem.__new__(InventorySystem)
+    system.inventory = {'A': {'quantity': 1}, 'B': {'quantity': 2}, 'C': {'quantity': 3}}
+    system.conn = FakeConnection(['A', 'B', 'C'])
+    system.events = EventBus()
+    system.events.subscribe(system._apply_events)
+    changes = []
+    system.inventory_changed = lambda name=None: changes.append(name)
+    assert system.remove_items(['A', 'B', 'Missing'], soft=True, username='alice') == 2
+    assert list(system.inventory) == ['C'] and sorted(changes) == ['A', 'B']
+    select, update, events = system.conn.executed
+    assert select[0].endswith('AND deleted_at IS NULL FOR UPDATE')
+    # Only the assets actually retired get an event, in the chunk's transaction
+    assert events[1] == [('retired', 'A', None, 'alice'), ('retired', 'B', None, 'alice')]
+    assert system.conn.commits == 1
+
+
+def test_restore_items_reloads_the_restored_assets():
+    system = InventorySystem.__new__(InventorySystem)
+    system.inventory = {'C': {'quantity': 3}}
+    system.conn = FakeConnection(['A'])
+    system.events = EventBus()
+    system.events.subscribe(system._apply_events)
+    system._reload_asset = lambda name: system.inventory.__setitem__(name, {'quantity': 1})
+    system.inventory_changed = lambda name=None: None
+    assert system.restore_items(['A', 'Missing', ''], username='alice') == 1
+    assert sorted(system.inventory) == ['A', 'C']
+    select, update, events = system.conn.executed
+    assert select[0].endswith('AND deleted_at IS NOT NULL FOR UPDATE')
+    assert update[0].startswith('UPDATE inventory SET deleted_at = NULL')
+    assert events[1] == [('restored', 'A', None, 'alice')]
@@ -0,0 +1,93 @@
+"""
+Tests for chunked, resumable uploads into the blob store (no database required)
+"""
+import sys
+import os
+import hashlib
+import io
+import time
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.chunked_upload import MIN_CHUNK_SIZE, UploadError, UploadSessions, chunk_checksum
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunks_of(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    return UploadSessions(str(tmp_path), chunk_size=MIN_CHUNK_SIZE)
+
+
+def test_out_of_order_chunks_assemble_into_blob(sessions, tmp_path):
+    data = os.urandom(MIN_CHUNK_SIZE * 2 + 1000)
+    upload = sessions.create('report.pdf', len(data), 'alice', 'apo', 'application/pdf')
+    assert upload['total_chunks'] == 3 and upload['received'] == []
+    parts = chunks_of(data, upload['chunk_size'])
+    for index in (2, 0, 1):
+        sessions.write_chunk(upload['upload_id'], index, io.BytesIO(parts[index]), 'alice', sha(parts[index]))
+    # A resent chunk just replaces the stored copy
+    sessions.write_chunk(upload['upload_id'], 1, io.BytesIO(parts[1]), 'alice', sha(parts[1]))
+    assert sessions.status(upload['upload_id'], 'alice')['received'] == [0, 1, 2]
+
+    done = sessions.complete(upload['upload_id'], 'alice')
+    assert done['complete'] and done['sha256'] == sha(data)
+    assert sessions.complete(upload['upload_id'], 'alice')['sha256'] == sha(data)
+    blob = tmp_path / 'blobs' / sha(data)[:2] / sha(data)
+    assert blob.read_bytes() == data
+
+    claimed = sessions.claim(upload['upload_id'], 'alice', 'apo')
+    assert claimed['saved_filename'] == f'blobs/{sha(data)[:2]}/{sha(data)}'
+    assert claimed['filename'] == 'report.pdf' and claimed['size'] == len(data)
+    with pytest.raises(UploadError):
+        sessions.status(upload['upload_id'], 'alice')
+
+
+def test_bad_checksum_and_missing_chunks_are_rejected(sessions):
+    data = os.urandom(MIN_CHUNK_SIZE + 10)
+    upload = sessions.create('a.bin', len(data), 'alice', 'contracts')
+    first = data[:MIN_CHUNK_SIZE]
+    with pytest.raises(UploadError) as err:
+        sessions.write_chunk(upload['upload_id'], 0, io.BytesIO(first), 'alice', sha(b'other'))
+    assert err.value.status == 422
+    with pytest.raises(UploadError) as err:
+        sessions.write_chunk(upload['upload_id'], 0, io.BytesIO(first[:-1]), 'alice', sha(first[:-1]))
+    assert err.value.status == 400
+    crc = f'{zlib.crc32(first) & 0xffffffff:08x}'
+    assert chunk_checksum(first, 'crc32') == crc
+    sessions.write_chunk(upload['upload_id'], 0, io.BytesIO(first), 'alice', crc, 'crc32')
+    with pytest.raises(UploadError) as err:
+        sessions.complete(upload['upload_id'], 'alice')
+    assert err.value.status == 409
+
+
+def test_sessions_are_scoped_to_owner_and_purpose(sessions):
+    upload = sessions.create('x.txt', 3, 'alice', 'apo')
+    with pytest.raises(UploadError) as err:
+        sessions.status(upload['upload_id'], 'mallory')
+    assert err.value.status == 404
+    with pytest.raises(UploadError):
+        sessions.status('../../etc', 'alice')
+    sessions.write_chunk(upload['upload_id'], 0, io.BytesIO(b'abc'), 'alice', sha(b'abc'))
+    sessions.complete(upload['upload_id'], 'alice')
+    with pytest.raises(UploadError):
+        sessions.claim(upload['upload_id'], 'alice', 'contracts')
+    with pytest.raises(UploadError):
+        sessions.create('x.txt', 3, 'alice', 'profile')
+
+
+def test_stale_sessions_are_purged(sessions):
+    upload = sessions.create('x.txt', 3, 'alice', 'apo')
+    assert sessions.purge_stale(now=time.time()) == 0
+    assert sessions.purge_stale(now=time.time() + 25 * 3600) == 1
+    with pytest.raises(UploadError):
+        sessions.status(upload['upload_id'], 'alice')
@@ -0,0 +1,96 @@
+"""
+Tests for blocked duplicate detection and the review queue (no database required)
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import duplicates
+from utils.duplicates import DuplicateIndex, enqueue_matches, resolve_review, token_set_ratio
+
+
+def make_inventory():
+    return {
+        'Dell Latitude 5420': {'brand': 'Dell', 'model': 'Latitude 5420', 'serial_number': None},
+        'DELL Latitude-5420': {'brand': None, 'model': None, 'serial_number': None},
+        'HP LaserJet Pro': {'brand': 'HP', 'model': 'M404', 'serial_number': 'CN-123'},
+        'Printer (2nd floor)': {'brand': 'hp', 'model': 'm404', 'serial_number': 'cn 123'},
+        'Office Chair': {'brand': None, 'model': None, 'serial_number': None},
+        # Same model, different units
+        'Dell Latitude 5420 #2': {'brand': 'Dell', 'model': 'Latitude 5420', 'serial_number': 'SN-9'},
+        'Dell Latitude 5420 #3': {'brand': 'Dell', 'model': 'Latitude 5420', 'serial_number': 'SN-10'},
+    }
+
+
+def test_near_duplicates_and_shared_serials_are_found():
+    index = DuplicateIndex(make_inventory())
+    result = index.scan(workers=1)
+    pairs = {(a, b): reason for a, b, _, reason in result['matches']}
+    assert ('DELL Latitude-5420', 'Dell Latitude 5420') in pairs
+    assert pairs[('HP LaserJet Pro', 'Printer (2nd floor)')] == 'Same serial number'
+    assert ('Dell Latitude 5420 #2', 'Dell Latitude 5420 #3') not in pairs
+    assert all('Office Chair' not in pair for pair in pairs)
+    assert result['pairs'] < 7 * 6 // 2
+
+
+def test_oversized_blocks_are_not_compared(monkeypatch):
+    inventory = {f'Laptop {i}': {} for i in range(30)}
+    monkeypatch.setattr(duplicates, 'MAX_BLOCK_SIZE', 10)
+    index = DuplicateIndex(inventory)
+    assert index.candidate_pairs() == []
+    assert index.candidates('Laptop 1') == set()
+
+
+def test_incremental_check_on_insert():
+    inventory = make_inventory()
+    index = DuplicateIndex(inventory)
+    index.scan(workers=1)
+    inventory['Dell latitude 5420 laptop'] = {'brand': 'Dell', 'model': 'Latitude 5420'}
+    index.asset_changed('Dell latitude 5420 laptop')
+    found = {tuple(sorted(m[:2])) for m in index.matches('Dell latitude 5420 laptop')}
+    assert ('Dell Latitude 5420', 'Dell latitude 5420 laptop') in found
+    del inventory['Dell Latitude 5420']
+    index.asset_changed('Dell Latitude 5420')
+    assert 'Dell Latitude 5420' not in index.candidates('Dell latitude 5420 laptop')
+
+
+def test_process_pool_scores_like_a_single_process(monkeypatch):
+    inventory = {f'Asset {i % 40} unit{i}': {'brand': 'Acme', 'model': f'M{i % 40}'} for i in range(400)}
+    serial = DuplicateIndex(inventory).scan(threshold=0.8, workers=1)
+    monkeypatch.setattr(duplicates, 'PARALLEL_MIN_PAIRS', 1)
+    monkeypatch.setattr(duplicates, 'PAIRS_PER_TASK', 200)
+    parallel = DuplicateIndex(inventory).scan(threshold=0.8, workers=2)
+    assert parallel == serial
+
+
+def test_token_set_ratio():
+    assert token_set_ratio(frozenset({'dell', 'latitude'}), frozenset({'latitude', 'dell'})) == 1.0
+    assert token_set_ratio(frozenset({'chair'}), frozenset({'desk'})) < 0.5
+    assert token_set_ratio(frozenset(), frozenset({'desk'})) == 0.0
+
+
+class FakeCursor:
+    rowcount = 1
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, params))
+
+    def executemany(self, sql, rows):
+        self.executed.append((sql, rows))
+
+
+def test_review_queue_keeps_decisions():
+    cursor = FakeCursor()
+    assert enqueue_matches(cursor, [('A', 'B', 0.95, 'Same serial number')]) == 1
+    sql, rows = cursor.executed[0]
+    assert 'ON DUPLICATE KEY UPDATE' in sql and 'status' not in sql.split('UPDATE', 1)[1]
+    assert rows == [('A', 'B', 0.95, 'Same serial number')]
+    assert resolve_review(cursor, 1, 'not_duplicate', 'alice')
+    with pytest.raises(ValueError):
+        resolve_review(cursor, 1, 'maybe', 'alice')
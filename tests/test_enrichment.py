@@ -0,0 +1,67 @@
+"""
+Tests for batched asset enrichment (no database required)
+"""
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.enrichment import changed_rows, depreciated_value, enrich_rows, write_enrichment
+
+TODAY = date(2025, 1, 1)
+
+
+class FakeCursor:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+        self.batches = []
+
+    def execute(self, sql, params=()):
+        self.executed.append(' '.join(sql.split()))
+
+    def executemany(self, sql, rows):
+        self.batches.append(rows)
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_enrichment_uses_the_asset_list_depreciation():
+    rows = enrich_rows([
+        ('Laptop', 1000, '2023-01-01', 100, 4, 'straight_line'),
+        ('Server', Decimal('5000'), date(2017, 6, 1), 0, 5, 'declining_balance'),
+        ('Chair', 80, None, 0, 5, 'straight_line'),
+        ('Desk', 300, 'not a date', 0, 5, 'straight_line'),
+    ], TODAY)
+    laptop, server, chair, desk = rows
+    book = round(depreciated_value(1000, '2023-01-01', 100, 4, today=TODAY), 2)
+    assert laptop == ('Laptop', 2.0, round(1000 - book, 2), book, 'Mature', 'Low')
+    assert server == ('Server', 7.59, 5000.0, 0.0, 'End of Life', 'Medium')
+    assert chair == ('Chair', 0.0, 0.0, 80.0, 'Unknown', 'Low')
+    assert desk[4] == 'Unknown'
+
+
+def test_only_changed_or_unstamped_rows_are_written():
+    fresh = enrich_rows([('B', 900, '2024-01-01', 0, 5, 'straight_line')], TODAY)[0]
+    cursor = FakeCursor([
+        # stored values already current, row not touched since enrichment
+        ('B', 900, '2024-01-01', 0, 5, 'straight_line',
+         Decimal(str(fresh[1])), Decimal(str(fresh[2])), Decimal(str(fresh[3])), fresh[4], fresh[5], 0),
+        # stale calculated values
+        ('A', 900, '2020-01-01', 0, 5, 'straight_line', 0, 0, 900, 'New', 'Low', 0),
+        # values current but the row was edited since (must be stamped)
+        ('C', 0, None, 0, 5, 'straight_line', 0, 0, 0, 'Unknown', 'Low', 1),
+    ])
+    examined, rows = changed_rows(cursor, incremental=True, today=TODAY)
+    assert examined == 3
+    assert [row[0] for row in rows] == ['A', 'C']
+    assert cursor.executed[0].endswith('WHERE deleted_at IS NULL AND (enriched_at IS NULL OR updated_at > enriched_at)')
+
+    write_enrichment(cursor, rows * 700)
+    assert [len(batch) for batch in cursor.batches] == [1000, 400]
+    update = [sql for sql in cursor.executed if sql.startswith('UPDATE inventory')]
+    assert len(update) == 1 and 'i.updated_at = i.updated_at' in update[0]
+    assert cursor.executed[-1].startswith('DROP TEMPORARY TABLE')
@@ -0,0 +1,130 @@
+"""
+Tests for the inventory change outbox and event bus (no database required)
+"""
+import sys
+import os
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.events import EventBus, InventoryEvent, events_since
+
+
+class FakeCursor:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+        self.lastrowid = 0
+
+    def execute(self, sql, params=()):
+        self.executed.append((' '.join(sql.split()), params))
+        self.lastrowid += 1
+
+    def executemany(self, sql, rows):
+        self.executed.append((' '.join(sql.split()), rows))
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_events_are_delivered_only_after_publish():
+    bus = EventBus()
+    seen, moves = [], []
+    bus.subscribe(seen.append)
+    bus.subscribe(moves.append, actions=['moved'])
+    cursor = FakeCursor()
+    event = bus.record(cursor, 'moved', 'Laptop', {'location': 'HQ'}, 'alice')
+    bus.record_many(cursor, 'checkout', [('Mouse', {'quantity': 3}), ('Cable', None)])
+    assert seen == [] and event.id == 1
+    sql, params = cursor.executed[0]
+    assert sql.startswith('INSERT INTO inventory_events') and params == ('moved', 'Laptop', '{"location": "HQ"}', 'alice')
+    assert cursor.executed[1][1] == [('checkout', 'Mouse', '{"quantity": 3}', None), ('checkout', 'Cable', None, None)]
+
+    assert bus.publish() == 3
+    assert len(seen) == 1 and [e.asset_name for e in seen[0]] == ['Laptop', 'Mouse', 'Cable']
+    assert moves == [[event]]
+    assert bus.publish() == 0
+
+
+def test_rolled_back_events_are_discarded():
+    bus = EventBus()
+    seen = []
+    bus.subscribe(seen.append)
+    bus.record(FakeCursor(), 'deleted', 'Laptop')
+    bus.discard()
+    assert bus.publish() == 0 and seen == []
+    with pytest.raises(ValueError):
+        bus.record(FakeCursor(), 'teleported', 'Laptop')
+
+
+def test_pending_events_are_per_thread():
+    bus = EventBus()
+    seen = []
+    bus.subscribe(lambda events: seen.extend(e.asset_name for e in events))
+    bus.record(FakeCursor(), 'updated', 'Mine')
+    worker = threading.Thread(target=lambda: (bus.record(FakeCursor(), 'updated', 'Theirs'), bus.publish()))
+    worker.start()
+    worker.join()
+    assert seen == ['Theirs']
+    bus.publish()
+    assert seen == ['Theirs', 'Mine']
+
+
+def test_failing_subscriber_does_not_stop_the_others(capsys):
+    bus = EventBus()
+    seen = []
+
+    def broken(events):
+        raise RuntimeError('boom')
+
+    bus.subscribe(broken)
+    bus.subscribe(seen.append)
+    bus.record(FakeCursor(), 'created', 'Laptop')
+    bus.publish()
+    assert len(seen) == 1 and 'broken failed: boom' in capsys.readouterr().out
+    bus.unsubscribe(broken)
+    bus.record(FakeCursor(), 'created', 'Mouse')
+    bus.publish()
+    assert capsys.readouterr().out == ''
+
+
+def test_events_since_reads_the_outbox_in_order():
+    cursor = FakeCursor([(7, 'checkin', 'Laptop', '{"quantity": 4}', 'bob', None)])
+    assert events_since(cursor, after_id=6, limit=10, asset_name='Laptop') == [
+        InventoryEvent(7, 'checkin', 'Laptop', {'quantity': 4}, 'bob', None)]
+    sql, params = cursor.executed[0]
+    assert sql.endswith('AND asset_name = %s ORDER BY id LIMIT %s') and params == [6, 5, 'Laptop', 10]
+
+
+class OutboxCursor:
+    """inventory_events as another connection sees it: only committed rows, server clock in seconds"""
+
+    def __init__(self):
+        self.now = 0
+        self.rows = {}  # id -> [created_at, committed]
+
+    def insert(self, event_id, committed=False):
+        self.rows[event_id] = [self.now, committed]
+
+    def execute(self, sql, params):
+        assert 'created_at < NOW() - INTERVAL %s SECOND' in sql
+        after, settle, limit = params
+        self.result = [(i, 'checkout', 'Laptop', None, None, None) for i, (created, committed)
+                       in sorted(self.rows.items()) if committed and i > after and created < self.now - settle][:limit]
+
+    def fetchall(self):
+        return self.result
+
+
+def test_an_id_committed_out_of_order_is_not_skipped():
+    outbox = OutboxCursor()
+    outbox.insert(10)                  # T1 records its event but has not committed
+    outbox.now = 1
+    outbox.insert(11, committed=True)  # T2 records and commits first
+    outbox.now = 2
+    assert events_since(outbox, after_id=9) == []  # 11 is too young to hand out past 10
+    outbox.rows[10][1] = True           # T1 commits
+    outbox.now = 7
+    assert [e.id for e in events_since(outbox, after_id=9)] == [10, 11]
@@ -0,0 +1,110 @@
+"""
+Tests for the date-ordered expiry index
+"""
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.asset import AssetRecord
+from utils.expiry_index import ExpiryIndex, end_of_life, parse_date
+
+TODAY = date(2024, 6, 15)
+
+
+def make_inventory():
+    return {
+        'Laptop': AssetRecord(purchase_date='2021-06-01', useful_life_years=3),
+        'Printer': AssetRecord(purchase_date=date(2019, 6, 20), useful_life_years=5),
+        'Server': AssetRecord(purchase_date='2020-01-01', useful_life_years=5),
+        'Desk': AssetRecord(useful_life_years=10),
+    }
+
+
+def names(entries):
+    return [e['asset'] for e in entries]
+
+
+def test_parse_date_accepts_common_forms():
+    assert parse_date('2024-06-01') == date(2024, 6, 1)
+    assert parse_date('01/06/2024') == date(2024, 6, 1)
+    assert parse_date('') is None
+    assert parse_date('soon') is None
+    assert end_of_life({'purchase_date': '2020-02-29', 'useful_life_years': 5}) == date(2025, 2, 28)
+    assert end_of_life({'purchase_date': '2020-01-01', 'useful_life_years': None}) is None
+
+
+def test_expired_and_expiring_are_range_lookups():
+    index = ExpiryIndex(make_inventory())
+    assert names(index.expired('end_of_life', TODAY)) == ['Laptop']
+    assert names(index.expiring('end_of_life', 30, TODAY)) == ['Printer']
+    assert names(index.between('end_of_life', date(2024, 6, 1), date(2024, 6, 20))) == ['Laptop', 'Printer']
+    assert len(index) == 3
+
+
+def test_edits_update_incrementally():
+    inventory = make_inventory()
+    index = ExpiryIndex(inventory)
+    index.expired('end_of_life', TODAY)
+    inventory['Laptop']['useful_life_years'] = 4
+    inventory['Laptop']['purchase_date'] = '2020-07-01'
+    index.asset_changed('Laptop')
+    inventory['Desk']['purchase_date'] = '2014-01-01'
+    index.asset_changed('Desk')
+    del inventory['Printer']
+    index.asset_changed('Printer')
+    assert names(index.expired('end_of_life', TODAY)) == ['Desk']
+    assert names(index.expiring('end_of_life', 30, TODAY)) == ['Laptop']
+
+
+def test_schedule_entries_sit_beside_inventory_entries():
+    index = ExpiryIndex(make_inventory())
+    index.set('lease', 'asset_leases:7', '2024-06-30', 'Office')
+    index.set('warranty', 'asset_warranties:3', '2024-06-16', 'Laptop')
+    index.set('warranty', 'asset_warranties:4', '2023-01-01', 'Laptop')
+    assert names(index.expiring('lease', 30, TODAY)) == ['Office']
+    assert names(index.expiring('warranty', 30, TODAY)) == ['Laptop']
+    assert index.next_for_asset('warranty', 'Laptop', TODAY) == date(2024, 6, 16)
+    index.remove('warranty', 'asset_warranties:3')
+    assert index.next_for_asset('warranty', 'Laptop', TODAY) == date(2023, 1, 1)
+    index.remove('lease', 'asset_leases:7')
+    assert index.expiring('lease', 30, TODAY) == []
+
+
+class ScheduleCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchone(self):
+        return (1,)  # every schedule table exists
+
+    def fetchall(self):
+        return self.rows if 'asset_warranties' in self.sql else []
+
+
+def test_schedules_are_reloaded_after_the_ttl(monkeypatch):
+    from utils import expiry_index
+    clock = [1000.0]
+    monkeypatch.setattr(expiry_index.time, 'monotonic', lambda: clock[0])
+    index = ExpiryIndex({})
+    rows = [(1, 'Laptop', '2024-06-20')]
+    loads = []
+    index.refresh_schedules_every(60, lambda: loads.append(index.load_schedules(ScheduleCursor(list(rows)))))
+    assert names(index.expiring('warranty', 30, TODAY)) == ['Laptop'] and len(loads) == 1
+
+    rows.append((2, 'Server', '2024-06-25'))
+    clock[0] += 30
+    assert names(index.expiring('warranty', 30, TODAY)) == ['Laptop']
+    clock[0] += 31
+    assert names(index.expiring('warranty', 30, TODAY)) == ['Laptop', 'Server'] and len(loads) == 2
+
+    def broken():
+        raise RuntimeError('database down')
+    index.refresh_schedules_every(60, broken)
+    clock[0] += 61
+    assert names(index.expiring('warranty', 30, TODAY)) == ['Laptop', 'Server']
+    assert index._schedules_loaded_at == clock[0]
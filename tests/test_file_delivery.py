@@ -0,0 +1,111 @@
+"""
+Tests for upload delivery: ETags, conditional and Range requests, X-Accel/X-Sendfile
+"""
+import sys
+import os
+import hashlib
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.file_delivery import content_disposition, send_upload
+
+PDF = b'%PDF-1.4 ' + bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / 'apo').mkdir()
+    (tmp_path / 'apo' / '20240101_quote.pdf').write_bytes(PDF)
+    digest = hashlib.sha256(PDF).hexdigest()
+    blob = tmp_path / 'blobs' / digest[:2]
+    blob.mkdir(parents=True)
+    (blob / digest).write_bytes(PDF)
+
+    app = Flask(__name__)
+
+    @app.route('/files/<mode>/<path:name>')
+    def serve(mode, name):
+        return send_upload(str(tmp_path), name, download_name='quote.pdf', mode=mode,
+                           accel_prefix='/protected-uploads/')
+
+    return app.test_client()
+
+
+def test_strong_etag_and_conditional_get(client):
+    first = client.get('/files/flask/apo/20240101_quote.pdf')
+    assert first.status_code == 200 and first.data == PDF
+    assert first.headers['ETag'] == f'"{hashlib.sha256(PDF).hexdigest()}"'
+    assert 'private' in first.headers['Cache-Control'] and 'no-cache' in first.headers['Cache-Control']
+    again = client.get('/files/flask/apo/20240101_quote.pdf', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.data == b''
+
+
+def test_range_requests_return_partial_content(client):
+    response = client.get('/files/flask/apo/20240101_quote.pdf', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == PDF[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(PDF)}'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+
+def test_blobs_are_cached_as_immutable(client):
+    digest = hashlib.sha256(PDF).hexdigest()
+    response = client.get(f'/files/flask/blobs/{digest[:2]}/{digest}')
+    assert response.headers['ETag'] == f'"{digest}"'
+    assert 'immutable' in response.headers['Cache-Control'] and 'public' not in response.headers['Cache-Control']
+
+
+def test_web_server_modes_send_headers_only(client):
+    accel = client.get('/files/x-accel/apo/20240101_quote.pdf')
+    assert accel.status_code == 200 and accel.data == b''
+    assert accel.headers['X-Accel-Redirect'] == '/protected-uploads/apo/20240101_quote.pdf'
+    assert accel.headers['Content-Type'] == 'application/pdf'
+    assert accel.headers['Content-Disposition'] == 'inline; filename="quote.pdf"'
+    cached = client.get('/files/x-accel/apo/20240101_quote.pdf', headers={'If-None-Match': accel.headers['ETag']})
+    assert cached.status_code == 304 and 'X-Accel-Redirect' not in cached.headers
+    sendfile = client.get('/files/x-sendfile/apo/20240101_quote.pdf')
+    assert sendfile.headers['X-Sendfile'].endswith(os.path.join('apo', '20240101_quote.pdf'))
+
+
+def test_paths_outside_the_upload_root_are_not_served(client):
+    assert client.get('/files/flask/../secret.txt').status_code == 404
+    assert client.get('/files/flask/apo/missing.pdf').status_code == 404
+
+
+def test_non_ascii_download_names():
+    assert content_disposition('Überweisung.pdf', True) == \
+        "attachment; filename=\"berweisung.pdf\"; filename*=UTF-8''%C3%9Cberweisung.pdf"
+
+
+@pytest.fixture
+def upload_root(tmp_path):
+    (tmp_path / 'apo').mkdir()
+    (tmp_path / 'apo' / 'quote.pdf').write_bytes(PDF)
+    (tmp_path / 'apo' / 'invoice.pdf').write_bytes(b'<html><script>alert(document.cookie)</script></html>')
+    (tmp_path / 'apo' / 'prices.csv').write_bytes(b'name,price\nLaptop,900\n')
+    return tmp_path
+
+
+@pytest.mark.parametrize('mode', ['flask', 'x-accel', 'x-sendfile'])
+def test_content_type_is_sniffed_not_taken_from_the_upload(upload_root, mode):
+    app = Flask(__name__)
+
+    @app.route('/files/<path:name>')
+    def serve(name):
+        return send_upload(str(upload_root), name, download_name=os.path.basename(name), mode=mode)
+
+    client = app.test_client()
+    pdf = client.get('/files/apo/quote.pdf')
+    assert pdf.headers['Content-Type'] == 'application/pdf'
+    assert pdf.headers['Content-Disposition'].startswith('inline')
+    assert pdf.headers['X-Content-Type-Options'] == 'nosniff'
+    html = client.get('/files/apo/invoice.pdf')
+    assert html.headers['Content-Type'] == 'application/octet-stream'
+    assert html.headers['Content-Disposition'].startswith('attachment')
+    assert html.headers['X-Content-Type-Options'] == 'nosniff'
+    csv = client.get('/files/apo/prices.csv')
+    assert csv.headers['Content-Type'].startswith('text/csv')
+    assert csv.headers['Content-Disposition'].startswith('attachment')
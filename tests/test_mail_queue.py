@@ -0,0 +1,83 @@
+"""
+Tests for the outbound mail queue (SQLite spool + pooled SMTP), using an in-process SMTP stand-in
+"""
+import sys
+import os
+import smtplib
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.mail_queue import MailSpool, SMTPPool, MailQueue, backoff_delay
+
+
+class FakeSMTP:
+    """Records sessions and messages; ``fail`` holds exceptions to raise on the next sends"""
+    sessions = []
+    delivered = []
+    fail = []
+
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        FakeSMTP.sessions.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.logins += 1
+
+    def noop(self):
+        return (250, b'OK')
+
+    def send_message(self, msg):
+        if FakeSMTP.fail:
+            raise FakeSMTP.fail.pop(0)
+        FakeSMTP.delivered.append((msg['To'], msg['Subject']))
+
+    def quit(self):
+        pass
+
+
+def make_queue(tmp_path, **kwargs):
+    FakeSMTP.sessions, FakeSMTP.delivered, FakeSMTP.fail = [], [], []
+    pool = SMTPPool('smtp.test', 587, 'sender@test', 'secret', size=1, smtp_factory=FakeSMTP)
+    return MailQueue(MailSpool(str(tmp_path / 'spool.sqlite3')), pool, 'sender@test', **kwargs)
+
+
+def test_backoff_grows_and_caps():
+    assert [backoff_delay(n, 10, 100) for n in (1, 2, 3, 4, 5)] == [10, 20, 40, 80, 100]
+
+
+def test_batch_reuses_one_smtp_session(tmp_path):
+    mq = make_queue(tmp_path)
+    for i in range(5):
+        mq.send(f'user{i}@test', f'Subject {i}', 'Body')
+    assert mq.process_once() == {'sent': 5, 'retry': 0, 'failed': 0}
+    assert len(FakeSMTP.delivered) == 5
+    assert len(FakeSMTP.sessions) == 1 and FakeSMTP.sessions[0].logins == 1
+    assert mq.spool.counts()['sent'] == 5
+
+
+def test_transient_failure_is_retried_after_backoff(tmp_path):
+    mq = make_queue(tmp_path, base_delay=60)
+    mq.send('user@test', 'Hello', 'Body')
+    FakeSMTP.fail = [smtplib.SMTPServerDisconnected('gone')]
+    now = time.time() + 1
+    assert mq.process_once(now=now)['retry'] == 1
+    # Not due again until the backoff elapses; the broken session was discarded
+    assert mq.process_once(now=now + 30)['sent'] == 0
+    assert mq.process_once(now=now + 61)['sent'] == 1
+    assert len(FakeSMTP.sessions) == 2
+
+
+def test_permanent_failure_and_attempt_limit(tmp_path):
+    mq = make_queue(tmp_path, max_attempts=2, base_delay=0)
+    mq.send('bad@test', 'Refused', 'Body')
+    mq.send('flaky@test', 'Flaky', 'Body')
+    FakeSMTP.fail = [smtplib.SMTPRecipientsRefused({'bad@test': (550, b'no such user')}),
+                     smtplib.SMTPServerDisconnected('gone'), smtplib.SMTPServerDisconnected('gone')]
+    mq.process_once()
+    mq.process_once()
+    counts = mq.spool.counts()
+    assert counts['failed'] == 2 and counts['pending'] == 0
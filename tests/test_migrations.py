@@ -0,0 +1,105 @@
+"""
+Tests for the versioned migration runner (no database required)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from db.migrate import discover_migrations, split_sql, MigrationRunner
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._result = []
+
+    def execute(self, sql, params=()):
+        self.conn.statements.append(' '.join(sql.split()))
+        if 'INFORMATION_SCHEMA.TABLES' in sql:
+            self._result = [(1 if self.conn.has_version_table else 0,)]
+        elif sql.strip().startswith('SELECT version'):
+            self._result = [(v, 'x', 'y', None) for v in self.conn.applied]
+        elif sql.strip().startswith('INSERT INTO schema_migrations'):
+            self.conn.applied.append(params[0])
+        elif 'CREATE TABLE IF NOT EXISTS schema_migrations' in sql:
+            self.conn.has_version_table = True
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.applied = []
+        self.has_version_table = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_shipped_migrations_are_ordered_and_unique():
+    migrations = discover_migrations()
+    versions = [m.version for m in migrations]
+    assert versions == sorted(versions)
+    assert versions[0] == 1
+    assert len(set(versions)) == len(versions)
+
+
+def test_split_sql_drops_comments_and_handles_multiline():
+    script = """
+    -- comment; with a semicolon
+    UPDATE t SET a = 1;
+
+    ALTER TABLE t
+        MODIFY COLUMN a INT;
+    """
+    statements = split_sql(script)
+    assert len(statements) == 2
+    assert statements[0] == 'UPDATE t SET a = 1'
+    assert statements[1].startswith('ALTER TABLE t')
+    assert not statements[1].endswith(';')
+
+
+def test_upgrade_applies_only_pending(tmp_path):
+    (tmp_path / '0001_first.sql').write_text('CREATE TABLE a (id INT);\n')
+    (tmp_path / '0002_second.sql').write_text('CREATE TABLE b (id INT);\n')
+    (tmp_path / 'README.txt').write_text('ignored')
+    conn = FakeConnection()
+    runner = MigrationRunner(conn, migrations_dir=str(tmp_path))
+
+    applied = runner.upgrade(target=1)
+    assert [m.version for m in applied] == [1]
+    applied = runner.upgrade()
+    assert [m.version for m in applied] == [2]
+    assert runner.upgrade() == []
+    assert sum('CREATE TABLE a' in s for s in conn.statements) == 1
+
+
+def test_partition_month_arithmetic():
+    from datetime import date
+    from db.transaction_archive import (add_months, month_range, partition_name, partition_month,
+                                        partition_definition, archive_cutoff)
+
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert month_range(date(2023, 11, 15), date(2024, 2, 1)) == [
+        date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)]
+    assert partition_name(date(2024, 3, 1)) == 'p202403'
+    assert partition_month('p202403') == date(2024, 3, 1)
+    assert partition_month('pmax') is None
+    assert "UNIX_TIMESTAMP('2024-04-01 00:00:00')" in partition_definition(date(2024, 3, 1))
+    assert archive_cutoff(24, today=date(2024, 6, 17)) == date(2022, 6, 1)
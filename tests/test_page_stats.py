@@ -0,0 +1,50 @@
+"""
+Tests for the single-query page statistics (no database required)
+"""
+import sys
+import os
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import page_stats
+from utils.page_stats import cached_stats, invalidate_stats
+
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, list(params)))
+
+    def fetchone(self):
+        return self.row
+
+
+def test_employee_stats_and_filtered_count_in_one_query():
+    invalidate_stats()
+    cursor = FakeCursor({'stat_0': Decimal('7'), 'stat_1': 10, 'stat_2': 3, 'stat_3': Decimal('5000.00'),
+                         'stat_4': Decimal('4')})
+    stats = cached_stats(cursor, 'employees', 'e.department_id = %s', ['2'], alias='e')
+    assert stats == {'active_count': 7, 'total_count': 10, 'dept_with_employees': 3,
+                     'total_salary': Decimal('5000.00'), 'matched': 4}
+    assert len(cursor.executed) == 1
+    sql, params = cursor.executed[0]
+    assert sql.endswith('FROM employees e') and 'SUM(e.department_id = %s)' in sql
+    assert params == ['2']
+
+
+def test_stats_are_cached_per_filter_set_until_invalidated():
+    invalidate_stats()
+    cursor = FakeCursor((1, 2, Decimal('100'), 1))
+    cached_stats(cursor, 'departments')
+    cached_stats(cursor, 'departments')
+    assert len(cursor.executed) == 1
+    cached_stats(cursor, 'employees', 'e.is_active = TRUE', alias='e')
+    assert len(cursor.executed) == 2
+    invalidate_stats('departments')
+    cached_stats(cursor, 'departments')
+    assert len(cursor.executed) == 3
+    assert ('employees', 'e', 'e.is_active = TRUE', ()) in page_stats._cache
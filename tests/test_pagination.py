@@ -0,0 +1,152 @@
+"""
+Tests for keyset pagination helpers and the transaction history query
+"""
+import sys
+import os
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.pagination import encode_cursor, decode_cursor, seek_clause, clamp_limit
+from utils.transactions import (parse_transaction_filters, fetch_transaction_page,
+                                invalidate_archive_watermark, tables_for_range)
+
+
+class FakeCursor:
+    """Evaluates the report query against in-memory hot and archive rows"""
+
+    def __init__(self, rows, archive_rows=(), watermark=None):
+        self.rows = rows
+        self.archive_rows = list(archive_rows)
+        self.watermark = watermark
+        self.tables = []
+        self.result = []
+        self.last_sql = None
+        self.last_params = None
+        invalidate_archive_watermark()
+
+    def fetchone(self):
+        return self.result[0]
+
+    def execute(self, sql, params=()):
+        if 'transaction_archive_log' in sql:
+            self.result = [(self.watermark,)]
+            return
+        self.last_sql = sql
+        self.last_params = list(params)
+        archive = 'asset_transactions_archive' in sql
+        self.tables.append('archive' if archive else 'hot')
+        limit = params[-1]
+        ascending = 'ASC' in sql
+        source = self.archive_rows if archive else self.rows
+        rows = sorted(source, key=lambda r: (r[8], r[0]), reverse=not ascending)
+        if 'OR (t.created_at = %s AND t.id' in sql:
+            ts, _, row_id = params[-4:-1]
+            if ascending:
+                rows = [r for r in rows if (r[8], r[0]) > (ts, row_id)]
+            else:
+                rows = [r for r in rows if (r[8], r[0]) < (ts, row_id)]
+        self.result = rows[:limit]
+
+    def fetchall(self):
+        return list(self.result)
+
+
+def make_rows(count):
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    # Pairs of rows share a timestamp so the id tie-breaker matters
+    return [(i, f'Asset {i}', 'checkout', 1, None, None, None, 'admin', base + timedelta(minutes=i // 2))
+            for i in range(1, count + 1)]
+
+
+def test_cursor_round_trip():
+    values = [datetime(2024, 5, 6, 7, 8, 9), 42]
+    token = encode_cursor(values)
+    assert '=' not in token
+    assert decode_cursor(token, 2) == values
+
+
+def test_decode_cursor_rejects_garbage():
+    assert decode_cursor(None, 2) is None
+    assert decode_cursor('not-a-cursor', 2) is None
+    assert decode_cursor(encode_cursor([1, 2, 3]), 2) is None
+
+
+def test_seek_clause_expands_columns():
+    sql, params = seek_clause(('a', 'b'), [1, 2])
+    assert sql == '(a < %s OR (a = %s AND b < %s))'
+    assert params == [1, 1, 2]
+    sql, _ = seek_clause(('a', 'b'), [1, 2], descending=False)
+    assert '>' in sql and '<' not in sql
+
+
+def test_clamp_limit():
+    assert clamp_limit(None) == 50
+    assert clamp_limit('10') == 10
+    assert clamp_limit(0) == 1
+    assert clamp_limit(100000) == 500
+
+
+def test_parse_filters_ignores_blank_and_bad_dates():
+    filters = parse_transaction_filters({'action': 'CheckOut', 'asset': ' ', 'date_from': '2024-02-30',
+                                         'date_to': '2024-03-01'})
+    assert filters == {'action': 'checkout', 'date_to': date(2024, 3, 1)}
+
+
+def test_pages_walk_forward_and_back_without_gaps():
+    cursor = FakeCursor(make_rows(25))
+    seen = []
+    page = fetch_transaction_page(cursor, {}, limit=10)
+    assert page['prev_cursor'] is None
+    pages = [page]
+    while page['next_cursor']:
+        page = fetch_transaction_page(cursor, {}, after=page['next_cursor'], limit=10)
+        pages.append(page)
+    for p in pages:
+        seen.extend(t['id'] for t in p['transactions'])
+    assert seen == list(range(25, 0, -1))
+    assert [len(p['transactions']) for p in pages] == [10, 10, 5]
+
+    back = fetch_transaction_page(cursor, {}, before=pages[2]['prev_cursor'], limit=10)
+    assert [t['id'] for t in back['transactions']] == [t['id'] for t in pages[1]['transactions']]
+    assert back['next_cursor'] is not None
+    first = fetch_transaction_page(cursor, {}, before=back['prev_cursor'], limit=10)
+    assert [t['id'] for t in first['transactions']] == list(range(25, 15, -1))
+    assert first['prev_cursor'] is None
+
+
+def test_filters_become_bound_parameters():
+    cursor = FakeCursor([])
+    fetch_transaction_page(cursor, {'action': 'checkin', 'department': 'IT', 'date_to': date(2024, 1, 31)})
+    assert 't.action = %s' in cursor.last_sql
+    assert 't.department = %s' in cursor.last_sql
+    assert cursor.last_params[:3] == ['checkin', 'IT', datetime(2024, 2, 1)]
+
+
+def test_archive_only_read_when_range_needs_it():
+    watermark = datetime(2024, 1, 1)
+    assert tables_for_range({}, None) == ['asset_transactions']
+    assert tables_for_range({'date_from': date(2024, 3, 1)}, watermark) == ['asset_transactions']
+    assert tables_for_range({'date_to': date(2023, 12, 30)}, watermark) == ['asset_transactions_archive']
+    assert tables_for_range({}, watermark) == ['asset_transactions', 'asset_transactions_archive']
+
+
+def test_pages_spill_from_hot_into_archive():
+    rows = make_rows(30)
+    watermark = rows[14][8] + timedelta(seconds=30)
+    hot = [r for r in rows if r[8] >= watermark]
+    archived = [r for r in rows if r[8] < watermark]
+    cursor = FakeCursor(hot, archived, watermark)
+
+    page = fetch_transaction_page(cursor, {}, limit=10)
+    assert cursor.tables == ['hot']
+    ids = [t['id'] for t in page['transactions']]
+    while page['next_cursor']:
+        page = fetch_transaction_page(cursor, {}, after=page['next_cursor'], limit=10)
+        ids.extend(t['id'] for t in page['transactions'])
+    assert ids == list(range(30, 0, -1))
+    # Second page straddles the watermark, third page is archive only
+    assert cursor.tables == ['hot', 'hot', 'archive', 'archive']
+
+    back = fetch_transaction_page(cursor, {}, before=page['prev_cursor'], limit=10)
+    assert [t['id'] for t in back['transactions']] == list(range(20, 10, -1))
@@ -0,0 +1,92 @@
+"""
+Tests for the employee/customer search query builder (no database required)
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import people_search
+from utils.people_search import query_words, search, search_clause, text_grams, word_grams
+
+
+class FakeCursor:
+    def __init__(self, log, rows):
+        self.log = log
+        self.rows = rows
+
+    def execute(self, sql, params=()):
+        self.log.append((sql, list(params)))
+
+    def fetchone(self):
+        return {'total': len(self.rows)}
+
+    def fetchall(self):
+        return [dict(r) for r in self.rows]
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, rows=()):
+        self.log = []
+        self.rows = list(rows)
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.log, self.rows)
+
+
+def ngram_match(row_values, query):
+    """What the trigram candidate query selects for one row"""
+    grams = text_grams(row_values)
+    return all(set(word_grams(w)[0]) <= grams for w in query_words(query))
+
+
+def test_query_words_are_distinct_and_folded():
+    assert query_words('Jane  SMITH jane@acme.com') == ['jane', 'smith', 'acme', 'com']
+    assert query_words('  ') == []
+
+
+def test_trigrams_match_substrings_and_short_prefixes():
+    row = ('EMP-0042', 'Jonathan', 'Smith', 'jon@acme.com', 'Engineer')
+    assert ngram_match(row, 'nath')
+    assert ngram_match(row, 'jo smi')
+    assert ngram_match(row, 'E')
+    assert not ngram_match(row, 'th smith')   # "th" is not the start of a word
+    assert not ngram_match(row, 'nurse')
+
+
+def test_fulltext_clause_uses_boolean_prefix_terms():
+    clause = search_clause(None, 'employees', 'Jane sm', alias='e', backend='fulltext')
+    assert 'MATCH(e.employee_id, e.first_name, e.last_name, e.email, e.position)' in clause.where
+    assert clause.params == ['+jane*', '(^|[^[:alnum:]_])sm']
+    assert clause.where.endswith('REGEXP %s') and 'LIKE' not in clause.where
+    assert clause.rank.startswith('MATCH(') and clause.rank_params == ['+jane*']
+    # Without an indexable word there is nothing to narrow: no results rather than a table scan
+    assert search_clause(None, 'employees', 'j sm', backend='fulltext') == ('1 = 0', [], '0', [])
+    assert search_clause(None, 'employees', '  ', backend='fulltext') is None
+
+
+def test_ngram_clause_requires_every_word_and_ranks_by_grams():
+    clause = search_clause(None, 'customers', 'acme', alias='c', backend='ngram')
+    assert clause.params == ['customers', 'acm', 'cme', 2, '%acme%']
+    assert clause.rank_params == ['customers', 'acm', 'cme', '  a', ' ac']
+    assert 'c.id IN (SELECT entity_id FROM search_ngrams' in clause.where
+
+
+def test_search_pages_and_filters():
+    people_search._backends['employees'] = 'fulltext'
+    try:
+        conn = FakeConn([{'id': 1, 'first_name': 'Jane', 'relevance': 1.23456}] * 3)
+        result = search(conn, 'employees', 'jane', page=5, per_page=2, filters={'is_active': True},
+                        fields=('id', 'first_name'))
+    finally:
+        people_search.reset_backends()
+    assert result['pages'] == 2 and result['page'] == 2 and result['total'] == 3
+    assert result['results'][0]['relevance'] == 1.2346
+    count_sql, count_params = conn.log[0]
+    assert count_sql.startswith('SELECT COUNT(*)') and count_params == [True, '+jane*']
+    page_sql, page_params = conn.log[1]
+    assert 'ORDER BY relevance DESC, t.last_name, t.first_name, t.id' in page_sql
+    assert page_params == ['+jane*', True, '+jane*', 2, 2]
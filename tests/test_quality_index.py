@@ -0,0 +1,74 @@
+"""
+Tests for the incrementally maintained data quality index
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.data_quality import DataQualityCleaner
+from utils.quality_index import QualityIndex
+
+
+def asset(**fields):
+    record = {'category': 'Laptop', 'supplier': 'HP', 'location': 'HQ',
+              'purchase_date': '2023-01-01', 'price': 900}
+    record.update(fields)
+    return record
+
+
+def make_inventory():
+    inventory = {f'Asset {i:03d}': asset() for i in range(60)}
+    inventory['Asset 007'] = asset(category='Uncategorized', price=0)
+    inventory['Asset 042'] = asset(location='', purchase_date=None)
+    return inventory
+
+
+def full_report(inventory):
+    return DataQualityCleaner.generate_data_quality_report(
+        [dict(record, name=name) for name, record in inventory.items()])
+
+
+def test_report_matches_full_scan_through_changes():
+    inventory = make_inventory()
+    index = QualityIndex(inventory)
+    assert index.report() == full_report(inventory)
+    assert index.report()['issues']['total_issues'] == 4
+
+    inventory['Asset 007']['price'] = 1200
+    index.asset_changed('Asset 007')
+    inventory['New'] = asset(supplier='Unknown Supplier')
+    index.asset_changed('New')
+    del inventory['Asset 042']
+    index.asset_changed('Asset 042')
+    assert index.report() == full_report(inventory)
+    assert index.counts() == {'missing_categories': 1, 'missing_suppliers': 1, 'missing_locations': 0,
+                              'missing_dates': 0, 'zero_prices': 0}
+
+    inventory.clear()
+    inventory.update({'Solo': asset(price=None)})
+    index.asset_changed()
+    assert index.report() == full_report(inventory)
+
+
+def test_problems_page_through_every_offender():
+    inventory = {f'Asset {i:03d}': asset(location=None) for i in range(45)}
+    inventory['Clean'] = asset()
+    inventory['Zero'] = asset(price='0')
+    index = QualityIndex(inventory)
+
+    first = index.problems(page=1, per_page=20)
+    assert first['total'] == 46 and first['pages'] == 3
+    assert first['items'][0] == {'name': 'Asset 000', 'issues': ['Missing location']}
+    last = index.problems(page=9, per_page=20)
+    assert last['page'] == 3 and [item['name'] for item in last['items']][-1] == 'Zero'
+
+    zero = index.problems(issue='zero_prices')
+    assert [item['name'] for item in zero['items']] == ['Zero']
+    inventory['Zero']['price'] = 10
+    index.asset_changed('Zero')
+    assert index.problems(issue='zero_prices')['total'] == 0
+    with pytest.raises(ValueError):
+        index.problems(issue='bogus')
@@ -0,0 +1,174 @@
+"""
+Tests for relative, conditional quantity updates (two workers on one SQLite database)
+"""
+import sys
+import os
+import sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from AssetManagement import BulkTransactionError, InventorySystem
+
+
+class SqliteCursor:
+    """mysql.connector-style cursor over SQLite (%s placeholders, GREATEST)"""
+
+    def __init__(self, db):
+        self._cursor = db.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?').replace('GREATEST(', 'MAX('), params)
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(sql.replace('%s', '?'), rows)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+
+def make_worker(path):
+    db = sqlite3.connect(path)
+    system = InventorySystem.__new__(InventorySystem)
+    system.inventory = {}
+    from utils.asset_index import AssetIndex
+    from utils.expiry_index import ExpiryIndex
+    from utils.search_index import SearchIndex
+    from utils.quality_index import QualityIndex
+    from utils.duplicates import DuplicateIndex
+    from utils.events import CACHE_ACTIONS, EventBus
+    system.asset_index = AssetIndex(system.inventory)
+    system.expiry_index = ExpiryIndex(system.inventory)
+    system.search_index = SearchIndex(system.inventory)
+    system.quality_index = QualityIndex(system.inventory)
+    system.duplicate_index = DuplicateIndex(system.inventory)
+    system.events = EventBus()
+    system.events.subscribe(system._apply_events, actions=CACHE_ACTIONS)
+    system.conn = db
+    system.cursor = SqliteCursor(db)
+    system.email_config = {}
+    system._load_inventory()
+    return system
+
+
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / 'inventory.db')
+    db = sqlite3.connect(path)
+    db.execute("""CREATE TABLE inventory (name TEXT PRIMARY KEY, quantity INT, price REAL, description TEXT,
+                  low_stock_threshold INT, category TEXT, supplier TEXT, department TEXT, funding_source TEXT,
+                  location TEXT, model TEXT, brand TEXT, serial_number TEXT, purchase_date TEXT,
+                  depreciation_method TEXT, useful_life_years INT, salvage_value REAL, version INT DEFAULT 0,
+                  deleted_at TEXT)""")
+    db.execute("""CREATE TABLE asset_transactions (asset_name TEXT, action TEXT, quantity INT, person TEXT,
+                  department TEXT, location TEXT, notes TEXT, username TEXT, user_id TEXT)""")
+    db.execute("""CREATE TABLE inventory_events (id INTEGER PRIMARY KEY AUTOINCREMENT, action TEXT, asset_name TEXT,
+                  changes TEXT, username TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP)""")
+    db.execute("INSERT INTO inventory (name, quantity, low_stock_threshold) VALUES ('Laptop', 5, 1)")
+    db.execute("INSERT INTO inventory (name, quantity, low_stock_threshold) VALUES ('Mouse', 10, 1)")
+    db.commit()
+    db.close()
+    return make_worker(path), make_worker(path), path
+
+
+def stored(path):
+    return sqlite3.connect(path).execute("SELECT quantity, version FROM inventory WHERE name = 'Laptop'").fetchone()
+
+
+def test_concurrent_checkouts_do_not_lose_updates(workers):
+    a, b, path = workers
+    a.checkout_item('Laptop', 2, username='alice')
+    # b still caches 5 units; its checkout applies to the stored 3
+    b.checkout_item('Laptop', 2, username='bob')
+    assert stored(path) == (1, 2)
+    assert b.inventory['Laptop']['quantity'] == 1 and b.inventory['Laptop']['version'] == 2
+    with pytest.raises(ValueError, match='Only 1 available'):
+        a.checkout_item('Laptop', 2)
+    assert a.inventory['Laptop']['quantity'] == 1  # reconciled from the row
+    assert stored(path) == (1, 2)
+    actions = sqlite3.connect(path).execute("SELECT action, quantity FROM asset_transactions").fetchall()
+    assert actions == [('checkout', 2), ('checkout', 2)]
+
+
+def test_checkin_dispose_and_update_are_relative(workers):
+    a, b, path = workers
+    a.checkin_item('Laptop', 3)
+    b.dispose_item('Laptop', 4, reason='Broken', disposal_method='Recycle')
+    assert stored(path)[0] == 4
+    with pytest.raises(ValueError, match='Insufficient quantity'):
+        a.dispose_item('Laptop', 10)
+    b.update_quantity('Laptop', -10)
+    assert stored(path)[0] == 0 and b.inventory['Laptop']['quantity'] == 0
+    a.update_quantity('Laptop', 2)
+    assert stored(path) == (2, 4)
+
+
+def test_bulk_checkout_is_all_or_nothing(workers):
+    a, b, path = workers
+    results = a.bulk_transaction('checkout', [('Laptop', 1), ('Mouse', 2), ('Laptop', 1)],
+                                 username='alice', person='new.hire')
+    assert results == {'Laptop': (2, 3), 'Mouse': (2, 8)}
+    assert a.inventory['Mouse']['quantity'] == 8
+
+    with pytest.raises(BulkTransactionError) as refused:
+        a.bulk_transaction('checkout', [('Laptop', 9), ('Keyboard', 1), ('Mouse', 0)])
+    assert refused.value.problems == ['Keyboard: item not found', 'Mouse: quantity must be a positive whole number',
+                                      'Laptop: only 3 available to checkout']
+
+    # b's cache still shows 5 laptops; the stored stock refuses the whole batch
+    with pytest.raises(BulkTransactionError, match='Laptop: only 3 available'):
+        b.bulk_transaction('checkout', [('Mouse', 1), ('Laptop', 4)])
+    assert stored(path)[0] == 3 and b.inventory['Laptop']['quantity'] == 3
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT quantity FROM inventory WHERE name = 'Mouse'").fetchone() == (8,)
+    assert db.execute("SELECT COUNT(*) FROM asset_transactions").fetchone() == (2,)
+
+    b.bulk_transaction('checkin', [('Laptop', 2), ('Mouse', 2)])
+    assert stored(path)[0] == 5
+    events = db.execute("SELECT action, asset_name FROM inventory_events ORDER BY id").fetchall()
+    assert events == [('checkout', 'Laptop'), ('checkout', 'Mouse'), ('checkin', 'Laptop'), ('checkin', 'Mouse')]
+
+
+def test_writes_are_published_after_commit(workers):
+    a, b, path = workers
+    seen = []
+    a.events.subscribe(lambda events: seen.extend((e.action, e.asset_name, e.changes.get('quantity')) for e in events))
+    a.checkout_item('Laptop', 2, username='alice')
+    assert seen == [('checkout', 'Laptop', 3)]
+    assert a.inventory['Laptop']['quantity'] == 3 and a.inventory['Laptop']['version'] == 1
+    # Refused changes write no event
+    try:
+        a.checkout_item('Laptop', 9)
+    except ValueError:
+        pass
+    assert len(seen) == 1
+    row = sqlite3.connect(path).execute("SELECT action, asset_name, changes, username FROM inventory_events").fetchone()
+    assert row == ('checkout', 'Laptop', '{"delta": -2, "quantity": 3, "version": 1}', 'alice')
+
+
+def test_adding_a_retired_name_is_refused(workers):
+    a, b, path = workers
+    db = sqlite3.connect(path)
+    db.execute("UPDATE inventory SET deleted_at = '2024-05-01 10:00:00' WHERE name = 'Mouse'")
+    db.commit()
+    c = make_worker(path)
+    assert 'Mouse' not in c.inventory
+    with pytest.raises(ValueError, match='retired on 2024-05-01'):
+        c.add_item('Mouse', 3)
+    with pytest.raises(ValueError, match='already exists'):
+        a.add_item('Laptop', 1)
+    c.add_item('Keyboard', 4, username='alice')
+    assert c.inventory['Keyboard']['quantity'] == 4
+    assert db.execute("SELECT quantity FROM inventory WHERE name = 'Keyboard'").fetchone() == (4,)
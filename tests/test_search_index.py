@@ -0,0 +1,59 @@
+"""
+Tests for the asset search index and prefix trie
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.search_index import PrefixTrie, SearchIndex, tokenize
+
+
+def make_inventory():
+    return {
+        'Dell Laptop 5420': {'serial_number': 'SN-1001', 'model': 'Latitude', 'brand': 'Dell',
+                             'category': 'Laptop', 'supplier': 'Acme', 'location': 'HQ'},
+        'HP Printer': {'serial_number': 'SN-2002', 'model': 'LaserJet', 'brand': 'HP',
+                       'category': 'Printer', 'supplier': 'Acme', 'location': 'Branch'},
+        'Laptop Bag': {'serial_number': None, 'model': None, 'brand': None,
+                       'category': 'Accessory', 'supplier': 'Lapco', 'location': 'HQ'},
+    }
+
+
+def test_tokenize_adds_joined_form_for_serials():
+    assert tokenize('SN-1001', joined=True) == ['sn', '1001', 'sn1001']
+    assert tokenize('Dell Laptop') == ['dell', 'laptop']
+    assert tokenize(None) == []
+
+
+def test_trie_prefix_and_discard():
+    trie = PrefixTrie()
+    for term in ('lap', 'laptop', 'laser', 'bag'):
+        trie.add(term)
+    assert trie.terms('la') == ['lap', 'laser', 'laptop']
+    trie.discard('laptop')
+    assert trie.terms('lapt') == []
+    assert trie.terms('lap') == ['lap']
+
+
+def test_search_ranks_name_matches_first_and_requires_all_words():
+    index = SearchIndex(make_inventory())
+    assert index.search('lap') == ['Laptop Bag', 'Dell Laptop 5420']
+    assert index.search('laptop hq') == ['Laptop Bag', 'Dell Laptop 5420']
+    assert index.search('dell hq') == ['Dell Laptop 5420']
+    assert index.search('sn2002') == ['HP Printer']
+    assert index.search('acme branch') == ['HP Printer']
+    assert index.search('nothing') == []
+
+
+def test_incremental_updates():
+    inventory = make_inventory()
+    index = SearchIndex(inventory)
+    assert index.search('projector') == []
+    inventory['Epson Projector'] = {'category': 'AV', 'location': 'HQ'}
+    index.asset_changed('Epson Projector')
+    assert index.search('proj') == ['Epson Projector']
+    del inventory['HP Printer']
+    index.asset_changed('HP Printer')
+    assert index.search('laserjet') == []
+    assert index.autocomplete('epson', limit=5)[0]['category'] == 'AV'
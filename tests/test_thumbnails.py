@@ -0,0 +1,89 @@
+"""
+Tests for gallery thumbnails and the gallery query (no database required)
+"""
+import sys
+import os
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import thumbnails
+from utils.blob_store import BlobStore
+from utils.gallery import fetch_gallery
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def png_bytes(size=(1200, 800), mode='RGBA'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 40, 40, 128) if mode == 'RGBA' else (200, 40, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def test_variants_are_cached_by_content_hash(tmp_path):
+    store = BlobStore(str(tmp_path))
+    sha256, _ = store.put_stream(io.BytesIO(png_bytes()))
+    assert thumbnails.generate_upload_variants(str(tmp_path), [{'sha256': sha256}]) == len(thumbnails.output_formats())
+    relative = thumbnails.ensure_variant(str(tmp_path), sha256, 'thumb', 'jpg')
+    assert relative == f'thumbs/thumb/{sha256[:2]}/{sha256}.jpg'
+    with Image.open(tmp_path / relative) as thumb:
+        assert thumb.format == 'JPEG' and thumb.mode == 'RGB'
+        assert thumb.size == (320, 213)
+    preview = thumbnails.ensure_variant(str(tmp_path), sha256, 'preview', 'jpg')
+    with Image.open(tmp_path / preview) as image:
+        assert image.size == (1200, 800)  # never scaled up
+    assert thumbnails.remove_variants(str(tmp_path), sha256) >= 2
+    assert not (tmp_path / relative).exists()
+
+
+def test_unrenderable_sources_are_marked_once(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    sha256, _ = store.put_stream(io.BytesIO(b'%PDF-1.4 not really a pdf'))
+    monkeypatch.setattr(thumbnails, 'HAVE_PYMUPDF', False)
+    monkeypatch.setattr(thumbnails.shutil, 'which', lambda name: None)
+    assert thumbnails.source_kind(store.path(sha256)) == 'pdf'
+    assert thumbnails.ensure_variant(str(tmp_path), sha256, 'thumb', 'jpg') is None
+    assert (tmp_path / f'thumbs/thumb/{sha256[:2]}/{sha256}.jpg.failed').exists()
+    sha_text, _ = store.put_stream(io.BytesIO(b'plain text'))
+    assert thumbnails.source_kind(store.path(sha_text)) is None
+
+
+def test_webp_only_for_browsers_that_accept_it():
+    assert thumbnails.preferred_format('text/html,image/avif,image/webp,*/*') == \
+        ('webp' if thumbnails.webp_supported() else 'jpg')
+    assert thumbnails.preferred_format('image/png,*/*') == 'jpg'
+    assert thumbnails.preferred_format(None) == 'jpg'
+
+
+def test_avatar_from_profile_picture(tmp_path):
+    picture = tmp_path / 'profile_alice.png'
+    picture.write_bytes(png_bytes((600, 900), 'RGB'))
+    sha256 = thumbnails.store_avatar(str(tmp_path / 'uploads'), str(picture))
+    with Image.open(tmp_path / 'uploads' / f'thumbs/avatar/{sha256[:2]}/{sha256}.jpg') as avatar:
+        assert avatar.size == (107, 160)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_gallery_pages_without_count_query():
+    rows = [{'source': 'apo', 'id': i} for i in range(4)]
+    cursor = FakeCursor(rows)
+    page = fetch_gallery(cursor, 'images', page=2, per_page=3)
+    sql, params = cursor.executed[0]
+    assert params == (4, 3)
+    assert "f.file_type LIKE 'image/%%'" in sql and 'COUNT' not in sql
+    assert len(page['items']) == 3 and page['has_next'] and page['has_prev']
+    with pytest.raises(ValueError):
+        fetch_gallery(cursor, 'videos')